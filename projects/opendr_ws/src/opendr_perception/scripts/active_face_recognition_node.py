@@ -176,18 +176,15 @@ class FaceRecognitionNode:
                                     for item in self.features_to_keep[result.description]:
                                         features_sum += item
                                     features_to_compare = features_sum / len(self.features_to_keep[result.description])
-                                    pos = 0
-                                    distance = 10
-                                    for cnt, item in enumerate(self.recognizer.database[result.description]):
-                                        diff = np.subtract(features_to_compare.cpu().numpy(), item.cpu().numpy())
-                                        dist = np.sum(np.square(diff), axis=1)
-                                        if dist < distance:
-                                            distance = dist
-                                            pos = cnt
-                                    if len(self.recognizer.database[result.description]) < 5:
-                                        self.recognizer.database[result.description].append(features_to_compare)
+                                    features_to_compare = features_to_compare.cpu().numpy()
+                                    references = self.recognizer.database[result.description]
+                                    if len(references) < 5:
+                                        self.recognizer.add_reference(result.description, features_to_compare)
                                     else:
-                                        self.recognizer.database[result.description][pos] = features_to_compare
+                                        # Replace the closest of the kept references
+                                        distances = np.sum(np.square(references - features_to_compare), axis=1)
+                                        references[np.argmin(distances)] = features_to_compare
+                                        self.recognizer.database[result.description] = references
                                     del self.features_to_keep[result.description]
                                     rospy.loginfo("Features Updated")
                         else:
@@ -201,7 +198,7 @@ class FaceRecognitionNode:
                                 os.makedirs(path)
                             cv2.imwrite(os.path.join(path, str(self.img_counter) + '.jpg'), frame)
                             features, closest_id, distance = self.recognizer.feature_extraction(frame)
-                            self.recognizer.database[self.new_person_name] = [features]
+                            self.recognizer.database[self.new_person_name] = features
                             self.add_new_person = False
                             self.color = (0, 0, 255)
 
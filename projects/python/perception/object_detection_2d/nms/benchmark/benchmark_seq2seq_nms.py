@@ -0,0 +1,91 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from opendr.engine.data import Image
+from opendr.perception.object_detection_2d import Seq2SeqNMSLearner, FSeq2NMSLearner
+from opendr.perception.object_detection_2d.nms.utils.nms_utils import pad_detections
+
+
+def synthetic_detections(images, boxes_per_image, width, height, seed=0):
+    """
+    Generates random detections of a single class for a number of images.
+
+    :return: the boxes [N, 4] and the scores [N, 1] of every image
+    """
+    generator = torch.Generator().manual_seed(seed)
+    detections = []
+    for _ in range(images):
+        count = int(torch.randint(boxes_per_image // 2, boxes_per_image + 1, (1,), generator=generator))
+        xy = torch.rand(count, 2, generator=generator) * torch.tensor([width * 0.8, height * 0.8])
+        wh = torch.rand(count, 2, generator=generator) * torch.tensor([width * 0.2, height * 0.2]) + 8
+        detections.append((torch.cat([xy, xy + wh], dim=1), torch.rand(count, 1, generator=generator)))
+    return detections
+
+
+def timeit(function, runs):
+    function()
+    start = time.perf_counter()
+    for _ in range(runs):
+        function()
+    return (time.perf_counter() - start) / runs
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--method", help="NMS method to benchmark", type=str, default="seq2seq",
+                        choices=["seq2seq", "fseq2"])
+    parser.add_argument("--device", help="Device to use (cpu, cuda)", type=str, default="cpu")
+    parser.add_argument("--batch-size", help="Number of images per batch", type=int, default=16)
+    parser.add_argument("--boxes", help="Maximum number of detections per image", type=int, default=200)
+    parser.add_argument("--max-pairs", help="Maximum number of pairs of boxes per model pass", type=int,
+                        default=8192)
+    parser.add_argument("--runs", help="Number of timed runs", type=int, default=10)
+    args = parser.parse_args()
+
+    width, height = 640, 480
+    img = Image(np.zeros((height, width, 3), dtype=np.uint8))
+    imgs = [img] * args.batch_size
+    detections = synthetic_detections(args.batch_size, args.boxes, width, height)
+    boxes, scores, num_boxes = pad_detections([b for b, _ in detections], [s for _, s in detections])
+
+    # The model is randomly initialized, as only the throughput is measured
+    if args.method == "seq2seq":
+        learner = Seq2SeqNMSLearner(device=args.device, app_feats='zeros', app_input_dim=315)
+        maps = [None] * args.batch_size
+    else:
+        learner = FSeq2NMSLearner(device=args.device)
+        maps = [torch.rand(height // 8, width // 8, 512) for _ in range(args.batch_size)]
+    learner.model.eval()
+
+    def per_image():
+        for (image_boxes, image_scores), image_map in zip(detections, maps):
+            kwargs = {} if image_map is None else {'map': image_map}
+            learner.run_nms(boxes=image_boxes, scores=image_scores, img=img, **kwargs)
+
+    def batched():
+        kwargs = {} if maps[0] is None else {'maps': maps}
+        learner.run_nms_batch(boxes=boxes, scores=scores, num_boxes=num_boxes, imgs=imgs, max_pairs=args.max_pairs,
+                              **kwargs)
+
+    per_image_time = timeit(per_image, args.runs)
+    batched_time = timeit(batched, args.runs)
+    print(f"{'per-image':>10}: {args.batch_size / per_image_time:8.1f} img/s | {per_image_time * 1000:8.2f} ms/batch")
+    print(f"{'batched':>10}: {args.batch_size / batched_time:8.1f} img/s | {batched_time * 1000:8.2f} ms/batch")
+    print(f"{'':>10}  speedup {per_image_time / batched_time:.2f}x")
@@ -30,6 +30,8 @@ if __name__ == '__main__':
     parser.add_argument("--height2", help="Base height of resizing in second inference", default=540)
     parser.add_argument("--method", help="Choose between primary or adaptive ROI selection methodology defaults to adaptive",
                         default="adaptive", choices=["primary", "adaptive"])
+    parser.add_argument("--batch", help="Benchmark infer_batch, which uses the primary ROI selection, with batch sizes "
+                                        "from 1 to 16", default=False, action="store_true")
     args = parser.parse_args()
 
     device, accelerate, base_height1, base_height2, method = args.device, args.accelerate, \
@@ -75,6 +77,17 @@ if __name__ == '__main__':
         fps_list.append(1.0 / (end_time - start_time))
     print("Average FPS: %.2f" % (np.mean(fps_list)))
 
+    if args.batch:
+        # Every image of the batch is a separate stream, e.g. a camera
+        for batch_size in [1, 2, 4, 8, 16]:
+            imgs = [img] * batch_size
+            pose_estimator.infer_batch(imgs)  # Warm up
+            start_time = time.perf_counter()
+            for i in range(20):
+                results = pose_estimator.infer_batch(imgs)
+            end_time = time.perf_counter()
+            print("Batch size %2d: %.2f images per second" % (batch_size, 20 * batch_size / (end_time - start_time)))
+
     # If pynvml is available, try to get memory stats for cuda
     try:
         if 'cuda' in device:
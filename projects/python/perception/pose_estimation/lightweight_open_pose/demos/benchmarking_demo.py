@@ -26,6 +26,8 @@ if __name__ == '__main__':
     parser.add_argument("--device", help="Device to use (cpu, cuda)", type=str, default="cuda")
     parser.add_argument("--accelerate", help="Enables acceleration flags (e.g., stride)", default=False,
                         action="store_true")
+    parser.add_argument("--batch", help="Benchmark infer_batch with batch sizes from 1 to 16", default=False,
+                        action="store_true")
     args = parser.parse_args()
 
     onnx, device, accelerate = args.onnx, args.device, args.accelerate
@@ -61,6 +63,17 @@ if __name__ == '__main__':
         fps_list.append(1.0 / (end_time - start_time))
     print("Average FPS: %.2f" % (np.mean(fps_list)))
 
+    if args.batch:
+        # Every image of the batch is a separate stream, e.g. a camera
+        for batch_size in [1, 2, 4, 8, 16]:
+            imgs = [img] * batch_size
+            pose_estimator.infer_batch(imgs)  # Warm up
+            start_time = time.perf_counter()
+            for i in range(20):
+                poses = pose_estimator.infer_batch(imgs)
+            end_time = time.perf_counter()
+            print("Batch size %2d: %.2f images per second" % (batch_size, 20 * batch_size / (end_time - start_time)))
+
     # If pynvml is available, try to get memory stats for cuda
     try:
         if 'cuda' in device:
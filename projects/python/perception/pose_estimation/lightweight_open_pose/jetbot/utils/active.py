@@ -18,8 +18,8 @@
 
 import torch
 import cv2
-from opendr.perception.pose_estimation.lightweight_open_pose.lightweight_open_pose_learner import Image, extract_keypoints,\
-    normalize, pad_width, group_keypoints, track_poses, FilteredPose, Pose, LightweightOpenPoseLearner
+from opendr.perception.pose_estimation.lightweight_open_pose.lightweight_open_pose_learner import Image, \
+    extract_all_keypoints, normalize, pad_width, group_keypoints, track_poses, FilteredPose, Pose, LightweightOpenPoseLearner
 import numpy as np
 
 
@@ -82,12 +82,8 @@ def infer_active(self, img, upsample_ratio=4, track=True, smooth=True):
         pafs = np.float32(pafs)
     pafs = cv2.resize(pafs, (0, 0), fx=upsample_ratio, fy=upsample_ratio, interpolation=cv2.INTER_CUBIC)
 
-    total_keypoints_num = 0
-    all_keypoints_by_type = []
     num_keypoints = 18
-    for kpt_idx in range(num_keypoints):  # 19th for bg
-        total_keypoints_num += extract_keypoints(heatmaps[:, :, kpt_idx], all_keypoints_by_type,
-                                                 total_keypoints_num)
+    all_keypoints_by_type = extract_all_keypoints(heatmaps[:, :, :num_keypoints])  # 19th for bg
 
     pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, pafs)
     for kpt_id in range(all_keypoints.shape[0]):
@@ -0,0 +1,124 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from opendr.engine.batching import BatchingLearner
+from opendr.engine.learners import Learner
+
+
+class SyntheticLearner(Learner):
+    """
+    Learner that emulates an accelerator: every forward pass costs a fixed launch overhead plus a small
+    per-sample cost, and only one forward pass can run at a time.
+    """
+
+    def __init__(self, overhead=0.01, item_cost=0.001):
+        super(SyntheticLearner, self).__init__(device="cpu")
+        self.overhead = overhead
+        self.item_cost = item_cost
+        self._device_lock = threading.Lock()
+
+    def __forward(self, count):
+        with self._device_lock:
+            time.sleep(self.overhead + count * self.item_cost)
+
+    def infer(self, batch):
+        self.__forward(1)
+        return batch
+
+    def infer_batch(self, samples):
+        self.__forward(len(samples))
+        return samples
+
+    def fit(self, dataset, val_dataset=None, logging_path='', silent=True, verbose=True):
+        pass
+
+    def eval(self, dataset):
+        pass
+
+    def save(self, path):
+        pass
+
+    def load(self, path):
+        pass
+
+    def optimize(self, target_device):
+        pass
+
+    def reset(self):
+        pass
+
+
+def generate_load(infer, producers, requests, interval):
+    """
+    Calls infer() from several producer threads and measures the latency of every request.
+
+    :param infer: function that performs inference on a single sample
+    :param producers: number of producer threads, e.g. cameras
+    :param requests: number of requests issued by every producer
+    :param interval: time between two consecutive requests of a producer, in seconds
+    :return: the request latencies (in seconds) and the total wall time
+    """
+    latencies = [[] for _ in range(producers)]
+
+    def produce(index):
+        sample = np.zeros((3, 8, 8), dtype=np.uint8)
+        for _ in range(requests):
+            start = time.perf_counter()
+            infer(sample)
+            latency = time.perf_counter() - start
+            latencies[index].append(latency)
+            if interval > latency:
+                time.sleep(interval - latency)
+
+    threads = [threading.Thread(target=produce, args=(i,)) for i in range(producers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.concatenate([np.asarray(values) for values in latencies]), time.perf_counter() - start
+
+
+def report(name, latencies, wall_time):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    print(f"{name:>10}: {len(latencies) / wall_time:8.1f} req/s | "
+          f"p50 {p50:7.2f} ms | p95 {p95:7.2f} ms | p99 {p99:7.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--producers", help="Number of concurrent producers", type=int, default=16)
+    parser.add_argument("--requests", help="Number of requests per producer", type=int, default=50)
+    parser.add_argument("--interval-ms", help="Time between requests of a producer", type=float, default=0.0)
+    parser.add_argument("--max-batch-size", help="Maximum batch size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", help="Maximum time a request waits for a batch", type=float, default=2.0)
+    parser.add_argument("--overhead-ms", help="Fixed cost of a forward pass", type=float, default=10.0)
+    parser.add_argument("--item-ms", help="Per-sample cost of a forward pass", type=float, default=1.0)
+    args = parser.parse_args()
+
+    learner = SyntheticLearner(overhead=args.overhead_ms / 1000, item_cost=args.item_ms / 1000)
+
+    latencies, wall_time = generate_load(learner.infer, args.producers, args.requests, args.interval_ms / 1000)
+    report("unbatched", latencies, wall_time)
+
+    with BatchingLearner(learner, max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000) as server:
+        latencies, wall_time = generate_load(server.infer, args.producers, args.requests, args.interval_ms / 1000)
+        report("batched", latencies, wall_time)
+        print(f"{'':>10}  average batch size {server.infers_count / max(1, server.batches_count):.2f}")
@@ -0,0 +1,245 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from opendr.engine.learners import Learner
+
+
+class BatchingLearner(Learner):
+    """
+    The BatchingLearner class wraps any Learner and serves its per-sample infer() to many concurrent callers.
+
+    Requests submitted from any number of threads (or asyncio tasks) are queued and grouped into batches by a
+    single worker thread. A batch is dispatched as soon as it holds *max_batch_size* requests, or when the oldest
+    request in it has waited for *max_wait* seconds. Each caller receives its own result through a future.
+
+    A learner declares a batched path by implementing *infer_batch(samples)*, which receives a list of samples
+    and returns a list of results of the same length. A custom callable with the same contract can also be
+    supplied through *batch_infer*. If neither is available, the samples of each batch are passed one by one to
+    the learner's infer(), which still serializes access to the model across threads.
+
+    All other Learner methods (fit(), eval(), save(), load(), optimize(), reset()) are delegated to the wrapped
+    learner.
+    """
+
+    def __init__(self, learner, max_batch_size=8, max_wait=0.005, batch_infer=None, max_queue_size=0):
+        """
+        :param learner: the learner to serve
+        :type learner: engine.learners.Learner
+        :param max_batch_size: maximum number of requests that are grouped in a single batch
+        :type max_batch_size: int
+        :param max_wait: maximum time (in seconds) a request waits for other requests to join its batch
+        :type max_wait: float
+        :param batch_infer: callable that performs inference on a list of samples, defaults to learner.infer_batch
+        :type batch_infer: callable, optional
+        :param max_queue_size: maximum number of pending requests, submit() blocks when it is reached, 0 for no limit
+        :type max_queue_size: int
+        """
+        super(BatchingLearner, self).__init__(batch_size=max_batch_size, device=str(getattr(learner, "device", "cpu")))
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size should be a positive integer")
+        if max_wait < 0:
+            raise ValueError("max_wait should be non-negative")
+
+        self.learner = learner
+        self.max_wait = max_wait
+        if batch_infer is None:
+            batch_infer = getattr(learner, "infer_batch", None)
+        self.batch_infer = batch_infer
+
+        self.batches_count = 0
+        self.infers_count = 0
+
+        self.max_queue_size = max_queue_size
+        self._queue = None
+        self._lock = threading.Lock()
+        self._worker = None
+        self._running = False
+
+    @property
+    def max_batch_size(self):
+        return self.batch_size
+
+    def start(self):
+        """
+        Starts the batching worker thread. It is started automatically on the first request.
+        """
+        with self._lock:
+            self.__start()
+
+    def __start(self):
+        # Must be called with the lock held. Every worker gets its own queue, so that a worker that is started
+        # while a stopped one still serves its last requests never receives the stop request of the latter.
+        if self._running:
+            return
+        self._running = True
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._worker = threading.Thread(target=self.__serve, args=(self._queue,), name="opendr-batching",
+                                        daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        """
+        Stops the batching worker thread after the pending requests are served.
+        """
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            worker = self._worker
+            self._worker = None
+            self._queue.put(None)
+        worker.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def submit(self, sample):
+        """
+        Queues a sample for inference.
+
+        :param sample: a single sample, as accepted by the wrapped learner's infer()
+        :type sample: Data class type
+        :return: a future that will hold the result of the inference
+        :rtype: concurrent.futures.Future
+        """
+        future = Future()
+        with self._lock:
+            if not self._running:
+                self.__start()
+            # The request is queued with the lock held, so that it cannot end up behind a stop request
+            self._queue.put((sample, future))
+        return future
+
+    def infer(self, batch):
+        """
+        Performs inference on a single sample, blocking until the batch it was grouped in has been processed.
+
+        :param batch: a single sample, as accepted by the wrapped learner's infer()
+        :type batch: Data class type
+        :return: the result returned by the wrapped learner for this sample
+        :rtype: Target class type
+        """
+        return self.submit(batch).result()
+
+    async def infer_async(self, sample):
+        """
+        Coroutine version of infer() to be used from an asyncio event loop.
+
+        :param sample: a single sample, as accepted by the wrapped learner's infer()
+        :type sample: Data class type
+        :return: the result returned by the wrapped learner for this sample
+        :rtype: Target class type
+        """
+        return await asyncio.wrap_future(self.submit(sample))
+
+    def __next_batch(self, requests):
+        request = requests.get()
+        if request is None:
+            return None
+        batch = [request]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = requests.get(timeout=timeout) if timeout > 0 else requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Serve what has been collected and let the main loop see the stop request
+                requests.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def __serve(self, requests):
+        while True:
+            batch = self.__next_batch(requests)
+            if batch is None:
+                return
+            batch = [(sample, future) for sample, future in batch if future.set_running_or_notify_cancel()]
+            if len(batch) == 0:
+                continue
+            samples = [sample for sample, _ in batch]
+            try:
+                if self.batch_infer is not None:
+                    results = list(self.batch_infer(samples))
+                    if len(results) != len(samples):
+                        raise ValueError("Batched inference returned " + str(len(results)) + " results for " +
+                                         str(len(samples)) + " samples.")
+                else:
+                    results = [self.learner.infer(sample) for sample in samples]
+            except BaseException as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                if not isinstance(e, Exception):
+                    # e.g. SystemExit, the worker stops and the requests that are still queued are failed as well
+                    self.__abort(requests, e)
+                    return
+            else:
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            self.batches_count += 1
+            self.infers_count += len(batch)
+
+    def __abort(self, requests, error):
+        # Detaches the queue of a worker that cannot continue, so that the next request starts a new worker. A
+        # submit() may hold the lock while it waits for space in a full queue, so the queue is drained meanwhile.
+        while not self._lock.acquire(timeout=0.01):
+            self.__fail_pending(requests, error)
+        try:
+            if self._queue is requests:
+                self._running = False
+                self._worker = None
+        finally:
+            self._lock.release()
+        self.__fail_pending(requests, error)
+
+    @staticmethod
+    def __fail_pending(requests, error):
+        while True:
+            try:
+                request = requests.get_nowait()
+            except queue.Empty:
+                return
+            if request is not None and request[1].set_running_or_notify_cancel():
+                request[1].set_exception(error)
+
+    def fit(self, dataset, val_dataset=None, logging_path='', silent=True, verbose=True):
+        return self.learner.fit(dataset, val_dataset=val_dataset, logging_path=logging_path, silent=silent,
+                                verbose=verbose)
+
+    def eval(self, dataset):
+        return self.learner.eval(dataset)
+
+    def save(self, path):
+        return self.learner.save(path)
+
+    def load(self, path):
+        return self.learner.load(path)
+
+    def optimize(self, target_device):
+        return self.learner.optimize(target_device)
+
+    def reset(self):
+        return self.learner.reset()
@@ -214,9 +214,16 @@ class Image(Data):
     - returning a NumPy compatible representation of data (numpy())
     - loading an input directly into OpenDR compliant format (open())
     - getting an image into OpenCV-compliant format (opencv()) for visualization purposes
+
+    Internally, the image is kept in the layout it was supplied in (e.g. HWC/BGR for OpenCV frames) and the
+    CHW/RGB representation, as well as any other requested layout, is computed lazily and cached, so that an
+    image can be passed to a model that consumes the original layout without any conversions.
     """
 
-    def __init__(self, data=None, dtype=np.uint8, guess_format=True):
+    _formats = ('channels_first', 'channels_last')
+    _channel_orders = ('rgb', 'bgr')
+
+    def __init__(self, data=None, dtype=np.uint8, guess_format=True, copy=True):
         """
         Image constructor
         :param data: Data to be held by the image object
@@ -225,10 +232,14 @@ class Image(Data):
         :type data: numpy.dtype
         :param guess_format: try to automatically guess the type of input data and convert it to OpenDR format
         :type guess_format: bool
+        :param copy: if set to False, the supplied array is shared with the object when it already has the
+        requested dtype, so it must not be modified afterwards
+        :type copy: bool
         """
         super().__init__(data)
 
         self.dtype = dtype
+        self._layouts = {}
         if data is not None:
             # Check if the image is in the correct format
             try:
@@ -241,26 +252,104 @@ class Image(Data):
             if guess_format:
                 # If channels are found last and image is a color one, assume OpenCV format
                 if data.shape[2] == 3:
-                    data = cv2.cvtColor(data, cv2.COLOR_BGR2RGB)
-                    data = np.transpose(data, (2, 0, 1))
+                    self._set_layout(data, 'channels_last', 'bgr', copy=copy)
+                    return
                 # If channels are found last and image is not a color one, just perform transpose
                 elif data.shape[2] < min(data.shape[0], data.shape[1]):
-                    data = np.transpose(data, (2, 0, 1))
-            self.data = data
+                    self._set_layout(data, 'channels_last', 'rgb', copy=copy)
+                    return
+            self._set_layout(data, 'channels_first', 'rgb', copy=copy)
         else:
             raise ValueError("Image is of type None")
 
+    def _set_layout(self, data, format, channel_order, copy=False, dtype=None):
+        """
+        Stores data that is in the given layout, discarding any previously cached conversions.
+        :param data: image data
+        :type data: numpy.ndarray
+        :param format: either 'channels_first' or 'channels_last'
+        :type format: str
+        :param channel_order: either 'rgb' or 'bgr'
+        :type channel_order: str
+        :param copy: if set to True, the stored array never shares memory with the supplied one
+        :type copy: bool
+        :param dtype: type in which the data are stored, defaults to the dtype of the image
+        :type dtype: numpy.dtype
+        """
+        source = data
+        data = np.asarray(data, dtype=self.dtype if dtype is None else dtype)
+        if copy and isinstance(source, np.ndarray) and np.may_share_memory(data, source):
+            data = data.copy()
+        if len(data.shape) != 3:
+            raise ValueError(
+                "Only 3-D arrays are supported by Image. Please supply a data object that can be casted "
+                "into a 3-D NumPy array.")
+        self._layouts = {(format, channel_order): data}
+        self._source_layout = (format, channel_order)
+        self._data = data if (format, channel_order) == ('channels_first', 'rgb') else None
+
+    def _get_layout(self, format, channel_order):
+        """
+        Returns the image in the requested layout, converting it from a stored layout and caching the result if needed.
+        The returned array is shared with the object and must not be modified.
+        """
+        if format not in self._formats:
+            raise ValueError("format not in ('channels_first', 'channels_last')")
+        if channel_order not in self._channel_orders:
+            raise ValueError("channel_order not in ('rgb', 'bgr')")
+        if not self._layouts:
+            raise ValueError("Image is empty")
+
+        key = (format, channel_order)
+        data = self._layouts.get(key)
+        if data is not None:
+            return data
+
+        # Prefer a source that only differs in memory layout, since transposing is free
+        for (source_format, source_order), source in self._layouts.items():
+            if source_order == channel_order:
+                break
+        if source_format == 'channels_first':
+            source = np.transpose(source, (1, 2, 0))
+        if source_order != channel_order and source.shape[2] == 3:
+            source = cv2.cvtColor(source, cv2.COLOR_BGR2RGB if source_order == 'bgr' else cv2.COLOR_RGB2BGR)
+        data = source if format == 'channels_last' else np.transpose(source, (2, 0, 1))
+
+        self._layouts[key] = data
+        if key == ('channels_first', 'rgb'):
+            self._data = data
+        return data
+
+    @property
+    def format(self):
+        """
+        Returns the layout ('channels_first' or 'channels_last') in which the image was originally supplied.
+        :rtype: str
+        """
+        return self._source_layout[0]
+
+    @property
+    def channel_order(self):
+        """
+        Returns the channel order ('rgb' or 'bgr') in which the image was originally supplied.
+        :rtype: str
+        """
+        return self._source_layout[1]
+
     @property
     def data(self):
         """
         Getter of data. Image class returns a *dtype* NumPy array.
+        Since the returned array may be modified in place, any other cached layout is discarded.
         :return: the actual data held by the object
         :rtype: A *dtype* NumPy array
         """
-        if self._data is None:
+        if not self._layouts:
             raise ValueError("Image is empty")
-
-        return self._data
+        data = self._get_layout('channels_first', 'rgb')
+        if len(self._layouts) > 1:
+            self._layouts = {('channels_first', 'rgb'): data}
+        return data
 
     @data.setter
     def data(self, data):
@@ -268,25 +357,18 @@ class Image(Data):
         Setter for data.
         :param: data to be used for creating a vector
         """
-        # Convert input data to a NumPy array
-        data = np.asarray(data, dtype=self.dtype)
-
-        # Check if the supplied vector is 3D, e.g. (width, height, channels)
-        if len(data.shape) != 3:
-            raise ValueError(
-                "Only 3-D arrays are supported by Image. Please supply a data object that can be casted "
-                "into a 3-D NumPy array.")
-
-        self._data = data
+        self._set_layout(data, 'channels_first', 'rgb')
 
-    def numpy(self):
+    def numpy(self, copy=True):
         """
         Returns a NumPy-compatible representation of data.
+        :param copy: if set to False, the internal array is returned without copying it, so it must not be modified
+        :type copy: bool
         :return: a NumPy-compatible representation of data
         :rtype: numpy.ndarray
         """
         # Since this class stores the data as NumPy arrays, we can directly return the data
-        return self.data.copy()
+        return self.convert(copy=copy)
 
     def __str__(self):
         """
@@ -294,7 +376,7 @@ class Image(Data):
         :return: a human-friendly string-based representation of the data
         :rtype: str
         """
-        return str(self.data)
+        return str(self.numpy(copy=False))
 
     @classmethod
     def open(cls, filename):
@@ -310,47 +392,37 @@ class Image(Data):
         if not Path(filename).exists():
             raise FileNotFoundError('The image file does not exist.')
         data = cv2.imread(filename)
-        # Change channel order and convert from HWC to CHW
-        data = cv2.cvtColor(data, cv2.COLOR_BGR2RGB)
-        data = np.transpose(data, (2, 0, 1))
-        return cls(data)
+        # OpenCV reads images as HWC/BGR, conversion to CHW/RGB is performed lazily
+        return cls(data, copy=False)
 
-    def opencv(self):
+    def opencv(self, copy=True):
         """
         Returns the stored image into a format that can be directly used by OpenCV.
         This function is useful due to the discrepancy between the way images are stored:
         HWC/BGR (OpenCV) and CWH/RGB (OpenDR/PyTorch)
+        :param copy: if set to False, the returned array may be shared with the object (and with the array the image
+        was created from), so it must not be modified
+        :type copy: bool
         :return: an image into OpenCV compliant-format
         :rtype: NumPy array
         """
-        data = np.transpose(self.data, (1, 2, 0))
-        data = cv2.cvtColor(data, cv2.COLOR_RGB2BGR)
-        return data
+        return self.convert('channels_last', 'bgr', copy=copy)
 
-    def convert(self, format='channels_first', channel_order='rgb'):
+    def convert(self, format='channels_first', channel_order='rgb', copy=True):
         """
         Returns the data in channels first/last format using either 'rgb' or 'bgr' ordering.
         :param format: either 'channels_first' or 'channels_last'
         :type format: str
         :param channel_order: either 'rgb' or 'bgr'
         :type channel_order: str
+        :param copy: if set to False, the returned array may be shared with the object (and with the array the image
+        was created from), so it must not be modified
+        :type copy: bool
         :return an image (as NumPy array) with the appropriate format
         :rtype NumPy array
         """
-        if format == 'channels_last':
-            data = np.transpose(self.data, (1, 2, 0))
-        elif format == 'channels_first':
-            data = self.data.copy()
-        else:
-            raise ValueError("format not in ('channels_first', 'channels_last')")
-
-        if channel_order == 'bgr':
-            # This causes a second copy operation. Can be potentially further optimized in the future.
-            data = cv2.cvtColor(data, cv2.COLOR_RGB2BGR)
-        elif channel_order not in ('rgb', 'bgr'):
-            raise ValueError("channel_order not in ('rgb', 'bgr')")
-
-        return data
+        data = self._get_layout(format, channel_order)
+        return data.copy() if copy else data
 
 
 class ImageWithDetections(Image):
@@ -366,37 +438,11 @@ class ImageWithDetections(Image):
 
         self.boundingBoxList = boundingBoxList
 
-    @property
-    def data(self):
-        """
-        Getter of data. Image class returns a float32 NumPy array.
-
-        :return: the actual data held by the object
-        :rtype: A float32 NumPy array
-        """
-        if self._data is None:
-            raise ValueError("Image is empty")
-
-        return self._data
-
-    @data.setter
-    def data(self, data):
+    def _set_layout(self, data, format, channel_order, copy=False, dtype=None):
         """
-        Setter for data.
-
-        :param: data to be used for creating a vector
+        Stores data that is in the given layout. Images with detections are always stored as uint8.
         """
-        # Convert input data to a NumPy array
-        # Note that will also fail for non-numeric data (which is expected)
-        data = np.asarray(data, dtype=np.uint8)
-
-        # Check if the supplied vector is 3D, e.g. (width, height, channels)
-        if len(data.shape) != 3:
-            raise ValueError(
-                "Only 3-D arrays are supported by Image. Please supply a data object that can be casted "
-                "into a 3-D NumPy array.")
-
-        self._data = data
+        super()._set_layout(data, format, channel_order, copy=copy, dtype=np.uint8)
 
     def numpy(self):
         """
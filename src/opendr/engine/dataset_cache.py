@@ -0,0 +1,403 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import pickle
+import zlib
+import numpy as np
+from opendr.engine.data import Image, PointCloud, SkeletonSequence, Timeseries, Vector, Video
+from opendr.engine.datasets import DatasetIterator
+from opendr.engine.target import BoundingBox, BoundingBoxList, ColumnarBoundingBoxList, Category
+
+# Data classes that are fully described by their array and are therefore stored in the memory-mapped shards.
+# Any other sample data (or subclass of these, e.g., PointCloudWithCalibration) is pickled.
+_ARRAY_CLASSES = (None, Image, PointCloud, Timeseries, SkeletonSequence, Vector, Video)
+_PICKLED = len(_ARRAY_CLASSES)
+_IMAGE_LAYOUTS = (('channels_first', 'rgb'), ('channels_first', 'bgr'), ('channels_last', 'rgb'),
+                  ('channels_last', 'bgr'))
+_MAX_DIMS = 8
+_ALIGNMENT = 64
+
+# Target kinds of the columnar side file
+_TARGET_NONE, _TARGET_BOXES, _TARGET_CATEGORY, _TARGET_PICKLED = range(4)
+
+_FORMAT_VERSION = 1
+_MANIFEST = "manifest.json"
+_INDEX = "index.npz"
+_TARGETS = "targets.npz"
+
+
+def _checksum(path, chunk_size=1 << 24):
+    checksum = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return checksum
+            checksum = zlib.crc32(chunk, checksum)
+
+
+class DatasetCacheWriter:
+    """
+    DatasetCacheWriter materializes (Data, Target) samples into a cache directory that is read by
+    CachedDatasetIterator.
+
+    Sample data is written in shards holding a fixed number of samples. NumPy arrays, as well as the arrays of
+    Image, PointCloud, Timeseries, SkeletonSequence, Vector and Video objects, are stored raw so that they can be
+    memory-mapped, while other data is pickled. Targets are stored in a columnar side file: the boxes of all
+    BoundingBoxList targets are concatenated in a few arrays, Category targets in one array, and other targets
+    are pickled. The manifest, which holds the checksums of all files, is written last, so that an interrupted
+    cache is never read.
+    """
+    def __init__(self, path, shard_size=1024):
+        """
+        :param path: directory of the cache, created if it does not exist
+        :type path: str
+        :param shard_size: number of samples per shard
+        :type shard_size: int
+        """
+        if shard_size < 1:
+            raise ValueError("shard_size should be a positive integer")
+        self.path = path
+        self.shard_size = shard_size
+        os.makedirs(path, exist_ok=True)
+        # The manifest is removed first, so that the cache is never considered complete while it is rewritten
+        for name in [_MANIFEST] + sorted(os.listdir(path)):
+            if name == _MANIFEST and os.path.exists(os.path.join(path, name)) or \
+                    name.startswith("shard-") and name.endswith(".bin"):
+                os.remove(os.path.join(path, name))
+
+        self._count = 0
+        self._shards = []
+        self._shard_file = None
+        self._shard_offset = 0
+        self._dtypes = []
+
+        self._data_kind, self._layout, self._dtype, self._ndim = [], [], [], []
+        self._shape, self._shard, self._offset, self._nbytes = [], [], [], []
+
+        self._target_kind, self._image_id, self._category = [], [], []
+        self._box_counts, self._boxes, self._scores, self._classes, self._ids = [], [], [], [], []
+        self._blobs, self._blob_sizes = [], []
+
+    def __shard_path(self, shard):
+        return os.path.join(self.path, "shard-{:05d}.bin".format(shard))
+
+    def __write_bytes(self, buffer):
+        if self._count % self.shard_size == 0:
+            self.__close_shard()
+            self._shard_file = open(self.__shard_path(len(self._shards)), "wb")
+            self._shard_offset = 0
+            self._shards.append({"file": os.path.basename(self.__shard_path(len(self._shards)))})
+        padding = -self._shard_offset % _ALIGNMENT
+        self._shard_file.write(b"\0" * padding)
+        offset = self._shard_offset + padding
+        self._shard_file.write(buffer)
+        self._shard_offset = offset + len(buffer)
+        return offset
+
+    def __close_shard(self):
+        if self._shard_file is not None:
+            self._shard_file.close()
+            self._shard_file = None
+            shard = self._shards[-1]
+            shard["size"] = self._shard_offset
+            shard["checksum"] = _checksum(os.path.join(self.path, shard["file"]))
+
+    def __dtype_code(self, dtype):
+        name = dtype.str
+        if name not in self._dtypes:
+            self._dtypes.append(name)
+        return self._dtypes.index(name)
+
+    def __append_data(self, data):
+        layout = 0
+        if data is None or type(data) not in _ARRAY_CLASSES or \
+                isinstance(data, np.ndarray) and data.dtype.hasobject:
+            kind = _PICKLED
+            array = np.frombuffer(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8)
+        elif isinstance(data, np.ndarray):
+            kind, array = 0, data
+        else:
+            kind = _ARRAY_CLASSES.index(type(data))
+            if isinstance(data, Image):
+                layout = _IMAGE_LAYOUTS.index((data.format, data.channel_order))
+                array = data.convert(data.format, data.channel_order, copy=False)
+            else:
+                array = data.data
+        array = np.ascontiguousarray(array)
+        if array.ndim > _MAX_DIMS:
+            raise ValueError("Arrays with more than " + str(_MAX_DIMS) + " dimensions cannot be cached.")
+
+        self._offset.append(self.__write_bytes(array.data.cast("B") if array.nbytes else b""))
+        self._shard.append(len(self._shards) - 1)
+        self._nbytes.append(array.nbytes)
+        self._data_kind.append(kind)
+        self._layout.append(layout)
+        self._dtype.append(self.__dtype_code(array.dtype))
+        self._ndim.append(array.ndim)
+        self._shape.append(list(array.shape) + [0] * (_MAX_DIMS - array.ndim))
+
+    def __append_target(self, target):
+        category = image_id = -1
+        count = 0
+        if target is None:
+            kind = _TARGET_NONE
+        elif isinstance(target, ColumnarBoundingBoxList) and target.classes.dtype.kind in "biu":
+            kind, count, image_id = _TARGET_BOXES, len(target), target.image_id
+            self._boxes.append(target.bboxes)
+            self._scores.append(target.scores)
+            self._classes.append(target.classes.astype(np.int64))
+            self._ids.append(target.ids)
+        elif type(target) is BoundingBoxList and all(type(box) is BoundingBox for box in target.data) and \
+                all(isinstance(box.name, (int, np.integer)) for box in target.data):
+            kind, count, image_id = _TARGET_BOXES, len(target), target.image_id
+            columnar = ColumnarBoundingBoxList.from_bounding_box_list(target)
+            self._boxes.append(columnar.bboxes)
+            self._scores.append(columnar.scores)
+            self._classes.append(columnar.classes.astype(np.int64))
+            self._ids.append(columnar.ids)
+        elif type(target) is Category and target.description is None and target.confidence is None:
+            kind, category = _TARGET_CATEGORY, int(target.data)
+        else:
+            kind = _TARGET_PICKLED
+            blob = pickle.dumps(target, protocol=pickle.HIGHEST_PROTOCOL)
+            self._blobs.append(blob)
+            self._blob_sizes.append(len(blob))
+        if kind != _TARGET_PICKLED:
+            self._blob_sizes.append(0)
+        self._target_kind.append(kind)
+        self._box_counts.append(count)
+        self._image_id.append(image_id if isinstance(image_id, (int, np.integer)) else -1)
+        self._category.append(category)
+
+    def append(self, sample):
+        """
+        Appends a sample to the cache.
+
+        :param sample: the sample and its annotation
+        :type sample: Tuple of (Data, Target)
+        """
+        if not isinstance(sample, (tuple, list)) or len(sample) != 2:
+            raise ValueError("Only (data, target) samples can be cached.")
+        data, target = sample
+        self.__append_data(data)
+        self.__append_target(target)
+        self._count += 1
+
+    def close(self):
+        """
+        Writes the index, the targets and the manifest of the cache.
+        """
+        self.__close_shard()
+        np.savez(os.path.join(self.path, _INDEX),
+                 data_kind=np.asarray(self._data_kind, dtype=np.int8),
+                 layout=np.asarray(self._layout, dtype=np.int8),
+                 dtype=np.asarray(self._dtype, dtype=np.int16),
+                 ndim=np.asarray(self._ndim, dtype=np.int8),
+                 shape=np.asarray(self._shape, dtype=np.int64).reshape(-1, _MAX_DIMS),
+                 shard=np.asarray(self._shard, dtype=np.int32),
+                 offset=np.asarray(self._offset, dtype=np.int64),
+                 nbytes=np.asarray(self._nbytes, dtype=np.int64))
+        np.savez(os.path.join(self.path, _TARGETS),
+                 kind=np.asarray(self._target_kind, dtype=np.int8),
+                 image_id=np.asarray(self._image_id, dtype=np.int64),
+                 category=np.asarray(self._category, dtype=np.int64),
+                 box_offsets=np.concatenate([[0], np.cumsum(self._box_counts, dtype=np.int64)]),
+                 boxes=np.concatenate(self._boxes).astype(np.float32) if self._boxes else np.empty((0, 4), np.float32),
+                 scores=np.concatenate(self._scores).astype(np.float32) if self._scores else np.empty(0, np.float32),
+                 classes=np.concatenate(self._classes) if self._classes else np.empty(0, np.int64),
+                 ids=np.concatenate(self._ids).astype(np.int64) if self._ids else np.empty(0, np.int64),
+                 blob_offsets=np.concatenate([[0], np.cumsum(self._blob_sizes, dtype=np.int64)]),
+                 blobs=np.frombuffer(b"".join(self._blobs), dtype=np.uint8))
+        manifest = {
+            "version": _FORMAT_VERSION,
+            "num_samples": self._count,
+            "shard_size": self.shard_size,
+            "dtypes": self._dtypes,
+            "shards": self._shards,
+            "index": {"file": _INDEX, "checksum": _checksum(os.path.join(self.path, _INDEX))},
+            "targets": {"file": _TARGETS, "checksum": _checksum(os.path.join(self.path, _TARGETS))},
+        }
+        with open(os.path.join(self.path, _MANIFEST + ".tmp"), "w") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(os.path.join(self.path, _MANIFEST + ".tmp"), os.path.join(self.path, _MANIFEST))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._shard_file is not None:
+            self._shard_file.close()
+            self._shard_file = None
+
+
+class CachedDatasetIterator(DatasetIterator):
+    """
+    CachedDatasetIterator reads a cache written by DatasetCacheWriter (or cache_dataset()) and can be used in place
+    of the original DatasetIterator.
+
+    The shards are memory-mapped, so that a sample is read from the page cache instead of being decoded again.
+    BoundingBoxList targets are returned as ColumnarBoundingBoxList objects. The checksum of every shard is
+    verified the first time the shard is accessed, unless verify is False.
+    """
+    def __init__(self, path, verify=True, copy=True):
+        """
+        :param path: directory of the cache
+        :type path: str
+        :param verify: whether the checksums of the files are verified before they are used
+        :type verify: bool
+        :param copy: whether the arrays of the samples are copied out of the memory-mapped shards, if False the
+            returned arrays are read-only
+        :type copy: bool
+        """
+        super().__init__()
+        self.path = path
+        self.verify = verify
+        self.copy = copy
+        manifest_path = os.path.join(path, _MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise ValueError("No complete dataset cache found in " + path + ".")
+        with open(manifest_path) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != _FORMAT_VERSION:
+            raise ValueError("Unsupported dataset cache version " + str(self.manifest.get("version")) + ".")
+
+        self._index = self.__load_columns(self.manifest["index"])
+        self._targets = self.__load_columns(self.manifest["targets"])
+        self._dtypes = [np.dtype(name) for name in self.manifest["dtypes"]]
+        if len(self._index["offset"]) != len(self) or len(self._targets["kind"]) != len(self):
+            raise ValueError("Dataset cache " + path + " is corrupted: its index does not match the manifest.")
+        self._maps = {}
+
+    def __load_columns(self, entry):
+        file_path = os.path.join(self.path, entry["file"])
+        if self.verify and _checksum(file_path) != entry["checksum"]:
+            raise ValueError("Dataset cache file " + file_path + " is corrupted (checksum mismatch).")
+        with np.load(file_path, allow_pickle=False) as columns:
+            return {name: columns[name] for name in columns.files}
+
+    def __shard(self, shard):
+        data = self._maps.get(shard)
+        if data is None:
+            entry = self.manifest["shards"][shard]
+            file_path = os.path.join(self.path, entry["file"])
+            if os.path.getsize(file_path) != entry["size"]:
+                raise ValueError("Dataset cache file " + file_path + " is corrupted (size mismatch).")
+            if self.verify and _checksum(file_path) != entry["checksum"]:
+                raise ValueError("Dataset cache file " + file_path + " is corrupted (checksum mismatch).")
+            data = np.memmap(file_path, dtype=np.uint8, mode="r") if entry["size"] else np.empty(0, np.uint8)
+            self._maps[shard] = data
+        return data
+
+    def __data(self, idx):
+        index = self._index
+        offset, nbytes = index["offset"][idx], index["nbytes"][idx]
+        buffer = self.__shard(index["shard"][idx])[offset:offset + nbytes]
+        kind = index["data_kind"][idx]
+        if kind == _PICKLED:
+            return pickle.loads(buffer.tobytes())
+
+        shape = tuple(index["shape"][idx][:index["ndim"][idx]])
+        array = np.frombuffer(buffer, dtype=self._dtypes[index["dtype"][idx]]).reshape(shape)
+        if self.copy:
+            array = array.copy()
+        data_class = _ARRAY_CLASSES[kind]
+        if data_class is None:
+            return array
+        if data_class is Image:
+            # The array is already a copy or a view, as self.copy asks
+            image = Image(array, dtype=array.dtype, guess_format=False, copy=False)
+            layout = _IMAGE_LAYOUTS[index["layout"][idx]]
+            if layout != ('channels_first', 'rgb'):
+                image._set_layout(array, *layout)
+            return image
+        return data_class(array)
+
+    def __target(self, idx):
+        targets = self._targets
+        kind = targets["kind"][idx]
+        if kind == _TARGET_NONE:
+            return None
+        if kind == _TARGET_CATEGORY:
+            return Category(int(targets["category"][idx]))
+        if kind == _TARGET_PICKLED:
+            start, end = targets["blob_offsets"][idx], targets["blob_offsets"][idx + 1]
+            return pickle.loads(targets["blobs"][start:end].tobytes())
+        start, end = targets["box_offsets"][idx], targets["box_offsets"][idx + 1]
+        return ColumnarBoundingBoxList(targets["boxes"][start:end], scores=targets["scores"][start:end],
+                                       classes=targets["classes"][start:end], ids=targets["ids"][start:end],
+                                       image_id=int(targets["image_id"][idx]))
+
+    def __getitem__(self, idx):
+        """
+        This method is used for loading the idx-th sample of a dataset along with its annotation.
+
+        :param idx: the index of the sample to load
+        :return: the idx-th sample and its annotation
+        :rtype: Tuple of (Data, Target)
+        """
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("index " + str(idx) + " is out of range")
+        return self.__data(idx), self.__target(idx)
+
+    def __len__(self):
+        """
+        This method returns the size of the dataset.
+
+        :return: the size of the dataset
+        :rtype: int
+        """
+        return self.manifest["num_samples"]
+
+    def __getstate__(self):
+        # Memory maps are opened again (and verified) by the receiving process
+        state = self.__dict__.copy()
+        state["_maps"] = {}
+        return state
+
+
+def cache_dataset(dataset, path, shard_size=1024, overwrite=False, verify=True, copy=True):
+    """
+    Materializes a DatasetIterator into a cache, unless a complete cache of the same size already exists in path,
+    and returns a CachedDatasetIterator over it.
+
+    :param dataset: the dataset to cache
+    :type dataset: engine.datasets.DatasetIterator
+    :param path: directory of the cache
+    :type path: str
+    :param shard_size: number of samples per shard
+    :type shard_size: int
+    :param overwrite: whether an existing cache is written again
+    :type overwrite: bool
+    :param verify: passed to CachedDatasetIterator
+    :type verify: bool
+    :param copy: passed to CachedDatasetIterator
+    :type copy: bool
+    :return: the cached dataset
+    :rtype: engine.dataset_cache.CachedDatasetIterator
+    """
+    if not overwrite and os.path.exists(os.path.join(path, _MANIFEST)):
+        cached = CachedDatasetIterator(path, verify=verify, copy=copy)
+        if len(cached) == len(dataset):
+            return cached
+    with DatasetCacheWriter(path, shard_size=shard_size) as writer:
+        for idx in range(len(dataset)):
+            writer.append(dataset[idx])
+    return CachedDatasetIterator(path, verify=verify, copy=copy)
@@ -13,7 +13,13 @@
 # limitations under the License.
 
 from abc import ABC, abstractmethod
+from collections import deque
+import concurrent.futures
+import multiprocessing
 import os
+import pickle
+import random
+import sys
 import numpy as np
 from opendr.engine.data import PointCloud
 
@@ -98,6 +104,281 @@ class MappedDatasetIterator(DatasetIterator):
         return len(self.original)
 
 
+def _seed_sample(seed):
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+    # Torch is only seeded if it is already in use, seeding never imports it
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.manual_seed(seed)
+
+
+def _release_shared(descriptors):
+    from multiprocessing import shared_memory
+    for name, _ in descriptors or ():
+        if name is None:
+            # Empty buffers are sent inline
+            continue
+        try:
+            block = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            continue
+        block.close()
+        block.unlink()
+
+
+def _load_shared(payload, descriptors):
+    from multiprocessing import shared_memory
+    buffers = []
+    for name, size in descriptors:
+        if name is None:
+            buffers.append(size)
+            continue
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            # Single copy out of the block, which can then be unlinked, the view has to be released before closing it
+            view = np.ndarray((size,), dtype=np.uint8, buffer=block.buf)
+            buffers.append(view.copy())
+            del view
+        finally:
+            block.close()
+            block.unlink()
+    return pickle.loads(payload, buffers=buffers)
+
+
+# State of a worker process of ParallelMappedDatasetIterator, set once by the pool initializer
+_worker_state = None
+
+
+def _init_worker(original, map_function, seed, shm_threshold):
+    global _worker_state
+    _worker_state = (original, map_function, seed, shm_threshold)
+
+
+def _map_in_worker(idx):
+    from multiprocessing import shared_memory
+    original, map_function, seed, shm_threshold = _worker_state
+    result = ParallelMappedDatasetIterator._map_sample(original, map_function, seed, idx)
+
+    # Large buffers (e.g., the arrays of Image and PointCloud) are moved through shared memory
+    # instead of being pickled through the result pipe
+    out_of_band = []
+    payload = pickle.dumps(result, protocol=5,
+                           buffer_callback=lambda b: b.raw().nbytes < shm_threshold or out_of_band.append(b))
+    descriptors = []
+    try:
+        for buffer in out_of_band:
+            raw = buffer.raw()
+            if raw.nbytes == 0:
+                descriptors.append((None, bytearray()))
+                continue
+            block = shared_memory.SharedMemory(create=True, size=raw.nbytes)
+            descriptors.append((block.name, raw.nbytes))
+            block.buf[:raw.nbytes] = raw
+            block.close()
+    except BaseException:
+        _release_shared(descriptors)
+        raise
+    return payload, descriptors
+
+
+class ParallelMappedDatasetIterator(MappedDatasetIterator):
+    """
+    ParallelMappedDatasetIterator loads and transforms the samples of a DatasetIterator in a pool of worker
+    threads or processes, prefetching a bounded number of samples ahead of the consumer.
+
+    It can be used in place of the original DatasetIterator:
+    - iterating over it yields the samples in order (or as soon as they are ready, if ordered is False),
+    - __getitem__(i) detects sequential access, e.g., an eval() loop over range(len(dataset)), and prefetches
+      the next samples, so that learners use all workers without any change in their code.
+
+    With the process backend, the NumPy buffers of the samples are transferred through shared memory.
+    If a seed is given, the random generators (random, numpy and torch, if imported) are seeded with seed + i
+    before loading the i-th sample, so that random augmentations do not depend on the number of workers or on the
+    order of execution. Since these generators are global, deterministic seeding requires the process backend
+    or num_workers=0.
+    """
+    def __init__(self, original, map_function=None, num_workers=None, prefetch=None, ordered=True,
+                 backend="thread", seed=None, shm_threshold=65536, mp_context=None):
+        """
+        :param original: the dataset to load the samples from
+        :type original: engine.datasets.DatasetIterator
+        :param map_function: function applied to every sample, defaults to the identity
+        :type map_function: callable, optional
+        :param num_workers: number of workers, defaults to the number of CPUs, 0 loads the samples synchronously
+        :type num_workers: int, optional
+        :param prefetch: maximum number of samples loaded ahead of the consumer, defaults to 2 * num_workers
+        :type prefetch: int, optional
+        :param ordered: whether iteration yields the samples in order or as soon as they are ready
+        :type ordered: bool
+        :param backend: either "thread" or "process"
+        :type backend: str
+        :param seed: base seed of the random generators, None leaves them untouched
+        :type seed: int, optional
+        :param shm_threshold: minimum size (in bytes) of the buffers that are transferred through shared memory
+        :type shm_threshold: int
+        :param mp_context: multiprocessing context (or start method name) of the process backend
+        :type mp_context: str or multiprocessing.context.BaseContext, optional
+        """
+        super().__init__(original, map_function)
+        if backend not in ("thread", "process"):
+            raise ValueError("backend should be either 'thread' or 'process'")
+        self.num_workers = (os.cpu_count() or 1) if num_workers is None else num_workers
+        if self.num_workers < 0:
+            raise ValueError("num_workers should be non-negative")
+        self.prefetch = 2 * max(self.num_workers, 1) if prefetch is None else prefetch
+        if self.prefetch < 1:
+            raise ValueError("prefetch should be a positive integer")
+        self.ordered = ordered
+        self.backend = backend
+        self.seed = seed
+        self.shm_threshold = shm_threshold
+        self.mp_context = mp_context
+        self._executor = None
+        self._pending = {}
+        self._last_index = None
+
+    @staticmethod
+    def _map_sample(original, map_function, seed, idx):
+        if seed is not None:
+            _seed_sample(seed + idx)
+        sample = original[idx]
+        return sample if map_function is None else map_function(sample)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.backend == "thread":
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    self.num_workers, thread_name_prefix="opendr-dataset")
+            else:
+                from multiprocessing import resource_tracker
+                # Workers inherit the tracker of this process, so that the shared memory they create can be
+                # released here without being reported as leaked
+                resource_tracker.ensure_running()
+                context = self.mp_context
+                if context is None or isinstance(context, str):
+                    context = multiprocessing.get_context(context)
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    self.num_workers, mp_context=context, initializer=_init_worker,
+                    initargs=(self.original, self.map_function, self.seed, self.shm_threshold))
+        return self._executor
+
+    def _submit(self, idx):
+        if self.backend == "thread":
+            return self._get_executor().submit(self._map_sample, self.original, self.map_function, self.seed, idx)
+        return self._get_executor().submit(_map_in_worker, idx)
+
+    def _result(self, future):
+        result = future.result()
+        if self.backend == "process":
+            result = _load_shared(*result)
+        return result
+
+    def _discard(self, future):
+        if future.cancel() or self.backend == "thread":
+            return
+
+        def release(done):
+            if not done.cancelled() and done.exception() is None:
+                _release_shared(done.result()[1])
+        future.add_done_callback(release)
+
+    def __getitem__(self, idx):
+        """
+        This method is used for loading the idx-th sample of a dataset along with its annotation.
+        Sequential accesses are served from the prefetched samples.
+
+        :param idx: the index of the sample to load
+        :return: the idx-th sample and its annotation
+        :rtype: Tuple of (Data, Target)
+        """
+        length = len(self)
+        if idx < 0:
+            idx += length
+        if not 0 <= idx < length:
+            raise IndexError("index " + str(idx) + " is out of range")
+        if self.num_workers == 0:
+            return self._map_sample(self.original, self.map_function, self.seed, idx)
+
+        future = self._pending.pop(idx, None)
+        sequential = future is not None or (self._last_index is not None and idx == self._last_index + 1)
+        self._last_index = idx
+        for index in [i for i in self._pending if not idx < i <= idx + self.prefetch]:
+            self._discard(self._pending.pop(index))
+        if future is None:
+            future = self._submit(idx)
+        if sequential:
+            for index in range(idx + 1, min(idx + 1 + self.prefetch, length)):
+                if index not in self._pending:
+                    self._pending[index] = self._submit(index)
+        return self._result(future)
+
+    def __iter__(self):
+        return self.iterate()
+
+    def iterate(self, indices=None):
+        """
+        Yields the samples with the given indices, loading up to *prefetch* of them ahead of the consumer.
+
+        :param indices: indices of the samples to load, defaults to all samples
+        :type indices: iterable of int, optional
+        :return: a generator of samples, in the order of the indices if *ordered* is True
+        """
+        indices = iter(range(len(self)) if indices is None else indices)
+        if self.num_workers == 0:
+            for idx in indices:
+                yield self._map_sample(self.original, self.map_function, self.seed, idx)
+            return
+
+        in_flight = deque()
+        try:
+            for idx in indices:
+                in_flight.append(self._submit(idx))
+                if len(in_flight) >= self.prefetch:
+                    yield self._result(self._next_done(in_flight))
+            while in_flight:
+                yield self._result(self._next_done(in_flight))
+        finally:
+            for future in in_flight:
+                self._discard(future)
+
+    def _next_done(self, in_flight):
+        if self.ordered:
+            return in_flight.popleft()
+        done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+        future = next(f for f in in_flight if f in done)
+        in_flight.remove(future)
+        return future
+
+    def close(self):
+        """
+        Stops the workers, discarding the prefetched samples. They are started again if more samples are requested.
+        """
+        for future in self._pending.values():
+            self._discard(future)
+        self._pending = {}
+        self._last_index = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        if getattr(self, "_executor", None) is not None:
+            self._executor.shutdown(wait=False)
+
+    def __getstate__(self):
+        # Workers and prefetched samples are not transferred, e.g., when the dataset is sent to other processes
+        state = self.__dict__.copy()
+        state.update(_executor=None, _pending={}, _last_index=None)
+        return state
+
+
 class ExternalDataset(Dataset):
     """
     ExternalDataset provides a way for handling well-known external dataset formats
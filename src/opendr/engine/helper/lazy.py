@@ -0,0 +1,55 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib
+import sys
+
+
+def lazy_exports(package_name, exports):
+    """
+    Creates the module-level __getattr__ and __dir__ functions (PEP 562) of a package whose public names are only
+    imported when they are first accessed, so that importing the package does not import every learner it contains.
+
+    Example::
+
+        __getattr__, __dir__ = lazy_exports(__name__, {
+            "X3DLearner": ".x3d.x3d_learner",
+        })
+
+    :param package_name: name of the package, i.e., __name__ of its __init__ module
+    :type package_name: str
+    :param exports: maps every public name to the module it is imported from, either as an absolute module name or
+        relative to the package. If the module does not define the name, the name is imported as a submodule of
+        that module
+    :type exports: dict
+    :return: the __getattr__ and __dir__ functions of the package
+    :rtype: tuple
+    """
+
+    def __getattr__(name):
+        if name not in exports:
+            raise AttributeError("module '" + package_name + "' has no attribute '" + name + "'")
+        module = importlib.import_module(exports[name], package_name)
+        try:
+            value = getattr(module, name)
+        except AttributeError:
+            value = importlib.import_module(exports[name] + "." + name, package_name)
+        # Cache the value in the package, so that __getattr__ is not called again for this name
+        setattr(sys.modules[package_name], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package_name])) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,377 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import math
+import os
+import sys
+import threading
+from functools import wraps
+from time import perf_counter
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+class _NullStage:
+    """
+    Stage returned when profiling is disabled, so that disabled instrumentation only costs an attribute lookup.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_null_stage = _NullStage()
+
+
+# Peak RSS reached before the last reset of the high-water mark of the kernel, so that resets do not affect
+# peak_host_memory()
+_peak_host_memory_before_reset = 0
+
+
+def _host_memory_high_water():
+    # Peak RSS in bytes since the last reset, only available on Linux
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_host_memory_high_water():
+    # Resets the peak RSS to the current RSS and returns the peak before the reset, None if it cannot be reset
+    global _peak_host_memory_before_reset
+    high_water = _host_memory_high_water()
+    if high_water is None:
+        return None
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return None
+    _peak_host_memory_before_reset = max(_peak_host_memory_before_reset, high_water)
+    return high_water
+
+
+def peak_host_memory():
+    """
+    Returns the peak resident set size of the process in bytes, or None if it cannot be queried.
+    """
+    high_water = _host_memory_high_water()
+    if high_water is not None:
+        return max(high_water, _peak_host_memory_before_reset)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _torch_cuda():
+    # Torch is only queried if the process already imported it, profiling never pulls it in
+    torch = sys.modules.get("torch")
+    if torch is None or not torch.cuda.is_available():
+        return None
+    return torch.cuda
+
+
+class StageStats:
+    """
+    Latency histogram and counters of a single profiled stage.
+    Latencies are accumulated in logarithmic buckets (4 per octave, starting from 1 microsecond), so that memory
+    usage is constant regardless of the number of calls.
+    """
+
+    buckets_per_octave = 4
+    num_buckets = 112  # Covers latencies from 1us up to ~4 minutes
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.peak_host_memory = None
+        self.peak_device_memory = None
+        self.histogram = [0] * self.num_buckets
+
+    @classmethod
+    def bucket_upper_bound(cls, index):
+        """
+        Returns the upper bound (in seconds) of the histogram bucket with the given index.
+        """
+        return 1e-6 * 2 ** ((index + 1) / cls.buckets_per_octave)
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+        if duration <= 1e-6:
+            index = 0
+        else:
+            index = int(math.log2(duration * 1e6) * self.buckets_per_octave)
+            index = min(max(index, 0), self.num_buckets - 1)
+        self.histogram[index] += 1
+
+    def percentile(self, q):
+        """
+        Returns an estimate of the q-th percentile (0-100) of the latency in seconds, based on the histogram.
+        """
+        if self.count == 0:
+            return None
+        target = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target and count > 0:
+                return min(self.bucket_upper_bound(index), self.max)
+        return self.max
+
+    def to_dict(self):
+        summary = {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "histogram": {"{:.3g}".format(self.bucket_upper_bound(i)): count
+                          for i, count in enumerate(self.histogram) if count > 0},
+        }
+        # The peaks are only measured when the profiler tracks memory
+        if self.peak_host_memory is not None:
+            summary["peak_host_memory"] = self.peak_host_memory
+        if self.peak_device_memory is not None:
+            summary["peak_device_memory"] = self.peak_device_memory
+        return summary
+
+
+class _Stage:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+        # Peak host/device memory of the stage that was observed before a nested stage reset the peak counters, None
+        # if the counter cannot be reset and thus no per-stage peak is available
+        self.peak_memory = [None, None]
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        parent = stack[-1] if stack else None
+        if parent is not None:
+            self.name = parent.name + "/" + self.name
+        stack.append(self)
+        if self.profiler.synchronize:
+            self.profiler._synchronize()
+        if self.profiler.track_memory:
+            peaks = self.profiler._reset_peak_memory()
+            for i, peak in enumerate(peaks):
+                if peak is not None:
+                    self.peak_memory[i] = 0
+                    if parent is not None and parent.peak_memory[i] is not None:
+                        parent.peak_memory[i] = max(parent.peak_memory[i], peak)
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.profiler.synchronize:
+            self.profiler._synchronize()
+        duration = perf_counter() - self.start
+        self.profiler._stack().pop()
+        peaks = [None, None]
+        if self.profiler.track_memory:
+            for i, peak in enumerate(self.profiler._peak_memory()):
+                if self.peak_memory[i] is not None and peak is not None:
+                    peaks[i] = max(self.peak_memory[i], peak)
+        self.profiler._record(self.name, duration, *peaks)
+        return False
+
+
+class Profiler:
+    """
+    Lightweight profiler that learners use to mark the stages of their hot path, e.g., preprocessing, forward pass
+    and postprocessing. Stages are marked either with the stage() context manager or the profile() decorator, and
+    nested stages are reported with their full path, e.g., "infer/forward".
+
+    For every stage, a latency histogram and the number of calls are kept. When the profiler is disabled, which is
+    the default, marking a stage does not record anything and has negligible cost.
+
+    With track_memory, the peak host (RSS) and device (CUDA, if torch is in use) memory reached while a stage runs
+    are also kept. They are measured by resetting the process-wide peak counters at the start of every stage, i.e.
+    torch.cuda.reset_peak_memory_stats() and /proc/self/clear_refs, so any other reader of these counters, e.g.
+    torch.cuda.max_memory_allocated() in a training logger, sees the peak since the last stage started instead of
+    the peak of the process (peak_host_memory() still reports the latter). Every stage boundary also reads and writes
+    /proc, the host peak is only available on Linux, and stages that run concurrently in other threads, e.g. the
+    worker of a BatchingLearner, contribute to each other's peaks. Memory tracking is therefore off by default.
+    """
+
+    def __init__(self, enabled=False, synchronize=False, track_memory=False):
+        """
+        :param enabled: whether stages are recorded
+        :type enabled: bool
+        :param synchronize: whether CUDA is synchronized at stage boundaries, so that asynchronous kernels are
+            attributed to the stage that launched them
+        :type synchronize: bool
+        :param track_memory: whether peak host/device memory is recorded for each stage, which resets the peak
+            memory counters of the process at every stage
+        :type track_memory: bool
+        """
+        self.enabled = enabled
+        self.synchronize = synchronize
+        self.track_memory = track_memory
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self, synchronize=None, track_memory=None):
+        self.enabled = True
+        if synchronize is not None:
+            self.synchronize = synchronize
+        if track_memory is not None:
+            self.track_memory = track_memory
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """
+        Discards all recorded statistics.
+        """
+        with self._lock:
+            self._stats = {}
+
+    def stage(self, name):
+        """
+        Returns a context manager that records the time spent in the enclosed block under the given stage name.
+
+        :param name: name of the stage
+        :type name: str
+        """
+        if not self.enabled:
+            return _null_stage
+        return _Stage(self, name)
+
+    def profile(self, name=None):
+        """
+        Decorator that records every call of the decorated function as a stage.
+
+        :param name: name of the stage, defaults to the qualified name of the function
+        :type name: str, optional
+        """
+        def decorator(function):
+            stage_name = function.__qualname__ if name is None else name
+
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _Stage(self, stage_name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @staticmethod
+    def _synchronize():
+        cuda = _torch_cuda()
+        if cuda is not None:
+            cuda.synchronize()
+
+    @staticmethod
+    def _peak_memory():
+        cuda = _torch_cuda()
+        return _host_memory_high_water(), None if cuda is None else cuda.max_memory_allocated()
+
+    @staticmethod
+    def _reset_peak_memory():
+        # Returns the peaks before the reset, None for the counters that cannot be reset
+        device_memory = None
+        cuda = _torch_cuda()
+        if cuda is not None:
+            device_memory = cuda.max_memory_allocated()
+            cuda.reset_peak_memory_stats()
+        return _reset_host_memory_high_water(), device_memory
+
+    def _record(self, name, duration, host_memory=None, device_memory=None):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = StageStats()
+            stats.add(duration)
+            if host_memory is not None:
+                stats.peak_host_memory = max(stats.peak_host_memory or 0, host_memory)
+            if device_memory is not None:
+                stats.peak_device_memory = max(stats.peak_device_memory or 0, device_memory)
+
+    @property
+    def stats(self):
+        """
+        Returns the StageStats of every recorded stage, keyed by the stage name.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def to_dict(self):
+        """
+        Returns a summary of all recorded stages, keyed by the stage name. Latencies are in seconds and memory in
+        bytes.
+
+        :rtype: dict
+        """
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+    def to_json_lines(self, path=None):
+        """
+        Exports the summary of all recorded stages as JSON lines, one stage per line.
+
+        :param path: file to append the lines to, if None the lines are only returned
+        :type path: str, optional
+        :return: the JSON lines
+        :rtype: str
+        """
+        lines = "".join(json.dumps(dict(stage=name, **summary)) + "\n" for name, summary in self.to_dict().items())
+        if path is not None:
+            with open(path, "a") as f:
+                f.write(lines)
+        return lines
+
+    def __str__(self):
+        rows = []
+        for name, stats in sorted(self.stats.items()):
+            rows.append("{}: {} calls, mean {:.3f} ms, p50 {:.3f} ms, p95 {:.3f} ms, p99 {:.3f} ms".format(
+                name, stats.count, 1000 * stats.total / stats.count, 1000 * stats.percentile(50),
+                1000 * stats.percentile(95), 1000 * stats.percentile(99)))
+        return "\n".join(rows)
+
+
+# Profiler used by the OpenDR learners, which can be enabled either from code or by setting the OPENDR_PROFILE
+# environment variable (OPENDR_PROFILE=sync also synchronizes CUDA at stage boundaries)
+profiler = Profiler(enabled=os.environ.get("OPENDR_PROFILE", "0") not in ("", "0"),
+                    synchronize=os.environ.get("OPENDR_PROFILE", "0") == "sync")
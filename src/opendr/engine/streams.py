@@ -0,0 +1,363 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from collections import OrderedDict
+
+
+class StreamPool(object):
+    """
+    The StreamPool class holds the state of several independent video streams, keyed by a stream id, e.g. the
+    trackers of a tracking learner or the continual inference states of a continual learner.
+
+    The state of a stream is created on its first frame by *create_state* and shares the network of the learner
+    that owns the pool, so that serving N cameras does not need N copies of the model. Streams that have not
+    received a frame for more than *max_idle_time* seconds are evicted, and the least recently used stream is
+    evicted when a new stream would exceed *max_streams*.
+    """
+
+    def __init__(self, create_state, max_idle_time=None, max_streams=None, clock=time.monotonic):
+        """
+        :param create_state: callable that creates the state of a new stream
+        :type create_state: callable
+        :param max_idle_time: time (in seconds) after which a stream without frames is evicted, None to keep it
+        :type max_idle_time: float, optional
+        :param max_streams: maximum number of streams that are tracked at the same time, None for no limit
+        :type max_streams: int, optional
+        :param clock: callable that returns the current time in seconds
+        :type clock: callable
+        """
+        if max_idle_time is not None and max_idle_time <= 0:
+            raise ValueError("max_idle_time should be positive")
+        if max_streams is not None and max_streams < 1:
+            raise ValueError("max_streams should be a positive integer")
+
+        self.create_state = create_state
+        self.max_idle_time = max_idle_time
+        self.max_streams = max_streams
+        self.clock = clock
+
+        # Stream id -> (state, time of the last frame), from the least to the most recently used stream
+        self._streams = OrderedDict()
+
+    def __len__(self):
+        return len(self._streams)
+
+    def __contains__(self, stream_id):
+        return stream_id in self._streams
+
+    @property
+    def streams(self):
+        """
+        :return: the ids of the tracked streams, from the least to the most recently used
+        :rtype: list
+        """
+        return list(self._streams.keys())
+
+    def get(self, stream_id):
+        """
+        Returns the state of a stream and marks the stream as used, creating the state if the stream is new.
+
+        :param stream_id: id of the stream
+        :type stream_id: hashable
+        :return: the state of the stream
+        """
+        if stream_id in self._streams:
+            state, _ = self._streams.pop(stream_id)
+        else:
+            if self.max_streams is not None and len(self._streams) >= self.max_streams:
+                self._streams.popitem(last=False)
+            state = self.create_state()
+        self._streams[stream_id] = (state, self.clock())
+        return state
+
+    def remove(self, stream_id):
+        """
+        Drops the state of a stream. Its next frame starts from a new state.
+
+        :param stream_id: id of the stream
+        :type stream_id: hashable
+        """
+        self._streams.pop(stream_id, None)
+
+    def evict_idle(self):
+        """
+        Drops the streams that have not received a frame for more than max_idle_time seconds.
+
+        :return: the ids of the evicted streams
+        :rtype: list
+        """
+        if self.max_idle_time is None:
+            return []
+        deadline = self.clock() - self.max_idle_time
+        evicted = []
+        for stream_id, (_, last_used) in self._streams.items():
+            if last_used >= deadline:
+                break
+            evicted.append(stream_id)
+        for stream_id in evicted:
+            del self._streams[stream_id]
+        return evicted
+
+    def reset(self):
+        """
+        Drops all the streams.
+        """
+        self._streams.clear()
+
+
+class _ContinualState(object):
+    """
+    The continual state of a stream, None until its first step.
+    """
+
+    def __init__(self):
+        self.state = None
+
+
+class ContinualStreams(StreamPool):
+    """
+    The ContinualStreams class runs the continual inference of several independent streams through one continual
+    model, so that a single continual learner can follow many cameras.
+
+    Every stream keeps its own continual state. On every step, the inputs and the states of the streams are stacked
+    into one batch, the model runs a single *_forward_step* and the next states are split back to the streams.
+    The continual modules keep ring buffer indices that are shared by the whole batch, so only streams that are at
+    the same position of their buffers can share a step, e.g. streams that started together. The streams are
+    grouped by that position and every group runs one step.
+
+    The states are stacked along the batch dimension of every state tensor, which differs between the continual
+    modules. It is found once per model by stepping a batch of one and a batch of two zero inputs.
+    """
+
+    def __init__(self, max_idle_time=None, max_streams=None, warm_up=False, clock=time.monotonic):
+        """
+        :param max_idle_time: time (in seconds) after which a stream without frames is evicted, None to keep it
+        :type max_idle_time: float, optional
+        :param max_streams: maximum number of streams that are followed at the same time, None for no limit
+        :type max_streams: int, optional
+        :param warm_up: if True, the first input of a stream is stepped receptive_field times before its first step,
+            so that the stream has an output from its first frame on
+        :type warm_up: bool
+        :param clock: callable that returns the current time in seconds
+        :type clock: callable
+        """
+        super(ContinualStreams, self).__init__(_ContinualState, max_idle_time=max_idle_time,
+                                               max_streams=max_streams, clock=clock)
+        self.warm_up = warm_up
+        self._probed_model = None
+        self._batch_dims = None
+
+    def step(self, model, inputs):
+        """
+        Steps the streams of the inputs by one time step.
+
+        :param model: continual model that implements *_forward_step(input, state)*, e.g. a continual.Sequential
+        :type model: torch.nn.Module
+        :param inputs: the input of every stream, with a batch dimension of one, keyed by the stream id
+        :type inputs: dict
+        :return: the output of every stream, with a batch dimension of one, or None while the stream warms up
+        :rtype: dict
+        """
+        import torch
+
+        self.evict_idle()
+        groups = OrderedDict()
+        for stream_id in inputs:
+            stream = self.get(stream_id)
+            groups.setdefault(_phase(stream.state), []).append((stream_id, stream))
+
+        outputs = {}
+        with torch.no_grad():
+            for group in groups.values():
+                batch = torch.cat([inputs[stream_id] for stream_id, _ in group])
+                batch_dims = self.__batch_dims(model, batch[:1]) if len(group) > 1 else None
+                state = _gather([stream.state for _, stream in group], batch_dims)
+                if state is None and self.warm_up:
+                    for _ in range(model.receptive_field):
+                        _, state = model._forward_step(batch, state)
+
+                output, state = model._forward_step(batch, state)
+
+                states = _scatter(state, len(group), batch_dims)
+                for i, ((stream_id, stream), stream_state) in enumerate(zip(group, states)):
+                    stream.state = stream_state
+                    outputs[stream_id] = output[i:i + 1] if isinstance(output, torch.Tensor) else None
+        return outputs
+
+    def __batch_dims(self, model, sample):
+        """
+        :return: the batch dimension of every state tensor, or None for the tensors that are shared by the batch
+        :rtype: dict
+        """
+        if self._probed_model is not model:
+            import torch
+
+            leaves = []
+            for batch_size in (1, 2):
+                x = torch.zeros((batch_size,) + tuple(sample.shape[1:]), dtype=sample.dtype, device=sample.device)
+                state = None
+                for _ in range(model.receptive_field + 1):
+                    _, state = model._forward_step(x, state)
+                leaves.append(dict(_leaves(state)))
+
+            self._batch_dims = {}
+            for path, leaf in leaves[0].items():
+                other = leaves[1].get(path)
+                if isinstance(leaf, torch.Tensor) and isinstance(other, torch.Tensor) and leaf.dim() > 0:
+                    dims = [d for d in range(leaf.dim()) if leaf.shape[d] != other.shape[d]]
+                    self._batch_dims[path] = dims[0] if dims else None
+            self._probed_model = model
+        return self._batch_dims
+
+
+class _ClipBuffer(object):
+    """
+    The latest frames of a stream and the number of frames it has received.
+    """
+
+    def __init__(self):
+        self.frames = None
+        self.count = 0
+
+
+class ClipStreams(StreamPool):
+    """
+    The ClipStreams class keeps a sliding window of the latest frames of several independent streams, so that a
+    clip-based learner can run on live streams without re-processing the frames that overlapping clips share.
+
+    The frames of a stream are kept in a ring buffer that stays on the device of the frames, e.g. after they have
+    been preprocessed on the inference device. Every frame is written twice, one clip length apart, so that the
+    latest clip is always a contiguous view of the buffer and is emitted without copies. A stream emits a clip
+    once it has received *clip_len* frames and then on every *stride* frames.
+    """
+
+    def __init__(self, clip_len, stride=1, max_idle_time=None, max_streams=None, clock=time.monotonic):
+        """
+        :param clip_len: number of frames of a clip
+        :type clip_len: int
+        :param stride: number of frames between the clips of a stream
+        :type stride: int
+        :param max_idle_time: time (in seconds) after which a stream without frames is evicted, None to keep it
+        :type max_idle_time: float, optional
+        :param max_streams: maximum number of streams that are followed at the same time, None for no limit
+        :type max_streams: int, optional
+        :param clock: callable that returns the current time in seconds
+        :type clock: callable
+        """
+        if clip_len < 1:
+            raise ValueError("clip_len should be a positive integer")
+        if stride < 1:
+            raise ValueError("stride should be a positive integer")
+
+        super(ClipStreams, self).__init__(_ClipBuffer, max_idle_time=max_idle_time,
+                                          max_streams=max_streams, clock=clock)
+        self.clip_len = clip_len
+        self.stride = stride
+
+    def push(self, frames):
+        """
+        Appends the latest frame of every stream to its window.
+
+        :param frames: the latest frame of every stream, with shape (C, H, W), keyed by the stream id
+        :type frames: dict
+        :return: the clips of the streams that complete a window, with shape (C, T, H, W) and their frames in
+            temporal order, keyed by the stream id. The clips are views of the buffers of the streams, which are
+            valid until their next frame.
+        :rtype: dict
+        """
+        self.evict_idle()
+        clips = {}
+        for stream_id, frame in frames.items():
+            stream = self.get(stream_id)
+            if stream.frames is None or stream.frames[:, 0].shape != frame.shape or \
+                    stream.frames.device != frame.device or stream.frames.dtype != frame.dtype:
+                # A new stream, or a stream whose frames changed, starts a new window
+                stream.frames = frame.new_empty((frame.shape[0], 2 * self.clip_len) + tuple(frame.shape[1:]))
+                stream.count = 0
+
+            index = stream.count % self.clip_len
+            stream.frames[:, index] = frame
+            stream.frames[:, index + self.clip_len] = frame
+            stream.count += 1
+
+            if stream.count >= self.clip_len and (stream.count - self.clip_len) % self.stride == 0:
+                # The oldest frame of the window is the next one to be overwritten
+                start = stream.count % self.clip_len
+                clips[stream_id] = stream.frames[:, start:start + self.clip_len]
+        return clips
+
+
+def _leaves(state, path=()):
+    """
+    Yields the path and the value of every leaf of a nested continual state.
+    """
+    if isinstance(state, (tuple, list)):
+        for i, item in enumerate(state):
+            yield from _leaves(item, path + (i,))
+    else:
+        yield path, state
+
+
+def _rebuild(state, leaf_fn, path=()):
+    """
+    Rebuilds a nested continual state with the leaves returned by leaf_fn(path, leaf).
+    """
+    if isinstance(state, (tuple, list)):
+        return type(state)(_rebuild(item, leaf_fn, path + (i,)) for i, item in enumerate(state))
+    return leaf_fn(path, state)
+
+
+def _phase(state):
+    """
+    :return: the structure and the ring buffer indices of a continual state, which the streams of a batch share
+    :rtype: tuple
+    """
+    phase = []
+    for path, leaf in _leaves(state):
+        if hasattr(leaf, "shape"):
+            leaf = leaf.item() if len(leaf.shape) == 0 else tuple(leaf.shape)
+        phase.append((path, leaf))
+    return tuple(phase)
+
+
+def _gather(states, batch_dims):
+    """
+    Stacks the continual states of the streams of a group into the state of their batch.
+    """
+    if len(states) == 1 or states[0] is None:
+        return states[0]
+    import torch
+
+    leaves = [dict(_leaves(state)) for state in states]
+
+    def gather_leaf(path, leaf):
+        if batch_dims.get(path) is None:
+            return leaf
+        return torch.cat([stream_leaves[path] for stream_leaves in leaves], batch_dims[path])
+
+    return _rebuild(states[0], gather_leaf)
+
+
+def _scatter(state, num_streams, batch_dims):
+    """
+    Splits the continual state of a batch into the states of its streams.
+    """
+    if num_streams == 1:
+        return [state]
+
+    chunks = {path: leaf.chunk(num_streams, batch_dims[path])
+              for path, leaf in _leaves(state) if batch_dims.get(path) is not None}
+    return [_rebuild(state, lambda path, leaf: chunks[path][i] if path in chunks else leaf)
+            for i in range(num_streams)]
@@ -529,6 +529,277 @@ class BoundingBoxList(Target):
         return str(self.mot())
 
 
+class _BoundingBoxView:
+    """
+    Lazy sequence view over a ColumnarBoundingBoxList.
+    BoundingBox objects are only built when an element is accessed, so that code written against the list-based
+    BoundingBoxList (iteration, indexing, ``data.append``) keeps working on the columnar storage.
+    """
+
+    def __init__(self, owner):
+        self._owner = owner
+
+    def append(self, box):
+        self._owner.add_box(box)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._owner._make_box(i) for i in range(*idx.indices(len(self._owner)))]
+        return self._owner[idx]
+
+    def __iter__(self):
+        owner = self._owner
+        for i in range(len(owner)):
+            yield owner._make_box(i)
+
+    def __len__(self):
+        return len(self._owner)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class ColumnarBoundingBoxList(BoundingBoxList):
+    """
+    This target is used for 2D Object Detection.
+    It holds the same information as BoundingBoxList, but stores the boxes (left, top, width, height), scores, classes
+    and ids of a frame in contiguous NumPy arrays instead of one BoundingBox object per detection.
+    Appending is amortized O(1), conversions to MOT/COCO are vectorized and the list can be sliced or filtered with
+    a boolean mask. Individual BoundingBox objects are created lazily on access and are read-only snapshots, i.e.,
+    modifying them does not change the list.
+    """
+
+    _initial_capacity = 16
+
+    def __init__(
+        self,
+        boxes=None,
+        scores=None,
+        classes=None,
+        ids=None,
+        image_id=-1,
+    ):
+        Target.__init__(self)
+        self.image_id = image_id
+
+        if boxes is None or isinstance(boxes, (list, tuple)) and (len(boxes) == 0 or
+                                                                  isinstance(boxes[0], BoundingBox)):
+            self._boxes = np.empty((self._initial_capacity, 4), dtype=np.float32)
+            self._scores = np.empty((self._initial_capacity,), dtype=np.float32)
+            self._classes = np.empty((self._initial_capacity,), dtype=np.int64)
+            self._ids = np.empty((self._initial_capacity,), dtype=np.int64)
+            self._size = 0
+            if boxes is not None:
+                for box in boxes:
+                    self.add_box(box)
+        else:
+            boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+            count = boxes.shape[0]
+            self._boxes = boxes
+            self._scores = self.__column(scores, count, np.float32, 0)
+            self._classes = self.__column(classes, count, None, 0)
+            self._ids = self.__column(ids, count, np.int64, -1)
+            self._size = count
+
+    @staticmethod
+    def __column(values, count, dtype, default):
+        if values is None:
+            return np.full((count,), default, dtype=dtype if dtype is not None else np.int64)
+        values = np.asarray(values, dtype=dtype).reshape(-1)
+        if values.dtype.kind in "US":
+            values = values.astype(object)
+        if values.shape[0] != count:
+            raise ValueError("Expected " + str(count) + " values per column, got " + str(values.shape[0]) + ".")
+        return values
+
+    @classmethod
+    def _from_arrays(cls, boxes, scores, classes, ids, image_id):
+        # Adopts the given arrays without copying them
+        result = cls.__new__(cls)
+        Target.__init__(result)
+        result.image_id = image_id
+        result._boxes = boxes
+        result._scores = scores
+        result._classes = classes
+        result._ids = ids
+        result._size = boxes.shape[0]
+        return result
+
+    @staticmethod
+    def from_coco(boxes_coco, image_id=0):
+        """
+        Vectorized counterpart of BoundingBoxList.from_coco(). Segmentation masks are not kept.
+        """
+        count = len(boxes_coco)
+        boxes = np.array([box["bbox"] for box in boxes_coco], dtype=np.float32).reshape(count, 4)
+        classes = [box["category_id"] for box in boxes_coco]
+        scores = [box.get("confidence", box.get("score", 0)) for box in boxes_coco]
+        return ColumnarBoundingBoxList(boxes, scores=scores, classes=classes, image_id=image_id)
+
+    @staticmethod
+    def from_bounding_box_list(bounding_box_list):
+        """
+        Converts a list-based BoundingBoxList into a ColumnarBoundingBoxList.
+        """
+        if isinstance(bounding_box_list, ColumnarBoundingBoxList):
+            return bounding_box_list
+        count = len(bounding_box_list)
+        boxes = np.array([[box.left, box.top, box.width, box.height] for box in bounding_box_list.data],
+                         dtype=np.float32).reshape(count, 4)
+        scores = [box.confidence for box in bounding_box_list.data]
+        classes = [box.name for box in bounding_box_list.data]
+        return ColumnarBoundingBoxList(boxes, scores=scores, classes=classes, image_id=bounding_box_list.image_id)
+
+    def to_bounding_box_list(self):
+        """
+        Materializes all boxes into a list-based BoundingBoxList.
+        """
+        return BoundingBoxList(list(self.data), image_id=self.image_id)
+
+    def mot(self, with_confidence=True):
+        n = self._size
+        frames = np.full((n, 1), -1, dtype=np.float32)
+        if with_confidence:
+            return np.concatenate([frames, self._boxes[:n], self._scores[:n, None]], axis=1)
+        return np.concatenate([frames, self._boxes[:n]], axis=1)
+
+    def coco(self, with_confidence=True):
+        n = self._size
+        boxes = self._boxes[:n]
+        areas = (boxes[:, 2] * boxes[:, 3]).tolist()
+        classes = self._classes[:n].tolist()
+        scores = self._scores[:n].tolist()
+        result = []
+        for i, bbox in enumerate(boxes.tolist()):
+            entry = {"bbox": bbox, "category_id": classes[i], "area": areas[i]}
+            if with_confidence:
+                entry["confidence"] = scores[i]
+            result.append(entry)
+        return result
+
+    def __reserve(self, capacity):
+        if capacity <= self._boxes.shape[0]:
+            return
+        capacity = max(capacity, 2 * self._boxes.shape[0], self._initial_capacity)
+        n = self._size
+        for name in ("_boxes", "_scores", "_classes", "_ids"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:n] = old[:n]
+            setattr(self, name, new)
+
+    def __fit_classes(self, classes):
+        # Class columns start as integers and are promoted (e.g. to strings or objects) only when needed
+        current, incoming = self._classes.dtype, np.asarray(classes).dtype
+        if current == object:
+            return
+        if current.kind in "biuf" and incoming.kind in "biuf":
+            dtype = np.result_type(current, incoming)
+        else:
+            dtype = np.dtype(object)
+        if dtype != current:
+            self._classes = self._classes.astype(dtype)
+
+    def add_box(self, box: BoundingBox):
+        self.__fit_classes([box.name])
+        n = self._size
+        self.__reserve(n + 1)
+        self._boxes[n] = (box.left, box.top, box.width, box.height)
+        self._scores[n] = box.confidence
+        self._classes[n] = box.name
+        self._ids[n] = getattr(box, "id", -1)
+        self._size = n + 1
+
+    def add_boxes(self, boxes, scores=None, classes=None, ids=None):
+        """
+        Appends several boxes at once.
+        :param boxes: array-like of shape (N, 4) with (left, top, width, height) rows
+        :param scores: optional array-like of N scores
+        :param classes: optional array-like of N class ids
+        :param ids: optional array-like of N object ids
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        count = boxes.shape[0]
+        scores = self.__column(scores, count, np.float32, 0)
+        classes = self.__column(classes, count, None, 0)
+        ids = self.__column(ids, count, np.int64, -1)
+        self.__fit_classes(classes)
+        n = self._size
+        self.__reserve(n + count)
+        self._boxes[n:n + count] = boxes
+        self._scores[n:n + count] = scores
+        self._classes[n:n + count] = classes
+        self._ids[n:n + count] = ids
+        self._size = n + count
+
+    def _make_box(self, i):
+        left, top, width, height = self._boxes[i].tolist()
+        name = self._classes[i]
+        return BoundingBox(name.item() if isinstance(name, np.generic) else name, left, top, width, height,
+                           score=self._scores[i].item())
+
+    @property
+    def data(self):
+        return _BoundingBoxView(self)
+
+    @data.setter
+    def data(self, data):
+        raise AttributeError("ColumnarBoundingBoxList data cannot be replaced, use add_box() or add_boxes().")
+
+    @property
+    def boxes(self):
+        return self.data
+
+    @property
+    def bboxes(self):
+        """
+        Returns a (N, 4) view of the boxes in (left, top, width, height) format.
+        """
+        return self._boxes[:self._size]
+
+    @property
+    def scores(self):
+        return self._scores[:self._size]
+
+    @property
+    def classes(self):
+        return self._classes[:self._size]
+
+    @property
+    def ids(self):
+        return self._ids[:self._size]
+
+    @property
+    def confidence(self):
+        if self._size == 0:
+            return 0
+        return float(self._scores[:self._size].mean())
+
+    @confidence.setter
+    def confidence(self, confidence):
+        raise AttributeError("ColumnarBoundingBoxList confidence is computed from the box scores.")
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            if idx < -self._size or idx >= self._size:
+                raise IndexError("ColumnarBoundingBoxList index out of range")
+            return self._make_box(idx % self._size)
+        if not isinstance(idx, slice):
+            idx = np.asarray(idx)
+            if idx.dtype == bool and idx.shape[0] != self._size:
+                raise IndexError("Boolean mask length does not match the number of boxes.")
+        n = self._size
+        return ColumnarBoundingBoxList._from_arrays(
+            self._boxes[:n][idx], self._scores[:n][idx], self._classes[:n][idx], self._ids[:n][idx], self.image_id
+        )
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return "ColumnarBoundingBoxList " + str(self)
+
+
 class TrackingAnnotation(Target):
     """
     This target is used for 2D Object Tracking.
@@ -20,6 +20,7 @@ import pickle
 from pathlib import Path
 from opendr.engine.learners import Learner
 from opendr.engine.helper.io import bump_version
+from opendr.engine.streams import ContinualStreams
 import onnxruntime as ort
 from collections import OrderedDict
 
@@ -28,7 +29,7 @@ from opendr.engine.datasets import Dataset
 from opendr.engine.target import Category
 
 from logging import getLogger
-from typing import Any, Union, Dict
+from typing import Any, Union, Dict, Hashable
 
 import pytorch_lightning as pl
 import continual as co
@@ -65,6 +66,8 @@ class CoTransEncLearner(Learner):
         pin_memory=False,
         num_workers=0,
         seed=123,
+        max_stream_idle_time=60.0,
+        max_streams=None,
         *args,
         **kwargs,
     ):
@@ -101,6 +104,10 @@ class CoTransEncLearner(Learner):
             pin_memory (bool, optional): Pin memory in dataloader. Defaults to False.
             num_workers (int, optional): Number of workers in dataloader. Defaults to 0.
             seed (int, optional): Random seed. Defaults to 123.
+            max_stream_idle_time (float, optional): Time (in seconds) after which a stream of `infer_streams`
+                without tokens is dropped. Defaults to 60.0.
+            max_streams (int, optional): Maximum number of streams of `infer_streams`. When a new stream exceeds it,
+                the least recently used stream is dropped. Defaults to None.
         """
         # Pass the shared parameters on super's constructor so they can get initialized as class attributes
         assert optimizer in {"sgd", "adam"}, "Supported optimizers are Adam and SGD."
@@ -141,6 +148,9 @@ class CoTransEncLearner(Learner):
         self._loss = loss
         self._ort_session = None
         self._seed = seed
+        self._max_stream_idle_time = max_stream_idle_time
+        self._max_streams = max_streams
+        self.streams = ContinualStreams(max_idle_time=max_stream_idle_time, max_streams=max_streams)
         torch.manual_seed(self._seed)
 
         self.init_model()
@@ -321,6 +331,8 @@ class CoTransEncLearner(Learner):
             pin_memory=optimizer_info["pin_memory"],
             num_workers=optimizer_info["num_workers"],
             seed=optimizer_info["seed"],
+            max_stream_idle_time=self._max_stream_idle_time,
+            max_streams=self._max_streams,
         )
 
         weights_path = path.parent / meta_data["model_paths"]
@@ -366,7 +378,8 @@ class CoTransEncLearner(Learner):
         )
 
     def reset(self):
-        pass
+        """Drop the continual states of all streams of `infer_streams`."""
+        self.streams.reset()
 
     def fit(
         self,
@@ -551,6 +564,44 @@ class CoTransEncLearner(Learner):
         else:
             self.model.eval()
             r = (self.model.forward if forward_mode == "regular" else self.model.forward_step)(x)
+        return self._category(r)
+
+    def infer_streams(self, xs: Dict[Hashable, Union[Vector, torch.Tensor]]) -> Dict[Hashable, Category]:
+        """Run inference on the latest token of several independent streams, e.g. cameras.
+        Every stream keeps its own continual state, and the tokens of all streams are stepped through the model
+        together, so that a single learner can follow many streams. Streams that are at the same position of the
+        ring buffers of the model, e.g. that started together, share a single forward step.
+        This uses the PyTorch model, also after `optimize`.
+
+        Args:
+            xs (Dict[Hashable, Union[Vector, torch.Tensor]]): The latest token of every stream, keyed by the stream id.
+                Every token should have shape (input_dims,).
+
+        Returns:
+            Dict[Hashable, Category]: Network output of every stream
+        """
+        if not isinstance(xs, dict):
+            raise ValueError("xs should be a dict of tokens keyed by the stream id")
+
+        inputs = {
+            stream_id: torch.as_tensor(x.data if isinstance(x, Vector) else x).to(
+                device=self.device, dtype=torch.float
+            ).unsqueeze(0)  # Add batch dim
+            for stream_id, x in xs.items()
+        }
+        self.model.eval()
+        results = self.streams.step(self.model, inputs)
+        return {stream_id: self._category(r) for stream_id, r in results.items()}
+
+    def remove_stream(self, stream_id):
+        """Drop the continual state of a stream of `infer_streams`. Its next token starts a new state.
+
+        Args:
+            stream_id (Hashable): Id of the stream.
+        """
+        self.streams.remove(stream_id)
+
+    def _category(self, r) -> Category:
         if isinstance(r, torch.Tensor):
             r = torch.nn.functional.softmax(r[0], dim=-1)
             result = Category(prediction=int(r.argmax(dim=0)), confidence=r)
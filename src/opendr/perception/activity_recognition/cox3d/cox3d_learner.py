@@ -18,13 +18,14 @@ import continual as co
 import pickle
 import os
 from opendr.engine import data
+from opendr.engine.streams import ContinualStreams
 from opendr.engine.target import Category
 from opendr.perception.activity_recognition.cox3d.algorithm.x3d import CoX3D
 from opendr.perception.activity_recognition.utils.lightning import _LightningModuleWithCrossEntropy
 from opendr.perception.activity_recognition.x3d.x3d_learner import X3DLearner
 from pathlib import Path
 from logging import getLogger
-from typing import Union, List
+from typing import Union, List, Dict, Hashable
 import onnxruntime as ort
 
 
@@ -54,6 +55,8 @@ class CoX3DLearner(X3DLearner):
         seed=123,
         num_classes=400,
         temporal_window_size: int = None,
+        max_stream_idle_time: float = 60.0,
+        max_streams: int = None,
         *args,
         **kwargs,
     ):
@@ -81,6 +84,10 @@ class CoX3DLearner(X3DLearner):
             num_classes (int, optional): Number of classes to predict among. Defaults to 400.
             temporal_window_size (int, optional): Size of the final global average pooling.
                 If None, size will be automatically chosen according to the backbone. Defaults to None.
+            max_stream_idle_time (float, optional): Time (in seconds) after which a stream of `infer_streams`
+                without frames is dropped. Defaults to 60.0.
+            max_streams (int, optional): Maximum number of streams of `infer_streams`. When a new stream exceeds it,
+                the least recently used stream is dropped. Defaults to None.
         """
         super().__init__(
             lr,
@@ -103,10 +110,13 @@ class CoX3DLearner(X3DLearner):
             seed,
             num_classes,
             *args,
+            max_stream_idle_time=max_stream_idle_time,
+            max_streams=max_streams,
             **kwargs,
         )
         self.temporal_window_size = temporal_window_size
         self._ort_state = None
+        self.streams = ContinualStreams(max_idle_time=max_stream_idle_time, max_streams=max_streams)
 
     def init_model(self) -> CoX3D:
         """Initialise model with random parameters
@@ -181,6 +191,49 @@ class CoX3DLearner(X3DLearner):
             results = [Category(prediction=int(r.argmax(dim=0)), confidence=F.softmax(r, dim=-1)) for r in results]
         return results
 
+    def infer_streams(self, frames: Dict[Hashable, Union[data.Image, torch.Tensor]]) -> Dict[Hashable, Category]:
+        """Run inference on the latest frame of several independent video streams, e.g. cameras.
+        Every stream keeps its own continual state, and the frames of all streams are stepped through the model
+        together, so that a single learner can follow many streams. Streams that are at the same position of the
+        ring buffers of the model, e.g. that started together, share a single forward step.
+        This uses the PyTorch model, also after `optimize`.
+
+        Args:
+            frames (Dict[Hashable, Union[data.Image, torch.Tensor]]): The latest frame of every stream,
+                keyed by the stream id. Every frame should have shape (3, H, W).
+
+        Returns:
+            Dict[Hashable, target.Category]: The output category of every stream,
+                or None while the state of the stream is warming up.
+        """
+        if not isinstance(frames, dict):
+            raise ValueError("frames should be a dict of images keyed by the stream id")
+
+        inputs = {
+            stream_id: torch.as_tensor(frame.data if isinstance(frame, data.Image) else frame).to(
+                device=self.device, dtype=torch.float
+            ).unsqueeze(0)
+            for stream_id, frame in frames.items()
+        }
+        self.model.eval()
+        results = self.streams.step(self.model, inputs)
+        return {
+            stream_id: None if r is None else Category(prediction=int(r[0].argmax(dim=0)), confidence=F.softmax(r[0], dim=-1))
+            for stream_id, r in results.items()
+        }
+
+    def remove_stream(self, stream_id):
+        """Drop the continual state of a stream of `infer_streams`. Its next frame starts a new state.
+
+        Args:
+            stream_id (Hashable): Id of the stream.
+        """
+        self.streams.remove(stream_id)
+
+    def reset(self):
+        """Drop the continual states of all streams of `infer_streams`."""
+        self.streams.reset()
+
     def optimize(self, do_constant_folding=False):
         """Optimize model execution.
         This is accomplished by saving to the ONNX format and loading the optimized model.
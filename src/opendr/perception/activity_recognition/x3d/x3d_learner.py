@@ -22,16 +22,18 @@ from opendr.engine.learners import Learner
 from opendr.engine.helper.io import bump_version
 from torch import onnx
 import onnxruntime as ort
-from opendr.engine.data import Video
+from opendr.engine.data import Image, Video
 from opendr.engine.datasets import Dataset
+from opendr.engine.streams import ClipStreams
 from opendr.engine.target import Category
 
+from opendr.perception.activity_recognition.datasets.utils.transforms import standard_video_transforms
 from opendr.perception.activity_recognition.x3d.algorithm.x3d import X3D
 import pytorch_lightning as pl
 
 from urllib.request import urlretrieve
 from logging import getLogger
-from typing import Any, Iterable, Union, Dict, List
+from typing import Any, Iterable, Union, Dict, List, Hashable
 
 logger = getLogger(__name__)
 
@@ -60,6 +62,9 @@ class X3DLearner(Learner):
         num_workers=0,
         seed=123,
         num_classes=400,
+        clip_stride=1,
+        max_stream_idle_time=60.0,
+        max_streams=None,
         *args,
         **kwargs,
     ):
@@ -85,6 +90,12 @@ class X3DLearner(Learner):
             num_workers (int, optional): Number of workers in dataloader. Defaults to 0.
             seed (int, optional): Random seed. Defaults to 123.
             num_classes (int, optional): Number of classes to predict among. Defaults to 400.
+            clip_stride (int, optional): Number of frames between the clips of a stream of `infer_streams`.
+                Defaults to 1.
+            max_stream_idle_time (float, optional): Time (in seconds) after which a stream of `infer_streams`
+                without frames is dropped. Defaults to 60.0.
+            max_streams (int, optional): Maximum number of streams of `infer_streams`. When a new stream exceeds it,
+                the least recently used stream is dropped. Defaults to None.
         """
         assert backbone in _MODEL_NAMES, f"Invalid model selected. Choose one of {_MODEL_NAMES}."
         assert network_head in {"classification"}, "Currently, only 'classification' head is supported."
@@ -118,9 +129,28 @@ class X3DLearner(Learner):
         self._ort_session = None
         torch.manual_seed(self.seed)
 
+        self.clip_stride = clip_stride
+        self.max_stream_idle_time = max_stream_idle_time
+        self.max_streams = max_streams
+        # Created on the first use of `infer_streams`, which the continual learners do not use
+        self._clip_streams = None
+        self._frame_transform = None
+
         self._load_model_hparams(self.backbone)
         self.init_model()
 
+    @property
+    def clip_streams(self) -> ClipStreams:
+        """The sliding windows of the streams of `infer_streams`."""
+        if self._clip_streams is None:
+            self._clip_streams = ClipStreams(
+                clip_len=self.model_hparams["frames_per_clip"],
+                stride=self.clip_stride,
+                max_idle_time=self.max_stream_idle_time,
+                max_streams=self.max_streams,
+            )
+        return self._clip_streams
+
     def _load_model_hparams(self, model_name: str = None) -> Dict[str, Any]:
         """Load hyperparameters for an X3D model
 
@@ -297,6 +327,9 @@ class X3DLearner(Learner):
             pin_memory=optimizer_info["pin_memory"],
             num_workers=optimizer_info["num_workers"],
             seed=optimizer_info["seed"],
+            clip_stride=self.clip_stride,
+            max_stream_idle_time=self.max_stream_idle_time,
+            max_streams=self.max_streams,
         )
 
         weights_path = path.parent / meta_data["model_paths"]
@@ -330,7 +363,8 @@ class X3DLearner(Learner):
                 assert filename.is_file(), f"Something wen't wrong when downloading {str(filename)}"
 
     def reset(self):
-        pass
+        """Drop the frames of all streams of `infer_streams`."""
+        self.clip_streams.reset()
 
     def fit(
         self,
@@ -482,10 +516,70 @@ class X3DLearner(Learner):
             results = torch.tensor(self._ort_session.run(None, {"video": batch.cpu().numpy()})[0])
         else:
             self.model.eval()
-            results = self.model.forward(batch)
+            with torch.inference_mode():
+                results = self.model.forward(batch)
         results = [Category(prediction=int(r.argmax(dim=0)), confidence=r) for r in results]
         return results
 
+    def infer_streams(self, frames: Dict[Hashable, Union[Image, torch.Tensor]]) -> Dict[Hashable, Category]:
+        """Run inference on the latest frame of several independent video streams, e.g. cameras.
+        Every frame is preprocessed once on the inference device and kept in a sliding window of its stream.
+        Once a stream has `frames_per_clip` frames, and then on every `clip_stride` frames, its latest clip is
+        classified. The clips of all streams are classified in a single batch.
+
+        Args:
+            frames (Dict[Hashable, Union[Image, torch.Tensor]]): The latest frame of every stream,
+                keyed by the stream id. Every frame should be an Image or a uint8 RGB tensor of shape (3, H, W).
+
+        Returns:
+            Dict[Hashable, target.Category]: The output category of every stream,
+                or None if the stream has no new clip.
+        """
+        if not isinstance(frames, dict):
+            raise ValueError("frames should be a dict of images keyed by the stream id")
+
+        with torch.inference_mode():
+            clips = self.clip_streams.push(self._preprocess_frames(frames))
+            results = {stream_id: None for stream_id in frames}
+            if len(clips) > 0:
+                results.update(zip(clips.keys(), self.infer(torch.stack(list(clips.values())))))
+        return results
+
+    def remove_stream(self, stream_id):
+        """Drop the frames of a stream of `infer_streams`. Its next frame starts a new clip.
+
+        Args:
+            stream_id (Hashable): Id of the stream.
+        """
+        self.clip_streams.remove(stream_id)
+
+    def _preprocess_frames(self, frames: Dict[Hashable, Union[Image, torch.Tensor]]) -> Dict[Hashable, torch.Tensor]:
+        """Bring frames into the input format of the model on the inference device, as the evaluation transform of
+        the datasets does. The frames are uploaded as uint8 and frames of the same size are transformed together.
+
+        Args:
+            frames (Dict[Hashable, Union[Image, torch.Tensor]]): RGB frames of shape (3, H, W), keyed by the stream id.
+
+        Returns:
+            Dict[Hashable, torch.Tensor]: Preprocessed frames of shape (3, S, S), keyed by the stream id.
+        """
+        groups = {}
+        for stream_id, frame in frames.items():
+            if isinstance(frame, Image):
+                frame = frame.convert(format="channels_first", channel_order="rgb", copy=False)
+            frame = torch.as_tensor(frame).to(device=self.device)
+            groups.setdefault(tuple(frame.shape), []).append((stream_id, frame))
+
+        if self._frame_transform is None:
+            self._frame_transform = standard_video_transforms(spatial_pixels=self.model_hparams["image_size"])[1]
+
+        results = {}
+        for group in groups.values():
+            # The transform takes a (T, H, W, C) video and returns a (C, T, S, S) clip
+            video = self._frame_transform(torch.stack([frame.permute(1, 2, 0) for _, frame in group]))
+            results.update((stream_id, video[:, i]) for i, (stream_id, _) in enumerate(group))
+        return {stream_id: results[stream_id] for stream_id in frames}
+
     def optimize(self, do_constant_folding=False):
         """Optimize model execution.
         This is accomplished by saving to the ONNX format and loading the optimized model.
@@ -1,4 +1,9 @@
-from opendr.perception.binary_high_resolution.binary_high_resolution_learner import BinaryHighResolutionLearner
-from opendr.perception.binary_high_resolution.utils.utils import visualize
+from opendr.engine.helper.lazy import lazy_exports
+
+# Learners and datasets are only imported when they are first accessed
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'BinaryHighResolutionLearner': '.binary_high_resolution_learner',
+    'visualize': '.utils.utils',
+})
 
 __all__ = ['BinaryHighResolutionLearner', 'visualize']
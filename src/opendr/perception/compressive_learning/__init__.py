@@ -1,4 +1,10 @@
-from opendr.perception.compressive_learning.multilinear_compressive_learning.multilinear_compressive_learner import (
-    MultilinearCompressiveLearner, get_builtin_backbones, PRETRAINED_COMPRESSED_SHAPE)
+from opendr.engine.helper.lazy import lazy_exports
+
+# Learners and datasets are only imported when they are first accessed
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'MultilinearCompressiveLearner': '.multilinear_compressive_learning.multilinear_compressive_learner',
+    'get_builtin_backbones': '.multilinear_compressive_learning.multilinear_compressive_learner',
+    'PRETRAINED_COMPRESSED_SHAPE': '.multilinear_compressive_learning.multilinear_compressive_learner',
+})
 
 __all__ = ['MultilinearCompressiveLearner', 'get_builtin_backbones', 'PRETRAINED_COMPRESSED_SHAPE']
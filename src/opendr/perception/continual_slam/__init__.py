@@ -1,3 +1,8 @@
-from opendr.perception.continual_slam.continual_slam_learner import ContinualSLAMLearner
+from opendr.engine.helper.lazy import lazy_exports
+
+# Learners and datasets are only imported when they are first accessed
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'ContinualSLAMLearner': '.continual_slam_learner',
+})
 
 __all__ = ['ContinualSLAMLearner']
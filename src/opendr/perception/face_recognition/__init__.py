@@ -1,3 +1,8 @@
-from opendr.perception.face_recognition.face_recognition_learner import FaceRecognitionLearner
+from opendr.engine.helper.lazy import lazy_exports
+
+# Learners and datasets are only imported when they are first accessed
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'FaceRecognitionLearner': '.face_recognition_learner',
+})
 
 __all__ = ['FaceRecognitionLearner']
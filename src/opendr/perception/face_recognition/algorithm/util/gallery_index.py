@@ -0,0 +1,407 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+from collections.abc import MutableMapping
+
+import numpy as np
+
+_METADATA = "gallery.json"
+_EMBEDDINGS = "embeddings.bin"
+_ROW_LABELS = "labels.bin"
+
+
+def _normalize(embeddings):
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim == 1:
+        embeddings = embeddings[None]
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+class GalleryIndex(MutableMapping):
+    """
+    Index over the reference embeddings of the enrolled identities, used for matching query faces.
+
+    The index is a mapping from every identity to its reference embeddings, so it can be used in place of the dict
+    based reference database: index[label] returns the (normalized) embeddings of an identity, assigning to it
+    replaces them and deleting it removes the identity.
+
+    All reference embeddings are kept L2-normalized in one contiguous matrix, grouped by identity, so that the
+    squared euclidean distances between a batch of queries and the whole gallery are computed with a single matrix
+    product (||q - r||^2 = 2 - 2 q.r) and reduced to the closest embedding of each identity.
+
+    Identities can be added and removed incrementally. For very large galleries, an approximate inverted file index
+    can be enabled: the embeddings are clustered with k-means and only the clusters closest to a query are searched.
+
+    An index is saved in a directory holding the raw (float16 or float32) embedding matrix, the identity of every
+    row and a small JSON file with the identity names. Loading memory-maps the matrix, so it takes milliseconds
+    regardless of the gallery size, and saving again to the same directory only appends the new embeddings.
+    """
+
+    def __init__(self, approximate=False, num_lists=None, num_probes=8, min_approximate_size=100000, seed=0):
+        """
+        :param approximate: whether the approximate inverted file index is used for large galleries
+        :type approximate: bool
+        :param num_lists: number of k-means clusters of the approximate index, defaults to sqrt(size)
+        :type num_lists: int, optional
+        :param num_probes: number of clusters searched per query by the approximate index
+        :type num_probes: int
+        :param min_approximate_size: gallery size from which the approximate index is used, smaller galleries are
+            always searched exactly
+        :type min_approximate_size: int
+        :param seed: seed of the k-means initialization
+        :type seed: int
+        """
+        self.approximate = approximate
+        self.num_lists = num_lists
+        self.num_probes = num_probes
+        self.min_approximate_size = min_approximate_size
+        self.seed = seed
+
+        self.labels = []
+        self._label_ids = {}
+        self._pending = []
+        self._dim = None
+        self._embeddings = None
+        self._row_labels = np.empty((0,), dtype=np.int64)
+        self._starts = np.empty((0,), dtype=np.int64)
+        self._sorted = True
+        self._centroids = None
+        self._lists = None
+        self._trained_size = 0
+        self._saved = None
+        self._unsaved = []
+
+    def __len__(self):
+        """
+        Returns the number of enrolled identities.
+        """
+        return len(self._label_ids)
+
+    @property
+    def size(self):
+        """
+        Returns the number of reference embeddings.
+        """
+        self.__consolidate()
+        return self._row_labels.shape[0]
+
+    def __contains__(self, label):
+        return label in self._label_ids
+
+    def __iter__(self):
+        return iter(list(self.labels))
+
+    def __getitem__(self, label):
+        """
+        Returns the normalized reference embeddings of an identity.
+
+        :param label: the identity
+        :type label: hashable
+        :return: a (copied) array of shape (N, dim)
+        :rtype: numpy.ndarray
+        """
+        if label not in self._label_ids:
+            raise KeyError(label)
+        self.__prepare()
+        return self._embeddings[self._row_labels == self._label_ids[label]]
+
+    def __setitem__(self, label, embeddings):
+        """
+        Replaces the reference embeddings of an identity, which is enrolled if it is not already.
+        """
+        if label in self._label_ids:
+            self.remove(label)
+        self.add(label, embeddings)
+
+    def __delitem__(self, label):
+        self.remove(label)
+
+    @classmethod
+    def from_database(cls, database, **kwargs):
+        """
+        Builds an index from a reference database, i.e., a dict mapping every identity to its reference embeddings.
+
+        :param database: the reference database created by FaceRecognitionLearner.fit_reference()
+        :type database: dict
+        :return: the index
+        :rtype: GalleryIndex
+        """
+        index = cls(**kwargs)
+        for label, embeddings in database.items():
+            index.add(label, embeddings)
+        return index
+
+    def add(self, label, embeddings):
+        """
+        Adds reference embeddings of an identity, which is enrolled if it is not already.
+
+        :param label: the identity
+        :type label: hashable
+        :param embeddings: one or more embeddings, with shape (dim,) or (N, dim)
+        :type embeddings: numpy.ndarray or torch.Tensor
+        """
+        if hasattr(embeddings, "detach"):
+            embeddings = embeddings.detach().cpu().numpy()
+        embeddings = _normalize(embeddings)
+        if embeddings.shape[0] == 0:
+            raise ValueError("At least one embedding is required per identity.")
+        if self._dim is None:
+            self._dim = embeddings.shape[1]
+        elif embeddings.shape[1] != self._dim:
+            raise ValueError("Expected embeddings of size " + str(self._dim) + ", got " + str(embeddings.shape[1]) +
+                             ".")
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = self._label_ids[label] = len(self.labels)
+            self.labels.append(label)
+        self._pending.append((label_id, embeddings))
+        self._unsaved.append((label_id, embeddings))
+
+    def remove(self, label):
+        """
+        Removes an identity and all its reference embeddings.
+
+        :param label: the identity
+        :type label: hashable
+        """
+        if label not in self._label_ids:
+            raise KeyError(label)
+        self.__prepare()
+        label_id = self._label_ids.pop(label)
+        keep = self._row_labels != label_id
+        self._embeddings = self._embeddings[keep]
+        self._row_labels = self._row_labels[keep]
+        # Identity ids are kept contiguous, so that they can be used as columns of the distance matrix
+        last = len(self.labels) - 1
+        if label_id != last:
+            moved = self.labels[last]
+            self.labels[label_id] = moved
+            self._label_ids[moved] = label_id
+            self._row_labels[self._row_labels == last] = label_id
+        self.labels.pop()
+        self.__sort()
+        # Removals are only persisted by rewriting the whole gallery
+        self._saved = None
+
+    def __consolidate(self):
+        # Pending embeddings are appended in one go, so that enrolling many identities is linear
+        if not self._pending:
+            return
+        embeddings = [embeddings for _, embeddings in self._pending]
+        row_labels = [np.full((len(embeddings),), label_id, dtype=np.int64) for label_id, embeddings in self._pending]
+        if self._embeddings is not None:
+            embeddings.insert(0, self._embeddings)
+            row_labels.insert(0, self._row_labels)
+        self._embeddings = np.concatenate(embeddings).astype(np.float32, copy=False)
+        self._row_labels = np.concatenate(row_labels)
+        self._pending = []
+        self._sorted = False
+        self._lists = None
+
+    def __prepare(self):
+        # Brings the index in its searchable form: rows grouped by identity in a float32 matrix
+        self.__consolidate()
+        if self._embeddings is not None and self._embeddings.dtype != np.float32:
+            self._embeddings = self._embeddings.astype(np.float32)
+        if not self._sorted:
+            self.__sort()
+
+    def __sort(self):
+        if np.any(self._row_labels[1:] < self._row_labels[:-1]):
+            order = np.argsort(self._row_labels, kind="stable")
+            self._embeddings = np.ascontiguousarray(self._embeddings[order])
+            self._row_labels = self._row_labels[order]
+        self._starts = np.flatnonzero(np.r_[True, self._row_labels[1:] != self._row_labels[:-1]]) \
+            if self._row_labels.shape[0] else np.empty((0,), dtype=np.int64)
+        self._sorted = True
+        self._lists = None
+
+    def __train(self):
+        # Lloyd's k-means on the (normalized) embeddings, retrained whenever the gallery doubles in size
+        size = self._embeddings.shape[0]
+        num_lists = min(size, self.num_lists or int(np.sqrt(size)))
+        if self._centroids is None or size >= 2 * self._trained_size or 2 * size <= self._trained_size:
+            rng = np.random.RandomState(self.seed)
+            sample = self._embeddings[rng.choice(size, min(size, 64 * num_lists), replace=False)]
+            centroids = sample[rng.choice(sample.shape[0], num_lists, replace=False)]
+            for _ in range(10):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, sample)
+                counts = np.bincount(assignment, minlength=num_lists)
+                centroids = np.where(counts[:, None] > 0, sums, centroids)
+                centroids = _normalize(centroids)
+            self._centroids = centroids
+            self._trained_size = size
+        assignment = np.argmax(self._embeddings @ self._centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        self._lists = (order, np.searchsorted(assignment[order], np.arange(self._centroids.shape[0] + 1)))
+
+    def distances(self, queries):
+        """
+        Returns the squared euclidean distance between every query and the closest reference embedding of every
+        identity.
+
+        :param queries: the query embeddings, with shape (dim,) or (Q, dim)
+        :type queries: numpy.ndarray or torch.Tensor
+        :return: an array of shape (Q, number of identities), whose columns follow the order of *labels*
+        :rtype: numpy.ndarray
+        """
+        if hasattr(queries, "detach"):
+            queries = queries.detach().cpu().numpy()
+        self.__prepare()
+        return self.__distances(_normalize(queries))
+
+    def __distances(self, queries):
+        if self._row_labels.shape[0] == 0:
+            return np.empty((queries.shape[0], 0), dtype=np.float32)
+        distances = np.maximum(2 - 2 * (queries @ self._embeddings.T), 0)
+        return np.minimum.reduceat(distances, self._starts, axis=1)
+
+    def search(self, queries, k=1):
+        """
+        Returns the k nearest identities of every query.
+
+        :param queries: the query embeddings, with shape (dim,) or (Q, dim)
+        :type queries: numpy.ndarray or torch.Tensor
+        :param k: number of identities returned per query
+        :type k: int
+        :return: for every query, a list of up to k (identity, squared euclidean distance) tuples, closest first
+        :rtype: list of list of tuple
+        """
+        if hasattr(queries, "detach"):
+            queries = queries.detach().cpu().numpy()
+        queries = _normalize(queries)
+        self.__prepare()
+        if self.approximate and self._row_labels.shape[0] >= self.min_approximate_size:
+            return [self.__search_approximate(query, k) for query in queries]
+
+        distances = self.__distances(queries)
+        k = min(k, distances.shape[1])
+        if k == 0:
+            return [[] for _ in range(queries.shape[0])]
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        results = []
+        for query_distances, candidates in zip(distances, nearest):
+            candidates = candidates[np.argsort(query_distances[candidates], kind="stable")]
+            results.append([(self.labels[i], float(query_distances[i])) for i in candidates])
+        return results
+
+    def __search_approximate(self, query, k):
+        if self._lists is None:
+            self.__train()
+        order, bounds = self._lists
+        probes = np.argsort(-(self._centroids @ query))[:self.num_probes]
+        rows = np.concatenate([order[bounds[p]:bounds[p + 1]] for p in probes])
+        distances = np.maximum(2 - 2 * (self._embeddings[rows] @ query), 0)
+        row_labels = self._row_labels[rows]
+        # Keep the closest row of every identity, then the k closest identities
+        rank = np.lexsort((distances, row_labels))
+        first = np.r_[True, row_labels[rank][1:] != row_labels[rank][:-1]]
+        best = rank[first]
+        best = best[np.argsort(distances[best], kind="stable")[:k]]
+        return [(self.labels[row_labels[i]], float(distances[i])) for i in best]
+
+    def save(self, path, dtype=np.float32):
+        """
+        Saves the index in a directory. If the index was loaded from (or last saved to) the same directory with the
+        same dtype and no identity was removed since, only the embeddings added since are appended.
+
+        :param path: directory of the gallery, created if it does not exist
+        :type path: str
+        :param dtype: dtype of the stored embeddings, either float16 or float32
+        :type dtype: numpy.dtype or str
+        """
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float16, np.float32):
+            raise ValueError("Embeddings can only be stored as float16 or float32.")
+        os.makedirs(path, exist_ok=True)
+        self.__consolidate()
+        files = [os.path.join(path, _EMBEDDINGS), os.path.join(path, _ROW_LABELS)]
+        if self._saved is not None and self._saved[:2] == (os.path.abspath(path), dtype.str):
+            count = self._saved[2]
+            rows = self._unsaved
+            mode = "r+b"
+            targets = files
+        else:
+            count = 0
+            self.__prepare()
+            rows = [(self._row_labels, self._embeddings)] if self._embeddings is not None else []
+            mode = "wb"
+            # The gallery is rewritten in new files, since the current ones may be memory-mapped by this (or
+            # another) index, and truncating a mapped file makes any later read of the mapping fail
+            targets = [file + ".tmp" for file in files]
+        with open(targets[0], mode) as embeddings_file, open(targets[1], mode) as labels_file:
+            # Anything past the rows listed in the metadata, e.g., from an interrupted save, is discarded
+            embeddings_file.truncate(count * self._dim * dtype.itemsize if self._dim else 0)
+            labels_file.truncate(count * 4)
+            embeddings_file.seek(0, os.SEEK_END)
+            labels_file.seek(0, os.SEEK_END)
+            for label_ids, embeddings in rows:
+                embeddings = np.ascontiguousarray(embeddings, dtype=dtype)
+                embeddings_file.write(embeddings.tobytes())
+                labels_file.write(np.broadcast_to(np.asarray(label_ids, dtype=np.int32),
+                                                  (embeddings.shape[0],)).tobytes())
+                count += embeddings.shape[0]
+        for target, file in zip(targets, files):
+            if target != file:
+                os.replace(target, file)
+        metadata = {"version": 1, "dim": self._dim, "dtype": dtype.str, "count": count, "labels": self.labels}
+        # The metadata is replaced last, so that an interrupted save leaves the previous gallery readable
+        with open(os.path.join(path, _METADATA + ".tmp"), "w") as f:
+            json.dump(metadata, f)
+        os.replace(os.path.join(path, _METADATA + ".tmp"), os.path.join(path, _METADATA))
+        self._saved = (os.path.abspath(path), dtype.str, count)
+        self._unsaved = []
+
+    @staticmethod
+    def exists(path):
+        """
+        Returns whether a saved gallery exists in a directory.
+
+        :param path: directory of the gallery
+        :type path: str
+        :rtype: bool
+        """
+        return os.path.exists(os.path.join(path, _METADATA))
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """
+        Loads an index saved with save(). The embeddings are memory-mapped and are only read when searched.
+
+        :param path: directory of the gallery
+        :type path: str
+        :return: the index
+        :rtype: GalleryIndex
+        """
+        with open(os.path.join(path, _METADATA)) as f:
+            metadata = json.load(f)
+        index = cls(**kwargs)
+        count, dim, dtype = metadata["count"], metadata["dim"], np.dtype(metadata["dtype"])
+        index.labels = list(metadata["labels"])
+        index._label_ids = {label: i for i, label in enumerate(index.labels)}
+        index._dim = dim
+        if count > 0:
+            index._embeddings = np.memmap(os.path.join(path, _EMBEDDINGS), dtype=dtype, mode="r", shape=(count, dim))
+            index._row_labels = np.fromfile(os.path.join(path, _ROW_LABELS), dtype=np.int32,
+                                            count=count).astype(np.int64)
+            if index._row_labels.shape[0] != count:
+                raise ValueError("Gallery " + path + " is truncated.")
+            index._sorted = False
+        index._saved = (os.path.abspath(path), dtype.str, count)
+        return index
@@ -50,7 +50,6 @@ import os
 import json
 import shutil
 from urllib.request import urlretrieve
-from collections import defaultdict
 
 from opendr.engine.learners import Learner
 from opendr.engine.data import Image
@@ -68,6 +67,21 @@ from opendr.perception.face_recognition.algorithm.util.utils import make_weights
     separate_resnet_bn_paras, warm_up_lr, schedule_lr, perform_val, perform_val_imagefolder, buffer_val, AverageMeter, \
     accuracy
 from opendr.perception.face_recognition.algorithm.align.align import face_align
+from opendr.perception.face_recognition.algorithm.util.gallery_index import GalleryIndex
+
+
+class _ReferenceImages(torch.utils.data.Dataset):
+    def __init__(self, files, transform):
+        self.files = files
+        self.transform = transform
+
+    def __getitem__(self, idx):
+        person_id, file = self.files[idx]
+        image = cv2.cvtColor(cv2.imread(file), cv2.COLOR_BGR2RGB)
+        return self.transform(PILImage.fromarray(image)), person_id
+
+    def __len__(self):
+        return len(self.files)
 
 
 class FaceRecognitionLearner(Learner):
@@ -78,7 +92,7 @@ class FaceRecognitionLearner(Learner):
                  input_size=[112, 112], rgb_mean=[0.5, 0.5, 0.5], rgb_std=[0.5, 0.5, 0.5], embedding_size=512,
                  weight_decay=5e-4, momentum=0.9, drop_last=True, stages=[35, 65, 95],
                  pin_memory=True, num_workers=4,
-                 seed=123):
+                 seed=123, approximate_search=False):
         super(FaceRecognitionLearner, self).__init__(lr=lr, iters=iters, batch_size=batch_size, optimizer=optimizer,
                                                      backbone=backbone, network_head=network_head, temp_path=temp_path,
                                                      checkpoint_after_iter=checkpoint_after_iter,
@@ -109,6 +123,7 @@ class FaceRecognitionLearner(Learner):
         self.stages = stages
         self.pin_memory = pin_memory
         self.num_workers = num_workers
+        self.approximate_search = approximate_search
 
         torch.manual_seed(self.seed)
 
@@ -387,64 +402,144 @@ class FaceRecognitionLearner(Learner):
 
         return {'Training_statistics': results, 'Evaluation_statistics': eval_results}
 
-    def fit_reference(self, path=None, save_path=None, create_new=True):
+    def fit_reference(self, path=None, save_path=None, create_new=True, dtype='float32'):
         """
         Implementation to create reference database. Provided with a path with reference images and a save_path,
-        it creates a .pkl file containing the features of the reference images, and saves it
-        in the save_path.
-        :param path: path containing the reference images
+        it computes the features of the reference images in batches and saves them as a gallery (a memory-mapped
+        embedding matrix and a label index) in the save_path.
+        :param path: path containing the reference images, one sub-folder per person
         :type path: str
-        :param save_path: path to save the .pkl file
+        :param save_path: path to save the gallery
         :type save_path: str
-        :param create_new: create new reference.pkl file. If false it will attempt to load an existing reference.pkl
-         file from save_path.
+        :param create_new: create a new gallery. If false it will load an existing gallery (or legacy reference.pkl
+         file) from save_path and only compute the features of the persons of path that are not already in it.
         :type create_new: bool, default=True
+        :param dtype: dtype of the stored embeddings, 'float16' or 'float32'
+        :type dtype: str, default='float32'
         """
         if self._model is None and self.ort_backbone_session is None:
             raise UserWarning('A model should be loaded first')
         self.database_path = path
-        if os.path.exists(os.path.join(save_path, 'reference.pkl')) and not create_new:
+        if not create_new and GalleryIndex.exists(save_path):
+            print('Loading Reference')
+            database = GalleryIndex.load(save_path, approximate=self.approximate_search)
+        elif not create_new and os.path.exists(os.path.join(save_path, 'reference.pkl')):
             print('Loading Reference')
-            self.database = pickle.load(open(os.path.join(save_path, 'reference.pkl'), "rb"))
+            with open(os.path.join(save_path, 'reference.pkl'), "rb") as f:
+                database = GalleryIndex.from_database(pickle.load(f), approximate=self.approximate_search)
         else:
-            if not os.path.exists(save_path):
-                os.makedirs(save_path)
-            database = defaultdict(list)
-            transform = transforms.Compose([
-                transforms.Resize([int(128 * self.input_size[0] / 112), int(128 * self.input_size[0] / 112)]),
-                transforms.CenterCrop([self.input_size[0], self.input_size[1]]),
-                transforms.ToTensor(),
-                transforms.Normalize(mean=self.rgb_mean, std=self.rgb_std)]
-            )
-            with torch.no_grad():
-                for subdir, dirs, files in os.walk(path):
-                    if subdir == path:
-                        continue
-                    subdir1 = subdir.split('/')
-                    subdir1 = subdir1[-1]
-                    total = 0
-                    features_sum = torch.zeros(1, self.embedding_size).to(self.device)
-                    for file in files:
-                        total += 1
-                        inputs = cv2.imread(os.path.join(subdir, file))
-                        inputs = transform(PILImage.fromarray(
-                            cv2.cvtColor(inputs, cv2.COLOR_BGR2RGB))
-                        )
-                        inputs = inputs.unsqueeze(0)
-                        if self.ort_backbone_session is not None:
-                            features = self.ort_backbone_session.run(None, {'data': np.array(inputs.cpu())})
-                            features = torch.tensor(features[0]).to(self.device)
-                        else:
-                            self.backbone_model.eval()
-                            inputs = inputs.to(self.device)
-                            features = self.backbone_model(inputs)
-                        features = l2_norm(features)
-                        features_sum += features
-                    database[subdir1] = features
-            f = open(os.path.join(save_path, "reference.pkl"), "wb")
-            pickle.dump(database, f)
-            f.close()
-            self.database = database
+            database = GalleryIndex(approximate=self.approximate_search)
+
+        if path is not None:
+            names, files = [], []
+            for subdir, dirs, subdir_files in os.walk(path):
+                if subdir == path:
+                    continue
+                name = subdir.split('/')[-1]
+                if name in database or len(subdir_files) == 0:
+                    continue
+                files.extend((len(names), os.path.join(subdir, file)) for file in sorted(subdir_files))
+                names.append(name)
+            if len(files) > 0:
+                # The average of the (normalized) embeddings of each person is kept
+                features_sum = np.zeros((len(names), self.embedding_size), dtype=np.float64)
+                for ids, features in self.__reference_features(files):
+                    np.add.at(features_sum, ids, features)
+                for name, features in zip(names, features_sum):
+                    database.add(name, features)
+        database.save(save_path, dtype=dtype)
+        self.database = database
+
+    def __reference_features(self, files):
+        # Yields the ids and the normalized features of the reference images, batch by batch
+        transform = transforms.Compose([
+            transforms.Resize([int(128 * self.input_size[0] / 112), int(128 * self.input_size[0] / 112)]),
+            transforms.CenterCrop([self.input_size[0], self.input_size[1]]),
+            transforms.ToTensor(),
+            transforms.Normalize(mean=self.rgb_mean, std=self.rgb_std)]
+        )
+        loader = torch.utils.data.DataLoader(_ReferenceImages(files, transform), batch_size=self.batch_size,
+                                             num_workers=self.num_workers,
+                                             pin_memory=self.pin_memory and 'cuda' in self.device)
+        if self.ort_backbone_session is None:
+            self.backbone_model.eval()
+        with torch.no_grad():
+            for inputs, ids in loader:
+                if self.ort_backbone_session is not None:
+                    # The exported backbone has a fixed batch size of 1
+                    features = np.concatenate([self.ort_backbone_session.run(None, {'data': sample[None]})[0]
+                                               for sample in inputs.numpy()])
+                    features = torch.tensor(features)
+                else:
+                    features = self.backbone_model(inputs.to(self.device))
+                yield ids.numpy(), l2_norm(features).cpu().numpy()
+
+    @property
+    def database(self):
+        """
+        Returns the reference database, or None if it has not been created or loaded yet.
+
+        :rtype: GalleryIndex
+        """
+        return self._database
+
+    @database.setter
+    def database(self, database):
+        """
+        Sets the reference database. A dict of embeddings (e.g., loaded from a legacy reference.pkl file) is indexed
+        right away, so later changes have to be made through the returned index, e.g., with add_reference().
+
+        :param database: the reference database
+        :type database: GalleryIndex or dict
+        """
+        if isinstance(database, dict):
+            database = GalleryIndex.from_database(database, approximate=self.approximate_search)
+        self._database = database
+
+    @property
+    def gallery(self):
+        """
+        Returns the index over the reference database.
+
+        :rtype: GalleryIndex
+        """
+        return self._database
+
+    def add_reference(self, name, features):
+        """
+        Enrolls a person (or adds embeddings to an enrolled one) without recreating the reference database.
+        The gallery on disk is only updated by calling gallery.save(), which then appends the new embeddings.
+
+        :param name: the ID of the person
+        :type name: str
+        :param features: the embeddings of the person, e.g., as returned by feature_extraction()
+        :type features: torch.Tensor
+        """
+        if self.database is None:
+            self.database = GalleryIndex(approximate=self.approximate_search)
+        self.gallery.add(name, features)
+
+    def remove_reference(self, name):
+        """
+        Removes a person from the reference database.
+        The gallery on disk is only updated by calling gallery.save(), which then rewrites the gallery.
+
+        :param name: the ID of the person
+        :type name: str
+        """
+        if self.database is None:
+            raise KeyError(name)
+        self.gallery.remove(name)
+
+    def __match(self, features):
+        # Returns the closest identity of the reference database and its squared distance to the features
+        if self.database is None:
+            raise UserWarning('A reference for comparison should be created first. Try calling fit_reference()')
+        matches = self.gallery.search(features, k=1)[0]
+        if len(matches) == 0:
+            return None, None
+        person, distance = matches[0]
+        return person, 10.0 if np.isnan(distance) else distance
 
     def infer(self, img):
         """
@@ -486,21 +581,11 @@ class FaceRecognitionLearner(Learner):
                     self.backbone_model.eval()
                     features = self.backbone_model(img)
                 features = l2_norm(features)
-            if self.database is None:
-                raise UserWarning('A reference for comparison should be created first. Try calling fit_reference()')
-            for key in self.database:
-                for item in self.database[key]:
-                    diff = np.subtract(features.cpu().numpy(), item.cpu().numpy())
-                    dist = np.sum(np.square(diff), axis=1)
-                    if np.isnan(dist):
-                        dist = 10
-                    if dist < distance:
-                        distance = dist
-                        person = key
-            if type(distance) != float:
-                confidence = 1 - (distance.item() / self.threshold)
-            else:
-                confidence = 1 - (distance / self.threshold)
+            closest_id, dist = self.__match(features)
+            if closest_id is not None and dist < distance:
+                distance = dist
+                person = closest_id
+            confidence = 1 - (distance / self.threshold)
             if person is not None:
                 person = Category(0, person, confidence)
                 return person
@@ -575,21 +660,11 @@ class FaceRecognitionLearner(Learner):
                     self.backbone_model.eval()
                     features = self.backbone_model(img)
                 features = l2_norm(features)
-            if self.database is None:
-                raise UserWarning('A reference for comparison should be created first. Try calling fit_reference()')
-            for key in self.database:
-                for item in self.database[key]:
-                    diff = np.subtract(features.cpu().numpy(), item.cpu().numpy())
-                    dist = np.sum(np.square(diff), axis=1)
-                    if np.isnan(dist):
-                        dist = 10
-                    if dist < distance:
-                        distance = dist
-                        closest_id = key
-            if type(distance) != float:
-                confidence = distance.item()
-            else:
-                confidence = distance
+            key, dist = self.__match(features)
+            if key is not None and dist < distance:
+                distance = dist
+                closest_id = key
+            confidence = distance
             return features, closest_id, confidence
 
         else:
@@ -1,3 +1,8 @@
-from opendr.perception.fall_detection.fall_detector_learner import FallDetectorLearner
+from opendr.engine.helper.lazy import lazy_exports
+
+# Learners and datasets are only imported when they are first accessed
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'FallDetectorLearner': '.fall_detector_learner',
+})
 
 __all__ = ['FallDetectorLearner']
@@ -1,13 +1,14 @@
-from opendr.perception.multimodal_human_centric.rgbd_hand_gesture_learner.rgbd_hand_gesture_learner import (
-    RgbdHandGestureLearner,
-    get_builtin_architectures,
-)
-from opendr.perception.multimodal_human_centric.\
-    audiovisual_emotion_learner.avlearner import AudiovisualEmotionLearner
-from opendr.perception.multimodal_human_centric.\
-    audiovisual_emotion_learner.algorithm.data import get_audiovisual_emotion_dataset
-from opendr.perception.multimodal_human_centric.audiovisual_emotion_learner.algorithm import spatial_transforms
-from opendr.perception.multimodal_human_centric.intent_recognition_learner.\
-    intent_recognition_learner import IntentRecognitionLearner
+from opendr.engine.helper.lazy import lazy_exports
+
+# Learners and datasets are only imported when they are first accessed
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'RgbdHandGestureLearner': '.rgbd_hand_gesture_learner.rgbd_hand_gesture_learner',
+    'get_builtin_architectures': '.rgbd_hand_gesture_learner.rgbd_hand_gesture_learner',
+    'AudiovisualEmotionLearner': '.audiovisual_emotion_learner.avlearner',
+    'get_audiovisual_emotion_dataset': '.audiovisual_emotion_learner.algorithm.data',
+    'spatial_transforms': '.audiovisual_emotion_learner.algorithm',
+    'IntentRecognitionLearner': '.intent_recognition_learner.intent_recognition_learner',
+})
+
 __all__ = ['RgbdHandGestureLearner', 'get_builtin_architectures', 'AudiovisualEmotionLearner',
            'get_audiovisual_emotion_dataset', 'spatial_transforms', 'IntentRecognitionLearner']
@@ -56,6 +56,7 @@ from opendr.engine.target import BoundingBox, BoundingBoxList
 from opendr.engine.constants import OPENDR_SERVER_URL
 
 from opendr.engine.learners import Learner
+from opendr.engine.profiling import profiler
 from urllib.request import urlretrieve
 
 import onnxruntime as ort
@@ -846,47 +847,50 @@ class NanodetLearner(Learner):
                                        ch_l=ch_l)
 
         if not isinstance(input, Image):
-            input = Image(input)
-        _input = input.opencv()
-
-        _input, *metadata = self.predictor.preprocessing(_input)
-
-        if self.trt_model:
-            if self.jit_model or self.ort_session:
-                warnings.warn(
-                    "Warning: More than one optimization types are initialized, "
-                    "inference will run in TensorRT mode by default.\n"
-                    "To run in a specific optimization please delete the self.ort_session, self.jit_model or "
-                    "self.trt_model like: detector.ort_session = None.")
-            preds = self.trt_model(_input)
-        elif self.jit_model:
-            if self.ort_session:
-                warnings.warn(
-                    "Warning: Both JIT and ONNX models are initialized, inference will run in JIT mode by default.\n"
-                    "To run in JIT please delete the self.ort_session like: detector.ort_session = None.")
-            self.jit_model = self.jit_model.half() if hf else self.jit_model.float()
-
-            preds = self.jit_model(_input, *metadata)
-        elif self.ort_session:
-            preds = self.ort_session.run(['output'], {'data': _input.cpu().numpy()})
-            preds = torch.from_numpy(preds[0]).to(self.device, torch.half if hf else torch.float32)
-        else:
-            self.predictor.model = self.predictor.model.half() if hf else self.predictor.model.float()
-            preds = self.predictor(_input)
-        res = self.predictor.postprocessing(preds, _input, *metadata)
-
-        bounding_boxes = []
-        if res.numel() != 0:
-            for box in res:
-                box = box.to("cpu")
-                bbox = BoundingBox(left=box[0], top=box[1],
-                                   width=box[2] - box[0],
-                                   height=box[3] - box[1],
-                                   name=box[5],
-                                   score=box[4])
-                bounding_boxes.append(bbox)
-        bounding_boxes = BoundingBoxList(bounding_boxes)
-        bounding_boxes.data.sort(key=lambda v: v.confidence)
+            input = Image(input, copy=False)
+        with profiler.stage("nanodet/preprocess"):
+            _input = input.opencv(copy=False)
+            _input, *metadata = self.predictor.preprocessing(_input)
+
+        with profiler.stage("nanodet/forward"):
+            if self.trt_model:
+                if self.jit_model or self.ort_session:
+                    warnings.warn(
+                        "Warning: More than one optimization types are initialized, "
+                        "inference will run in TensorRT mode by default.\n"
+                        "To run in a specific optimization please delete the self.ort_session, self.jit_model or "
+                        "self.trt_model like: detector.ort_session = None.")
+                preds = self.trt_model(_input)
+            elif self.jit_model:
+                if self.ort_session:
+                    warnings.warn(
+                        "Warning: Both JIT and ONNX models are initialized, inference will run in JIT mode by default.\n"
+                        "To run in JIT please delete the self.ort_session like: detector.ort_session = None.")
+                self.jit_model = self.jit_model.half() if hf else self.jit_model.float()
+
+                preds = self.jit_model(_input, *metadata)
+            elif self.ort_session:
+                preds = self.ort_session.run(['output'], {'data': _input.cpu().numpy()})
+                preds = torch.from_numpy(preds[0]).to(self.device, torch.half if hf else torch.float32)
+            else:
+                self.predictor.model = self.predictor.model.half() if hf else self.predictor.model.float()
+                preds = self.predictor(_input)
+
+        with profiler.stage("nanodet/postprocess"):
+            res = self.predictor.postprocessing(preds, _input, *metadata)
+
+            bounding_boxes = []
+            if res.numel() != 0:
+                for box in res:
+                    box = box.to("cpu")
+                    bbox = BoundingBox(left=box[0], top=box[1],
+                                       width=box[2] - box[0],
+                                       height=box[3] - box[1],
+                                       name=box[5],
+                                       score=box[4])
+                    bounding_boxes.append(bbox)
+            bounding_boxes = BoundingBoxList(bounding_boxes)
+            bounding_boxes.data.sort(key=lambda v: v.confidence)
 
         return bounding_boxes
 
@@ -28,9 +28,9 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 from opendr.perception.object_detection_2d.nms.utils import NMSCustom
-from opendr.perception.object_detection_2d.nms.utils.nms_utils import jaccard, diou, distance
+from opendr.perception.object_detection_2d.nms.utils.nms_utils import jaccard, diou, distance, to_device, \
+    mask_padding, batch_top_k, select_top_detections
 from opendr.engine.target import BoundingBox, BoundingBoxList
-import numpy as np
 import torch
 
 
@@ -65,70 +65,20 @@ class ClusterNMS(NMSCustom):
     def set_cross_class(self, cross_class=True):
         self.cross_class = cross_class
 
-    def run_nms(self, boxes=None, scores=None, img=None, threshold=0.2):
-
-        if isinstance(boxes, np.ndarray):
-            boxes = torch.tensor(boxes, device=self.device)
-        elif torch.is_tensor(boxes):
-            if self.device == 'cpu':
-                boxes = boxes.cpu()
-            elif self.device == 'cuda':
-                boxes = boxes.cuda()
-
-        if isinstance(scores, np.ndarray):
-            scores = torch.tensor(scores, device=self.device)
-        elif torch.is_tensor(scores):
-            if self.device == 'cpu':
-                scores = scores.cpu()
-            elif self.device == 'cuda':
-                scores = scores.cuda()
-
-        scores = torch.transpose(scores, dim0=1, dim1=0)
+    def run_nms_batch(self, boxes=None, scores=None, threshold=0.2, num_boxes=None, imgs=None, maps=None):
+        boxes = to_device(boxes, self.device).float()
+        scores = mask_padding(to_device(scores, self.device).float(), num_boxes)
+        return cluster_nms_batch(boxes=boxes, scores=scores, nms_type=self.nms_type, cross_class=self.cross_class,
+                                 nms_thres=self.nms_thres, top_k=self.top_k, post_k=self.post_k, threshold=threshold)
 
-        if self.nms_type == 'default':
-            if self.cross_class:
-                [boxes, classes, scores] = cc_cluster_nms_default(boxes=boxes, scores=scores, nms_thres=self.nms_thres,
-                                                                  top_k=self.top_k, post_k=self.post_k)
-            else:
-                [boxes, classes, scores] = cluster_nms_default(boxes=boxes, scores=scores, nms_thres=self.nms_thres,
-                                                               top_k=self.top_k, post_k=self.post_k)
-        elif self.nms_type == 'diou':
-            if self.cross_class:
-                [boxes, classes, scores] = cc_cluster_diounms(boxes=boxes, scores=scores, nms_thres=self.nms_thres,
-                                                              top_k=self.top_k, post_k=self.post_k)
-            else:
-                [boxes, classes, scores] = cluster_diounms(boxes=boxes, scores=scores, nms_thres=self.nms_thres,
-                                                           top_k=self.top_k, post_k=self.post_k)
-        elif self.nms_type == 'spm':
-            if self.cross_class:
-                [boxes, classes, scores] = cc_cluster_SPM_nms(boxes=boxes, scores=scores, nms_thres=self.nms_thres,
-                                                              top_k=self.top_k, post_k=self.post_k)
-            else:
-                [boxes, classes, scores] = cluster_SPM_nms(boxes=boxes, scores=scores, nms_thres=self.nms_thres,
-                                                           top_k=self.top_k, post_k=self.post_k)
-        elif self.nms_type == 'spm_dist':
-            if self.cross_class:
-                [boxes, classes, scores] = cc_cluster_SPM_dist_nms(boxes=boxes, scores=scores, nms_thres=self.nms_thres,
-                                                                   top_k=self.top_k, post_k=self.post_k)
-            else:
-                [boxes, classes, scores] = cluster_SPM_dist_nms(boxes=boxes, scores=scores, nms_thres=self.nms_thres,
-                                                                top_k=self.top_k, post_k=self.post_k)
-
-        elif self.nms_type == 'spm_dist_weighted':
-            if self.cross_class:
-                [boxes, classes, scores] = cc_cluster_SPM_dist_weighted_nms(boxes=boxes, scores=scores,
-                                                                            nms_thres=self.nms_thres,
-                                                                            top_k=self.top_k,
-                                                                            post_k=self.post_k)
-            else:
-                [boxes, classes, scores] = cluster_SPM_dist_weighted_nms(boxes=boxes, scores=scores,
-                                                                         nms_thres=self.nms_thres,
-                                                                         top_k=self.top_k, post_k=self.post_k)
-
-        keep_ids = torch.where(scores > threshold)
-        scores = scores[keep_ids].cpu().numpy()
-        classes = classes[keep_ids].cpu().numpy()
-        boxes = boxes[keep_ids].cpu().numpy()
+    def run_nms(self, boxes=None, scores=None, img=None, threshold=0.2):
+        boxes, classes, scores, _ = self.run_nms_batch(boxes=to_device(boxes, self.device)[None],
+                                                       scores=to_device(scores, self.device)[None],
+                                                       threshold=threshold)
+        valid = torch.where(classes[0] >= 0)
+        scores = scores[0][valid].cpu().numpy()
+        classes = classes[0][valid].cpu().numpy()
+        boxes = boxes[0][valid].cpu().numpy()
         bounding_boxes = BoundingBoxList([])
         for idx, box in enumerate(boxes):
             bbox = BoundingBox(left=box[0], top=box[1],
@@ -141,370 +91,39 @@ class ClusterNMS(NMSCustom):
         return bounding_boxes, [boxes, classes, scores]
 
 
-def cc_cluster_nms_default(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200):
-    # Collapse all the classes into 1
-
-    scores, classes = scores.max(dim=0)
-    _, idx = scores.sort(0, descending=True)
-    idx = idx[:top_k]
-    boxes = boxes[idx]
-    scores = scores[idx]
-    classes = classes[idx]
-    iou = jaccard(boxes, boxes).triu_(diagonal=1)
-    B = iou
-    for i in range(200):
-        A = B
-        maxA, _ = torch.max(A, dim=0)
-        E = (maxA <= nms_thres).float().unsqueeze(1).expand_as(A)
-        B = iou.mul(E)
-        if A.equal(B):
-            break
-
-    idx_out = torch.where(maxA > nms_thres)
-    scores[idx_out] = 0
-    scores, idx = scores.sort(0, descending=True)
-    idx = idx[:post_k]
-    scores = scores[:post_k]
-    classes = classes[idx]
-    boxes = boxes[idx]
-    return boxes, classes, scores
-
-
-def cluster_nms_default(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200):
-
-    scores, idx = scores.sort(1, descending=True)
-    idx = idx[:top_k]
-    scores = scores[:top_k]
-    boxes = boxes[idx, :]
-
-    num_classes, num_dets = scores.shape
-    boxes = boxes.view(num_classes, num_dets, 4)
-    _, classes = scores.max(dim=0)
-    iou = jaccard(boxes, boxes).triu_(diagonal=1)
+def cluster_nms_batch(boxes=None, scores=None, nms_type='default', cross_class=True, nms_thres=0.45, top_k=400,
+                      post_k=200, threshold=0.2):
+    # Cluster-NMS of a padded batch: boxes [B, N, 4], scores [B, N, C]. Without cross_class, every class of every
+    # image is processed as a separate group, using the same suppression as the cross-class variants
+    boxes, scores, classes, indices = batch_top_k(boxes, scores, top_k, cross_class=cross_class)
+    if nms_type == 'diou':
+        iou = diou(boxes, boxes)
+    else:
+        iou = jaccard(boxes, boxes)
+    # Padding boxes have zero area, their IoU with each other is undefined
+    iou = torch.nan_to_num(iou, nan=0.0).triu_(diagonal=1)
     B = iou
     maxA = None
     for i in range(200):
         A = B
-        maxA, _ = A.max(dim=1)
+        maxA, _ = torch.max(A, dim=1)
         E = (maxA <= nms_thres).float().unsqueeze(2).expand_as(A)
         B = iou.mul(E)
         if A.equal(B):
             break
-    keep = (scores > 0.00)
-    discard = (maxA > nms_thres)
-    scores[discard] = 0
-    # Assign each kept detection to its corresponding class
-    boxes = boxes[keep]
-    scores = scores[keep]
-
-    # Only keep the top cfg.max_num_detections highest scores across all classes
-    scores, idx = scores.sort(0, descending=True)
-    idx = idx[:post_k]
-    scores = scores[:post_k]
-    classes = classes[idx]
-    boxes = boxes[idx]
-    return boxes, classes, scores
-
-
-def cc_cluster_diounms(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200):
-
-    scores, classes = scores.max(dim=0)
-    _, idx = scores.sort(0, descending=True)
-    idx = idx[:top_k]
-    boxes = boxes[idx]
-    scores = scores[idx]
-    classes = classes[idx]
-    iou = diou(boxes, boxes).triu_(diagonal=1)
-    B = iou
-    for i in range(200):
-        A = B
-        maxA, _ = torch.max(A, dim=0)
-        E = (maxA <= nms_thres).float().unsqueeze(1).expand_as(A)
-        B = iou.mul(E)
-        if A.equal(B):
-            break
-
-    idx_out = torch.where(maxA > nms_thres)
-    scores[idx_out] = 0
-    scores, idx = scores.sort(0, descending=True)
-    idx = idx[:post_k]
-    scores = scores[:post_k]
-    classes = classes[idx]
-    boxes = boxes[idx]
-    return boxes, classes, scores
-
-
-def cluster_diounms(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200):
-
-    scores, idx = scores.sort(1, descending=True)
-    idx = idx[:top_k]
-    scores = scores[:top_k]
-    boxes = boxes[idx, :]
-
-    num_classes, num_dets = scores.shape
-    boxes = boxes.view(num_classes, num_dets, 4)
-    _, classes = scores.max(dim=0)
-
-    iou = diou(boxes, boxes).triu_(diagonal=1)
-    B = iou
-    maxA = None
-    for i in range(200):
-        A = B
-        maxA, _ = A.max(dim=1)
-        E = (maxA <= nms_thres).float().unsqueeze(2).expand_as(A)
-        B = iou.mul(E)
-        if A.equal(B):
-            break
-    keep = (scores > 0.00)
-    discard = (maxA > nms_thres)
-    scores[discard] = 0
-    # Assign each kept detection to its corresponding class
-    boxes = boxes[keep]
-    scores = scores[keep]
-
-    # Only keep the top cfg.max_num_detections highest scores across all classes
-    scores, idx = scores.sort(0, descending=True)
-    idx = idx[:post_k]
-    scores = scores[:post_k]
-    classes = classes[idx]
-    boxes = boxes[idx]
-
-    return boxes, classes, scores
-
-
-def cc_cluster_SPM_nms(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200):
-
-    scores, classes = scores.max(dim=0)
-    _, idx = scores.sort(0, descending=True)
-    idx = idx[:top_k]
-    boxes = boxes[idx]
-    scores = scores[idx]
-    classes = classes[idx]
-    iou = jaccard(boxes, boxes).triu_(diagonal=1)
-    B = iou
-    for i in range(200):
-        A = B
-        maxA, _ = torch.max(A, dim=0)
-        E = (maxA <= nms_thres).float().unsqueeze(1).expand_as(A)
-        B = iou.mul(E)
-        if A.equal(B):
-            break
-    scores = torch.prod(torch.exp(-B ** 2 / 0.2), 0) * scores
-
-    scores, idx = scores.sort(0, descending=True)
-    idx = idx[:post_k]
-    scores = scores[:post_k]
-    classes = classes[idx]
-    boxes = boxes[idx]
-    return boxes, classes, scores
-
-
-def cluster_SPM_nms(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200):
-
-    scores, idx = scores.sort(1, descending=True)
-    idx = idx[:top_k]
-    scores = scores[:top_k]
-    boxes = boxes[idx, :]
-
-    num_classes, num_dets = scores.shape
-    boxes = boxes.view(num_classes, num_dets, 4)
-    _, classes = scores.max(dim=0)
-
-    iou = jaccard(boxes, boxes).triu_(diagonal=1)
-    B = iou
-    for i in range(200):
-        A = B
-        maxA, _ = A.max(dim=1)
-        E = (maxA <= nms_thres).float().unsqueeze(2).expand_as(A)
-        B = iou.mul(E)
-        if A.equal(B):
-            break
-    keep = (scores > 0.00)
-    scores = torch.prod(torch.exp(-B ** 2 / 0.2), 1) * scores
-    # Assign each kept detection to its corresponding class
-    boxes = boxes[keep]
-    scores = scores[keep]
-
-    # Only keep the top cfg.max_num_detections highest scores across all classes
-    scores, idx = scores.sort(0, descending=True)
-    idx = idx[:post_k]
-    scores = scores[:post_k]
-    classes = classes[idx]
-    boxes = boxes[idx]
-    return boxes, classes, scores
-
-
-def cc_cluster_SPM_dist_nms(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200):
-
-    scores, classes = scores.max(dim=0)
-    _, idx = scores.sort(0, descending=True)
-    idx = idx[:top_k]
-    boxes = boxes[idx]
-    scores = scores[idx]
-    classes = classes[idx]
-    iou = jaccard(boxes, boxes).triu_(diagonal=1)
-    B = iou
-    for i in range(200):
-        A = B
-        maxA, _ = torch.max(A, dim=0)
-        E = (maxA <= nms_thres).float().unsqueeze(1).expand_as(A)
-        B = iou.mul(E)
-        if A.equal(B):
-            break
-    D = distance(boxes, boxes)
-    X = (B >= 0).float()
-    scores = torch.prod(torch.min(torch.exp(-B ** 2 / 0.2) + D * ((B > 0).float()), X), 0) * scores
-
-    scores, idx = scores.sort(0, descending=True)
-    idx = idx[:post_k]
-    scores = scores[:post_k]
-    classes = classes[idx]
-    boxes = boxes[idx]
-    return boxes, classes, scores
-
-
-def cluster_SPM_dist_nms(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200):
-
-    scores, idx = scores.sort(1, descending=True)
-    idx = idx[:top_k]
-    scores = scores[:top_k]
-    boxes = boxes[idx, :]
-
-    num_classes, num_dets = scores.shape
-    boxes = boxes.view(num_classes, num_dets, 4)
-    _, classes = scores.max(dim=0)
-
-    iou = jaccard(boxes, boxes).triu_(diagonal=1)
-    B = iou
-    for i in range(200):
-        A = B
-        maxA, _ = A.max(dim=1)
-        E = (maxA <= nms_thres).float().unsqueeze(2).expand_as(A)
-        B = iou.mul(E)
-        if A.equal(B):
-            break
-    D = distance(boxes, boxes)
-    X = (B >= 0).float()
-    keep = (scores > 0.00)
-    scores = torch.prod(torch.min(torch.exp(-B ** 2 / 0.2) + D * ((B > 0).float()), X), 1) * scores
-
-    # Assign each kept detection to its corresponding class
-    boxes = boxes[keep]
-    scores = scores[keep]
-
-    # Only keep the top cfg.max_num_detections highest scores across all classes
-    scores, idx = scores.sort(0, descending=True)
-    idx = idx[:post_k]
-    scores = scores[:post_k]
-    classes = classes[idx]
-    boxes = boxes[idx]
-
-    return boxes, classes, scores
-
-
-def cc_cluster_SPM_dist_weighted_nms(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200):
-
-    scores, classes = scores.max(dim=0)
-    _, idx = scores.sort(0, descending=True)
-    idx = idx[:top_k]
-    boxes = boxes[idx]
-    scores = scores[idx]
-    classes = classes[idx]
-    n = len(scores)
-    iou = jaccard(boxes, boxes).triu_(diagonal=1)
-    B = iou
-    for i in range(200):
-        A = B
-        maxA, _ = torch.max(A, dim=0)
-        E = (maxA <= nms_thres).float().unsqueeze(1).expand_as(A)
-        B = iou.mul(E)
-        if A.equal(B):
-            break
-    D = distance(boxes, boxes)
-    X = (B >= 0).float()
-    scores = torch.prod(torch.min(torch.exp(-B ** 2 / 0.2) + D * ((B > 0).float()), X), 0) * scores
-    eye = torch.eye(n)
-    if boxes.device.type == 'cuda':
-        eye = eye.cuda()
-    weights = (B * (B > 0.8).float() + eye) * (scores.reshape((1, n)))
-    xx1 = boxes[:, 0].expand(n, n)
-    yy1 = boxes[:, 1].expand(n, n)
-    xx2 = boxes[:, 2].expand(n, n)
-    yy2 = boxes[:, 3].expand(n, n)
-
-    weightsum = weights.sum(dim=1)
-    xx1 = (xx1 * weights).sum(dim=1) / (weightsum)
-    yy1 = (yy1 * weights).sum(dim=1) / (weightsum)
-    xx2 = (xx2 * weights).sum(dim=1) / (weightsum)
-    yy2 = (yy2 * weights).sum(dim=1) / (weightsum)
-    boxes = torch.stack([xx1, yy1, xx2, yy2], 1)
-
-    scores, idx = scores.sort(0, descending=True)
-    idx = idx[:post_k]
-    scores = scores[:post_k]
-    classes = classes[idx]
-    boxes = boxes[idx]
-    return boxes, classes, scores
-
-
-def cluster_SPM_dist_weighted_nms(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200):
-
-    scores, idx = scores.sort(1, descending=True)
-    idx = idx[:top_k]
-    scores = scores[:top_k]
-    boxes = boxes[idx, :]
-
-    num_classes, num_dets = scores.shape
-    boxes = boxes.view(num_classes, num_dets, 4)
-    _, classes = scores.max(dim=0)
-
-    iou = jaccard(boxes, boxes).triu_(diagonal=1)
-    B = iou
-    A = None
-    for i in range(200):
-        A = B
-        maxA, _ = A.max(dim=1)
-        E = (maxA <= nms_thres).float().unsqueeze(2).expand_as(A)
-        B = iou.mul(E)
-        if A.equal(B):
-            break
-    D = distance(boxes, boxes)
-    X = (B >= 0).float()
-    keep = (scores > 0.0)
-
-    scores = torch.prod(torch.min(torch.exp(-B ** 2 / 0.2) + D * ((B > 0).float()), X), 1) * scores
-
-    E = keep.float().unsqueeze(2).expand_as(A)
-    B = iou.mul(E)
-    _, n = scores.size()
-    eye = torch.eye(n).expand(num_classes, n, n)
-    if boxes.device.type == 'cuda':
-        eye = eye.cuda()
-    weights = (B * (B > 0.8).float() + eye) * (
-        scores.unsqueeze(2).expand(num_classes, n, n))
-    xx1 = boxes[:, :, 0].unsqueeze(1).expand(num_classes, n, n)
-    yy1 = boxes[:, :, 1].unsqueeze(1).expand(num_classes, n, n)
-    xx2 = boxes[:, :, 2].unsqueeze(1).expand(num_classes, n, n)
-    yy2 = boxes[:, :, 3].unsqueeze(1).expand(num_classes, n, n)
-
-    weightsum = weights.sum(dim=2)
-    xx1 = (xx1 * weights).sum(dim=2) / (weightsum)
-    yy1 = (yy1 * weights).sum(dim=2) / (weightsum)
-    xx2 = (xx2 * weights).sum(dim=2) / (weightsum)
-    yy2 = (yy2 * weights).sum(dim=2) / (weightsum)
-    boxes = torch.stack([xx1, yy1, xx2, yy2], 2)
-
-    # Assign each kept detection to its corresponding class
-    classes = torch.arange(num_classes, device=boxes.device)[:, None].expand_as(keep)
-    classes = classes[keep]
-    boxes = boxes[keep]
-    scores = scores[keep]
-
-    # Only keep the top cfg.max_num_detections highest scores across all classes
-    scores, idx = scores.sort(0, descending=True)
-    idx = idx[:post_k]
-    scores = scores[:post_k]
-    classes = classes[idx]
-    boxes = boxes[idx]
 
-    return boxes, classes, scores
+    if nms_type in ['default', 'diou']:
+        scores = torch.where(maxA > nms_thres, torch.zeros_like(scores), scores)
+    elif nms_type == 'spm':
+        scores = torch.prod(torch.exp(-B ** 2 / 0.2), 1) * scores
+    else:
+        D = distance(boxes, boxes)
+        X = (B >= 0).float()
+        scores = torch.prod(torch.min(torch.exp(-B ** 2 / 0.2) + D * ((B > 0).float()), X), 1) * scores
+        if nms_type == 'spm_dist_weighted':
+            n = scores.shape[1]
+            eye = torch.eye(n, device=boxes.device)
+            weights = (B * (B > 0.8).float() + eye) * scores.unsqueeze(1)
+            boxes = (boxes.unsqueeze(1) * weights.unsqueeze(3)).sum(dim=2) / weights.sum(dim=2).unsqueeze(2)
+
+    return select_top_detections(boxes, scores, classes, indices, post_k, threshold)
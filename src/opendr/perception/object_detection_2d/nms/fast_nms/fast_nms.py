@@ -28,10 +28,10 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 from opendr.perception.object_detection_2d.nms.utils import NMSCustom
-from opendr.perception.object_detection_2d.nms.utils.nms_utils import jaccard
+from opendr.perception.object_detection_2d.nms.utils.nms_utils import jaccard, to_device, mask_padding, batch_top_k, \
+    select_top_detections
 from opendr.engine.target import BoundingBox, BoundingBoxList
 import torch
-import numpy as np
 
 
 class FastNMS(NMSCustom):
@@ -54,36 +54,23 @@ class FastNMS(NMSCustom):
     def set_cross_class(self, cross_class=False):
         self.cross_class = cross_class
 
-    def run_nms(self, boxes=None, scores=None, threshold=0.2, img=None):
-
-        if isinstance(boxes, np.ndarray):
-            boxes = torch.tensor(boxes, device=self.device)
-        elif torch.is_tensor(boxes):
-            if self.device == 'cpu':
-                boxes = boxes.cpu()
-            elif self.device == 'cuda':
-                boxes = boxes.cuda()
-
-        if isinstance(scores, np.ndarray):
-            scores = torch.tensor(scores, device=self.device)
-        elif torch.is_tensor(scores):
-            if self.device == 'cpu':
-                scores = scores.cpu()
-            elif self.device == 'cuda':
-                scores = scores.cuda()
-
-        scores = torch.transpose(scores, dim0=1, dim1=0)
+    def run_nms_batch(self, boxes=None, scores=None, threshold=0.2, num_boxes=None, imgs=None, maps=None):
+        boxes = to_device(boxes, self.device).float()
+        scores = mask_padding(to_device(scores, self.device).float(), num_boxes)
         if self.cross_class:
-            [boxes, classes, scores] = cc_fast_nms(boxes=boxes, scores=scores, nms_thres=self.nms_thres,
-                                                   top_k=self.top_k, post_k=self.post_k)
-        else:
-            [boxes, classes, scores] = fast_nms(boxes=boxes, scores=scores, nms_thres=self.nms_thres,
-                                                top_k=self.top_k, post_k=self.post_k)
+            return cc_fast_nms_batch(boxes=boxes, scores=scores, nms_thres=self.nms_thres, top_k=self.top_k,
+                                     post_k=self.post_k, threshold=threshold)
+        return fast_nms_batch(boxes=boxes, scores=scores, nms_thres=self.nms_thres, top_k=self.top_k,
+                              post_k=self.post_k, threshold=threshold)
 
-        keep_ids = torch.where(scores > threshold)
-        scores = scores[keep_ids].cpu().numpy()
-        classes = classes[keep_ids].cpu().numpy()
-        boxes = boxes[keep_ids].cpu().numpy()
+    def run_nms(self, boxes=None, scores=None, threshold=0.2, img=None):
+        boxes, classes, scores, _ = self.run_nms_batch(boxes=to_device(boxes, self.device)[None],
+                                                       scores=to_device(scores, self.device)[None],
+                                                       threshold=threshold)
+        valid = torch.where(classes[0] >= 0)
+        scores = scores[0][valid].cpu().numpy()
+        classes = classes[0][valid].cpu().numpy()
+        boxes = boxes[0][valid].cpu().numpy()
         bounding_boxes = BoundingBoxList([])
         for idx, box in enumerate(boxes):
             bbox = BoundingBox(left=box[0], top=box[1],
@@ -96,52 +83,20 @@ class FastNMS(NMSCustom):
         return bounding_boxes, [boxes, classes, scores]
 
 
-def fast_nms(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200):
-    scores, idx = scores.sort(1, descending=True)
-    boxes = boxes[idx, :]
-
-    scores = scores[:, :top_k]
-    boxes = boxes[:, :top_k]
-
-    num_classes, num_dets = scores.shape
-
-    boxes = boxes.view(num_classes, num_dets, 4)
-
+def fast_nms_batch(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200, threshold=0.2):
+    # Per-class Fast-NMS of a padded batch: boxes [B, N, 4], scores [B, N, C]
+    boxes, scores, classes, indices = batch_top_k(boxes, scores, top_k, cross_class=False)
     iou = jaccard(boxes, boxes).triu_(diagonal=1)
     iou_max, _ = iou.max(dim=1)
+    keep = (iou_max <= nms_thres) * (scores > 0.01)
+    scores = torch.where(keep, scores, torch.full_like(scores, -float('inf')))
+    return select_top_detections(boxes, scores, classes, indices, post_k, threshold)
 
-    keep = (iou_max <= nms_thres)
-    keep *= (scores > 0.01)
-    classes = torch.arange(num_classes, device=boxes.device)[:, None].expand_as(keep)
-    classes = classes[keep]
-
-    boxes = boxes[keep]
-    scores = scores[keep]
-
-    scores, idx = scores.sort(0, descending=True)
-    idx = idx[:post_k]
-    scores = scores[:post_k]
 
-    classes = classes[idx]
-    boxes = boxes[idx]
-    return boxes, classes, scores
-
-
-def cc_fast_nms(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200):
-    scores, classes = scores.max(dim=0)
-    _, idx = scores.sort(0, descending=True)
-    idx = idx[:top_k]
-    boxes = boxes[idx]
-    scores = scores[idx]
-    classes = classes[idx]
+def cc_fast_nms_batch(boxes=None, scores=None, nms_thres=0.45, top_k=400, post_k=200, threshold=0.2):
+    # Cross-class Fast-NMS of a padded batch: boxes [B, N, 4], scores [B, N, C]
+    boxes, scores, classes, indices = batch_top_k(boxes, scores, top_k, cross_class=True)
     iou = jaccard(boxes, boxes).triu_(diagonal=1)
-    maxA, _ = torch.max(iou, dim=0)
-
-    idx_out = torch.where(maxA > nms_thres)
-    scores[idx_out] = 0
-    scores, idx = scores.sort(0, descending=True)
-    idx = idx[:post_k]
-    scores = scores[:post_k]
-    classes = classes[idx]
-    boxes = boxes[idx]
-    return boxes, classes, scores
+    maxA, _ = torch.max(iou, dim=1)
+    scores = torch.where(maxA > nms_thres, torch.zeros_like(scores), scores)
+    return select_top_detections(boxes, scores, classes, indices, post_k, threshold)
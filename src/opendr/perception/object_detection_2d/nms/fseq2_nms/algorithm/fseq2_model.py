@@ -103,17 +103,18 @@ class FSeq2Net(nn.Module):
         )
 
     def forward(self, q_geom_feats=None, k_geom_feats=None, msk=None, maps=None, img_res=None, boxes=None):
+        # For a padded batch of images, maps and img_res are lists with one entry per image and boxes has shape
+        # [B, N, 4]
         if maps is not None and boxes is not None and img_res is not None:
-            maps = maps.transpose(1, 2).transpose(0, 1).unsqueeze(0).float()
-            scale_d = self.res_maps / max(maps.shape[2], maps.shape[3])
-            maps = F.interpolate(maps, scale_factor=scale_d, mode='bilinear', align_corners=True)
-            scale_f = max(maps.shape[2], maps.shape[3]) / max(img_res[0], img_res[1])
-            boxes = boxes * scale_f
-            app_feats = self.roi_align(maps, [boxes])
+            if boxes.dim() == 3:
+                app_feats = torch.cat([self.__pool_regions(maps[i], img_res[i], boxes[i])
+                                       for i in range(boxes.shape[0])])
+            else:
+                app_feats = self.__pool_regions(maps, img_res, boxes)
             app_feats = self.relu(self.conv_1(app_feats))
             app_feats = self.maxpool(self.relu(self.conv_2(app_feats)))
             app_feats = torch.flatten(app_feats, start_dim=1, end_dim=-1)
-            app_feats = self.relu(self.linear(app_feats)).unsqueeze(1)
+            app_feats = self.relu(self.linear(app_feats)).view(boxes.shape[:-1] + (1, -1))
         else:
             raise UserWarning("Not sufficient input...")
         q_feats = self.q_geom_layers(q_geom_feats)
@@ -121,8 +122,9 @@ class FSeq2Net(nn.Module):
 
         if self.use_app_feats and app_feats is not None:
             app_feats = self.q_app_layers(app_feats)
-            q_feats = torch.cat((q_feats, app_feats), dim=2)
-            k_feats = torch.cat((k_feats, app_feats.transpose(0, 1).repeat(k_feats.shape[1], 1, 1)), dim=2)
+            q_feats = torch.cat((q_feats, app_feats), dim=-1)
+            k_feats = torch.cat((k_feats, app_feats.transpose(-3, -2).expand(k_feats.shape[:-1] +
+                                                                             app_feats.shape[-1:])), dim=-1)
 
         elif app_feats is None:
             raise UserWarning("Appearance-based representations not provided.")
@@ -131,7 +133,15 @@ class FSeq2Net(nn.Module):
         for i in range(self.num_JPUs):
             q_feats, k_feats = self.joint_processing_units[i](q_feats, k_feats, msk)
         scores = self.q_final_layers(q_feats)
-        return scores.squeeze(1)
+        return scores.squeeze(-2)
+
+    def __pool_regions(self, maps, img_res, boxes):
+        maps = maps.transpose(1, 2).transpose(0, 1).unsqueeze(0).float()
+        scale_d = self.res_maps / max(maps.shape[2], maps.shape[3])
+        maps = F.interpolate(maps, scale_factor=scale_d, mode='bilinear', align_corners=True)
+        scale_f = max(maps.shape[2], maps.shape[3]) / max(img_res[0], img_res[1])
+        boxes = boxes * scale_f
+        return self.roi_align(maps, [boxes])
 
 
 class Joint_processing_unit(nn.Module):
@@ -160,7 +170,7 @@ class Joint_processing_unit(nn.Module):
         kv_atten_in = self.norm_layer_k(k_feats)
         q_atten_in = self.norm_layer_q(q_atten)
         q_atten = q_atten + self.self_attention_module(q=q_atten_in, k=kv_atten_in, v=kv_atten_in, mask=msk)
-        k_feats = k_feats + self.scale_layer(q_atten).transpose(0, 1).repeat(q_atten.shape[0], 1, 1)
+        k_feats = k_feats + self.scale_layer(q_atten).transpose(-3, -2).expand_as(k_feats)
         q_feats = q_feats + self.q_block2(q_atten)
         return q_feats, k_feats
 
@@ -184,22 +194,23 @@ class Self_attention_module(nn.Module):
         )
 
     def forward(self, q, k, v, mask=None):
-        samples_dim = q.size(0)
-        k = self.k_linear(k).view(samples_dim, -1, self.h, self.qkv_split_dim).transpose(1, 2)
-        q = self.q_linear(q).view(samples_dim, -1, self.h, self.qkv_split_dim).transpose(1, 2)
-        v = self.v_linear(v).view(samples_dim, -1, self.h, self.qkv_split_dim).transpose(1, 2)
+        # The leading dimensions are [N] for the boxes of one image or [B, N] for a padded batch of images
+        samples_dims = q.shape[:-2]
+        k = self.k_linear(k).view(samples_dims + (-1, self.h, self.qkv_split_dim)).transpose(-3, -2)
+        q = self.q_linear(q).view(samples_dims + (-1, self.h, self.qkv_split_dim)).transpose(-3, -2)
+        v = self.v_linear(v).view(samples_dims + (-1, self.h, self.qkv_split_dim)).transpose(-3, -2)
         scores = torch.matmul(q, k.transpose(-2, -1)) / math.sqrt(self.qkv_split_dim)
 
-        mask = mask.unsqueeze(1)
-        mask = mask.unsqueeze(1)
-        mask = mask.repeat(1, scores.shape[1], 1, 1)
+        mask = mask.unsqueeze(-2)
+        mask = mask.unsqueeze(-3)
+        mask = mask.expand_as(scores)
         scores = torch.mul(scores, mask)
         scores = scores.masked_fill(mask == 0, -1e9)
 
         scores = F.softmax(scores, dim=-1)
         scores = self.dropout(scores)
         q = torch.matmul(scores, v)
-        q = q.transpose(1, 2).contiguous().view(samples_dim, -1, self.s_dim)
+        q = q.transpose(-3, -2).contiguous().view(samples_dims + (-1, self.s_dim))
         q = self.q_out(q)
         return q
 
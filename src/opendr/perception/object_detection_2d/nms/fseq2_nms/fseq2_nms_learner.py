@@ -15,12 +15,15 @@
 from opendr.engine.learners import Learner
 from opendr.engine.constants import OPENDR_SERVER_URL
 from opendr.engine.target import BoundingBox, BoundingBoxList
+from opendr.engine.data import Image
 from opendr.perception.object_detection_2d.nms.fseq2_nms.algorithm.fseq2_model import FSeq2Net
 from opendr.perception.object_detection_2d.nms.utils import NMSCustom
 from opendr.perception.object_detection_2d.nms.utils.nms_dataset import Dataset_NMS
 from opendr.perception.object_detection_2d.nms.utils.nms_utils import drop_dets, det_matching, \
-    run_coco_eval, filter_iou_boxes, bb_intersection_over_union, compute_class_weights, apply_torchNMS
+    run_coco_eval, compute_class_weights, apply_torchNMS, to_device, mask_padding, select_top_detections, \
+    pack_detections, compute_attention_mask, compute_geometrical_feats, bucket_by_length
 import torch
+import torchvision
 import torch.nn.functional as F
 import pickle
 import numpy as np
@@ -175,10 +178,9 @@ class FSeq2NMSLearner(Learner, NMSCustom):
 
                 dt_boxes = dt_boxes[:max_dt_boxes]
                 dt_scores = dt_scores[:max_dt_boxes]
-                msk = self.__compute_mask(dt_boxes, iou_thres=0.2, extra=0.1)
-                q_geom_feats, k_geom_feats = self.__compute_geometrical_feats(boxes=dt_boxes,
-                                                                              scores=dt_scores,
-                                                                              resolution=img_res)
+                msk = compute_attention_mask(dt_boxes, iou_thres=0.2, extra=0.1)
+                q_geom_feats, k_geom_feats = compute_geometrical_feats(boxes=dt_boxes, scores=dt_scores,
+                                                                       resolution=img_res)
                 preds = self.model(q_geom_feats=q_geom_feats, k_geom_feats=k_geom_feats, msk=msk,
                                    maps=map, img_res=img_res, boxes=dt_boxes)
                 preds = torch.clamp(preds, 0.001, 1 - 0.001)
@@ -288,10 +290,9 @@ class FSeq2NMSLearner(Learner, NMSCustom):
             dt_boxes = dt_boxes[:max_dt_boxes]
             dt_scores = dt_scores[:max_dt_boxes]
 
-            msk = self.__compute_mask(dt_boxes, iou_thres=0.2, extra=0.1)
-            q_geom_feats, k_geom_feats = self.__compute_geometrical_feats(boxes=dt_boxes,
-                                                                          scores=dt_scores,
-                                                                          resolution=img_res)
+            msk = compute_attention_mask(dt_boxes, iou_thres=0.2, extra=0.1)
+            q_geom_feats, k_geom_feats = compute_geometrical_feats(boxes=dt_boxes, scores=dt_scores,
+                                                                   resolution=img_res)
             with torch.no_grad():
                 preds = self.model(q_geom_feats=q_geom_feats, k_geom_feats=k_geom_feats, msk=msk,
                                    maps=map, img_res=img_res, boxes=dt_boxes)
@@ -333,6 +334,26 @@ class FSeq2NMSLearner(Learner, NMSCustom):
         bounding_boxes = BoundingBoxList([])
         if scores.shape[0] == 0:
             return bounding_boxes
+        boxes, scores, _ = self.__prepare_detections(boxes=boxes, scores=scores, boxes_sorted=boxes_sorted,
+                                                     max_dt_boxes=max_dt_boxes)
+        preds = self.__rescore(boxes=boxes.unsqueeze(0), scores=scores.unsqueeze(0), img_res=[img_res],
+                               maps=[map])[0]
+
+        mask = torch.where(preds > threshold)[0]
+        preds = preds[mask].cpu().detach().numpy()
+        boxes = boxes[mask, :].cpu().numpy()
+
+        for idx, box in enumerate(boxes):
+            bbox = BoundingBox(left=box[0], top=box[1],
+                               width=box[2] - box[0],
+                               height=box[3] - box[1],
+                               name=0,
+                               score=preds[idx])
+            bounding_boxes.data.append(bbox)
+        return bounding_boxes, [boxes, np.zeros(preds.shape[0]), preds]
+
+    def __prepare_detections(self, boxes, scores, boxes_sorted, max_dt_boxes):
+        # Filters and sorts the boxes of one image, returning the indices of the remaining boxes
         if scores.shape[1] > 1:
             raise ValueError('Multi-class NMS is not supported in Seq2Seq-NMS yet.')
         if boxes.shape[0] != scores.shape[0]:
@@ -348,41 +369,31 @@ class FSeq2NMSLearner(Learner, NMSCustom):
         if not boxes_sorted:
             scores, scores_ids = torch.sort(scores, dim=0, descending=True)
             boxes = boxes[scores_ids]
+            keep_ids = keep_ids[scores_ids]
 
         val_ids = torch.logical_and((boxes[:, 2] - boxes[:, 0]) > 4,
                                     (boxes[:, 3] - boxes[:, 1]) > 4)
         boxes = boxes[val_ids, :]
         scores = scores[val_ids]
+        keep_ids = keep_ids[val_ids]
 
         if self.iou_filtering is not None and 1.0 > self.iou_filtering > 0:
-            boxes, scores = apply_torchNMS(boxes=boxes, scores=scores, iou_thres=self.iou_filtering)
-
-        boxes = boxes[:max_dt_boxes]
-        scores = scores[:max_dt_boxes]
-
-        msk = self.__compute_mask(boxes, iou_thres=0.2, extra=0.1)
-        q_geom_feats, k_geom_feats = self.__compute_geometrical_feats(boxes=boxes,
-                                                                      scores=scores,
-                                                                      resolution=img_res)
-
+            ids_nms = torchvision.ops.nms(boxes, scores, self.iou_filtering)
+            boxes = boxes[ids_nms]
+            scores = scores[ids_nms]
+            keep_ids = keep_ids[ids_nms]
+
+        return boxes[:max_dt_boxes], scores[:max_dt_boxes], keep_ids[:max_dt_boxes]
+
+    def __rescore(self, boxes, scores, img_res, maps, num_boxes=None):
+        # Runs the model once on a padded batch of sorted boxes [B, N, 4] and returns their new scores [B, N, 1]
+        msk = compute_attention_mask(boxes, iou_thres=0.2, extra=0.1, num_boxes=num_boxes)
+        q_geom_feats, k_geom_feats = compute_geometrical_feats(boxes=boxes, scores=scores,
+                                                               resolution=torch.tensor(img_res, device=boxes.device))
         with torch.no_grad():
             preds = self.model(q_geom_feats=q_geom_feats, k_geom_feats=k_geom_feats, msk=msk,
-                               maps=map, img_res=img_res, boxes=boxes)
-
-        mask = torch.where(preds > threshold)[0]
-        if mask.size == 0:
-            return BoundingBoxList([])
-        preds = preds[mask].cpu().detach().numpy()
-        boxes = boxes[mask, :].cpu().numpy()
-
-        for idx, box in enumerate(boxes):
-            bbox = BoundingBox(left=box[0], top=box[1],
-                               width=box[2] - box[0],
-                               height=box[3] - box[1],
-                               name=0,
-                               score=preds[idx])
-            bounding_boxes.data.append(bbox)
-        return bounding_boxes, [boxes, np.zeros(scores.shape[0]), preds]
+                               maps=maps, img_res=img_res, boxes=boxes)
+        return preds
 
     def run_nms(self, boxes=None, scores=None, boxes_sorted=False, top_k=400, img=None, threshold=0.2, map=None):
         if isinstance(boxes, np.ndarray):
@@ -405,6 +416,41 @@ class FSeq2NMSLearner(Learner, NMSCustom):
                            img_res=img.opencv().shape[::-1][1:], map=map)
         return boxes
 
+    def run_nms_batch(self, boxes=None, scores=None, threshold=0.2, num_boxes=None, imgs=None, maps=None,
+                      boxes_sorted=False, top_k=400, max_pairs=8192):
+        """
+        Batched counterpart of run_nms(). The detections of the images are packed into padded sequences, whose
+        attention masks exclude the padding, and the geometrical representations and the model run once per chunk
+        of images with similar number of boxes, holding at most max_pairs pairs of boxes. The output follows
+        NMSCustom.run_nms_batch(), with all classes set to 0.
+        """
+        if imgs is None or maps is None:
+            raise ValueError('FSeq2-NMS requires the images and the feature maps of the batch.')
+        boxes = to_device(boxes, self.device).float()
+        scores = mask_padding(to_device(scores, self.device).float(), num_boxes)
+        if num_boxes is None:
+            num_boxes = [scores.shape[1]] * scores.shape[0]
+        detections, img_res = [], []
+        for b in range(scores.shape[0]):
+            img = imgs[b] if isinstance(imgs[b], Image) else Image(imgs[b])
+            img_res.append(img.opencv().shape[::-1][1:])
+            n = int(num_boxes[b])
+            detections.append(self.__prepare_detections(boxes=boxes[b, :n], scores=scores[b, :n],
+                                                        boxes_sorted=boxes_sorted, max_dt_boxes=top_k))
+
+        boxes, scores, indices, counts = pack_detections(detections, device=boxes.device)
+        preds = scores.clone()
+        for chunk in bucket_by_length(counts, max_pairs):
+            n = int(counts[chunk].max())
+            preds[chunk, :n] = self.__rescore(boxes=boxes[chunk, :n], scores=scores[chunk, :n],
+                                              img_res=[img_res[i] for i in chunk],
+                                              maps=[to_device(maps[i], self.device).float() for i in chunk],
+                                              num_boxes=counts[chunk])[..., 0]
+        keep = (indices >= 0) & (preds > threshold)
+        preds = torch.where(keep, preds, torch.full_like(preds, -float('inf')))
+        return select_top_detections(boxes, preds, torch.zeros_like(indices), indices, preds.shape[1],
+                                     -float('inf'))
+
     def save(self, path, verbose=False, optimizer=None, scheduler=None, current_epoch=None, max_dt_boxes=400):
         fname = path.split('/')[-1]
         dir_name = path.replace('/' + fname, '')
@@ -553,49 +599,3 @@ class FSeq2NMSLearner(Learner, NMSCustom):
     def reset(self):
         """This method is not used in this implementation."""
         return NotImplementedError
-
-    def __compute_mask(self, boxes=None, iou_thres=0.2, extra=0.1):
-        relations = filter_iou_boxes(boxes, iou_thres=iou_thres)
-        mask1 = torch.tril(relations).float()
-        mask2 = extra * torch.triu(relations, diagonal=1).float()
-        mask = mask1 + mask2
-        return mask
-
-    def __compute_geometrical_feats(self, boxes, scores, resolution):
-        boxBs = boxes.clone().unsqueeze(0).repeat(boxes.shape[0], 1, 1)
-        boxAs = boxes.unsqueeze(1).repeat(1, boxes.shape[0], 1)
-        scoresBs = scores.unsqueeze(0).unsqueeze(-1).repeat(scores.shape[0], 1, 1)
-        scoresAs = scores.unsqueeze(1).unsqueeze(1).repeat(1, scores.shape[0], 1)
-
-        scale_div = [resolution[1] / 20, resolution[0] / 20]
-        dx = ((boxBs[:, :, 0] - boxAs[:, :, 0] + boxBs[:, :, 2] - boxAs[:, :, 2]) / 2).unsqueeze(-1)
-        dy = ((boxBs[:, :, 1] - boxAs[:, :, 1] + boxBs[:, :, 3] - boxAs[:, :, 3]) / 2).unsqueeze(-1)
-        dxy = dx * dx + dy * dy
-        dxy = dxy / (scale_div[0] * scale_div[0] + scale_div[1] * scale_div[1])
-        dx = (dx / scale_div[0])
-        dy = (dy / scale_div[1])
-        sx = boxBs[:, :, 2] - boxBs[:, :, 0]
-        sx_1 = (sx / (boxAs[:, :, 2] - boxAs[:, :, 0])).unsqueeze(-1)
-        sx_2 = (sx / scale_div[0]).unsqueeze(-1)
-        sy = boxBs[:, :, 3] - boxBs[:, :, 1]
-        sy_1 = (sy / (boxAs[:, :, 3] - boxAs[:, :, 1])).unsqueeze(-1)
-        sy_2 = (sy / scale_div[1]).unsqueeze(-1)
-        scl = (boxBs[:, :, 2] - boxBs[:, :, 0]) * (boxBs[:, :, 3] - boxBs[:, :, 1])
-        scl_1 = (scl / ((boxAs[:, :, 2] - boxAs[:, :, 0]) * (boxAs[:, :, 3] - boxAs[:, :, 1]))).unsqueeze(-1)
-        scl_2 = (scl / (scale_div[0] * scale_div[1])).unsqueeze(-1)
-        del scl
-
-        scr_1 = 5 * scoresBs
-        scr_2 = scr_1 - 5 * scoresAs
-
-        sr_1 = torch.unsqueeze((boxBs[:, :, 3] - boxBs[:, :, 1]) / (boxBs[:, :, 2] - boxBs[:, :, 0]), dim=-1)
-        sr_2 = torch.unsqueeze(((boxBs[:, :, 3] - boxBs[:, :, 1]) / (boxBs[:, :, 2] - boxBs[:, :, 0])) / (
-                (boxAs[:, :, 3] - boxAs[:, :, 1]) / (boxAs[:, :, 2] - boxAs[:, :, 0])), dim=-1)
-
-        ious = 5 * (bb_intersection_over_union(boxes.unsqueeze(1).repeat(1, boxes.shape[0], 1),
-                                               boxes.clone().unsqueeze(0).repeat(boxes.shape[0], 1, 1))).unsqueeze(-1)
-        enc_vers_all = torch.cat((dx, dy, dxy, sx_1, sx_2, sy_1, sy_2, ious, scl_1, scl_2, scr_1, scr_2, sr_1,
-                                  sr_2),
-                                 dim=2)
-        enc_vers = enc_vers_all.diagonal(dim1=0, dim2=1).transpose(0, 1).unsqueeze(1)
-        return enc_vers, enc_vers_all
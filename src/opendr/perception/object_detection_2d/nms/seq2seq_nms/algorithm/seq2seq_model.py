@@ -103,8 +103,9 @@ class Seq2SeqNet(nn.Module):
 
         if self.use_app_feats and app_feats is not None:
             app_feats = self.q_app_layers(app_feats)
-            q_feats = torch.cat((q_feats, app_feats), dim=2)
-            k_feats = torch.cat((k_feats, app_feats.transpose(0, 1).repeat(k_feats.shape[1], 1, 1)), dim=2)
+            q_feats = torch.cat((q_feats, app_feats), dim=-1)
+            k_feats = torch.cat((k_feats, app_feats.transpose(-3, -2).expand(k_feats.shape[:-1] +
+                                                                             app_feats.shape[-1:])), dim=-1)
 
         elif app_feats is None:
             raise UserWarning("Appearance-based representations not provided.")
@@ -113,7 +114,7 @@ class Seq2SeqNet(nn.Module):
         for i in range(self.num_JPUs):
             q_feats, k_feats = self.joint_processing_units[i](q_feats, k_feats, msk)
         scores = self.q_final_layers(q_feats)
-        return scores.squeeze(1)
+        return scores.squeeze(-2)
 
 
 class Joint_processing_unit(nn.Module):
@@ -142,7 +143,7 @@ class Joint_processing_unit(nn.Module):
         kv_atten_in = self.norm_layer_k(k_feats)
         q_atten_in = self.norm_layer_q(q_atten)
         q_atten = q_atten + self.self_attention_module(q=q_atten_in, k=kv_atten_in, v=kv_atten_in, mask=msk)
-        k_feats = k_feats + self.scale_layer(q_atten).transpose(0, 1).repeat(q_atten.shape[0], 1, 1)
+        k_feats = k_feats + self.scale_layer(q_atten).transpose(-3, -2).expand_as(k_feats)
         q_feats = q_feats + self.q_block2(q_atten)
         return q_feats, k_feats
 
@@ -166,22 +167,23 @@ class Self_attention_module(nn.Module):
         )
 
     def forward(self, q, k, v, mask=None):
-        samples_dim = q.size(0)
-        k = self.k_linear(k).view(samples_dim, -1, self.h, self.qkv_split_dim).transpose(1, 2)
-        q = self.q_linear(q).view(samples_dim, -1, self.h, self.qkv_split_dim).transpose(1, 2)
-        v = self.v_linear(v).view(samples_dim, -1, self.h, self.qkv_split_dim).transpose(1, 2)
+        # The leading dimensions are [N] for the boxes of one image or [B, N] for a padded batch of images
+        samples_dims = q.shape[:-2]
+        k = self.k_linear(k).view(samples_dims + (-1, self.h, self.qkv_split_dim)).transpose(-3, -2)
+        q = self.q_linear(q).view(samples_dims + (-1, self.h, self.qkv_split_dim)).transpose(-3, -2)
+        v = self.v_linear(v).view(samples_dims + (-1, self.h, self.qkv_split_dim)).transpose(-3, -2)
         scores = torch.matmul(q, k.transpose(-2, -1)) / math.sqrt(self.qkv_split_dim)
 
-        mask = mask.unsqueeze(1)
-        mask = mask.unsqueeze(1)
-        mask = mask.repeat(1, scores.shape[1], 1, 1)
+        mask = mask.unsqueeze(-2)
+        mask = mask.unsqueeze(-3)
+        mask = mask.expand_as(scores)
         scores = torch.mul(scores, mask)
         scores = scores.masked_fill(mask == 0, -1e9)
 
         scores = F.softmax(scores, dim=-1)
         scores = self.dropout(scores)
         q = torch.matmul(scores, v)
-        q = q.transpose(1, 2).contiguous().view(samples_dim, -1, self.s_dim)
+        q = q.transpose(-3, -2).contiguous().view(samples_dims + (-1, self.s_dim))
         q = self.q_out(q)
         return q
 
@@ -35,15 +35,121 @@
 # SOFTWARE.
 
 from opendr.perception.object_detection_2d.nms.utils import NMSCustom
-from opendr.perception.object_detection_2d.nms.utils.nms_utils import jaccard
+from opendr.perception.object_detection_2d.nms.utils.nms_utils import jaccard, to_device, mask_padding, batch_top_k
 from opendr.engine.target import BoundingBox, BoundingBoxList
 import torch
 import numpy as np
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
+_LINEAR, _GAUSSIAN, _HARD = 0, 1, 2
+
+
+def _soft_nms_kernel(boxes, scores, method, nms_thres, threshold, max_out):
+    # Sequential Soft-NMS of a single image: the box with the highest (decayed) score is kept and the scores of the
+    # remaining boxes are decayed by their IoU with it, until max_out boxes are kept or no score exceeds threshold
+    n = boxes.shape[0]
+    scores = scores.copy()
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    active = np.ones(n, dtype=np.bool_)
+    keep = np.full(max_out, -1, dtype=np.int64)
+    keep_scores = np.zeros(max_out, dtype=np.float32)
+    count = 0
+    while count < max_out:
+        best = -1
+        best_score = threshold
+        for j in range(n):
+            if active[j] and scores[j] > best_score:
+                best = j
+                best_score = scores[j]
+        if best < 0:
+            break
+        keep[count] = best
+        keep_scores[count] = best_score
+        count += 1
+        active[best] = False
+        for j in range(n):
+            if not active[j]:
+                continue
+            w = min(boxes[best, 2], boxes[j, 2]) - max(boxes[best, 0], boxes[j, 0])
+            h = min(boxes[best, 3], boxes[j, 3]) - max(boxes[best, 1], boxes[j, 1])
+            if w <= 0 or h <= 0:
+                continue
+            union = areas[best] + areas[j] - w * h
+            iou = w * h / union if union > 0 else 0.0
+            if method == _LINEAR:
+                if iou > nms_thres:
+                    scores[j] *= 1 - iou
+            elif method == _GAUSSIAN:
+                scores[j] *= np.exp(-(iou * iou) / nms_thres)
+            elif iou > nms_thres:
+                active[j] = False
+    return keep[:count], keep_scores[:count]
+
+
+# The CPU kernel is compiled when numba is available, otherwise the vectorized IoU-matrix path is used
+_soft_nms_cpu = numba.njit(cache=True)(_soft_nms_kernel) if numba is not None else None
+
+
+def soft_nms_iou_matrix(boxes, scores, method, nms_thres, threshold, max_out, valid=None):
+    """
+    Batched Soft-NMS on a precomputed IoU matrix. Every iteration selects the box with the highest decayed score of
+    every image and decays the remaining boxes with one row of the IoU matrix, so it runs on the GPU without any
+    per-box allocation.
+
+    :param boxes: boxes in (x1, y1, x2, y2) format, with shape [B, N, 4]
+    :type boxes: torch.Tensor
+    :param scores: scores with shape [B, N]
+    :type scores: torch.Tensor
+    :param method: 0 for linear, 1 for gaussian and 2 for hard NMS
+    :type method: int
+    :param nms_thres: IoU threshold of the linear and hard variants, sigma of the gaussian one
+    :type nms_thres: float
+    :param threshold: boxes whose decayed score does not exceed this threshold are discarded
+    :type threshold: float
+    :param max_out: maximum number of boxes kept per image
+    :type max_out: int
+    :param valid: mask of the valid (non-padding) boxes, with shape [B, N]
+    :type valid: torch.Tensor, optional
+    :return: the indices of the kept boxes (-1 for padding) and their decayed scores, both with shape [B, max_out],
+        in decreasing score order
+    :rtype: tuple of torch.Tensor
+    """
+    batch_size, n = scores.shape
+    keep = torch.full((batch_size, max_out), -1, dtype=torch.long, device=scores.device)
+    keep_scores = torch.zeros((batch_size, max_out), dtype=scores.dtype, device=scores.device)
+    if n == 0:
+        return keep, keep_scores
+    # Padding boxes have zero area, their IoU with each other is undefined
+    iou = torch.nan_to_num(jaccard(boxes, boxes), nan=0.0)
+    scores = scores.clone()
+    active = torch.ones_like(scores, dtype=torch.bool) if valid is None else valid.clone()
+    batch = torch.arange(batch_size, device=scores.device)
+    for k in range(max_out):
+        best_score, best = torch.where(active, scores, torch.full_like(scores, -float('inf'))).max(dim=1)
+        selected = best_score > threshold
+        if not bool(selected.any()):
+            break
+        keep[:, k] = torch.where(selected, best, torch.full_like(best, -1))
+        keep_scores[:, k] = torch.where(selected, best_score, torch.zeros_like(best_score))
+        active[batch, best] = False
+        active &= selected.unsqueeze(1)
+        overlap = iou[batch, best]
+        if method == _LINEAR:
+            scores = scores * torch.where(overlap > nms_thres, 1 - overlap, torch.ones_like(overlap))
+        elif method == _GAUSSIAN:
+            scores = scores * torch.exp(-(overlap * overlap) / nms_thres)
+        else:
+            active &= overlap <= nms_thres
+    return keep, keep_scores
+
 
 class SoftNMS(NMSCustom):
     def __init__(self, nms_type='linear', device='cuda', nms_thres=None, top_k=400, post_k=100):
-        self.nms_types = ['linear', 'gaussian']
+        self.nms_types = ['linear', 'gaussian', 'hard']
         if nms_type not in self.nms_types:
             raise ValueError('Type: ' + nms_type + ' of Soft-NMS is not supported.')
         else:
@@ -53,6 +159,8 @@ class SoftNMS(NMSCustom):
                 nms_thres = 0.3
             elif nms_type == 'gaussian':
                 nms_thres = 0.5
+            elif nms_type == 'hard':
+                nms_thres = 0.45
         self.device = device
         self.nms_thres = nms_thres
         self.top_k = top_k
@@ -73,50 +181,42 @@ class SoftNMS(NMSCustom):
         else:
             self.nms_type = nms_type
 
-    def run_nms(self, boxes=None, scores=None, threshold=0.2, img=None):
+    def run_nms_batch(self, boxes=None, scores=None, threshold=0.2, num_boxes=None, imgs=None, maps=None):
+        boxes = to_device(boxes, self.device).float()
+        scores = mask_padding(to_device(scores, self.device).float(), num_boxes)
+        # Only the top_k boxes of every image take part in the suppression, every box takes its highest scoring class
+        boxes, scores, classes, indices = batch_top_k(boxes, scores, self.top_k, cross_class=True)
+        batch_size, k = scores.shape
+        method = self.nms_types.index(self.nms_type)
+        max_out = min(self.post_k, k)
+
+        if scores.device.type == 'cpu' and _soft_nms_cpu is not None:
+            keep = torch.full((batch_size, max_out), -1, dtype=torch.long)
+            keep_scores = torch.zeros((batch_size, max_out))
+            boxes_np, scores_np = boxes.numpy(), scores.numpy()
+            for b in range(batch_size):
+                idx, idx_scores = _soft_nms_cpu(boxes_np[b], scores_np[b], method, float(self.nms_thres),
+                                                float(threshold), max_out)
+                keep[b, :len(idx)] = torch.from_numpy(idx)
+                keep_scores[b, :len(idx)] = torch.from_numpy(idx_scores)
+        else:
+            keep, keep_scores = soft_nms_iou_matrix(boxes, scores, method, self.nms_thres, threshold, max_out)
+        valid = keep >= 0
+        keep = keep.clamp(min=0)
+        boxes = torch.gather(boxes, 1, keep.unsqueeze(2).expand(-1, -1, 4))
+        boxes = torch.where(valid.unsqueeze(2), boxes, torch.zeros_like(boxes))
+        classes = torch.where(valid, torch.gather(classes, 1, keep), torch.full_like(keep, -1))
+        indices = torch.where(valid, torch.gather(indices, 1, keep), torch.full_like(keep, -1))
+        return boxes, classes, keep_scores, indices
 
-        if isinstance(boxes, np.ndarray):
-            boxes = torch.tensor(boxes, device=self.device)
-        elif torch.is_tensor(boxes):
-            if self.device == 'cpu':
-                boxes = boxes.cpu()
-            elif self.device == 'cuda':
-                boxes = boxes.cuda()
-
-        if isinstance(scores, np.ndarray):
-            scores = torch.tensor(scores, device=self.device)
-        elif torch.is_tensor(scores):
-            if self.device == 'cpu':
-                scores = scores.cpu()
-            elif self.device == 'cuda':
-                scores = scores.cuda()
-
-        scores, classes = scores.max(dim=1)
-        _, idx = scores.sort(0, descending=True)
-        idx = idx[:self.top_k]
-        boxes = boxes[idx]
-        scores = scores[idx]
-        classes = classes[idx]
-
-        dets = torch.cat((boxes, scores.unsqueeze(-1)), dim=1)
-
-        i = 0
-        while dets.shape[0] > 0:
-            scores[i] = dets[0, 4]
-            iou = jaccard(dets[:1, :-1], dets[1:, :-1]).triu_(diagonal=0).squeeze(0)
-            weight = torch.ones_like(iou)
-            if self.nms_type == 'linear':
-                weight[iou > self.nms_thres] -= iou[iou > self.nms_thres]
-            elif self.nms_type == 'gaussian':
-                weight = np.exp(-(iou * iou) / self.nms_thres)
-
-            dets[1:, 4] *= weight
-            dets = dets[1:, :]
-            i = i + 1
-        keep_ids = torch.where(scores > threshold)
-        scores = scores[keep_ids].cpu().numpy()
-        classes = classes[keep_ids].cpu().numpy()
-        boxes = boxes[keep_ids].cpu().numpy()
+    def run_nms(self, boxes=None, scores=None, threshold=0.2, img=None):
+        boxes, classes, scores, _ = self.run_nms_batch(boxes=to_device(boxes, self.device)[None],
+                                                       scores=to_device(scores, self.device)[None],
+                                                       threshold=threshold)
+        valid = torch.where(classes[0] >= 0)
+        scores = scores[0][valid].cpu().numpy()
+        classes = classes[0][valid].cpu().numpy()
+        boxes = boxes[0][valid].cpu().numpy()
         bounding_boxes = BoundingBoxList([])
         for idx, box in enumerate(boxes):
             bbox = BoundingBox(left=box[0], top=box[1],
@@ -13,6 +13,8 @@
 # limitations under the License.
 
 from abc import ABC, abstractmethod
+from opendr.perception.object_detection_2d.nms.utils.nms_utils import to_device, mask_padding, select_top_detections
+import torch
 
 
 class NMSCustom(ABC):
@@ -22,3 +24,62 @@ class NMSCustom(ABC):
     @abstractmethod
     def run_nms(self, boxes=None, scores=None, threshold=0.2, img=None, device='cpu'):
         pass
+
+    def run_nms_batch(self, boxes=None, scores=None, threshold=0.2, num_boxes=None, imgs=None, maps=None):
+        """
+        Runs NMS on a padded batch of images at once, without creating any BoundingBox.
+        Padded tensors can be created with nms_utils.pad_detections() and the results can be converted to one
+        ColumnarBoundingBoxList per image with nms_utils.batch_to_bounding_boxes().
+
+        :param boxes: padded boxes in (x1, y1, x2, y2) format, with shape [B, N, 4]
+        :type boxes: torch.Tensor or numpy.ndarray
+        :param scores: padded class scores with shape [B, N, C] (or [B, N] for a single class)
+        :type scores: torch.Tensor or numpy.ndarray
+        :param threshold: detections whose score does not exceed this threshold are discarded
+        :type threshold: float
+        :param num_boxes: number of valid boxes of every image, with shape [B], defaults to N for all images
+        :type num_boxes: torch.Tensor or numpy.ndarray or list, optional
+        :param imgs: the images of the batch, required by the learned NMS methods
+        :type imgs: list of opendr.engine.data.Image, optional
+        :param maps: the feature maps of the images of the batch, required by FSeq2-NMS
+        :type maps: list, optional
+        :return: the boxes [B, P, 4], classes [B, P], scores [B, P] and indices into N [B, P] of the kept detections
+            of every image in decreasing score order, padded with -1 indices and classes and zero boxes and scores
+        :rtype: tuple of torch.Tensor
+        """
+        # Per-image fallback over run_nms() for the implementations without a batched path. The index of a kept
+        # detection is the one of the input box closest to it.
+        boxes = to_device(boxes, self.device).float()
+        scores = mask_padding(to_device(scores, self.device).float(), num_boxes)
+        batch_size, n = scores.shape[:2]
+        if num_boxes is None:
+            num_boxes = [n] * batch_size
+        detections = []
+        for b in range(batch_size):
+            image_boxes = boxes[b, :int(num_boxes[b])]
+            kept = []
+            if len(image_boxes) > 0:
+                kwargs = {} if maps is None else {'map': maps[b]}
+                kept = self.run_nms(boxes=image_boxes, scores=scores[b, :len(image_boxes)], threshold=threshold,
+                                    img=None if imgs is None else imgs[b], **kwargs)
+                if isinstance(kept, tuple):
+                    kept = kept[0]
+            detections.append([[box.left, box.top, box.left + box.width, box.top + box.height,
+                                float(box.confidence), int(box.name)] for box in kept])
+
+        max_dets = max([len(d) for d in detections] + [0])
+        kept_boxes = torch.zeros((batch_size, max_dets, 4), device=boxes.device)
+        kept_scores = torch.full((batch_size, max_dets), -float('inf'), device=boxes.device)
+        classes = torch.full((batch_size, max_dets), -1, dtype=torch.long, device=boxes.device)
+        indices = torch.full((batch_size, max_dets), -1, dtype=torch.long, device=boxes.device)
+        for b, image_detections in enumerate(detections):
+            if len(image_detections) == 0:
+                continue
+            image_detections = torch.tensor(image_detections, dtype=torch.float, device=boxes.device)
+            m = len(image_detections)
+            kept_boxes[b, :m] = image_detections[:, :4]
+            kept_scores[b, :m] = image_detections[:, 4]
+            classes[b, :m] = image_detections[:, 5].long()
+            distances = (kept_boxes[b, :m].unsqueeze(1) - boxes[b, :int(num_boxes[b])].unsqueeze(0)).abs().sum(2)
+            indices[b, :m] = distances.argmin(dim=1)
+        return select_top_detections(kept_boxes, kept_scores, classes, indices, max_dets, -float('inf'))
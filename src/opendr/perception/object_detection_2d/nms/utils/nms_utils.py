@@ -27,6 +27,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+from opendr.engine.target import ColumnarBoundingBoxList
 import torch
 import torchvision
 import numpy as np
@@ -133,6 +134,193 @@ def distance(box_a, box_b, iscrowd: bool = False):
     return out if use_batch else out.squeeze(0)
 
 
+def to_device(data, device):
+    """
+    Converts numpy arrays and lists to tensors and moves tensors to the given device.
+    """
+    if data is None:
+        return None
+    if not torch.is_tensor(data):
+        return torch.as_tensor(np.asarray(data), device=device)
+    return data.to(device)
+
+
+def mask_padding(scores, num_boxes=None):
+    """
+    Sets the scores of the padding boxes of a batch to zero, so that they are never kept.
+
+    :param scores: padded scores with shape [B, N, C] or [B, N]
+    :type scores: torch.Tensor
+    :param num_boxes: number of valid boxes of every image, with shape [B], defaults to N for all images
+    :type num_boxes: torch.Tensor or numpy.ndarray or list, optional
+    :return: the masked scores with shape [B, N, C]
+    :rtype: torch.Tensor
+    """
+    if scores.dim() == 2:
+        scores = scores.unsqueeze(2)
+    if num_boxes is None:
+        return scores
+    num_boxes = torch.as_tensor(num_boxes, device=scores.device).reshape(-1, 1, 1)
+    valid = torch.arange(scores.shape[1], device=scores.device).reshape(1, -1, 1) < num_boxes
+    return torch.where(valid, scores, torch.zeros_like(scores))
+
+
+def batch_top_k(boxes, scores, top_k, cross_class=True):
+    """
+    Selects the top_k highest scoring boxes of every image, or of every class of every image, of a padded batch.
+
+    :param boxes: boxes in (x1, y1, x2, y2) format, with shape [B, N, 4]
+    :type boxes: torch.Tensor
+    :param scores: scores with shape [B, N, C]
+    :type scores: torch.Tensor
+    :param top_k: number of boxes selected per image (cross_class) or per class
+    :type top_k: int
+    :param cross_class: if True, every box takes the class of its highest score and all classes are processed
+        together, otherwise every class is processed separately
+    :type cross_class: bool
+    :return: the selected boxes [B * G, K, 4] and scores [B * G, K] in decreasing score order, along with their
+        classes [B, G * K] and indices into N [B, G * K], where G is 1 if cross_class is True and C otherwise
+    :rtype: tuple of torch.Tensor
+    """
+    batch_size, num_dets, num_classes = scores.shape
+    k = min(top_k, num_dets)
+    if cross_class:
+        scores, classes = scores.max(dim=2)
+        scores, indices = scores.topk(k, dim=1)
+        classes = torch.gather(classes, 1, indices)
+        boxes = torch.gather(boxes, 1, indices.unsqueeze(2).expand(-1, -1, 4))
+        return boxes, scores, classes, indices
+    scores, indices = scores.transpose(1, 2).topk(k, dim=2)
+    boxes = torch.gather(boxes.unsqueeze(1).expand(-1, num_classes, -1, -1), 2,
+                         indices.unsqueeze(3).expand(-1, -1, -1, 4))
+    classes = torch.arange(num_classes, device=scores.device).reshape(1, -1, 1).expand_as(indices)
+    return boxes.reshape(-1, k, 4), scores.reshape(-1, k), classes.reshape(batch_size, -1), \
+        indices.reshape(batch_size, -1)
+
+
+def select_top_detections(boxes, scores, classes, indices, post_k, threshold):
+    """
+    Keeps the post_k highest scoring detections of every image whose score exceeds threshold. The remaining columns
+    are padding, with index and class -1 and zero box and score.
+
+    :param boxes: boxes with shape [B, M, 4] (or any shape that can be viewed as such)
+    :type boxes: torch.Tensor
+    :param scores: scores with shape [B, M] (or any shape that can be viewed as such)
+    :type scores: torch.Tensor
+    :param classes: classes with shape [B, M]
+    :type classes: torch.Tensor
+    :param indices: indices of the detections into the input boxes, with shape [B, M]
+    :type indices: torch.Tensor
+    :param post_k: maximum number of detections kept per image
+    :type post_k: int
+    :param threshold: detections whose score does not exceed this threshold are discarded
+    :type threshold: float
+    :return: the boxes [B, P, 4], classes [B, P], scores [B, P] and indices [B, P] of the kept detections of every
+        image in decreasing score order, where P = min(post_k, M)
+    :rtype: tuple of torch.Tensor
+    """
+    batch_size = classes.shape[0]
+    boxes = boxes.reshape(batch_size, -1, 4)
+    scores = scores.reshape(batch_size, -1)
+    scores, order = scores.topk(min(post_k, scores.shape[1]), dim=1)
+    valid = scores > threshold
+    boxes = torch.gather(boxes, 1, order.unsqueeze(2).expand(-1, -1, 4))
+    boxes = torch.where(valid.unsqueeze(2), boxes, torch.zeros_like(boxes))
+    scores = torch.where(valid, scores, torch.zeros_like(scores))
+    classes = torch.where(valid, torch.gather(classes, 1, order), torch.full_like(order, -1))
+    indices = torch.where(valid, torch.gather(indices, 1, order), torch.full_like(order, -1))
+    return boxes, classes, scores, indices
+
+
+def pack_detections(detections, device='cpu'):
+    """
+    Packs the sorted detections of several images into padded sequences for Seq2Seq-NMS and FSeq2-NMS. The padding
+    boxes are unit boxes with zero score, so that their geometrical representations remain finite.
+
+    :param detections: the boxes [N_i, 4], scores [N_i] and indices [N_i] of every image
+    :type detections: list of tuple of torch.Tensor
+    :param device: device of the returned tensors
+    :type device: str
+    :return: the padded boxes [B, N, 4], scores [B, N] and indices [B, N] (-1 for padding), and the number of boxes
+        of every image [B]
+    :rtype: tuple of torch.Tensor
+    """
+    num_boxes = torch.tensor([len(d[1]) for d in detections], dtype=torch.long, device=device)
+    max_dets = int(num_boxes.max()) if len(detections) > 0 else 0
+    boxes = torch.tensor([0.0, 0.0, 1.0, 1.0], device=device).repeat(len(detections), max_dets, 1)
+    scores = torch.zeros((len(detections), max_dets), device=device)
+    indices = torch.full((len(detections), max_dets), -1, dtype=torch.long, device=device)
+    for i, (image_boxes, image_scores, image_indices) in enumerate(detections):
+        boxes[i, :len(image_scores)] = image_boxes
+        scores[i, :len(image_scores)] = image_scores
+        indices[i, :len(image_scores)] = image_indices
+    return boxes, scores, indices, num_boxes
+
+
+def bucket_by_length(num_boxes, max_pairs):
+    """
+    Groups the images of a padded batch into chunks of similar number of boxes, so that each chunk holds at most
+    max_pairs pairs of boxes after padding (and at least one image). Grouping by length keeps the padding, and hence
+    the wasted attention computations, small.
+
+    :param num_boxes: number of boxes of every image [B]
+    :type num_boxes: torch.Tensor
+    :param max_pairs: maximum number of (padded) pairs of boxes of a chunk
+    :type max_pairs: int
+    :return: the indices of the images of every chunk, images without boxes are omitted
+    :rtype: list of torch.Tensor
+    """
+    counts, order = torch.sort(torch.as_tensor(num_boxes).cpu())
+    chunks, start = [], int(torch.count_nonzero(counts == 0))
+    for end in range(start + 1, len(counts) + 1):
+        if end == len(counts) or (end + 1 - start) * int(counts[end]) ** 2 > max_pairs:
+            chunks.append(order[start:end])
+            start = end
+    return chunks
+
+
+def pad_detections(boxes, scores, device='cpu'):
+    """
+    Stacks the detections of several images into the padded tensors expected by NMSCustom.run_nms_batch().
+
+    :param boxes: the boxes of every image, each with shape [N_i, 4]
+    :type boxes: list of torch.Tensor or numpy.ndarray
+    :param scores: the scores of every image, each with shape [N_i, C]
+    :type scores: list of torch.Tensor or numpy.ndarray
+    :param device: device of the returned tensors
+    :type device: str
+    :return: the padded boxes [B, N, 4], scores [B, N, C] and the number of boxes of every image [B]
+    :rtype: tuple of torch.Tensor
+    """
+    boxes = [to_device(b, device).float().reshape(-1, 4) for b in boxes]
+    scores = [to_device(s, device).float() for s in scores]
+    scores = [s.unsqueeze(1) if s.dim() == 1 else s for s in scores]
+    num_boxes = torch.tensor([b.shape[0] for b in boxes], device=device)
+    num_classes = max([s.shape[1] for s in scores] + [1])
+    padded_boxes = torch.zeros((len(boxes), max(num_boxes.tolist() + [0]), 4), device=device)
+    padded_scores = torch.zeros((len(boxes), padded_boxes.shape[1], num_classes), device=device)
+    for i, (b, s) in enumerate(zip(boxes, scores)):
+        padded_boxes[i, :b.shape[0]] = b
+        padded_scores[i, :s.shape[0], :s.shape[1]] = s
+    return padded_boxes, padded_scores, num_boxes
+
+
+def batch_to_bounding_boxes(boxes, classes, scores, indices):
+    """
+    Converts the output of NMSCustom.run_nms_batch() to one ColumnarBoundingBoxList per image.
+    """
+    valid = (indices >= 0).cpu().numpy()
+    boxes = boxes.cpu().numpy()
+    classes = classes.cpu().numpy()
+    scores = scores.cpu().numpy()
+    results = []
+    for i in range(valid.shape[0]):
+        image_boxes = boxes[i][valid[i]].astype(np.float32)
+        image_boxes[:, 2:] -= image_boxes[:, :2]
+        results.append(ColumnarBoundingBoxList(image_boxes, scores=scores[i][valid[i]], classes=classes[i][valid[i]]))
+    return results
+
+
 def det_matching(scores, dt_boxes, gt_boxes, iou_thres, device='cuda'):
     sorted_indices = torch.argsort(-scores, dim=0)
     labels = torch.zeros(len(dt_boxes))
@@ -248,17 +436,106 @@ def filter_iou_boxes(boxes=None, iou_thres=0.2):
 
 
 def bb_intersection_over_union(boxAs=None, boxBs=None):
-    xA = torch.maximum(boxAs[:, :, 0], boxBs[:, :, 0])
-    yA = torch.maximum(boxAs[:, :, 1], boxBs[:, :, 1])
-    xB = torch.minimum(boxAs[:, :, 2], boxBs[:, :, 2])
-    yB = torch.minimum(boxAs[:, :, 3], boxBs[:, :, 3])
+    xA = torch.maximum(boxAs[..., 0], boxBs[..., 0])
+    yA = torch.maximum(boxAs[..., 1], boxBs[..., 1])
+    xB = torch.minimum(boxAs[..., 2], boxBs[..., 2])
+    yB = torch.minimum(boxAs[..., 3], boxBs[..., 3])
     interAreas = torch.maximum(torch.zeros_like(xB), xB - xA + 1) * torch.maximum(torch.zeros_like(yB), yB - yA + 1)
-    boxAAreas = (boxAs[:, :, 2] - boxAs[:, :, 0] + 1) * (boxAs[:, :, 3] - boxAs[:, :, 1] + 1)
-    boxBAreas = (boxBs[:, :, 2] - boxBs[:, :, 0] + 1) * (boxBs[:, :, 3] - boxBs[:, :, 1] + 1)
+    boxAAreas = (boxAs[..., 2] - boxAs[..., 0] + 1) * (boxAs[..., 3] - boxAs[..., 1] + 1)
+    boxBAreas = (boxBs[..., 2] - boxBs[..., 0] + 1) * (boxBs[..., 3] - boxBs[..., 1] + 1)
     ious = interAreas / (boxAAreas + boxBAreas - interAreas)
     return ious
 
 
+def valid_boxes_mask(num_boxes, num_dets, device='cpu'):
+    """
+    Returns a [B, N] mask of the valid (non-padding) boxes of a padded batch.
+    """
+    num_boxes = torch.as_tensor(num_boxes, device=device).reshape(-1, 1)
+    return torch.arange(num_dets, device=device).unsqueeze(0) < num_boxes
+
+
+def compute_attention_mask(boxes=None, iou_thres=0.2, extra=0.1, num_boxes=None):
+    """
+    Computes the attention mask of Seq2Seq-NMS and FSeq2-NMS, i.e., 1 for the boxes ranked above (or equal to) a box
+    and overlapping with it by at least iou_thres, extra for the overlapping boxes ranked below it and 0 otherwise.
+
+    :param boxes: boxes sorted by decreasing score, with shape [N, 4] or [B, N, 4] for a padded batch
+    :type boxes: torch.Tensor
+    :param iou_thres: IoU threshold above which two boxes attend to each other
+    :type iou_thres: float
+    :param extra: weight of the boxes ranked below a box
+    :type extra: float
+    :param num_boxes: number of valid boxes of every image of a padded batch, the padding boxes are masked out
+    :type num_boxes: torch.Tensor or list, optional
+    :return: the mask with shape [N, N] or [B, N, N]
+    :rtype: torch.Tensor
+    """
+    relations = bb_intersection_over_union(boxes.unsqueeze(-2), boxes.unsqueeze(-3)) >= iou_thres
+    if num_boxes is not None:
+        valid = valid_boxes_mask(num_boxes, boxes.shape[-2], device=boxes.device)
+        relations = relations * valid.unsqueeze(-1) * valid.unsqueeze(-2)
+    mask1 = torch.tril(relations).float()
+    mask2 = extra * torch.triu(relations, diagonal=1).float()
+    mask = mask1 + mask2
+    return mask
+
+
+def compute_geometrical_feats(boxes, scores, resolution):
+    """
+    Computes the geometrical representations of Seq2Seq-NMS and FSeq2-NMS, for every box and for every pair of boxes.
+
+    :param boxes: boxes with shape [N, 4] or [B, N, 4] for a padded batch
+    :type boxes: torch.Tensor
+    :param scores: scores with shape [N] or [B, N]
+    :type scores: torch.Tensor
+    :param resolution: image resolution as [width, height], or one resolution per image with shape [B, 2]
+    :type resolution: list or torch.Tensor
+    :return: the features of every box [N, 1, 14] and of every pair of boxes [N, N, 14], with a leading batch
+        dimension for a padded batch
+    :rtype: tuple of torch.Tensor
+    """
+    n = boxes.shape[-2]
+    shape = boxes.shape[:-2] + (n, n)
+    boxBs = boxes.unsqueeze(-3).expand(shape + (4,))
+    boxAs = boxes.unsqueeze(-2).expand(shape + (4,))
+    scoresBs = scores.unsqueeze(-2).expand(shape).unsqueeze(-1)
+    scoresAs = scores.unsqueeze(-1).expand(shape).unsqueeze(-1)
+
+    resolution = torch.as_tensor(resolution, dtype=boxes.dtype, device=boxes.device)
+    resolution = resolution.reshape(resolution.shape[:-1] + (1, 1, 2))
+    scale_div = [resolution[..., 1:2] / 20, resolution[..., 0:1] / 20]
+    dx = ((boxBs[..., 0] - boxAs[..., 0] + boxBs[..., 2] - boxAs[..., 2]) / 2).unsqueeze(-1)
+    dy = ((boxBs[..., 1] - boxAs[..., 1] + boxBs[..., 3] - boxAs[..., 3]) / 2).unsqueeze(-1)
+    dxy = dx * dx + dy * dy
+    dxy = dxy / (scale_div[0] * scale_div[0] + scale_div[1] * scale_div[1])
+    dx = (dx / scale_div[0])
+    dy = (dy / scale_div[1])
+    sx = (boxBs[..., 2] - boxBs[..., 0]).unsqueeze(-1)
+    sx_1 = sx / (boxAs[..., 2] - boxAs[..., 0]).unsqueeze(-1)
+    sx_2 = sx / scale_div[0]
+    sy = (boxBs[..., 3] - boxBs[..., 1]).unsqueeze(-1)
+    sy_1 = sy / (boxAs[..., 3] - boxAs[..., 1]).unsqueeze(-1)
+    sy_2 = sy / scale_div[1]
+    scl = ((boxBs[..., 2] - boxBs[..., 0]) * (boxBs[..., 3] - boxBs[..., 1])).unsqueeze(-1)
+    scl_1 = scl / ((boxAs[..., 2] - boxAs[..., 0]) * (boxAs[..., 3] - boxAs[..., 1])).unsqueeze(-1)
+    scl_2 = scl / (scale_div[0] * scale_div[1])
+    del scl
+
+    scr_1 = 5 * scoresBs
+    scr_2 = scr_1 - 5 * scoresAs
+
+    sr_1 = torch.unsqueeze((boxBs[..., 3] - boxBs[..., 1]) / (boxBs[..., 2] - boxBs[..., 0]), dim=-1)
+    sr_2 = torch.unsqueeze(((boxBs[..., 3] - boxBs[..., 1]) / (boxBs[..., 2] - boxBs[..., 0])) / (
+            (boxAs[..., 3] - boxAs[..., 1]) / (boxAs[..., 2] - boxAs[..., 0])), dim=-1)
+
+    ious = 5 * (bb_intersection_over_union(boxAs, boxBs)).unsqueeze(-1)
+    enc_vers_all = torch.cat((dx, dy, dxy, sx_1, sx_2, sy_1, sy_2, ious, scl_1, scl_2, scr_1, scr_2, sr_1, sr_2),
+                             dim=-1)
+    enc_vers = enc_vers_all.diagonal(dim1=-3, dim2=-2).transpose(-2, -1).unsqueeze(-2)
+    return enc_vers, enc_vers_all
+
+
 def compute_class_weights(pos_weights, max_dets=400, dataset_nms=None):
     num_pos = np.ones([len(dataset_nms.classes), 1])
     num_bg = np.ones([len(dataset_nms.classes), 1])
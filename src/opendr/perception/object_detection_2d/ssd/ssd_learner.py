@@ -47,6 +47,7 @@ from opendr.perception.object_detection_2d.datasets.transforms import ImageToNDA
     BoundingBoxListToNumpyArray, \
     transform_test, pad_test
 from opendr.perception.object_detection_2d.nms.utils import NMSCustom
+from opendr.perception.object_detection_2d.nms.utils.nms_utils import batch_to_bounding_boxes
 
 gutils.random.seed(0)
 
@@ -669,8 +670,9 @@ class SingleShotDetectorLearner(Learner):
             maps_save = maps[0][0].swapaxes(dim1=0, dim2=1).swapaxes(dim1=1, dim2=2).asnumpy().astype(dtype=np.float16)
 
         if custom_nms is not None:
-                bounding_boxes, _ = custom_nms.run_nms(boxes=boxes, scores=scores, threshold=threshold, img=img,
-                                                       map=maps_save)
+            kept = custom_nms.run_nms_batch(boxes=boxes[np.newaxis], scores=scores[np.newaxis], threshold=threshold,
+                                            imgs=[img], maps=None if maps_save is None else [maps_save])
+            bounding_boxes = batch_to_bounding_boxes(*kept)[0]
         else:
             bounding_boxes = BoundingBoxList([])
             for idx, box in enumerate(boxes):
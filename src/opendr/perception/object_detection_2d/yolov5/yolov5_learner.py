@@ -65,7 +65,7 @@ class YOLOv5DetectorLearner(Learner):
 
     def infer(self, img, size=640):
         if isinstance(img, Image):
-            img = img.convert("channels_last", "rgb")
+            img = img.convert("channels_last", "rgb", copy=False)
 
         results = self.model(img, size=size)
 
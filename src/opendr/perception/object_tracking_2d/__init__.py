@@ -1,20 +1,17 @@
-from opendr.perception.object_tracking_2d.fair_mot.object_tracking_2d_fair_mot_learner import \
-    ObjectTracking2DFairMotLearner
-from opendr.perception.object_tracking_2d.deep_sort.object_tracking_2d_deep_sort_learner import \
-    ObjectTracking2DDeepSortLearner
-from opendr.perception.object_tracking_2d.siamrpn.siamrpn_learner import SiamRPNLearner
+from opendr.engine.helper.lazy import lazy_exports
 
-from opendr.perception.object_tracking_2d.datasets.mot_dataset import (
-    MotDataset,
-    MotDatasetIterator,
-    RawMotDatasetIterator,
-    RawMotWithDetectionsDatasetIterator,
-)
-
-from opendr.perception.object_tracking_2d.datasets.market1501_dataset import (
-    Market1501Dataset,
-    Market1501DatasetIterator,
-)
+# Learners and datasets are only imported when they are first accessed
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'ObjectTracking2DFairMotLearner': '.fair_mot.object_tracking_2d_fair_mot_learner',
+    'ObjectTracking2DDeepSortLearner': '.deep_sort.object_tracking_2d_deep_sort_learner',
+    'SiamRPNLearner': '.siamrpn.siamrpn_learner',
+    'MotDataset': '.datasets.mot_dataset',
+    'MotDatasetIterator': '.datasets.mot_dataset',
+    'RawMotDatasetIterator': '.datasets.mot_dataset',
+    'RawMotWithDetectionsDatasetIterator': '.datasets.mot_dataset',
+    'Market1501Dataset': '.datasets.market1501_dataset',
+    'Market1501DatasetIterator': '.datasets.market1501_dataset',
+})
 
 __all__ = ['ObjectTracking2DFairMotLearner', 'ObjectTracking2DDeepSortLearner', 'MotDataset', 'MotDatasetIterator',
            'RawMotDatasetIterator', 'RawMotWithDetectionsDatasetIterator', 'Market1501Dataset', 'Market1501DatasetIterator',
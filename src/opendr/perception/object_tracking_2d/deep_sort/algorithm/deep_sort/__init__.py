@@ -12,7 +12,8 @@ def build_tracker(
     max_age,
     n_init,
     nn_budget,
-    device
+    device,
+    extractor=None,
 ):
     return DeepSort(
         max_dist=max_dist,
@@ -23,4 +24,5 @@ def build_tracker(
         n_init=n_init,
         nn_budget=nn_budget,
         device=device,
+        extractor=extractor,
     )
@@ -37,6 +37,49 @@ class Extractor(object):
         ).float()
         return im_batch
 
+    def _crop_and_resize(self, image, crops):
+        """
+        Crops all the regions from the image and resizes them to self.size with bilinear interpolation, as
+        cv2.resize does for every crop, in a single operation on self.device.
+
+        :param image: HxWxC image
+        :param crops: Nx4 integer array with the (row_start, col_start, row_end, col_end) bounds of the regions
+        :return: NxCxHxW tensor with the normalized crops
+        """
+        image = torch.as_tensor(np.ascontiguousarray(image), device=self.device).float()
+        crops = torch.as_tensor(crops, device=self.device).long()
+
+        def sample_coordinates(start, end, size):
+            # Source pixel coordinates of every output pixel, clamped to the region as cv2 does
+            length = (end - start).unsqueeze(1)
+            scale = length.float() / size
+            coordinates = (torch.arange(size, device=self.device).float() + 0.5) * scale - 0.5
+            coordinates = torch.minimum(coordinates.clamp(min=0), (length - 1).float())
+            low = coordinates.floor().long()
+            high = torch.minimum(low + 1, length - 1)
+            return start.unsqueeze(1) + low, start.unsqueeze(1) + high, coordinates - low
+
+        top, bottom, row_weights = sample_coordinates(crops[:, 0], crops[:, 2], self.size[1])
+        left, right, col_weights = sample_coordinates(crops[:, 1], crops[:, 3], self.size[0])
+        row_weights, col_weights = row_weights[:, :, None, None], col_weights[:, None, :, None]
+
+        # Gathers from the flattened image, which is much faster than broadcast advanced indexing
+        width, channels = image.shape[1], image.shape[2]
+        pixels = image.reshape(-1, channels)
+
+        def gather(rows, cols):
+            indices = (rows[:, :, None] * width + cols[:, None, :]).reshape(-1)
+            return pixels.index_select(0, indices).reshape(len(crops), self.size[1], self.size[0], channels)
+
+        crops = (
+            (1 - row_weights) * ((1 - col_weights) * gather(top, left) + col_weights * gather(top, right)) +
+            row_weights * ((1 - col_weights) * gather(bottom, left) + col_weights * gather(bottom, right))
+        )
+        mean = torch.tensor([0.485, 0.456, 0.406], device=self.device)
+        std = torch.tensor([0.229, 0.224, 0.225], device=self.device)
+        crops = (crops / 255.0 - mean) / std
+        return crops.permute(0, 3, 1, 2).contiguous()
+
     def __call__(self, im_crops):
         im_batch = self._preprocess(im_crops)
         with torch.no_grad():
@@ -44,9 +87,39 @@ class Extractor(object):
             features = self.net(im_batch)
         return features.cpu().numpy()
 
+    def extract(self, image, crops):
+        """
+        Computes the features of several regions of an image. On accelerators, the image is uploaded to the device
+        once and all the regions are cropped, resized and normalized together, instead of one by one. On CPU, the
+        SIMD resize of OpenCV is faster than the batched gathers, so the regions are resized one by one.
+
+        :param image: HxWxC image
+        :param crops: Nx4 integer array with the (row_start, col_start, row_end, col_end) bounds of the regions
+        :return: NxD array with the features of the regions
+        """
+        return self.extract_batch([image], [crops])[0]
+
+    def extract_batch(self, images, crops):
+        """
+        Computes the features of the regions of several images, e.g. the latest frames of several streams, with a
+        single network pass.
 
-if __name__ == "__main__":
-    img = cv2.imread("demo.jpg")[:, :, (2, 1, 0)]
-    extr = Extractor("checkpoint/ckpt.t7")
-    feature = extr(img)
-    print(feature.shape)
+        :param images: list of HxWxC images
+        :param crops: list with the Nx4 region bounds of every image, as in extract
+        :return: list with the NxD features of the regions of every image
+        """
+        counts = [len(image_crops) for image_crops in crops]
+        if sum(counts) == 0:
+            return [np.zeros((0, 0), dtype=np.float32) for _ in counts]
+        with torch.no_grad():
+            if self.device is None or torch.device(self.device).type == "cpu":
+                im_batch = self._preprocess([
+                    image[r1:r2, c1:c2] for image, image_crops in zip(images, crops) for r1, c1, r2, c2 in image_crops
+                ])
+            else:
+                im_batch = torch.cat([
+                    self._crop_and_resize(image, image_crops)
+                    for image, image_crops in zip(images, crops) if len(image_crops) > 0
+                ])
+            features = self.net(im_batch.to(self.device)).cpu().numpy()
+        return np.split(features, np.cumsum(counts)[:-1])
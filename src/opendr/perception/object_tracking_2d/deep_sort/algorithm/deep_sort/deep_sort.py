@@ -22,11 +22,12 @@ class DeepSort(object):
         n_init=3,
         nn_budget=100,
         device=None,
+        extractor=None,
     ):
         self.min_confidence = min_confidence
         self.nms_max_overlap = nms_max_overlap
 
-        self.extractor = Extractor(device=device)
+        self.extractor = Extractor(device=device) if extractor is None else extractor
 
         max_cosine_distance = max_dist
         nn_budget = 100
@@ -35,10 +36,11 @@ class DeepSort(object):
             metric, max_iou_distance=max_iou_distance, max_age=max_age, n_init=n_init
         )
 
-    def update(self, bbox_xywh, confidences, cls_ids, ori_img, is_new):
+    def update(self, bbox_xywh, confidences, cls_ids, ori_img, is_new, features=None):
         self.width, self.height = ori_img.shape[:2]
-        # generate detections
-        features = self._get_features(bbox_xywh, ori_img)
+        # generate detections, unless their features were computed in a batch with other images
+        if features is None:
+            features = self._get_features(bbox_xywh, ori_img)
         bbox_tlwh = self._xywh_to_tlwh(bbox_xywh)
         detections = [
             Detection(bbox_tlwh[i], conf, cls_ids[i], features[i])
@@ -66,7 +68,7 @@ class DeepSort(object):
             confidence = track.confidence
             x1, y1, x2, y2 = self._tlwh_to_xyxy(box)
             track_id = track.track_id
-            outputs.append(np.array([x1, y1, x2, y2, track_id, confidence, cls_id], dtype=np.int))
+            outputs.append(np.array([x1, y1, x2, y2, track_id, confidence, cls_id], dtype=int))
         if len(outputs) > 0:
             outputs = np.stack(outputs, axis=0)
         return outputs
@@ -117,14 +119,38 @@ class DeepSort(object):
         h = int(y2 - y1)
         return t, l, w, h
 
+    @staticmethod
+    def crop_bounds(bbox_xywh, shape):
+        """Compute the bounds of the image regions the features of the boxes are
+        extracted from.
+
+        Parameters
+        ----------
+        bbox_xywh : ndarray
+            Nx4 array with the (top left x, top left y, width, height) of the boxes.
+        shape : tuple
+            Shape of the image.
+
+        Returns
+        -------
+        ndarray
+            Nx4 array with the (row_start, col_start, row_end, col_end) bounds of the regions.
+
+        """
+        # Same bounds as _tlwh_to_xyxy, which are used as the rows (x) and columns (y) of the crops
+        width, height = shape[:2]
+        x, y, w, h = np.asarray(bbox_xywh, dtype=np.float64).reshape(-1, 4).T
+        x1 = np.maximum(np.trunc(x), 0)
+        x2 = np.minimum(np.trunc(x + w), width - 1)
+        y1 = np.maximum(np.trunc(y), 0)
+        y2 = np.minimum(np.trunc(y + h), height - 1)
+        crops = np.stack([x1, y1, x2, y2], axis=1).astype(np.int64)
+        # Degenerate boxes are cropped to a single pixel
+        crops[:, :2] = np.minimum(crops[:, :2], [width - 1, height - 1])
+        crops[:, 2:] = np.maximum(crops[:, 2:], crops[:, :2] + 1)
+        return crops
+
     def _get_features(self, bbox_xywh, ori_img):
-        im_crops = []
-        for box in bbox_xywh:
-            x1, y1, x2, y2 = self._tlwh_to_xyxy(box)
-            im = ori_img[x1:x2, y1:y2]
-            im_crops.append(im)
-        if im_crops:
-            features = self.extractor(im_crops)
-        else:
-            features = np.array([])
-        return features
+        if len(bbox_xywh) == 0:
+            return np.array([])
+        return self.extractor.extract(ori_img, self.crop_bounds(bbox_xywh, ori_img.shape))
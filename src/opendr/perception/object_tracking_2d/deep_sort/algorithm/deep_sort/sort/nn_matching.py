@@ -2,98 +2,59 @@
 import numpy as np
 
 
-def _pdist(a, b):
-    """Compute pair-wise squared distance between points in `a` and `b`.
+def _nn_euclidean_distance_batch(dots, square_norms, valid, y):
+    """ Helper function for the batched nearest neighbor distance metric
+    (Euclidean).
 
     Parameters
     ----------
-    a : array_like
-        An NxM matrix of N samples of dimensionality M.
-    b : array_like
-        An LxM matrix of L samples of dimensionality M.
-
-    Returns
-    -------
-    ndarray
-        Returns a matrix of size len(a), len(b) such that eleement (i, j)
-        contains the squared distance between `a[i]` and `b[j]`.
-
-    """
-    a, b = np.asarray(a), np.asarray(b)
-    if len(a) == 0 or len(b) == 0:
-        return np.zeros((len(a), len(b)))
-    a2, b2 = np.square(a).sum(axis=1), np.square(b).sum(axis=1)
-    r2 = -2.0 * np.dot(a, b.T) + a2[:, None] + b2[None, :]
-    r2 = np.clip(r2, 0.0, float(np.inf))
-    return r2
-
-
-def _cosine_distance(a, b, data_is_normalized=False):
-    """Compute pair-wise cosine distance between points in `a` and `b`.
-
-    Parameters
-    ----------
-    a : array_like
-        An NxM matrix of N samples of dimensionality M.
-    b : array_like
-        An LxM matrix of L samples of dimensionality M.
-    data_is_normalized : Optional[bool]
-        If True, assumes rows in a and b are unit length vectors.
-        Otherwise, a and b are explicitly normalized to lenght 1.
-
-    Returns
-    -------
-    ndarray
-        Returns a matrix of size len(a), len(b) such that eleement (i, j)
-        contains the squared distance between `a[i]` and `b[j]`.
-
-    """
-    if not data_is_normalized:
-        a = np.asarray(a) / np.linalg.norm(a, axis=1, keepdims=True)
-        b = np.asarray(b) / np.linalg.norm(b, axis=1, keepdims=True)
-    return 1.0 - np.dot(a, b.T)
-
-
-def _nn_euclidean_distance(x, y):
-    """ Helper function for nearest neighbor distance metric (Euclidean).
-
-    Parameters
-    ----------
-    x : ndarray
-        A matrix of N row-vectors (sample points).
+    dots : ndarray
+        A TxBxN array with the dot products between the B sample points of
+        each of the T targets and the N query points.
+    square_norms : ndarray
+        A TxB matrix with the squared norms of the sample points.
+    valid : ndarray
+        A TxB boolean mask of the samples that have been observed.
     y : ndarray
-        A matrix of M row-vectors (query points).
+        A matrix of N row-vectors (query points).
 
     Returns
     -------
     ndarray
-        A vector of length M that contains for each entry in `y` the
-        smallest Euclidean distance to a sample in `x`.
+        A TxN matrix that contains for each target and entry in `y` the
+        smallest squared Euclidean distance to a sample of the target.
 
     """
-    distances = _pdist(x, y)
-    return np.maximum(0.0, distances.min(axis=0))
+    distances = -2.0 * dots + square_norms[:, :, None] + np.square(y).sum(axis=1)[None, None, :]
+    distances = np.where(valid[:, :, None], distances, np.inf)
+    return np.maximum(0.0, distances.min(axis=1))
 
 
-def _nn_cosine_distance(x, y):
-    """ Helper function for nearest neighbor distance metric (cosine).
+def _nn_cosine_distance_batch(dots, square_norms, valid, y):
+    """ Helper function for the batched nearest neighbor distance metric
+    (cosine).
 
     Parameters
     ----------
-    x : ndarray
-        A matrix of N row-vectors (sample points).
+    dots : ndarray
+        A TxBxN array with the dot products between the B unit length sample
+        points of each of the T targets and the N unit length query points.
+    square_norms : ndarray
+        Unused, the sample points are unit length.
+    valid : ndarray
+        A TxB boolean mask of the samples that have been observed.
     y : ndarray
-        A matrix of M row-vectors (query points).
+        A matrix of N unit length row-vectors (query points).
 
     Returns
     -------
     ndarray
-        A vector of length M that contains for each entry in `y` the
-        smallest cosine distance to a sample in `x`.
+        A TxN matrix that contains for each target and entry in `y` the
+        smallest cosine distance to a sample of the target.
 
     """
-    distances = _cosine_distance(x, y)
-    return distances.min(axis=0)
+    distances = np.where(valid[:, :, None], 1.0 - dots, np.inf)
+    return distances.min(axis=1)
 
 
 class NearestNeighborDistanceMetric(object):
@@ -101,6 +62,10 @@ class NearestNeighborDistanceMetric(object):
     A nearest neighbor distance metric that, for each target, returns
     the closest distance to any sample that has been observed so far.
 
+    The samples are stored in a preallocated array with one ring buffer
+    of `budget` samples per target, so that the distances to all targets
+    are computed at once.
+
     Parameters
     ----------
     metric : str
@@ -114,23 +79,60 @@ class NearestNeighborDistanceMetric(object):
 
     Attributes
     ----------
-    samples : Dict[int -> List[ndarray]]
-        A dictionary that maps from target identities to the list of samples
-        that have been observed so far.
+    samples : Dict[int -> ndarray]
+        A dictionary that maps from target identities to the samples that
+        have been observed so far, from the oldest to the newest one. The
+        samples of the cosine metric are stored normalized to unit length.
 
     """
 
     def __init__(self, metric, matching_threshold, budget=None):
 
         if metric == "euclidean":
-            self._metric = _nn_euclidean_distance
+            self._metric = _nn_euclidean_distance_batch
         elif metric == "cosine":
-            self._metric = _nn_cosine_distance
+            self._metric = _nn_cosine_distance_batch
         else:
             raise ValueError("Invalid metric; must be either 'euclidean' or 'cosine'")
+        self._normalize = metric == "cosine"
         self.matching_threshold = matching_threshold
         self.budget = budget
-        self.samples = {}
+
+        # [rows, capacity, dimensions] samples, with a ring buffer per row, whose head counts all the samples
+        # written to it, and the number of valid samples of every row
+        self._samples = None
+        self._square_norms = None
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._heads = np.zeros(0, dtype=np.int64)
+        self._rows = {}
+        self._free_rows = []
+
+    @property
+    def samples(self):
+        result = {}
+        for target, row in self._rows.items():
+            count, head = self._counts[row], self._heads[row]
+            order = (head - count + np.arange(count)) % self._samples.shape[1]
+            result[target] = self._samples[row, order]
+        return result
+
+    def _allocate(self, rows, capacity, dimensions, dtype):
+        samples = np.zeros((rows, capacity, dimensions), dtype=dtype)
+        square_norms = np.zeros((rows, capacity), dtype=dtype)
+        counts = np.zeros(rows, dtype=np.int64)
+        heads = np.zeros(rows, dtype=np.int64)
+        if self._samples is not None:
+            old_rows, old_capacity = self._samples.shape[:2]
+            # Buffers only grow while they are not full, so their samples do not wrap around
+            samples[:old_rows, :old_capacity] = self._samples
+            square_norms[:old_rows, :old_capacity] = self._square_norms
+            counts[:old_rows] = self._counts
+            heads[:old_rows] = self._heads
+            self._free_rows += list(range(old_rows, rows))
+        else:
+            self._free_rows = list(range(rows))
+        self._samples, self._square_norms = samples, square_norms
+        self._counts, self._heads = counts, heads
 
     def partial_fit(self, features, targets, active_targets):
         """Update the distance metric with new data.
@@ -145,11 +147,53 @@ class NearestNeighborDistanceMetric(object):
             A list of targets that are currently present in the scene.
 
         """
-        for feature, target in zip(features, targets):
-            self.samples.setdefault(target, []).append(feature)
-            if self.budget is not None:
-                self.samples[target] = self.samples[target][-self.budget:]
-        self.samples = {k: self.samples[k] for k in active_targets}
+        active_targets = set(active_targets)
+        for target in [t for t in self._rows if t not in active_targets]:
+            row = self._rows.pop(target)
+            self._counts[row] = 0
+            self._heads[row] = 0
+            self._free_rows.append(row)
+
+        features, targets = np.asarray(features), np.asarray(targets)
+        keep = np.array([t in active_targets for t in targets.tolist()], dtype=bool)
+        features, targets = features[keep], targets[keep]
+        if len(features) == 0:
+            return
+        if self._normalize:
+            features = features / np.linalg.norm(features, axis=1, keepdims=True)
+
+        new_targets = [t for t in dict.fromkeys(targets.tolist()) if t not in self._rows]
+        unique_targets, inverse, batch_counts = np.unique(targets, return_inverse=True, return_counts=True)
+        # Order of every feature among the features of its target in this batch
+        order = np.argsort(inverse, kind="stable")
+        ranks = np.empty(len(targets), dtype=np.int64)
+        ranks[order] = np.arange(len(targets)) - np.repeat(np.cumsum(batch_counts) - batch_counts, batch_counts)
+
+        if self._samples is None:
+            capacity = self.budget if self.budget is not None else int(batch_counts.max())
+            self._allocate(max(len(new_targets), 1), capacity, features.shape[1], features.dtype)
+        if len(new_targets) > len(self._free_rows):
+            rows = max(len(self._samples) * 2, len(self._samples) + len(new_targets) - len(self._free_rows))
+            self._allocate(rows, self._samples.shape[1], self._samples.shape[2], self._samples.dtype)
+        for target in new_targets:
+            self._rows[target] = self._free_rows.pop(0)
+
+        rows = np.array([self._rows[t] for t in unique_targets.tolist()], dtype=np.int64)
+        if self.budget is None:
+            needed = int((self._counts[rows] + batch_counts).max())
+            if needed > self._samples.shape[1]:
+                capacity = max(self._samples.shape[1] * 2, needed)
+                self._allocate(len(self._samples), capacity, self._samples.shape[2], self._samples.dtype)
+        capacity = self._samples.shape[1]
+
+        # Only the last `capacity` features of every target are stored, so that the scatter has no duplicates
+        stored = ranks >= batch_counts[inverse] - capacity
+        feature_rows = rows[inverse[stored]]
+        positions = (self._heads[feature_rows] + ranks[stored]) % capacity
+        self._samples[feature_rows, positions] = features[stored]
+        self._square_norms[feature_rows, positions] = np.square(features[stored]).sum(axis=1)
+        self._heads[rows] += batch_counts
+        self._counts[rows] = np.minimum(self._counts[rows] + batch_counts, capacity)
 
     def distance(self, features, targets):
         """Compute distance between features and targets.
@@ -169,7 +213,14 @@ class NearestNeighborDistanceMetric(object):
             `targets[i]` and `features[j]`.
 
         """
-        cost_matrix = np.zeros((len(targets), len(features)))
-        for i, target in enumerate(targets):
-            cost_matrix[i, :] = self._metric(self.samples[target], features)
-        return cost_matrix
+        if len(targets) == 0 or len(features) == 0:
+            return np.zeros((len(targets), len(features)))
+        features = np.asarray(features)
+        if self._normalize:
+            features = features / np.linalg.norm(features, axis=1, keepdims=True)
+        rows = np.array([self._rows[t] for t in np.asarray(targets).tolist()], dtype=np.int64)
+        # A single matrix product with all the stored samples is faster than gathering the samples of the targets
+        num_rows, capacity, dimensions = self._samples.shape
+        dots = np.dot(self._samples.reshape(-1, dimensions), features.T).reshape(num_rows, capacity, -1)[rows]
+        valid = np.arange(capacity)[None, :] < self._counts[rows][:, None]
+        return self._metric(dots, self._square_norms[rows], valid, features)
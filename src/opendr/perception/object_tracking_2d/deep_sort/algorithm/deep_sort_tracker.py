@@ -33,11 +33,12 @@ class DeepSortTracker(object):
         n_init,
         nn_budget,
         device,
+        extractor=None,
     ):
 
         self.device = device
 
-        self.build_tracker = lambda: build_tracker(
+        self.build_tracker = lambda extractor=None: build_tracker(
             max_dist,
             min_confidence,
             nms_max_overlap,
@@ -45,16 +46,19 @@ class DeepSortTracker(object):
             max_age,
             n_init,
             nn_budget,
-            device=device
+            device=device,
+            extractor=extractor,
         )
 
-        self.deepsort = self.build_tracker()
+        self.deepsort = self.build_tracker(extractor)
         self.frame = 0
 
     def infer(self, imageWithDetections: ImageWithDetections, frame_id=None, swap_left_top=False):
+        image, bbox_xywh, cls_conf, cls_ids = self.prepare(imageWithDetections, swap_left_top=swap_left_top)
+        return self.track(image, bbox_xywh, cls_conf, cls_ids, frame_id=frame_id, swap_left_top=swap_left_top)
 
-        if frame_id is not None:
-            self.frame = frame_id
+    @staticmethod
+    def prepare(imageWithDetections: ImageWithDetections, swap_left_top=False):
 
         image = imageWithDetections.numpy().transpose(1, 2, 0)
         detections = imageWithDetections.boundingBoxList
@@ -80,8 +84,17 @@ class DeepSortTracker(object):
         # bbox dilation just in case bbox too small
         bbox_xywh[:, 3:] *= 1.2
 
+        return image, bbox_xywh, cls_conf, cls_ids
+
+    def track(self, image, bbox_xywh, cls_conf, cls_ids, features=None, frame_id=None, swap_left_top=False):
+
+        if frame_id is not None:
+            self.frame = frame_id
+
         # do tracking
-        outputs = self.deepsort.update(bbox_xywh, cls_conf, cls_ids, image, self.frame <= self.deepsort.tracker.n_init)
+        outputs = self.deepsort.update(
+            bbox_xywh, cls_conf, cls_ids, image, self.frame <= self.deepsort.tracker.n_init, features=features
+        )
 
         results = []
 
@@ -110,5 +123,5 @@ class DeepSortTracker(object):
         return TrackingAnnotationList(results)
 
     def reset(self):
-        self.deepsort = self.build_tracker()
+        self.deepsort = self.build_tracker(self.deepsort.extractor)
         self.frame = 0
@@ -28,6 +28,7 @@ from opendr.perception.object_tracking_2d.datasets.market1501_dataset import Mar
 from opendr.perception.object_tracking_2d.deep_sort.algorithm.run import train
 from opendr.perception.object_tracking_2d.fair_mot.algorithm.run import evaluate
 from opendr.perception.object_tracking_2d.deep_sort.algorithm.deep_sort_tracker import DeepSortTracker
+from opendr.engine.streams import StreamPool
 from opendr.engine.data import Image, ImageWithDetections
 from opendr.engine.constants import OPENDR_SERVER_URL
 from urllib.request import urlretrieve
@@ -51,6 +52,8 @@ class ObjectTracking2DDeepSortLearner(Learner):
         max_age=70,
         n_init=3,
         nn_budget=100,
+        max_stream_idle_time=60.0,
+        max_streams=None,
     ):
         # Pass the shared parameters on super's constructor so they can get initialized as class attributes
         super(ObjectTracking2DDeepSortLearner, self).__init__(
@@ -71,6 +74,8 @@ class ObjectTracking2DDeepSortLearner(Learner):
         self.max_age = max_age
         self.n_init = n_init
         self.nn_budget = nn_budget
+        self.max_stream_idle_time = max_stream_idle_time
+        self.max_streams = max_streams
 
         self.__create_model()
         self.model_optimizer = torch.optim.SGD(
@@ -171,6 +176,7 @@ class ObjectTracking2DDeepSortLearner(Learner):
 
     def reset(self):
         self.tracker.reset()
+        self.streams.reset()
 
     def fit(
         self,
@@ -298,6 +304,67 @@ class ObjectTracking2DDeepSortLearner(Learner):
 
         return results
 
+    def infer_streams(self, frames, frame_ids=None, swap_left_top=False):
+        """
+        Tracks the objects of several independent video streams, e.g. cameras, with a single shared network.
+        The appearance features of the latest frame of every stream are computed in one batch, and each stream is
+        then associated with its own tracks. Streams that have not received a frame for more than
+        max_stream_idle_time seconds are evicted, and the least recently used stream is evicted when a new stream
+        would exceed max_streams.
+
+        :param frames: the latest frame of every stream, keyed by the stream id
+        :type frames: dict of engine.data.ImageWithDetections
+        :param frame_ids: frame id of every stream, keyed by the stream id, defaults to None
+        :type frame_ids: dict of int, optional
+        :param swap_left_top: whether the left and top coordinates of the detections are swapped
+        :type swap_left_top: bool, optional
+        :return: the tracking results of every stream, keyed by the stream id
+        :rtype: dict of engine.target.TrackingAnnotationList
+        """
+
+        if self.tracker is None:
+            raise ValueError("No model loaded or created")
+
+        if not isinstance(frames, dict) or not all(isinstance(frame, ImageWithDetections) for frame in frames.values()):
+            raise ValueError("Input frames should be a dict of engine.ImageWithDetections keyed by the stream id")
+
+        if frame_ids is None:
+            frame_ids = {}
+
+        t0 = time.time()
+
+        self.streams.evict_idle()
+        inputs = {
+            stream_id: DeepSortTracker.prepare(frame, swap_left_top=swap_left_top) for stream_id, frame in frames.items()
+        }
+        features = self.tracker.deepsort.extractor.extract_batch(
+            [image for image, _, _, _ in inputs.values()],
+            [self.tracker.deepsort.crop_bounds(bbox_xywh, image.shape) for image, bbox_xywh, _, _ in inputs.values()],
+        )
+
+        results = {}
+
+        for (stream_id, (image, bbox_xywh, cls_conf, cls_ids)), stream_features in zip(inputs.items(), features):
+            results[stream_id] = self.streams.get(stream_id).track(
+                image, bbox_xywh, cls_conf, cls_ids, features=stream_features,
+                frame_id=frame_ids.get(stream_id, -1), swap_left_top=swap_left_top,
+            )
+
+        t0 = time.time() - t0
+        self.infers_count += len(frames)
+        self.infers_time += t0
+
+        return results
+
+    def remove_stream(self, stream_id):
+        """
+        Stops tracking a stream of infer_streams. Its next frame starts new tracks.
+
+        :param stream_id: id of the stream
+        :type stream_id: hashable
+        """
+        self.streams.remove(stream_id)
+
     def optimize(self, do_constant_folding=False, img_size=(64, 128)):
         """
         Optimize method converts the model to ONNX format and saves the
@@ -387,7 +454,7 @@ class ObjectTracking2DDeepSortLearner(Learner):
         torch.onnx.export(
             self.tracker.deepsort.extractor.net, inp, output_name, verbose=verbose, opset_version=11,
             do_constant_folding=do_constant_folding, input_names=input_names, output_names=output_names,
-            dynamic_axes={"data": {0: "batch"}},
+            dynamic_axes={"data": {0: "batch"}, "output": {0: "batch"}},
         )
 
     def __load_from_onnx(self, path):
@@ -518,6 +585,22 @@ class ObjectTracking2DDeepSortLearner(Learner):
             nn_budget=self.nn_budget,
             device=self.device,
         )
+        self.streams = StreamPool(
+            self.__create_stream_tracker, max_idle_time=self.max_stream_idle_time, max_streams=self.max_streams
+        )
+
+    def __create_stream_tracker(self):
+        return DeepSortTracker(
+            max_dist=self.max_dist,
+            min_confidence=self.min_confidence,
+            nms_max_overlap=self.nms_max_overlap,
+            max_iou_distance=self.max_iou_distance,
+            max_age=self.max_age,
+            n_init=self.n_init,
+            nn_budget=self.nn_budget,
+            device=self.device,
+            extractor=self.tracker.deepsort.extractor,
+        )
 
     @staticmethod
     def __extract_trailing(path):
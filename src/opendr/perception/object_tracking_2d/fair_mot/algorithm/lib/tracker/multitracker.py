@@ -251,7 +251,15 @@ class JDETracker(object):
                 results[j] = results[j][keep_inds]
         return results
 
-    def update(self, im_blob, img0):
+    def forward(self, im_blob):
+        with torch.no_grad():
+            return self.model(im_blob)[-1]
+
+    def update(self, im_blob, img0, output=None):
+        """
+        Tracks the objects of the next frame. The network output can be precomputed, e.g. when the frames of
+        several streams are passed through the network in one batch, and is computed from im_blob otherwise.
+        """
         self.frame_id += 1
         activated_starcks = []
         refind_stracks = []
@@ -272,8 +280,9 @@ class JDETracker(object):
         }
 
         """ Step 1: Network forward, get detections & embeddings"""
+        if output is None:
+            output = self.forward(im_blob)
         with torch.no_grad():
-            output = self.model(im_blob)[-1]
             hm = output["hm"].sigmoid_()
             wh = output["wh"]
             id_feature = output["id"]
@@ -30,6 +30,7 @@ from opendr.perception.object_tracking_2d.fair_mot.algorithm.run import train, e
 from opendr.perception.object_tracking_2d.fair_mot.algorithm.load import load_from_checkpoint
 from opendr.perception.object_tracking_2d.datasets.mot_dataset import letterbox, process as process_dataset
 from opendr.perception.object_tracking_2d.fair_mot.algorithm.lib.tracker.multitracker import JDETracker
+from opendr.engine.streams import StreamPool
 from opendr.engine.data import Image
 from opendr.engine.target import TrackingAnnotation, TrackingAnnotationList
 from opendr.engine.constants import OPENDR_SERVER_URL
@@ -78,6 +79,8 @@ class ObjectTracking2DFairMotLearner(Learner):
         frame_rate=30,
         min_box_area=100,
         use_pretrained_backbone=True,
+        max_stream_idle_time=60.0,
+        max_streams=None,
     ):
         # Pass the shared parameters on super's constructor so they can get initialized as class attributes
         super(ObjectTracking2DFairMotLearner, self).__init__(
@@ -124,6 +127,8 @@ class ObjectTracking2DFairMotLearner(Learner):
         self.frame_rate = frame_rate
         self.min_box_area = min_box_area
         self.use_pretrained_backbone = use_pretrained_backbone
+        self.max_stream_idle_time = max_stream_idle_time
+        self.max_streams = max_streams
 
         main_batch_size = self.batch_size // len(self.gpus)
         rest_batch_size = (self.batch_size - main_batch_size)
@@ -230,6 +235,7 @@ class ObjectTracking2DFairMotLearner(Learner):
 
     def reset(self):
         self.tracker.reset()
+        self.streams.reset()
 
     def fit(
         self,
@@ -380,46 +386,11 @@ class ObjectTracking2DFairMotLearner(Learner):
 
         for image, frame_id in zip(batch, frame_ids):
 
-            img0 = image.convert("channels_last", "bgr")  # BGR
-            img, _, _, _ = letterbox(img0, height=img_size[1], width=img_size[0])
-
-            # Normalize RGB
-            img = img[:, :, ::-1].transpose(2, 0, 1)
-            img = np.ascontiguousarray(img, dtype=np.float32)
-            img /= 255.0
-
-            blob = torch.from_numpy(img).to(self.device).unsqueeze(0)
+            blob, img0 = self.__preprocess(image, img_size)
 
             t0 = time.time()
             online_targets = self.tracker.update(blob, img0)
-            online_tlwhs = []
-            online_ids = []
-            online_scores = []
-            for t in online_targets:
-                tlwh = t.tlwh
-                tid = t.track_id
-                vertical = tlwh[2] / tlwh[3] > 1.6
-                if tlwh[2] * tlwh[3] > self.min_box_area and not vertical:
-                    online_tlwhs.append(tlwh)
-                    online_ids.append(tid)
-                    online_scores.append(t.score)
-
-            result = TrackingAnnotationList([
-                TrackingAnnotation(
-                    name=0,
-                    top=tlwh[0],
-                    left=tlwh[1],
-                    width=tlwh[2],
-                    height=tlwh[3],
-                    id=id,
-                    score=score,
-                    frame=frame_id,
-                ) for tlwh, id, score in zip(
-                    online_tlwhs,
-                    online_ids,
-                    online_scores
-                )
-            ])
+            result = self.__to_annotations(online_targets, frame_id)
 
             t0 = time.time() - t0
             self.infers_count += 1
@@ -432,6 +403,110 @@ class ObjectTracking2DFairMotLearner(Learner):
 
         return results
 
+    def infer_streams(self, frames, frame_ids=None, img_size=(1088, 608)):
+        """
+        Tracks the objects of several independent video streams, e.g. cameras, with a single shared network.
+        The latest frame of every stream is passed through the detection and embedding network in one batch, and
+        each stream is then associated with its own tracks. Streams that have not received a frame for more than
+        max_stream_idle_time seconds are evicted, and the least recently used stream is evicted when a new stream
+        would exceed max_streams.
+
+        :param frames: the latest frame of every stream, keyed by the stream id
+        :type frames: dict of engine.data.Image
+        :param frame_ids: frame id of every stream, keyed by the stream id, defaults to None
+        :type frame_ids: dict of int, optional
+        :param img_size: size of the network input
+        :type img_size: tuple of int, optional
+        :return: the tracking results of every stream, keyed by the stream id
+        :rtype: dict of engine.target.TrackingAnnotationList
+        """
+
+        if self.model is None:
+            raise ValueError("No model loaded or created")
+
+        if not isinstance(frames, dict) or not all(isinstance(frame, Image) for frame in frames.values()):
+            raise ValueError("Input frames should be a dict of engine.Image keyed by the stream id")
+
+        self.model.eval()
+
+        if frame_ids is None:
+            frame_ids = {}
+
+        self.streams.evict_idle()
+        inputs = {stream_id: self.__preprocess(frame, img_size) for stream_id, frame in frames.items()}
+
+        results = {}
+
+        if len(inputs) == 0:
+            return results
+
+        t0 = time.time()
+
+        blobs = torch.cat([blob for blob, _ in inputs.values()])
+        outputs = self.tracker.forward(blobs)
+
+        for i, (stream_id, (blob, img0)) in enumerate(inputs.items()):
+            output = {head: value[i:i + 1] for head, value in outputs.items()}
+            online_targets = self.streams.get(stream_id).update(blob, img0, output=output)
+            results[stream_id] = self.__to_annotations(online_targets, frame_ids.get(stream_id, -1))
+
+        t0 = time.time() - t0
+        self.infers_count += len(frames)
+        self.infers_time += t0
+
+        return results
+
+    def remove_stream(self, stream_id):
+        """
+        Stops tracking a stream of infer_streams. Its next frame starts new tracks.
+
+        :param stream_id: id of the stream
+        :type stream_id: hashable
+        """
+        self.streams.remove(stream_id)
+
+    def __preprocess(self, image, img_size):
+        img0 = image.convert("channels_last", "bgr")  # BGR
+        img, _, _, _ = letterbox(img0, height=img_size[1], width=img_size[0])
+
+        # Normalize RGB
+        img = img[:, :, ::-1].transpose(2, 0, 1)
+        img = np.ascontiguousarray(img, dtype=np.float32)
+        img /= 255.0
+
+        blob = torch.from_numpy(img).to(self.device).unsqueeze(0)
+        return blob, img0
+
+    def __to_annotations(self, online_targets, frame_id):
+        online_tlwhs = []
+        online_ids = []
+        online_scores = []
+        for t in online_targets:
+            tlwh = t.tlwh
+            tid = t.track_id
+            vertical = tlwh[2] / tlwh[3] > 1.6
+            if tlwh[2] * tlwh[3] > self.min_box_area and not vertical:
+                online_tlwhs.append(tlwh)
+                online_ids.append(tid)
+                online_scores.append(t.score)
+
+        return TrackingAnnotationList([
+            TrackingAnnotation(
+                name=0,
+                top=tlwh[0],
+                left=tlwh[1],
+                width=tlwh[2],
+                height=tlwh[3],
+                id=id,
+                score=score,
+                frame=frame_id,
+            ) for tlwh, id, score in zip(
+                online_tlwhs,
+                online_ids,
+                online_scores
+            )
+        ])
+
     def optimize(self, do_constant_folding=False, img_size=(1088, 608), optimizable_dcn_v2=False):
         """
         Optimize method converts the model to ONNX format and saves the
@@ -673,7 +748,13 @@ class ObjectTracking2DFairMotLearner(Learner):
 
         self.model_optimizer = torch.optim.Adam(self.model.parameters(), self.lr)
 
-        self.tracker = JDETracker(
+        self.tracker = self.__create_tracker()
+        self.streams = StreamPool(
+            self.__create_tracker, max_idle_time=self.max_stream_idle_time, max_streams=self.max_streams
+        )
+
+    def __create_tracker(self):
+        return JDETracker(
             self.model,
             self.threshold,
             self.track_buffer,
@@ -1,17 +1,14 @@
-from opendr.perception.object_tracking_3d.ab3dmot.object_tracking_3d_ab3dmot_learner import (
-    ObjectTracking3DAb3dmotLearner,
-)
-from opendr.perception.object_tracking_3d.single_object_tracking.vpit.vpit_object_tracking_3d_learner import (
-    ObjectTracking3DVpitLearner,
-)
-from opendr.perception.object_tracking_3d.datasets.kitti_tracking import (
-    KittiTrackingDatasetIterator,
-    LabeledTrackingPointCloudsDatasetIterator,
-)
-from opendr.perception.object_tracking_3d.datasets.kitti_siamese_tracking import (
-    SiameseTrackingDatasetIterator,
-    SiameseTripletTrackingDatasetIterator,
-)
+from opendr.engine.helper.lazy import lazy_exports
+
+# Learners and datasets are only imported when they are first accessed
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "ObjectTracking3DAb3dmotLearner": ".ab3dmot.object_tracking_3d_ab3dmot_learner",
+    "ObjectTracking3DVpitLearner": ".single_object_tracking.vpit.vpit_object_tracking_3d_learner",
+    "KittiTrackingDatasetIterator": ".datasets.kitti_tracking",
+    "LabeledTrackingPointCloudsDatasetIterator": ".datasets.kitti_tracking",
+    "SiameseTrackingDatasetIterator": ".datasets.kitti_siamese_tracking",
+    "SiameseTripletTrackingDatasetIterator": ".datasets.kitti_siamese_tracking",
+})
 
 __all__ = [
     "ObjectTracking3DAb3dmotLearner",
@@ -15,8 +15,8 @@
 import numpy as np
 from opendr.engine.target import BoundingBox3DList, TrackingAnnotation3DList
 from scipy.optimize import linear_sum_assignment
-from opendr.perception.object_tracking_3d.ab3dmot.algorithm.core import convert_3dbox_to_8corner, iou3D
-from opendr.perception.object_tracking_3d.ab3dmot.algorithm.kalman_tracker_3d import KalmanTracker3D
+from opendr.perception.object_tracking_3d.ab3dmot.algorithm.core import convert_3dboxes_to_8corners, iou3D_matrix
+from opendr.perception.object_tracking_3d.ab3dmot.algorithm.kalman_tracker_3d import KalmanTracklets3D
 
 
 class AB3DMOT():
@@ -36,7 +36,6 @@ class AB3DMOT():
         self.min_updates = min_updates
         self.frame = frame - 1
         self.starting_frame = frame - 1
-        self.tracklets = []
         self.last_tracklet_id = 0
         self.iou_threshold = iou_threshold
 
@@ -46,6 +45,14 @@ class AB3DMOT():
         self.measurement_function_matrix = measurement_function_matrix
         self.covariance_matrix = covariance_matrix
         self.process_uncertainty_matrix = process_uncertainty_matrix
+        self.tracklets = self.__create_tracklets()
+
+    def __create_tracklets(self):
+        return KalmanTracklets3D(
+            self.state_dimensions, self.measurement_dimensions,
+            self.state_transition_matrix, self.measurement_function_matrix,
+            self.covariance_matrix, self.process_uncertainty_matrix
+        )
 
     def update(self, detections: BoundingBox3DList):
 
@@ -53,24 +60,13 @@ class AB3DMOT():
 
         if len(detections) > 0:
 
-            predictions = np.zeros([len(self.tracklets), self.measurement_dimensions])
-
-            for i, tracklet in enumerate(self.tracklets):
-                box = tracklet.predict().reshape(-1)[:self.measurement_dimensions]
-                predictions[i] = [*box]
+            predictions = self.tracklets.predict()[:, :self.measurement_dimensions]
 
-            detection_corners = [
-                convert_3dbox_to_8corner(np.array([*box.location, box.rotation_y, *box.dimensions]))
+            detection_corners = convert_3dboxes_to_8corners(np.array([
+                [*box.location, box.rotation_y, *box.dimensions]
                 for box in detections.boxes
-            ]
-
-            if len(predictions) > 0:
-                prediction_corners = [
-                    convert_3dbox_to_8corner(p)
-                    for p in predictions
-                ]
-            else:
-                prediction_corners = np.zeros((0, 8, 3))
+            ]))
+            prediction_corners = convert_3dboxes_to_8corners(predictions)
 
             (
                 matched_pairs,
@@ -78,74 +74,50 @@ class AB3DMOT():
                 unmatched_predictions
             ) = associate(detection_corners, prediction_corners, self.iou_threshold)
 
-            for d, p in matched_pairs:
-                self.tracklets[p].update(detections[d], self.frame)
-
-            for d in unmatched_detections:
-                self.last_tracklet_id += 1
-                tracklet = KalmanTracker3D(
-                    detections[d], self.last_tracklet_id, self.frame,
-                    self.state_dimensions, self.measurement_dimensions,
-                    self.state_transition_matrix, self.measurement_function_matrix,
-                    self.covariance_matrix, self.process_uncertainty_matrix
-                )
-                self.tracklets.append(tracklet)
+            self.tracklets.update(
+                matched_pairs[:, 1], [detections[d] for d in matched_pairs[:, 0]], self.frame
+            )
+            self.tracklets.add(
+                [detections[d] for d in unmatched_detections],
+                range(self.last_tracklet_id + 1, self.last_tracklet_id + 1 + len(unmatched_detections)),
+                self.frame,
+            )
+            self.last_tracklet_id += len(unmatched_detections)
 
-        old_tracklets = self.tracklets
-        self.tracklets = []
-        tracked_boxes = []
+        self.tracklets.keep(self.tracklets.staleness(self.frame) < self.max_staleness)
 
-        for tracklet in old_tracklets:
-
-            if tracklet.staleness(self.frame) < self.max_staleness:
-                self.tracklets.append(tracklet)
-
-                if self.frame <= self.min_updates or tracklet.updates >= self.min_updates:
-                    tracked_boxes.append(tracklet.tracking_bounding_box_3d(self.frame))
+        if self.frame <= self.min_updates:
+            reported = np.arange(len(self.tracklets))
+        else:
+            reported = np.flatnonzero(self.tracklets.updates >= self.min_updates)
 
-        result = TrackingAnnotation3DList(tracked_boxes)
+        result = TrackingAnnotation3DList(self.tracklets.tracking_bounding_boxes_3d(reported, self.frame))
         return result
 
     def reset(self):
         self.frame = self.starting_frame
-        self.tracklets = []
+        self.tracklets = self.__create_tracklets()
         self.last_tracklet_id = 0
 
 
 def associate(detection_corners, prediction_corners, iou_threshold):
 
-    iou_matrix = np.zeros((len(detection_corners), len(prediction_corners)), dtype=np.float32)
-    for d, det in enumerate(detection_corners):
-        for t, trk in enumerate(prediction_corners):
-            iou_matrix[d, t] = iou3D(det, trk)[0]
+    iou_matrix, _ = iou3D_matrix(detection_corners, prediction_corners)
 
     detection_match_ids, prediction_match_ids = linear_sum_assignment(-iou_matrix)
-    unmatched_detections = []
-    unmatched_predictions = []
-
-    for i in range(len(detection_corners)):
-        if i not in detection_match_ids:
-            unmatched_detections.append(i)
-
-    for i in range(len(prediction_corners)):
-        if i not in detection_match_ids:
-            unmatched_predictions.append(i)
-
-    matched_pairs = []
-
-    for i in range(len(detection_match_ids)):
-        detection_id = detection_match_ids[i]
-        prediction_id = prediction_match_ids[i]
-
-        if iou_matrix[detection_id, prediction_id] < iou_threshold:
-            unmatched_detections.append(detection_id)
-            unmatched_predictions.append(prediction_id)
-        else:
-            matched_pairs.append([detection_id, prediction_id])
-
-    if len(matched_pairs) <= 0:
-        matched_pairs = np.zeros((0, 2), dtype=np.int32)
-    else:
-        matched_pairs = np.array(matched_pairs, dtype=np.int32)
+    matched = iou_matrix[detection_match_ids, prediction_match_ids] >= iou_threshold
+
+    unmatched_detections = [
+        *np.setdiff1d(np.arange(len(detection_corners)), detection_match_ids),
+        *detection_match_ids[~matched],
+    ]
+    unmatched_predictions = [
+        *np.setdiff1d(np.arange(len(prediction_corners)), prediction_match_ids),
+        *prediction_match_ids[~matched],
+    ]
+
+    matched_pairs = np.stack(
+        [detection_match_ids[matched], prediction_match_ids[matched]], axis=1
+    ).astype(np.int32).reshape(-1, 2)
 
     return matched_pairs, unmatched_detections, unmatched_predictions
@@ -102,6 +102,91 @@ def iou3D(corners1, corners2):  # [8, 3] -> [8, 3] -> ([], [])
     return iou, iou_2d
 
 
+def polygon_areas(polygons):  # [N, K, 2] -> [N]
+    x = polygons[..., 0]
+    y = polygons[..., 1]
+    return 0.5 * np.abs(np.sum(x * np.roll(y, -1, axis=-1) - y * np.roll(x, -1, axis=-1), axis=-1))
+
+
+def convex_polygons_intersection_area(polygons1, polygons2, eps=1e-9):  # [N, 4, 2] -> [N, 4, 2] -> [N]
+    # The intersection of two convex polygons is the convex hull of the vertices of each polygon that lie inside
+    # the other one and of the intersections of their edges, which are computed for all pairs at once
+    def cross(a, b):
+        return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+    def inside(points, polygons):  # [N, K, 2] -> [N, V, 2] -> [N, K]
+        edges = np.roll(polygons, -1, axis=1) - polygons
+        sides = cross(edges[:, None], points[:, :, None] - polygons[:, None])
+        return np.all(sides >= -eps, axis=-1) | np.all(sides <= eps, axis=-1)
+
+    r = (np.roll(polygons1, -1, axis=1) - polygons1)[:, :, None]
+    s = (np.roll(polygons2, -1, axis=1) - polygons2)[:, None]
+    qp = polygons2[:, None] - polygons1[:, :, None]
+    denominator = cross(r, s)
+    parallel = np.abs(denominator) < eps
+    denominator = np.where(parallel, 1.0, denominator)
+    t = cross(qp, s) / denominator
+    u = cross(qp, r) / denominator
+    crossings = (~parallel) & (t >= -eps) & (t <= 1 + eps) & (u >= -eps) & (u <= 1 + eps)
+
+    count = len(polygons1)
+    points = np.concatenate([
+        polygons1, polygons2, (polygons1[:, :, None] + t[..., None] * r).reshape(count, -1, 2)
+    ], axis=1)
+    valid = np.concatenate([
+        inside(polygons1, polygons2), inside(polygons2, polygons1), crossings.reshape(count, -1)
+    ], axis=1)
+
+    num_valid = valid.sum(axis=1)
+    center = (points * valid[..., None]).sum(axis=1) / np.maximum(num_valid, 1)[:, None]
+    angles = np.arctan2(points[..., 1] - center[:, 1:2], points[..., 0] - center[:, 0:1])
+    order = np.argsort(np.where(valid, angles, np.inf), axis=1)
+    points = np.take_along_axis(points, order[..., None], axis=1)
+    # Invalid points are moved to the end and replaced by the first vertex, so they add no area
+    valid = np.take_along_axis(valid, order, axis=1)
+    points = np.where(valid[..., None], points, points[:, :1])
+    return np.where(num_valid >= 3, polygon_areas(points), 0.0)
+
+
+def iou3D_matrix(corners1, corners2):  # [N, 8, 3] -> [M, 8, 3] -> ([N, M], [N, M])
+    # Vectorized iou3D for all pairs of boxes. Pairs whose axis-aligned bird's eye view extents do not overlap
+    # are skipped, so that the rotated intersection is only computed for nearby boxes
+    corners1 = np.asarray(corners1, dtype=np.float64).reshape(-1, 8, 3)
+    corners2 = np.asarray(corners2, dtype=np.float64).reshape(-1, 8, 3)
+    iou = np.zeros((len(corners1), len(corners2)))
+    iou_2d = np.zeros((len(corners1), len(corners2)))
+    if len(corners1) == 0 or len(corners2) == 0:
+        return iou, iou_2d
+
+    rects1 = corners1[:, 3::-1][:, :, [0, 2]]
+    rects2 = corners2[:, 3::-1][:, :, [0, 2]]
+    y_max = np.minimum(corners1[:, None, 0, 1], corners2[None, :, 0, 1])
+    y_min = np.maximum(corners1[:, None, 4, 1], corners2[None, :, 4, 1])
+    overlaps = (
+        np.all(rects1.min(axis=1)[:, None] <= rects2.max(axis=1)[None], axis=-1) &
+        np.all(rects2.min(axis=1)[None] <= rects1.max(axis=1)[:, None], axis=-1)
+    )
+    ids1, ids2 = np.nonzero(overlaps)
+    if len(ids1) == 0:
+        return iou, iou_2d
+
+    inter_area = convex_polygons_intersection_area(rects1[ids1], rects2[ids2])
+    area1 = polygon_areas(rects1)[ids1]
+    area2 = polygon_areas(rects2)[ids2]
+    iou_2d[ids1, ids2] = inter_area / (area1 + area2 - inter_area)
+
+    def volumes(corners):
+        return (
+            np.linalg.norm(corners[:, 0] - corners[:, 1], axis=-1) *
+            np.linalg.norm(corners[:, 1] - corners[:, 2], axis=-1) *
+            np.linalg.norm(corners[:, 0] - corners[:, 4], axis=-1)
+        )
+
+    inter_vol = inter_area * np.maximum(0.0, y_max[ids1, ids2] - y_min[ids1, ids2])
+    iou[ids1, ids2] = inter_vol / (volumes(corners1)[ids1] + volumes(corners2)[ids2] - inter_vol)
+    return iou, iou_2d
+
+
 @numba.jit
 def rotation_matrix_y(t):  # [] -> [3, 3]
     c = np.cos(t)
@@ -125,3 +210,21 @@ def convert_3dbox_to_8corner(bbox3d_input):  # [7] -> [8, 3]
     corners_3d[2, :] = corners_3d[2, :] + bbox3d[2]
 
     return np.transpose(corners_3d)
+
+
+def convert_3dboxes_to_8corners(bboxes3d):  # [N, 7] -> [N, 8, 3]
+    bboxes3d = np.asarray(bboxes3d, dtype=np.float64).reshape(-1, 7)
+    c = np.cos(bboxes3d[:, 3])[:, None]
+    s = np.sin(bboxes3d[:, 3])[:, None]
+    l, w, h = bboxes3d[:, 4:5], bboxes3d[:, 5:6], bboxes3d[:, 6:7]
+
+    x_corners = l / 2 * np.array([1, 1, -1, -1, 1, 1, -1, -1])
+    y_corners = -h * np.array([0, 0, 0, 0, 1, 1, 1, 1])
+    z_corners = w / 2 * np.array([1, -1, -1, 1, 1, -1, -1, 1])
+
+    corners_3d = np.stack([
+        c * x_corners + s * z_corners,
+        y_corners,
+        -s * x_corners + c * z_corners,
+    ], axis=-1)
+    return corners_3d + bboxes3d[:, None, 0:3]
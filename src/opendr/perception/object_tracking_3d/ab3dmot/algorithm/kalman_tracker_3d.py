@@ -41,33 +41,16 @@ class KalmanTracker3D():
         self.predictions = []
         self.updates = 0
 
-        if state_transition_matrix is None:
-            state_transition_matrix = np.eye(state_dimensions, dtype=np.float32)
-            state_transition_matrix[0, -3] = 1
-            state_transition_matrix[1, -2] = 1
-            state_transition_matrix[2, -1] = 1
-
-        if measurement_function_matrix is None:
-            measurement_function_matrix = np.eye(
-                measurement_dimensions, state_dimensions, dtype=np.float32
-            )
-
-        if covariance_matrix is None:
-            covariance_matrix = np.eye(
-                state_dimensions, state_dimensions, dtype=np.float32
-            ) * 10
-            covariance_matrix[7:, 7:] *= 1000
-
-        if process_uncertainty_matrix is None:
-            process_uncertainty_matrix = np.eye(
-                state_dimensions, state_dimensions, dtype=np.float32
-            )
-            process_uncertainty_matrix[7:, 7:] *= 0.01
-
-        self.kalman_filter.F = state_transition_matrix
-        self.kalman_filter.H = measurement_function_matrix
-        self.kalman_filter.P = covariance_matrix
-        self.kalman_filter.Q = process_uncertainty_matrix
+        (
+            self.kalman_filter.F,
+            self.kalman_filter.H,
+            self.kalman_filter.P,
+            self.kalman_filter.Q,
+        ) = kalman_matrices(
+            state_dimensions, measurement_dimensions,
+            state_transition_matrix, measurement_function_matrix,
+            covariance_matrix, process_uncertainty_matrix,
+        )
 
         location = boundingBox3D.data["location"]
         dimensions = boundingBox3D.data["dimensions"]
@@ -137,7 +120,7 @@ class KalmanTracker3D():
             self.alpha, self.bbox2d,
             self.kalman_filter.x[4:7].reshape(-1),
             self.kalman_filter.x[:3].reshape(-1),
-            float(self.kalman_filter.x[3]),
+            float(self.kalman_filter.x[3, 0]),
             self.id,
             self.confidence,
             frame,
@@ -150,6 +133,229 @@ class KalmanTracker3D():
         return frame - self.last_update_frame
 
 
+class KalmanTracklets3D():
+    """
+    Holds the Kalman filter states of all tracklets in stacked arrays, so that the states of all tracklets are
+    predicted at once and the states of all matched tracklets are updated at once. The filter follows the
+    equations of filterpy.kalman.KalmanFilter, as used by KalmanTracker3D.
+    """
+
+    def __init__(
+        self,
+        state_dimensions=10,  # x, y, z, rotation_y, l, w, h, speed_x, speed_z, angular_speed
+        measurement_dimensions=7,  # x, y, z, rotation_y, l, w, h
+        state_transition_matrix=None,
+        measurement_function_matrix=None,
+        covariance_matrix=None,
+        process_uncertainty_matrix=None,
+    ):
+        super().__init__()
+
+        self.state_dimensions = state_dimensions
+        self.measurement_dimensions = measurement_dimensions
+
+        F, H, P, Q = kalman_matrices(
+            state_dimensions, measurement_dimensions,
+            state_transition_matrix, measurement_function_matrix,
+            covariance_matrix, process_uncertainty_matrix,
+        )
+        self.F = np.asarray(F, dtype=np.float64)
+        self.H = np.asarray(H, dtype=np.float64)
+        self.initial_P = np.asarray(P, dtype=np.float64)
+        self.Q = np.asarray(Q, dtype=np.float64)
+        self.R = np.eye(measurement_dimensions)
+
+        # [T, state_dimensions] and [T, state_dimensions, state_dimensions]
+        self.x = np.zeros((0, state_dimensions))
+        self.P = np.zeros((0, state_dimensions, state_dimensions))
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.start_frames = np.zeros(0, dtype=np.int64)
+        self.last_update_frames = np.zeros(0, dtype=np.int64)
+        self.updates = np.zeros(0, dtype=np.int64)
+        # Per tracklet attributes of the last matched BoundingBox3D
+        self.attributes = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, boxes, ids, frame):
+        """
+        Starts a tracklet for every box.
+
+        :param boxes: the boxes that start new tracklets
+        :type boxes: list of BoundingBox3D
+        :param ids: the ids of the new tracklets
+        :type ids: list of int
+        :param frame: the current frame
+        :type frame: int
+        """
+        count = len(boxes)
+        if count == 0:
+            return
+
+        x = np.zeros((count, self.state_dimensions))
+        x[:, :self.measurement_dimensions] = measurements(boxes)
+
+        self.x = np.concatenate([self.x, x])
+        self.P = np.concatenate([self.P, np.repeat(self.initial_P[None], count, axis=0)])
+        self.ids = np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)])
+        self.start_frames = np.concatenate([self.start_frames, np.full(count, frame)])
+        self.last_update_frames = np.concatenate([self.last_update_frames, np.full(count, frame)])
+        self.updates = np.concatenate([self.updates, np.zeros(count, dtype=np.int64)])
+        self.attributes += [box_attributes(box) for box in boxes]
+
+    def predict(self) -> np.ndarray:
+        """
+        Predicts the states of all tracklets in the current frame.
+
+        :return: the predicted states with shape [T, state_dimensions]
+        :rtype: numpy.ndarray
+        """
+        self.x = self.x @ self.F.T
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        self.x[:, 3] = normalize_angles(self.x[:, 3])
+        return self.x
+
+    def update(self, indices, boxes, frame):
+        """
+        Updates the states of the given tracklets with their matched boxes.
+
+        :param indices: the indices of the updated tracklets
+        :type indices: numpy.ndarray
+        :param boxes: the box matched to each of the updated tracklets
+        :type boxes: list of BoundingBox3D
+        :param frame: the current frame
+        :type frame: int
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) == 0:
+            return
+
+        self.last_update_frames[indices] = frame
+        self.updates[indices] += 1
+        for i, box in zip(indices, boxes):
+            self.attributes[i] = box_attributes(box)
+
+        z = measurements(boxes)
+        z[:, 3] = normalize_angles(z[:, 3])
+        rotation_y = z[:, 3]
+        predicted_rotation_y = self.x[indices, 3]
+
+        difference = np.abs(rotation_y - predicted_rotation_y)
+        flipped = (difference >= np.pi / 2) & (difference <= np.pi * 1.5)
+        predicted_rotation_y = np.where(
+            flipped, normalize_angles(predicted_rotation_y + np.pi), predicted_rotation_y
+        )
+
+        wrapped = np.abs(rotation_y - predicted_rotation_y) >= np.pi * 1.5
+        predicted_rotation_y = np.where(
+            wrapped, predicted_rotation_y + np.where(rotation_y > 0, np.pi * 2, -np.pi * 2), predicted_rotation_y
+        )
+        self.x[indices, 3] = predicted_rotation_y
+
+        x = self.x[indices]
+        P = self.P[indices]
+        y = z - x @ self.H.T
+        PHT = P @ self.H.T
+        S = self.H @ PHT + self.R
+        K = PHT @ np.linalg.inv(S)
+        I_KH = np.eye(self.state_dimensions) - K @ self.H
+
+        self.x[indices] = x + (K @ y[..., None])[..., 0]
+        self.P[indices] = I_KH @ P @ np.swapaxes(I_KH, -1, -2) + K @ self.R @ np.swapaxes(K, -1, -2)
+
+    def keep(self, mask):
+        """
+        Removes the tracklets that are not selected by the mask, keeping the order of the remaining ones.
+
+        :param mask: boolean mask of the tracklets to keep
+        :type mask: numpy.ndarray
+        """
+        mask = np.asarray(mask, dtype=bool)
+        self.x = self.x[mask]
+        self.P = self.P[mask]
+        self.ids = self.ids[mask]
+        self.start_frames = self.start_frames[mask]
+        self.last_update_frames = self.last_update_frames[mask]
+        self.updates = self.updates[mask]
+        self.attributes = [a for a, k in zip(self.attributes, mask) if k]
+
+    def tracking_bounding_boxes_3d(self, indices, frame):
+        result = []
+        for i in indices:
+            name, bbox2d, alpha, truncated, occluded, confidence = self.attributes[i]
+            result.append(TrackingAnnotation3D(
+                name, truncated, occluded,
+                alpha, bbox2d,
+                self.x[i, 4:7].copy(),
+                self.x[i, :3].copy(),
+                float(self.x[i, 3]),
+                int(self.ids[i]),
+                confidence,
+                frame,
+            ))
+        return result
+
+    def ages(self, frame):
+        return frame - self.start_frames
+
+    def staleness(self, frame):
+        return frame - self.last_update_frames
+
+
+def kalman_matrices(
+    state_dimensions, measurement_dimensions,
+    state_transition_matrix=None,
+    measurement_function_matrix=None,
+    covariance_matrix=None,
+    process_uncertainty_matrix=None,
+):
+    if state_transition_matrix is None:
+        state_transition_matrix = np.eye(state_dimensions, dtype=np.float32)
+        state_transition_matrix[0, -3] = 1
+        state_transition_matrix[1, -2] = 1
+        state_transition_matrix[2, -1] = 1
+
+    if measurement_function_matrix is None:
+        measurement_function_matrix = np.eye(
+            measurement_dimensions, state_dimensions, dtype=np.float32
+        )
+
+    if covariance_matrix is None:
+        covariance_matrix = np.eye(
+            state_dimensions, state_dimensions, dtype=np.float32
+        ) * 10
+        covariance_matrix[7:, 7:] *= 1000
+
+    if process_uncertainty_matrix is None:
+        process_uncertainty_matrix = np.eye(
+            state_dimensions, state_dimensions, dtype=np.float32
+        )
+        process_uncertainty_matrix[7:, 7:] *= 0.01
+
+    return (
+        state_transition_matrix, measurement_function_matrix,
+        covariance_matrix, process_uncertainty_matrix,
+    )
+
+
+def measurements(boxes):  # [BoundingBox3D] -> [N, 7]
+    # [x, y, z, rotation_y, l, w, h]
+    return np.array([
+        [*box.data["location"], box.data["rotation_y"], *box.data["dimensions"]]
+        for box in boxes
+    ], dtype=np.float64).reshape(-1, 7)
+
+
+def box_attributes(box):
+    return box.name, box.bbox2d, box.alpha, box.truncated, box.occluded, box.confidence
+
+
+def normalize_angles(angles):
+    angles = np.where(angles >= np.pi, angles - np.pi * 2, angles)
+    return np.where(angles < -np.pi, angles + np.pi * 2, angles)
+
+
 def normalize_angle(angle):
     if angle >= np.pi:
         angle -= np.pi * 2
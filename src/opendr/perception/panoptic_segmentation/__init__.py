@@ -1,7 +1,13 @@
-from opendr.perception.panoptic_segmentation.datasets import CityscapesDataset, KittiDataset,\
-    SemanticKittiDataset
-from opendr.perception.panoptic_segmentation.efficient_ps import EfficientPsLearner
-from opendr.perception.panoptic_segmentation.efficient_lps import EfficientLpsLearner
+from opendr.engine.helper.lazy import lazy_exports
+
+# Learners and datasets are only imported when they are first accessed
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'CityscapesDataset': '.datasets',
+    'KittiDataset': '.datasets',
+    'SemanticKittiDataset': '.datasets',
+    'EfficientPsLearner': '.efficient_ps',
+    'EfficientLpsLearner': '.efficient_lps',
+})
 
 __all__ = ['CityscapesDataset', 'KittiDataset', 'EfficientPsLearner',
            'SemanticKittiDataset', 'EfficientLpsLearner']
@@ -1,8 +1,11 @@
-from opendr.perception.pose_estimation.lightweight_open_pose.lightweight_open_pose_learner import \
-    LightweightOpenPoseLearner
-from opendr.perception.pose_estimation.hr_pose_estimation.high_resolution_learner import \
-    HighResolutionPoseEstimationLearner
+from opendr.engine.helper.lazy import lazy_exports
 
-from opendr.perception.pose_estimation.lightweight_open_pose.utilities import draw, get_bbox
+# Learners and datasets are only imported when they are first accessed
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'LightweightOpenPoseLearner': '.lightweight_open_pose.lightweight_open_pose_learner',
+    'HighResolutionPoseEstimationLearner': '.hr_pose_estimation.high_resolution_learner',
+    'draw': '.lightweight_open_pose.utilities',
+    'get_bbox': '.lightweight_open_pose.utilities',
+})
 
 __all__ = ['LightweightOpenPoseLearner', 'draw', 'get_bbox', 'HighResolutionPoseEstimationLearner']
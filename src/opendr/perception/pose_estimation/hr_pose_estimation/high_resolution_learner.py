@@ -18,6 +18,7 @@ import torchvision.transforms
 import os
 import cv2
 import torch
+import torch.nn.functional as F
 import json
 import numpy as np
 from tqdm import tqdm
@@ -28,6 +29,7 @@ from urllib.request import urlretrieve
 from opendr.engine.data import Image
 from opendr.engine.target import Pose
 from opendr.engine.constants import OPENDR_SERVER_URL
+from opendr.engine.streams import StreamPool
 
 # OpenDR lightweight_open_pose imports
 from opendr.perception.pose_estimation.lightweight_open_pose.lightweight_open_pose_learner import \
@@ -35,11 +37,26 @@ from opendr.perception.pose_estimation.lightweight_open_pose.lightweight_open_po
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.load_state import \
     load_state
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.keypoints import \
-    extract_keypoints, group_keypoints
+    extract_all_keypoints, group_keypoints, poses_to_array, upsample_maps, BODY_PARTS_PAF_IDS, FLIPPED_KPT_IDS, \
+    FLIPPED_PART_IDS
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.val import \
     convert_to_coco_format, run_coco_eval, normalize, pad_width
 
 
+class _RegionOfInterest(object):
+    """
+    The region of interest of a stream of infer_batch, which is updated on every frame of the stream.
+    """
+
+    def __init__(self):
+        self.counter = 0
+        self.prev_heatmap = np.array([])
+        self.xmin = None
+        self.ymin = None
+        self.xmax = None
+        self.ymax = None
+
+
 class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
 
     def __init__(self, device='cuda', backbone='mobilenet',
@@ -49,7 +66,7 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
                  heatmap_threshold=0.1, experiment_name='default', num_workers=8, weights_only=True,
                  output_name='detections.json', multiscale=False, scales=None, visualize=False,
                  img_mean=np.array([128, 128, 128], np.float32), img_scale=np.float32(1 / 256), pad_value=(0, 0, 0),
-                 half_precision=False):
+                 half_precision=False, max_stream_idle_time=60.0, max_streams=None):
 
         super(HighResolutionPoseEstimationLearner, self).__init__(device=device, backbone=backbone, temp_path=temp_path,
                                                                   mobilenet_use_stride=mobilenet_use_stride,
@@ -63,7 +80,9 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
                                                                   output_name=output_name, multiscale=multiscale,
                                                                   scales=scales, visualize=visualize, img_mean=img_mean,
                                                                   img_scale=img_scale, pad_value=pad_value,
-                                                                  half_precision=half_precision)
+                                                                  half_precision=half_precision,
+                                                                  max_stream_idle_time=max_stream_idle_time,
+                                                                  max_streams=max_streams)
 
         self.first_pass_height = first_pass_height
         self.second_pass_height = second_pass_height
@@ -72,6 +91,9 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
         self.threshold = heatmap_threshold
         self.prev_heatmap = np.array([])
         self.counter = 0
+        # Stream id -> region of interest of the stream for infer_batch
+        self.streams = StreamPool(_RegionOfInterest, max_idle_time=self.max_stream_idle_time,
+                                  max_streams=self.max_streams)
         if self.method == 'primary':
             self.xmin = None
             self.ymin = None
@@ -121,7 +143,8 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
 
     def __second_pass(self, img, net_input_height_size, max_width, stride, upsample_ratio,
                       pad_value=(0, 0, 0),
-                      img_mean=np.array([128, 128, 128], np.float32), img_scale=np.float32(1 / 256)):
+                      img_mean=np.array([128, 128, 128], np.float32), img_scale=np.float32(1 / 256),
+                      postprocess_on_device=False):
         """
         This method detects the keypoints and estimates the pose of humans using the cropped image from the
         previous step (__first_pass_).
@@ -136,14 +159,41 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
         :param upsample_ratio: Defines the amount of upsampling to be performed on the heatmaps and PAFs when resizing,
             defaults to 4
         :type upsample_ratio: int, optional
+        :param postprocess_on_device: If True, the heatmaps and PAFs are upsampled on the inference device and returned
+            as CxHxW tensors, defaults to 'False'
+        :type postprocess_on_device: bool, optional
 
          :returns: the heatmap of human figures, the part affinity filed (pafs), the scale of the resized image compared
             to the initial and the pad around the image
-         :rtype: heatmap, pafs -> numpy.ndarray
+         :rtype: heatmap, pafs -> numpy.ndarray or torch.Tensor
                  scale -> float
                  pad = -> list
         """
 
+        padded_img, scale, pad = self.__second_pass_input(img, net_input_height_size, max_width, stride, pad_value,
+                                                          img_mean, img_scale)
+        stage2_heatmaps, stage2_pafs = self.__second_pass_forward(padded_img[None])
+        heatmaps, pafs = self.__second_pass_maps(stage2_heatmaps, stage2_pafs, upsample_ratio, postprocess_on_device)
+        return heatmaps, pafs, scale, pad
+
+    @staticmethod
+    def __second_pass_input(img, net_input_height_size, max_width, stride, pad_value=(0, 0, 0),
+                            img_mean=np.array([128, 128, 128], np.float32), img_scale=np.float32(1 / 256)):
+        """
+        This method resizes, normalizes and pads the cropped image for the second pass.
+
+        :param img: input image for heatmap generation
+        :type img: numpy.ndarray
+        :param net_input_height_size: the height that the input image will be resized  for inference
+        :type net_input_height_size: int
+        :param max_width: the maximum width that the resized image should have
+        :type max_width: int
+        :param stride: the image is padded to a multiple of the stride
+        :type stride: int
+
+        :returns: the padded image, the scale of the resized image compared to the initial and the pad around the image
+        :rtype: tuple
+        """
         height, width, _ = img.shape
         scale = net_input_height_size / height
         img_ratio = width / height
@@ -154,27 +204,151 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
         scaled_img = normalize(scaled_img, img_mean, img_scale)
         min_dims = [net_input_height_size, max(scaled_img.shape[1], net_input_height_size)]
         padded_img, pad = pad_width(scaled_img, stride, pad_value, min_dims)
+        return padded_img, scale, pad
 
+    def __second_pass_forward(self, batch):
+        """
+        This method runs the network of the second pass on a batch of padded images.
+
+        :param batch: NxHxWx3 padded images
+        :type batch: numpy.ndarray
+
+        :returns: the heatmaps and the PAFs of the last stage
+        :rtype: tuple of torch.Tensor
+        """
         if 'cuda' in self.device:
-            tensor_img = torch.from_numpy(padded_img).permute(2, 0, 1).unsqueeze(0).float().cuda()
-            tensor_img = tensor_img.cuda()
+            tensor_img = torch.from_numpy(batch).permute(0, 3, 1, 2).float().cuda()
             if self.half:
                 tensor_img = tensor_img.half()
         else:
-            tensor_img = torch.from_numpy(padded_img).permute(2, 0, 1).unsqueeze(0).float().cpu()
+            tensor_img = torch.from_numpy(batch).permute(0, 3, 1, 2).float().cpu()
 
         stages_output = self.model(tensor_img)
+        return stages_output[-2], stages_output[-1]
 
-        stage2_heatmaps = stages_output[-2]
-        heatmaps = np.transpose(stage2_heatmaps.squeeze().cpu().data.numpy(), (1, 2, 0))
+    @staticmethod
+    def __second_pass_maps(stage2_heatmaps, stage2_pafs, upsample_ratio, postprocess_on_device=False):
+        """
+        This method upsamples the heatmaps and the PAFs of a single image of the second pass.
+
+        :param stage2_heatmaps: 1xKxHxW heatmaps
+        :type stage2_heatmaps: torch.Tensor
+        :param stage2_pafs: 1xCxHxW PAFs
+        :type stage2_pafs: torch.Tensor
+        :param upsample_ratio: Defines the amount of upsampling to be performed on the heatmaps and PAFs
+        :type upsample_ratio: int
+        :param postprocess_on_device: If True, the maps are upsampled on the inference device and returned as CxHxW
+            tensors
+        :type postprocess_on_device: bool, optional
+
+        :returns: the heatmaps of the keypoints, without the background, and the PAFs
+        :rtype: tuple of numpy.ndarray or torch.Tensor
+        """
+        if postprocess_on_device:
+            # The 19th heatmap channel is the background
+            heatmaps = upsample_maps(stage2_heatmaps.detach()[:, :18], upsample_ratio)
+            pafs = upsample_maps(stage2_pafs.detach(), upsample_ratio)
+            return heatmaps, pafs
+
+        heatmaps = np.transpose(stage2_heatmaps[0].cpu().data.numpy(), (1, 2, 0))
         heatmaps = heatmaps.astype(np.float32)
-        heatmaps = cv2.resize(heatmaps, (0, 0), fx=upsample_ratio, fy=upsample_ratio, interpolation=cv2.INTER_CUBIC)
+        heatmaps = cv2.resize(heatmaps, (0, 0), fx=upsample_ratio, fy=upsample_ratio,
+                              interpolation=cv2.INTER_CUBIC)[:, :, :18]
 
-        stage2_pafs = stages_output[-1]
-        pafs = np.transpose(stage2_pafs.squeeze().cpu().data.numpy(), (1, 2, 0))
+        pafs = np.transpose(stage2_pafs[0].cpu().data.numpy(), (1, 2, 0))
         pafs = pafs.astype(np.float32)
         pafs = cv2.resize(pafs, (0, 0), fx=upsample_ratio, fy=upsample_ratio, interpolation=cv2.INTER_CUBIC)
+        return heatmaps, pafs
+
+    def __second_pass_merged(self, img, net_input_height_size, max_width, upsample_ratio, scales, flip=False,
+                             postprocess_on_device=False):
+        """
+        This method runs the second pass on a pyramid of scales of the cropped image, and optionally on their
+        horizontal flips, as a single padded batch. The heatmaps and PAFs of every pass are resampled on the
+        inference device to the grid of the single scale second pass and averaged there, so that only the merged maps
+        are left for the keypoint extraction. With a single scale of 1 and no flip, the merged maps are the maps of
+        __second_pass.
 
+        :param img: input image for heatmap generation
+        :type img: numpy.ndarray
+        :param net_input_height_size: the height that the input image is resized to at scale 1
+        :type net_input_height_size: int
+        :param max_width: the maximum width that the resized image should have at scale 1
+        :type max_width: int
+        :param upsample_ratio: Defines the amount of upsampling to be performed on the heatmaps and PAFs
+        :type upsample_ratio: int
+        :param scales: the scales of the pyramid
+        :type scales: list of float
+        :param flip: If True, the horizontal flip of every scale is added to the batch, defaults to 'False'
+        :type flip: bool, optional
+        :param postprocess_on_device: If True, the merged maps are returned as KxHxW and CxHxW tensors on the inference
+            device, otherwise they are copied to the host as HxWxK and HxWxC arrays, defaults to 'False'
+        :type postprocess_on_device: bool, optional
+
+        :returns: the averaged heatmaps and PAFs, the scale and the pad of the single scale second pass
+        :rtype: tuple
+        """
+        reference_img, scale, pad = self.__second_pass_input(img, net_input_height_size, max_width, self.stride)
+        inputs = [self.__second_pass_input(img, int(net_input_height_size * pyramid_scale),
+                                           int(max_width * pyramid_scale), self.stride)
+                  for pyramid_scale in scales]
+        flips = [False] * len(inputs)
+        if flip:
+            # Flipping the padded image keeps the flipped image on the stride grid of the maps
+            inputs += [(cv2.flip(padded_img, 1), item_scale, item_pad) for padded_img, item_scale, item_pad in inputs]
+            flips += [True] * len(scales)
+
+        batch_height = max(padded_img.shape[0] for padded_img, _, _ in inputs)
+        batch_width = max(padded_img.shape[1] for padded_img, _, _ in inputs)
+        batch = np.stack([cv2.copyMakeBorder(padded_img, 0, batch_height - padded_img.shape[0],
+                                             0, batch_width - padded_img.shape[1], cv2.BORDER_CONSTANT,
+                                             value=(0, 0, 0))
+                          for padded_img, _, _ in inputs])
+        stage2_heatmaps, stage2_pafs = self.__second_pass_forward(batch)
+        # The 19th heatmap channel is the background
+        maps = torch.cat([stage2_heatmaps.detach()[:, :18], stage2_pafs.detach()], 1).float()
+        device = maps.device
+
+        # The flipped passes see the left keypoints and limbs as the right ones, and the PAFs point the other way in x
+        flip_ids = list(FLIPPED_KPT_IDS) + [0] * len(BODY_PARTS_PAF_IDS) * 2
+        flip_signs = torch.ones(maps.shape[1], device=device)
+        for part_id, flipped_part_id in enumerate(FLIPPED_PART_IDS):
+            x_id, y_id = BODY_PARTS_PAF_IDS[part_id]
+            flip_ids[18 + x_id], flip_ids[18 + y_id] = [18 + i for i in BODY_PARTS_PAF_IDS[flipped_part_id]]
+            flip_signs[18 + x_id] = -1
+
+        # Every pass is sampled at the pixels of the upsampled maps of the single scale pass, which are mapped to the
+        # cropped image and from there to the padded image of the pass. The maps cells lie at the stride block centers.
+        height, width = batch_height // self.stride, batch_width // self.stride
+        center = (self.stride - 1) / 2
+        map_height = reference_img.shape[0] // self.stride * upsample_ratio
+        map_width = reference_img.shape[1] // self.stride * upsample_ratio
+        ys = ((torch.arange(map_height, device=device) + 0.5) / upsample_ratio - 0.5) * self.stride + center
+        xs = ((torch.arange(map_width, device=device) + 0.5) / upsample_ratio - 0.5) * self.stride + center
+        ys, xs = (ys - pad[0]) / scale, (xs - pad[1]) / scale
+
+        merged = torch.zeros((maps.shape[1], map_height, map_width), device=device)
+        for i, ((padded_img, item_scale, item_pad), flipped) in enumerate(zip(inputs, flips)):
+            item_ys = ys * item_scale + item_pad[0]
+            item_xs = xs * item_scale + item_pad[1]
+            if flipped:
+                item_xs = padded_img.shape[1] - 1 - item_xs
+            # Normalized grid_sample coordinates of the map cells
+            item_ys = (2 * (item_ys - center) / self.stride + 1) / height - 1
+            item_xs = (2 * (item_xs - center) / self.stride + 1) / width - 1
+            grid = torch.stack(torch.broadcast_tensors(item_xs[None, :], item_ys[:, None]), -1)
+            item_maps = F.grid_sample(maps[i:i + 1], grid[None], mode='bicubic', padding_mode='border',
+                                      align_corners=False)[0]
+            if flipped:
+                item_maps = item_maps[flip_ids] * flip_signs[:, None, None]
+            merged += item_maps
+        merged /= len(inputs)
+
+        heatmaps, pafs = merged[:18], merged[18:]
+        if not postprocess_on_device:
+            # The peaks of the merged maps are found on the host, as after the single scale pass
+            heatmaps = heatmaps.permute(1, 2, 0).cpu().numpy()
+            pafs = pafs.permute(1, 2, 0).cpu().numpy()
         return heatmaps, pafs, scale, pad
 
     def __pooling(self, img, kernel):  # Pooling on input image for dimension reduction
@@ -563,11 +737,7 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
                 # ------- Second pass of the image, inference for pose estimation -------
                 avg_heatmaps, avg_pafs, scale, pad = self.__second_pass(crop_img, self.second_pass_height, max_width,
                                                                         self.stride, upsample_ratio)
-                total_keypoints_num = 0
-                all_keypoints_by_type = []
-                for kpt_idx in range(18):
-                    total_keypoints_num += extract_keypoints(avg_heatmaps[:, :, kpt_idx], all_keypoints_by_type,
-                                                             total_keypoints_num)
+                all_keypoints_by_type = extract_all_keypoints(avg_heatmaps)
 
                 pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, avg_pafs)
 
@@ -800,11 +970,7 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
                             avg_heatmaps, avg_pafs, scale, pad = self.__second_pass(crop_img, second_pass_height,
                                                                                     max_width, self.stride, upsample_ratio)
 
-                            total_keypoints_num = 0
-                            all_keypoints_by_type = []
-                            for kpt_idx in range(18):
-                                total_keypoints_num += extract_keypoints(avg_heatmaps[:, :, kpt_idx], all_keypoints_by_type,
-                                                                         total_keypoints_num)
+                            all_keypoints_by_type = extract_all_keypoints(avg_heatmaps)
 
                             pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, avg_pafs)
 
@@ -904,11 +1070,7 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
                     avg_heatmaps, avg_pafs, scale, pad = self.__second_pass(crop_img, second_pass_height,
                                                                             max_width, self.stride, upsample_ratio)
 
-                    total_keypoints_num = 0
-                    all_keypoints_by_type = []
-                    for kpt_idx in range(18):
-                        total_keypoints_num += extract_keypoints(avg_heatmaps[:, :, kpt_idx], all_keypoints_by_type,
-                                                                 total_keypoints_num)
+                    all_keypoints_by_type = extract_all_keypoints(avg_heatmaps)
 
                     pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, avg_pafs)
 
@@ -975,7 +1137,8 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
                 print("Evaluation ended with no detections.")
             return {"average_precision": [0.0 for _ in range(5)], "average_recall": [0.0 for _ in range(5)]}
 
-    def infer(self, img, upsample_ratio=4, stride=8, track=True, smooth=True, multiscale=False):
+    def infer(self, img, upsample_ratio=4, stride=8, track=True, smooth=True, multiscale=False,
+              postprocess_on_device=False, flip=False):
         """
         This method is used to perform pose estimation on an image.
 
@@ -991,8 +1154,18 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
         :type track: bool, optional
         :param smooth: If True, smoothing is performed on pose keypoints between frames, defaults to 'True'
         :type smooth: bool, optional
-        :param multiscale: Specifies whether evaluation will run in the predefined multiple scales setup or not.
+        :param multiscale: Specifies whether the second pass will run on multiple scales of the cropped image, i.e.
+            on self.scales, or on the predefined [0.5, 1.0, 1.5, 2.0] scales if self.scales holds a single scale. All
+            the scales run as a single batch and their maps are averaged on the inference device, defaults to 'False'
         :type multiscale: bool,optional
+        :param postprocess_on_device: If True, the heatmaps and PAFs are upsampled and their peaks are found on the
+            inference device, so that only the peaks and the PAF samples are copied to the host. With multiscale or
+            flip, the maps are always merged on the inference device and only their peaks are found there,
+            defaults to 'False'
+        :type postprocess_on_device: bool, optional
+        :param flip: If True, the horizontal flip of every scale is added to the batch of the second pass and its
+            maps are averaged with the rest, defaults to 'False'
+        :type flip: bool, optional
 
         :return: Returns a list of engine.target.Pose objects, where each holds a pose
         and a heatmap that contains human silhouettes of the input image.
@@ -1001,19 +1174,126 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
         :rtype: poses -> list of engine.target.Pose objects
                 heatmap -> np.array()
         """
-        current_poses = []
-        num_keypoints = Pose.num_kpts
         if not isinstance(img, Image):
-            img = Image(img)
+            img = Image(img, copy=False)
 
         # Bring image into the appropriate format for the implementation
-        img = img.convert(format='channels_last', channel_order='bgr')
+        img = img.convert(format='channels_last', channel_order='bgr', copy=False)
+        crop_img, xmin, ymin, max_width, heatmap = self.__select_crop(img, self)
+
+        current_poses = []
+        if crop_img is not None:
+            second_pass_height = min(crop_img.shape[0], self.second_pass_height)
+
+            # ------- Second pass of the image, inference for pose estimation -------
+            if multiscale or flip:
+                scales = [1]
+                if multiscale:
+                    scales = self.scales if len(self.scales) > 1 else [0.5, 1.0, 1.5, 2.0]
+                avg_heatmaps, avg_pafs, scale, pad = self.__second_pass_merged(crop_img, second_pass_height,
+                                                                               max_width, upsample_ratio, scales,
+                                                                               flip, postprocess_on_device)
+            else:
+                avg_heatmaps, avg_pafs, scale, pad = self.__second_pass(crop_img, second_pass_height,
+                                                                        max_width, self.stride, upsample_ratio,
+                                                                        postprocess_on_device=postprocess_on_device)
+            current_poses = self.__decode_poses(avg_heatmaps, avg_pafs, scale, pad, upsample_ratio, xmin, ymin)
+        self.counter += 1
+        bounds = ([self.xmin, self.xmax, self.ymin, self.ymax],)
+        return current_poses, heatmap, bounds
+
+    def infer_batch(self, imgs, upsample_ratio=4, stream_ids=None, postprocess_on_device=False):
+        """
+        This method is used to perform pose estimation on a batch of images, e.g. the latest frames of several cameras.
+        Every image is processed as in infer, with the region of interest of its own stream, and the second passes of
+        all the images run as a single forward pass, where the crops are padded to the size of the largest one.
+        Streams that have not received a frame for more than max_stream_idle_time seconds are evicted.
+
+        :param imgs: images to run inference on
+        :type imgs: list of engine.data.Image
+        :param upsample_ratio: Defines the amount of upsampling to be performed on the heatmaps and PAFs
+            when resizing, defaults to 4
+        :type upsample_ratio: int, optional
+        :param stream_ids: the stream id of every image, defaults to the position of the image in imgs
+        :type stream_ids: list, optional
+        :param postprocess_on_device: If True, the heatmaps and PAFs are upsampled and their peaks are found on the
+            inference device, so that only the peaks and the PAF samples are copied to the host, defaults to 'False'
+        :type postprocess_on_device: bool, optional
+
+        :return: Returns the poses, the heatmap and the bounds of the region of interest of every image, as infer does
+        :rtype: list of tuples
+        """
+        if stream_ids is None:
+            stream_ids = list(range(len(imgs)))
+        if len(stream_ids) != len(imgs):
+            raise ValueError("stream_ids should hold one stream id per image")
+
+        self.streams.evict_idle()
+        crops = []
+        for img, stream_id in zip(imgs, stream_ids):
+            if not isinstance(img, Image):
+                img = Image(img, copy=False)
+            img = img.convert(format='channels_last', channel_order='bgr', copy=False)
+
+            # The region of interest of every stream is tracked separately
+            region = self.streams.get(stream_id)
+            crop_img, xmin, ymin, max_width, heatmap = self.__select_crop(img, region)
+            region.counter += 1
+            bounds = ([region.xmin, region.xmax, region.ymin, region.ymax],)
+            crops.append((crop_img, xmin, ymin, max_width, heatmap, bounds))
+
+        inputs = [self.__second_pass_input(crop_img, min(crop_img.shape[0], self.second_pass_height), max_width,
+                                           self.stride)
+                  for crop_img, _, _, max_width, _, _ in crops if crop_img is not None]
+        if len(inputs) > 0:
+            batch_height = max(padded_img.shape[0] for padded_img, _, _ in inputs)
+            batch_width = max(padded_img.shape[1] for padded_img, _, _ in inputs)
+            # Padding on the bottom and the right keeps every crop on the same stride grid as in infer
+            batch = np.stack([cv2.copyMakeBorder(padded_img, 0, batch_height - padded_img.shape[0],
+                                                 0, batch_width - padded_img.shape[1], cv2.BORDER_CONSTANT,
+                                                 value=(0, 0, 0))
+                              for padded_img, _, _ in inputs])
+            stage2_heatmaps, stage2_pafs = self.__second_pass_forward(batch)
+
+        results = []
+        i = 0
+        for crop_img, xmin, ymin, _, heatmap, bounds in crops:
+            current_poses = []
+            if crop_img is not None:
+                padded_img, scale, pad = inputs[i]
+                height = stage2_heatmaps.shape[2] * padded_img.shape[0] // batch_height
+                width = stage2_heatmaps.shape[3] * padded_img.shape[1] // batch_width
+                avg_heatmaps, avg_pafs = self.__second_pass_maps(stage2_heatmaps[i:i + 1, :, :height, :width],
+                                                                 stage2_pafs[i:i + 1, :, :height, :width],
+                                                                 upsample_ratio, postprocess_on_device)
+                current_poses = self.__decode_poses(avg_heatmaps, avg_pafs, scale, pad, upsample_ratio, xmin, ymin)
+                i += 1
+            results.append((current_poses, heatmap, bounds))
+        return results
+
+    def __select_crop(self, img, region):
+        """
+        This method selects the region of the image that contains the humans. The region is found by a first pass
+        on every fifth frame and smoothed over the frames.
+
+        :param img: input image in channels last BGR format
+        :type img: engine.data.Image
+        :param region: the region of interest of the stream of the image, i.e. an object with the counter,
+            prev_heatmap, xmin, ymin, xmax and ymax attributes, which is updated in place. infer passes the learner
+            itself and infer_batch the region of interest of every stream.
+        :type region: object
+
+        :return: the cropped image, or None if no human was found, the top left corner of the crop, the maximum
+            width of the second pass and the heatmap of the first pass
+        :rtype: tuple
+        """
         h, w, _ = img.shape
         max_width = w
         xmin, ymin = 0, 0
         ymax, xmax, _ = img.shape
+        crop_img = None
 
-        if self.counter % 5 == 0:
+        if region.counter % 5 == 0:
             kernel = int(h / self.first_pass_height)
             if kernel > 0:
                 pool_img = self.__pooling(img, kernel)
@@ -1031,7 +1311,7 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
             heatmap = heatmap.astype(np.uint8)
             heatmap = cv2.blur(heatmap, (5, 5))
 
-            self.prev_heatmap = heatmap
+            region.prev_heatmap = heatmap
 
             contours, hierarchy = cv2.findContours(heatmap, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
 
@@ -1055,184 +1335,129 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
                 ymin = int(np.floor(min(ydim))) * int((h / heatmap.shape[0])) * kernel
                 ymax = int(np.floor(max(ydim))) * int((h / heatmap.shape[0])) * kernel
 
-                if self.xmin is None:
-                    self.xmin = xmin
-                    self.ymin = ymin
-                    self.xmax = xmax
-                    self.ymax = ymax
+                if region.xmin is None:
+                    region.xmin = xmin
+                    region.ymin = ymin
+                    region.xmax = xmax
+                    region.ymax = ymax
                 else:
                     a = 0.2
-                    self.xmin = a * xmin + (1 - a) * self.xmin
-                    self.ymin = a * ymin + (1 - a) * self.ymin
-                    self.ymax = a * ymax + (1 - a) * self.ymax
-                    self.xmax = a * xmax + (1 - a) * self.xmax
+                    region.xmin = a * xmin + (1 - a) * region.xmin
+                    region.ymin = a * ymin + (1 - a) * region.ymin
+                    region.ymax = a * ymax + (1 - a) * region.ymax
+                    region.xmax = a * xmax + (1 - a) * region.xmax
 
-                extra_pad_x = int(self.perc * (self.xmax - self.xmin))  # Adding an extra pad around cropped image
-                extra_pad_y = int(self.perc * (self.ymax - self.ymin))
+                extra_pad_x = int(self.perc * (region.xmax - region.xmin))  # Adding an extra pad around cropped image
+                extra_pad_y = int(self.perc * (region.ymax - region.ymin))
 
-                if self.xmin - extra_pad_x > 0:
-                    xmin = self.xmin - extra_pad_x
+                if region.xmin - extra_pad_x > 0:
+                    xmin = region.xmin - extra_pad_x
                 else:
-                    xmin = self.xmin
-                if self.xmax + extra_pad_x < img.shape[1]:
-                    xmax = self.xmax + extra_pad_x
+                    xmin = region.xmin
+                if region.xmax + extra_pad_x < img.shape[1]:
+                    xmax = region.xmax + extra_pad_x
                 else:
-                    xmax = self.xmax
+                    xmax = region.xmax
 
-                if self.ymin - extra_pad_y > 0:
-                    ymin = self.ymin - extra_pad_y
+                if region.ymin - extra_pad_y > 0:
+                    ymin = region.ymin - extra_pad_y
                 else:
-                    ymin = self.ymin
-                if self.ymax + extra_pad_y < img.shape[0]:
-                    ymax = self.ymax + extra_pad_y
+                    ymin = region.ymin
+                if region.ymax + extra_pad_y < img.shape[0]:
+                    ymax = region.ymax + extra_pad_y
                 else:
-                    ymax = self.ymax
+                    ymax = region.ymax
 
                 if (xmax - xmin) > 40 and (ymax - ymin) > 40:
                     crop_img = img[int(ymin):int(ymax), int(xmin):int(xmax)]
                 else:
                     crop_img = img[0:img.shape[0], 0:img.shape[1]]
-
-                h, w, _ = crop_img.shape
-                if crop_img.shape[0] < self.second_pass_height:
-                    second_pass_height = crop_img.shape[0]
-                else:
-                    second_pass_height = self.second_pass_height
-
-                # ------- Second pass of the image, inference for pose estimation -------
-                avg_heatmaps, avg_pafs, scale, pad = self.__second_pass(crop_img, second_pass_height,
-                                                                        max_width, self.stride, upsample_ratio)
-
-                total_keypoints_num = 0
-                all_keypoints_by_type = []
-                for kpt_idx in range(18):
-                    total_keypoints_num += extract_keypoints(avg_heatmaps[:, :, kpt_idx], all_keypoints_by_type,
-                                                             total_keypoints_num)
-
-                pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, avg_pafs)
-
-                for kpt_id in range(all_keypoints.shape[0]):
-                    all_keypoints[kpt_id, 0] = (all_keypoints[kpt_id, 0] * self.stride / upsample_ratio - pad[
-                        1]) / scale
-                    all_keypoints[kpt_id, 1] = (all_keypoints[kpt_id, 1] * self.stride / upsample_ratio - pad[
-                        0]) / scale
-
-                for i in range(all_keypoints.shape[0]):
-                    for j in range(all_keypoints.shape[1]):
-                        if j == 0:
-                            all_keypoints[i][j] = round((all_keypoints[i][j] + xmin))
-                        if j == 1:
-                            all_keypoints[i][j] = round((all_keypoints[i][j] + ymin))
-
-                current_poses = []
-                for n in range(len(pose_entries)):
-                    if len(pose_entries[n]) == 0:
-                        continue
-                    pose_keypoints = np.ones((num_keypoints, 2), dtype=np.int32) * -1
-                    for kpt_id in range(num_keypoints):
-                        if pose_entries[n][kpt_id] != -1.0:  # keypoint was found
-                            pose_keypoints[kpt_id, 0] = int(all_keypoints[int(pose_entries[n][kpt_id]), 0])
-                            pose_keypoints[kpt_id, 1] = int(all_keypoints[int(pose_entries[n][kpt_id]), 1])
-
-                    if np.count_nonzero(pose_keypoints == -1) < 26:
-                        pose = Pose(pose_keypoints, pose_entries[n][18])
-                        current_poses.append(pose)
             else:
-                if self.xmin is None:
-                    self.xmin = xmin
-                    self.ymin = ymin
-                    self.xmax = xmax
-                    self.ymax = ymax
+                if region.xmin is None:
+                    region.xmin = xmin
+                    region.ymin = ymin
+                    region.xmax = xmax
+                    region.ymax = ymax
                 else:
                     a = 0.2
-                    self.xmin = a * xmin + (1 - a) * self.xmin
-                    self.ymin = a * ymin + (1 - a) * self.ymin
-                    self.ymax = a * ymax + (1 - a) * self.ymax
-                    self.xmax = a * xmax + (1 - a) * self.xmax
+                    region.xmin = a * xmin + (1 - a) * region.xmin
+                    region.ymin = a * ymin + (1 - a) * region.ymin
+                    region.ymax = a * ymax + (1 - a) * region.ymax
+                    region.xmax = a * xmax + (1 - a) * region.xmax
         else:
 
-            extra_pad_x = int(self.perc * (self.xmax - self.xmin))  # Adding an extra pad around cropped image
-            extra_pad_y = int(self.perc * (self.ymax - self.ymin))
+            extra_pad_x = int(self.perc * (region.xmax - region.xmin))  # Adding an extra pad around cropped image
+            extra_pad_y = int(self.perc * (region.ymax - region.ymin))
 
-            if self.xmin - extra_pad_x > 0:
-                xmin = self.xmin - extra_pad_x
+            if region.xmin - extra_pad_x > 0:
+                xmin = region.xmin - extra_pad_x
             else:
-                xmin = self.xmin
+                xmin = region.xmin
 
-            if self.xmax + extra_pad_x < img.shape[1]:
-                xmax = self.xmax + extra_pad_x
+            if region.xmax + extra_pad_x < img.shape[1]:
+                xmax = region.xmax + extra_pad_x
             else:
-                xmax = self.xmax
+                xmax = region.xmax
 
-            if self.ymin - extra_pad_y > 0:
-                ymin = self.ymin - extra_pad_y
+            if region.ymin - extra_pad_y > 0:
+                ymin = region.ymin - extra_pad_y
             else:
-                ymin = self.ymin
+                ymin = region.ymin
 
-            if self.ymax + extra_pad_y < img.shape[0]:
-                ymax = self.ymax + extra_pad_y
+            if region.ymax + extra_pad_y < img.shape[0]:
+                ymax = region.ymax + extra_pad_y
             else:
-                ymax = self.ymax
+                ymax = region.ymax
 
             if (xmax - xmin) > 40 and (ymax - ymin) > 40:
                 crop_img = img[int(ymin):int(ymax), int(xmin):int(xmax)]
             else:
                 crop_img = img[0:img.shape[0], 0:img.shape[1]]
 
-            h, w, _ = crop_img.shape
-            if crop_img.shape[0] < self.second_pass_height:
-                second_pass_height = crop_img.shape[0]
-            else:
-                second_pass_height = self.second_pass_height
-
-            # ------- Second pass of the image, inference for pose estimation -------
-            avg_heatmaps, avg_pafs, scale, pad = self.__second_pass(crop_img, second_pass_height,
-                                                                    max_width, self.stride, upsample_ratio)
-
-            total_keypoints_num = 0
-            all_keypoints_by_type = []
-            for kpt_idx in range(18):
-                total_keypoints_num += extract_keypoints(avg_heatmaps[:, :, kpt_idx], all_keypoints_by_type,
-                                                         total_keypoints_num)
-
-            pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, avg_pafs)
-
-            for kpt_id in range(all_keypoints.shape[0]):
-                all_keypoints[kpt_id, 0] = (all_keypoints[kpt_id, 0] * self.stride / upsample_ratio - pad[1]) / scale
-                all_keypoints[kpt_id, 1] = (all_keypoints[kpt_id, 1] * self.stride / upsample_ratio - pad[0]) / scale
-
-            for i in range(all_keypoints.shape[0]):
-                for j in range(all_keypoints.shape[1]):
-                    if j == 0:
-                        all_keypoints[i][j] = round((all_keypoints[i][j] + xmin))
-                    if j == 1:
-                        all_keypoints[i][j] = round((all_keypoints[i][j] + ymin))
-
-            current_poses = []
-            for n in range(len(pose_entries)):
-                if len(pose_entries[n]) == 0:
-                    continue
-                pose_keypoints = np.ones((num_keypoints, 2), dtype=np.int32) * -1
-                for kpt_id in range(num_keypoints):
-                    if pose_entries[n][kpt_id] != -1.0:  # keypoint was found
-                        pose_keypoints[kpt_id, 0] = int(all_keypoints[int(pose_entries[n][kpt_id]), 0])
-                        pose_keypoints[kpt_id, 1] = int(all_keypoints[int(pose_entries[n][kpt_id]), 1])
-
-                if np.count_nonzero(pose_keypoints == -1) < 26:
-                    pose = Pose(pose_keypoints, pose_entries[n][18])
-                    current_poses.append(pose)
-
-            if np.any(self.prev_heatmap) is False:
+            if np.any(region.prev_heatmap) is False:
                 heatmap = np.zeros((int(img.shape[0] / (int((img.shape[0] / self.first_pass_height))) / 8),
                                     int(img.shape[1] / (int((img.shape[0] / self.first_pass_height))) / 8)),
                                    dtype=np.uint8)
             else:
-                heatmap = self.prev_heatmap
-        self.counter += 1
-        bounds = ([self.xmin, self.xmax, self.ymin, self.ymax],)
-        return current_poses, heatmap, bounds
+                heatmap = region.prev_heatmap
+        return crop_img, xmin, ymin, max_width, heatmap
 
-    def infer_adaptive(self, img, upsample_ratio=4, stride=8):
+    def __decode_poses(self, avg_heatmaps, avg_pafs, scale, pad, upsample_ratio, xmin, ymin):
+        """
+        This method groups the keypoints of the second pass into poses in the coordinates of the whole image.
+
+        :param avg_heatmaps: the heatmaps of the second pass
+        :type avg_heatmaps: numpy.ndarray or torch.Tensor
+        :param avg_pafs: the PAFs of the second pass
+        :type avg_pafs: numpy.ndarray or torch.Tensor
+        :param scale: the scale of the resize of the second pass
+        :type scale: float
+        :param pad: the padding of the second pass
+        :type pad: list
+        :param upsample_ratio: the amount of upsampling of the heatmaps and PAFs
+        :type upsample_ratio: int
+        :param xmin: left coordinate of the crop
+        :type xmin: float
+        :param ymin: top coordinate of the crop
+        :type ymin: float
+
+        :return: the poses that have enough keypoints
+        :rtype: list of engine.target.Pose objects
+        """
+        all_keypoints_by_type = extract_all_keypoints(avg_heatmaps)
+        pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, avg_pafs)
+
+        all_keypoints[:, 0] = np.round((all_keypoints[:, 0] * self.stride / upsample_ratio - pad[1]) / scale + xmin)
+        all_keypoints[:, 1] = np.round((all_keypoints[:, 1] * self.stride / upsample_ratio - pad[0]) / scale + ymin)
+
+        poses, confidences = poses_to_array(pose_entries, all_keypoints, Pose.num_kpts)
+        current_poses = []
+        for pose_keypoints, confidence in zip(poses[:, :, :2].astype(np.int32), confidences):
+            if np.count_nonzero(pose_keypoints == -1) < 26:
+                current_poses.append(Pose(pose_keypoints, confidence))
+        return current_poses
+
+    def infer_adaptive(self, img, upsample_ratio=4, stride=8, postprocess_on_device=False):
         """
             This method is used to perform pose estimation on an image.
 
@@ -1250,6 +1475,9 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
             :type smooth: bool, optional
             :param multiscale: Specifies whether evaluation will run in the predefined multiple scales setup or not.
             :type multiscale: bool,optional
+            :param postprocess_on_device: If True, the heatmaps and PAFs are upsampled and their peaks are found on the
+                inference device, so that only the peaks and the PAF samples are copied to the host, defaults to 'False'
+            :type postprocess_on_device: bool, optional
 
             :return: Returns a list of engine.target.Pose objects, where each holds a pose
             and a heatmap that contains human silhouettes of the input image.
@@ -1261,10 +1489,10 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
         current_poses = []
         num_keypoints = Pose.num_kpts
         if not isinstance(img, Image):
-            img = Image(img)
+            img = Image(img, copy=False)
 
         # Bring image into the appropriate format for the implementation
-        img = img.convert(format='channels_last', channel_order='bgr')
+        img = img.convert(format='channels_last', channel_order='bgr', copy=False)
         h, w, _ = img.shape
         max_width = w
         xmin, ymin = 0, 0
@@ -1352,13 +1580,10 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
 
                             # ------- Second pass of the image, inference for pose estimation -------
                             avg_heatmaps, avg_pafs, scale, pad = self.__second_pass(crop_img, second_pass_height,
-                                                                                    max_width, self.stride, upsample_ratio)
+                                                                                    max_width, self.stride, upsample_ratio,
+                                                                                    postprocess_on_device=postprocess_on_device)
 
-                            total_keypoints_num = 0
-                            all_keypoints_by_type = []
-                            for kpt_idx in range(18):
-                                total_keypoints_num += extract_keypoints(avg_heatmaps[:, :, kpt_idx], all_keypoints_by_type,
-                                                                         total_keypoints_num)
+                            all_keypoints_by_type = extract_all_keypoints(avg_heatmaps)
 
                             pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, avg_pafs)
 
@@ -1450,13 +1675,10 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
 
                     # ------- Second pass of the image, inference for pose estimation -------
                     avg_heatmaps, avg_pafs, scale, pad = self.__second_pass(crop_img, second_pass_height,
-                                                                            max_width, self.stride, upsample_ratio)
+                                                                            max_width, self.stride, upsample_ratio,
+                                                                            postprocess_on_device=postprocess_on_device)
 
-                    total_keypoints_num = 0
-                    all_keypoints_by_type = []
-                    for kpt_idx in range(18):
-                        total_keypoints_num += extract_keypoints(avg_heatmaps[:, :, kpt_idx], all_keypoints_by_type,
-                                                                 total_keypoints_num)
+                    all_keypoints_by_type = extract_all_keypoints(avg_heatmaps)
 
                     pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, avg_pafs)
 
@@ -1554,13 +1776,10 @@ class HighResolutionPoseEstimationLearner(LightweightOpenPoseLearner):
 
                 # ------- Second pass of the image, inference for pose estimation -------
                 avg_heatmaps, avg_pafs, scale, pad = self.__second_pass(crop_img, second_pass_height,
-                                                                        max_width, self.stride, upsample_ratio)
+                                                                        max_width, self.stride, upsample_ratio,
+                                                                        postprocess_on_device=postprocess_on_device)
 
-                total_keypoints_num = 0
-                all_keypoints_by_type = []
-                for kpt_idx in range(18):
-                    total_keypoints_num += extract_keypoints(avg_heatmaps[:, :, kpt_idx], all_keypoints_by_type,
-                                                             total_keypoints_num)
+                all_keypoints_by_type = extract_all_keypoints(avg_heatmaps)
 
                 pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, avg_pafs)
 
@@ -1,11 +1,16 @@
 import math
 import numpy as np
+import torch
+import torch.nn.functional as F
 from operator import itemgetter
 
 BODY_PARTS_KPT_IDS = [[1, 2], [1, 5], [2, 3], [3, 4], [5, 6], [6, 7], [1, 8], [8, 9], [9, 10], [1, 11],
                       [11, 12], [12, 13], [1, 0], [0, 14], [14, 16], [0, 15], [15, 17], [2, 16], [5, 17]]
 BODY_PARTS_PAF_IDS = ([12, 13], [20, 21], [14, 15], [16, 17], [22, 23], [24, 25], [0, 1], [2, 3], [4, 5],
                       [6, 7], [8, 9], [10, 11], [28, 29], [30, 31], [34, 35], [32, 33], [36, 37], [18, 19], [26, 27])
+# The keypoint and the body part that every keypoint and body part becomes in a horizontally flipped image
+FLIPPED_KPT_IDS = [0, 1, 5, 6, 7, 2, 3, 4, 11, 12, 13, 8, 9, 10, 15, 14, 17, 16]
+FLIPPED_PART_IDS = [BODY_PARTS_KPT_IDS.index([FLIPPED_KPT_IDS[a], FLIPPED_KPT_IDS[b]]) for a, b in BODY_PARTS_KPT_IDS]
 
 
 def extract_keypoints(heatmap, all_keypoints, total_keypoint_num):
@@ -43,6 +48,95 @@ def extract_keypoints(heatmap, all_keypoints, total_keypoint_num):
     return keypoint_num
 
 
+def upsample_maps(maps, upsample_ratio):
+    """
+    Upsamples the 1xKxHxW heatmaps or PAFs of the network on their device, with the same bicubic interpolation as
+    cv2.resize with INTER_CUBIC.
+
+    :param maps: 1xKxHxW network output
+    :type maps: torch.Tensor
+    :param upsample_ratio: upsampling factor
+    :type upsample_ratio: int
+    :return: the KxH'xW' upsampled maps in single precision
+    :rtype: torch.Tensor
+    """
+    height, width = maps.shape[2:]
+    size = (int(round(height * upsample_ratio)), int(round(width * upsample_ratio)))
+    return F.interpolate(maps.float(), size=size, mode='bicubic', align_corners=False)[0]
+
+
+def find_peaks(heatmaps, min_score=0.1):
+    """
+    Finds the pixels of the KxHxW heatmaps that are above min_score and strict maxima of their 4-neighbourhood. The
+    peaks are found on the device of the heatmaps and only the peaks are copied to the host.
+
+    :param heatmaps: KxHxW heatmaps, one per keypoint type
+    :type heatmaps: torch.Tensor
+    :param min_score: heatmap values below it are ignored
+    :type min_score: float
+    :return: the y, x, type and score of every peak
+    :rtype: tuple of numpy.ndarray
+    """
+    peaks = heatmaps >= min_score
+    peaks[:, :, 1:] &= heatmaps[:, :, 1:] > heatmaps[:, :, :-1]
+    peaks[:, :, :-1] &= heatmaps[:, :, :-1] > heatmaps[:, :, 1:]
+    peaks[:, 1:] &= heatmaps[:, 1:] > heatmaps[:, :-1]
+    peaks[:, :-1] &= heatmaps[:, :-1] > heatmaps[:, 1:]
+    types, ys, xs = torch.nonzero(peaks, as_tuple=True)
+    scores = heatmaps[types, ys, xs].cpu().numpy()
+    types, ys, xs = torch.stack([types, ys, xs]).cpu().numpy()
+    return ys, xs, types, scores
+
+
+def extract_all_keypoints(heatmaps, min_score=0.1, min_distance=6):
+    """
+    Extracts the keypoints of all types at once. It is equivalent to calling extract_keypoints for every channel of the
+    heatmaps: peaks are found in all channels together and the peaks closer than min_distance to a stronger candidate
+    of the same type (earlier in x, y order) are suppressed.
+
+    :param heatmaps: HxWxK heatmaps, one per keypoint type, or KxHxW tensor whose peaks are found on its device
+    :type heatmaps: numpy.ndarray or torch.Tensor
+    :param min_score: heatmap values below it are ignored
+    :type min_score: float
+    :param min_distance: minimum distance between two keypoints of the same type
+    :type min_distance: float
+    :return: list with the Nx4 (x, y, score, id) keypoints of every type, the ids are consecutive across types
+    :rtype: list of numpy.ndarray
+    """
+    # A peak is above min_score, so it is a strict maximum of its 4-neighbourhood whether or not the neighbours below
+    # min_score are zeroed, and only the pixels above min_score have to be compared with their neighbours.
+    if torch.is_tensor(heatmaps):
+        num_types, height, width = heatmaps.shape
+        ys, xs, types, scores = find_peaks(heatmaps, min_score)
+    else:
+        height, width, num_types = heatmaps.shape
+        ys, xs, types = np.nonzero(heatmaps >= min_score)
+        scores = heatmaps[ys, xs, types]
+        peaks = ((xs == 0) | (scores > heatmaps[ys, np.maximum(xs - 1, 0), types])) & \
+                ((xs == width - 1) | (scores > heatmaps[ys, np.minimum(xs + 1, width - 1), types])) & \
+                ((ys == 0) | (scores > heatmaps[np.maximum(ys - 1, 0), xs, types])) & \
+                ((ys == height - 1) | (scores > heatmaps[np.minimum(ys + 1, height - 1), xs, types]))
+        ys, xs, types, scores = ys[peaks], xs[peaks], types[peaks], scores[peaks]
+    order = np.lexsort((ys, xs, types))
+    ys, xs, types, scores = ys[order], xs[order], types[order], scores[order]
+
+    # The peaks are sorted by type and x, so only the next few peaks can be closer than min_distance
+    keep = np.ones(len(xs), dtype=bool)
+    ends = np.searchsorted(types * (width + min_distance) + xs, types * (width + min_distance) + xs + min_distance)
+    counts = ends - np.arange(1, len(xs) + 1)
+    first = np.repeat(np.arange(len(xs)), counts)
+    second = np.arange(len(first)) - np.repeat(np.cumsum(counts) - counts, counts) + first + 1
+    close = (xs[first] - xs[second]) ** 2 + (ys[first] - ys[second]) ** 2 < min_distance ** 2
+    for i, j in zip(first[close], second[close]):
+        if keep[i]:
+            keep[j] = False
+
+    keypoints = np.stack([xs, ys, scores, np.zeros_like(scores)], axis=1)[keep].astype(np.float32)
+    keypoints[:, 3] = np.arange(len(keypoints))
+    bounds = np.searchsorted(types[keep], np.arange(num_types + 1))
+    return [keypoints[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
 def connections_nms(a_idx, b_idx, affinity_scores):
     # From all retrieved connections that share the same starting/ending keypoints leave only the top-scoring ones.
     order = affinity_scores.argsort()[::-1]
@@ -61,14 +155,36 @@ def connections_nms(a_idx, b_idx, affinity_scores):
     return a_idx[idx], b_idx[idx], affinity_scores[idx]
 
 
+def sample_pafs(pafs, paf_ids, y, x):
+    """
+    Samples two channels of the part affinity fields at the given points.
+
+    :param pafs: HxWxC PAFs, or CxHxW tensor that is sampled on its device so that only the samples are copied
+    :type pafs: numpy.ndarray or torch.Tensor
+    :param paf_ids: the two channels to sample
+    :type paf_ids: list
+    :param y: y coordinates of the points
+    :type y: numpy.ndarray
+    :param x: x coordinates of the points
+    :type x: numpy.ndarray
+    :return: the Nx2 field at the points
+    :rtype: numpy.ndarray
+    """
+    if not torch.is_tensor(pafs):
+        return pafs[y[:, None], x[:, None], paf_ids]
+    paf_ids = torch.tensor(paf_ids, device=pafs.device)
+    y = torch.from_numpy(y).to(pafs.device, torch.int64)
+    x = torch.from_numpy(x).to(pafs.device, torch.int64)
+    return pafs[paf_ids[:, None], y, x].t().cpu().numpy()
+
+
 def group_keypoints(all_keypoints_by_type, pafs, pose_entry_size=20, min_paf_score=0.05):
-    pose_entries = []
-    all_keypoints = np.array([item for sublist in all_keypoints_by_type for item in sublist])
+    pose_entries = np.empty((0, pose_entry_size))
+    all_keypoints = np.array([item for sublist in all_keypoints_by_type for item in sublist]).reshape(-1, 4)
     points_per_limb = 10
     grid = np.arange(points_per_limb, dtype=np.float32).reshape(1, -1, 1)
     all_keypoints_by_type = [np.array(keypoints, np.float32) for keypoints in all_keypoints_by_type]
     for part_id in range(len(BODY_PARTS_PAF_IDS)):
-        part_pafs = pafs[:, :, BODY_PARTS_PAF_IDS[part_id]]
         kpts_a = all_keypoints_by_type[BODY_PARTS_KPT_IDS[part_id][0]]
         kpts_b = all_keypoints_by_type[BODY_PARTS_KPT_IDS[part_id][1]]
         n = len(kpts_a)
@@ -90,7 +206,7 @@ def group_keypoints(all_keypoints_by_type, pafs, pose_entry_size=20, min_paf_sco
         y = points[..., 1].ravel()
 
         # Compute affinity score between candidate limb vectors and part affinity field.
-        field = part_pafs[y, x].reshape(-1, points_per_limb, 2)
+        field = sample_pafs(pafs, BODY_PARTS_PAF_IDS[part_id], y, x).reshape(-1, points_per_limb, 2)
         vec_norm = np.linalg.norm(vec_raw, ord=2, axis=-1, keepdims=True)
         vec = vec_raw / (vec_norm + 1e-6)
         affinity_scores = (field * vec).sum(-1).reshape(-1, points_per_limb)
@@ -108,52 +224,60 @@ def group_keypoints(all_keypoints_by_type, pafs, pose_entry_size=20, min_paf_sco
 
         # Suppress incompatible connections.
         a_idx, b_idx, affinity_scores = connections_nms(a_idx, b_idx, affinity_scores)
-        connections = list(zip(kpts_a[a_idx, 3].astype(np.int32),
-                               kpts_b[b_idx, 3].astype(np.int32),
-                               affinity_scores))
-        if len(connections) == 0:
+        # Connections that share keypoints were suppressed, so every pose is extended by at most one connection.
+        kpt_a_id = BODY_PARTS_KPT_IDS[part_id][0]
+        kpt_b_id = BODY_PARTS_KPT_IDS[part_id][1]
+        connections_a = kpts_a[a_idx, 3].astype(np.int32)
+        connections_b = kpts_b[b_idx, 3].astype(np.int32)
+        if part_id == 17 or part_id == 18:
+            # Only complete the poses that already hold one of the two keypoints.
+            matches = (pose_entries[:, kpt_a_id, None] == connections_a) & (pose_entries[:, kpt_b_id, None] == -1)
+            rows, cols = np.nonzero(matches)
+            reverse_matches = (pose_entries[:, kpt_b_id, None] == connections_b) & \
+                              (pose_entries[:, kpt_a_id, None] == -1)
+            reverse_rows, reverse_cols = np.nonzero(reverse_matches)
+            pose_entries[rows, kpt_b_id] = connections_b[cols]
+            pose_entries[reverse_rows, kpt_a_id] = connections_a[reverse_cols]
             continue
 
-        if part_id == 0:
-            pose_entries = [np.ones(pose_entry_size) * -1 for _ in range(len(connections))]
-            for i in range(len(connections)):
-                pose_entries[i][BODY_PARTS_KPT_IDS[0][0]] = connections[i][0]
-                pose_entries[i][BODY_PARTS_KPT_IDS[0][1]] = connections[i][1]
-                pose_entries[i][-1] = 2
-                pose_entries[i][-2] = np.sum(all_keypoints[connections[i][0:2], 2]) + connections[i][2]
-        elif part_id == 17 or part_id == 18:
-            kpt_a_id = BODY_PARTS_KPT_IDS[part_id][0]
-            kpt_b_id = BODY_PARTS_KPT_IDS[part_id][1]
-            for i in range(len(connections)):
-                for j in range(len(pose_entries)):
-                    if pose_entries[j][kpt_a_id] == connections[i][0] and pose_entries[j][kpt_b_id] == -1:
-                        pose_entries[j][kpt_b_id] = connections[i][1]
-                    elif pose_entries[j][kpt_b_id] == connections[i][1] and pose_entries[j][kpt_a_id] == -1:
-                        pose_entries[j][kpt_a_id] = connections[i][0]
-            continue
-        else:
-            kpt_a_id = BODY_PARTS_KPT_IDS[part_id][0]
-            kpt_b_id = BODY_PARTS_KPT_IDS[part_id][1]
-            for i in range(len(connections)):
-                num = 0
-                for j in range(len(pose_entries)):
-                    if pose_entries[j][kpt_a_id] == connections[i][0]:
-                        pose_entries[j][kpt_b_id] = connections[i][1]
-                        num += 1
-                        pose_entries[j][-1] += 1
-                        pose_entries[j][-2] += all_keypoints[connections[i][1], 2] + connections[i][2]
-                if num == 0:
-                    pose_entry = np.ones(pose_entry_size) * -1
-                    pose_entry[kpt_a_id] = connections[i][0]
-                    pose_entry[kpt_b_id] = connections[i][1]
-                    pose_entry[-1] = 2
-                    pose_entry[-2] = np.sum(all_keypoints[connections[i][0:2], 2]) + connections[i][2]
-                    pose_entries.append(pose_entry)
-
-    filtered_entries = []
-    for i in range(len(pose_entries)):
-        if pose_entries[i][-1] < 3 or (pose_entries[i][-2] / pose_entries[i][-1] < 0.2):
-            continue
-        filtered_entries.append(pose_entries[i])
-    pose_entries = np.asarray(filtered_entries)
+        matches = pose_entries[:, kpt_a_id, None] == connections_a
+        rows, cols = np.nonzero(matches)
+        pose_entries[rows, kpt_b_id] = connections_b[cols]
+        pose_entries[rows, -1] += 1
+        pose_entries[rows, -2] += all_keypoints[connections_b[cols], 2] + affinity_scores[cols]
+
+        # The connections that do not extend any pose start new ones.
+        new = ~matches.any(axis=0)
+        new_entries = np.full((np.count_nonzero(new), pose_entry_size), -1.0)
+        new_entries[:, kpt_a_id] = connections_a[new]
+        new_entries[:, kpt_b_id] = connections_b[new]
+        new_entries[:, -1] = 2
+        new_entries[:, -2] = all_keypoints[connections_a[new], 2] + all_keypoints[connections_b[new], 2] + \
+            affinity_scores[new]
+        pose_entries = np.concatenate([pose_entries, new_entries])
+
+    keep = (pose_entries[:, -1] >= 3) & (pose_entries[:, -2] / np.maximum(pose_entries[:, -1], 1) >= 0.2)
+    pose_entries = pose_entries[keep]
     return pose_entries, all_keypoints
+
+
+def poses_to_array(pose_entries, all_keypoints, num_keypoints=18):
+    """
+    Gathers the keypoints of the grouped poses in a single array.
+
+    :param pose_entries: the pose entries returned by group_keypoints
+    :type pose_entries: numpy.ndarray
+    :param all_keypoints: the keypoints returned by group_keypoints
+    :type all_keypoints: numpy.ndarray
+    :param num_keypoints: number of keypoint types of a pose
+    :type num_keypoints: int
+    :return: the num_poses x num_keypoints x 3 (x, y, score) keypoints, -1 for the missing ones, and the confidences
+        of the poses
+    :rtype: tuple of numpy.ndarray
+    """
+    pose_entries = np.asarray(pose_entries).reshape(-1, num_keypoints + 2)
+    poses = np.full((len(pose_entries), num_keypoints, 3), -1.0)
+    ids = pose_entries[:, :num_keypoints].astype(np.int64)
+    found = ids != -1
+    poses[found] = all_keypoints[ids[found], :3]
+    return poses, pose_entries[:, num_keypoints]
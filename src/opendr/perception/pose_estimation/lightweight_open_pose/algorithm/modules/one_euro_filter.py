@@ -1,7 +1,9 @@
 import math
+import numpy as np
 
 
 def get_alpha(rate=30, cutoff=1):
+    # Works element-wise for a numpy.ndarray of cutoffs
     tau = 1 / (2 * math.pi * cutoff)
     te = 1 / rate
     return 1 / (1 + tau / te)
@@ -43,6 +45,62 @@ class OneEuroFilter:
         return x_filtered
 
 
+class OneEuroFilterArray:
+    """
+    Filters every value of an array with its own OneEuroFilter, e.g. the coordinates of all the keypoints of a pose,
+    with a few array operations instead of one filter call per value.
+    """
+    def __init__(self, shape, freq=15, mincutoff=1, beta=0.05, dcutoff=1):
+        self.freq = freq
+        self.mincutoff = mincutoff
+        self.beta = beta
+        self.dcutoff = dcutoff
+        self.x_previous = np.zeros(shape)
+        self.x_filtered = np.zeros(shape)
+        self.dx_filtered = np.zeros(shape)
+        self.initialized = np.zeros(shape, dtype=bool)
+
+    def __call__(self, x, mask=None):
+        """
+        Filters the values of x selected by mask, the filters of the other values are left untouched.
+
+        :param x: values to filter
+        :type x: numpy.ndarray
+        :param mask: the values to filter, all of them if None
+        :type mask: numpy.ndarray, optional
+        :return: the filtered values, where the values outside mask are the values of x
+        :rtype: numpy.ndarray
+        """
+        x = np.asarray(x, dtype=np.float64)
+        mask = np.ones(x.shape, dtype=bool) if mask is None else mask
+        initialized = self.initialized
+        dx = np.where(initialized, (x - self.x_previous) * self.freq, 0)
+        alpha = get_alpha(self.freq, self.dcutoff)
+        dx_smoothed = np.where(initialized, alpha * dx + (1 - alpha) * self.dx_filtered, dx)
+        alpha = get_alpha(self.freq, self.mincutoff + self.beta * np.abs(dx_smoothed))
+        x_filtered = np.where(initialized & mask, alpha * x + (1 - alpha) * self.x_filtered, x)
+
+        self.x_previous[mask] = x[mask]
+        self.x_filtered[mask] = x_filtered[mask]
+        self.dx_filtered[mask] = dx_smoothed[mask]
+        self.initialized |= mask
+        return x_filtered
+
+    def copy_from(self, other, mask):
+        """
+        Continues the filtering of the values selected by mask from the state of another filter.
+
+        :param other: filter of the same shape to copy the state from
+        :type other: OneEuroFilterArray
+        :param mask: the values whose state is copied
+        :type mask: numpy.ndarray
+        """
+        self.x_previous[mask] = other.x_previous[mask]
+        self.x_filtered[mask] = other.x_filtered[mask]
+        self.dx_filtered[mask] = other.dx_filtered[mask]
+        self.initialized[mask] = other.initialized[mask]
+
+
 if __name__ == '__main__':
     filter = OneEuroFilter(freq=15, beta=0.1)
     for val in range(10):
@@ -13,10 +13,11 @@
 # limitations under the License.
 
 from opendr.engine.target import Pose
-from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.one_euro_filter import OneEuroFilter
+from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.one_euro_filter import OneEuroFilterArray
 
 
 class FilteredPose(Pose):
     def __init__(self, keypoints, confidence):
         super().__init__(keypoints, confidence)
-        self.filters = [[OneEuroFilter(), OneEuroFilter()] for _ in range(self.num_kpts)]
+        # One filter per keypoint coordinate
+        self.filter = OneEuroFilterArray((self.num_kpts, 2))
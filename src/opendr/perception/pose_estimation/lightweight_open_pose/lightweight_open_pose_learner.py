@@ -29,6 +29,8 @@ from torchvision import transforms
 from urllib.request import urlretrieve
 
 from opendr.engine.learners import Learner
+from opendr.engine.profiling import profiler
+from opendr.engine.streams import StreamPool
 from opendr.engine.datasets import ExternalDataset, DatasetIterator
 from opendr.engine.data import Image
 from opendr.engine.target import Pose
@@ -48,7 +50,7 @@ from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.l
     load_state
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.loss import l2_loss
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.keypoints import \
-    extract_keypoints, group_keypoints
+    extract_all_keypoints, group_keypoints, poses_to_array, upsample_maps
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.datasets.coco import CocoTrainDataset
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.datasets.coco import CocoValDataset
 from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.datasets.transformations import \
@@ -70,7 +72,7 @@ class LightweightOpenPoseLearner(Learner):
                  experiment_name='default', num_workers=8, weights_only=True, output_name='detections.json',
                  multiscale=False, scales=None, visualize=False, base_height=256,
                  img_mean=np.array([128, 128, 128], np.float32), img_scale=np.float32(1 / 256), pad_value=(0, 0, 0),
-                 half_precision=False):
+                 half_precision=False, max_stream_idle_time=60.0, max_streams=None):
         super(LightweightOpenPoseLearner, self).__init__(lr=lr, batch_size=batch_size, lr_schedule=lr_schedule,
                                                          checkpoint_after_iter=checkpoint_after_iter,
                                                          checkpoint_load_iter=checkpoint_load_iter,
@@ -116,6 +118,10 @@ class LightweightOpenPoseLearner(Learner):
         self.img_scale = img_scale
         self.pad_value = pad_value
         self.previous_poses = []
+        self.max_stream_idle_time = max_stream_idle_time
+        self.max_streams = max_streams
+        # Stream id -> poses of the previous frame of the stream for infer_batch
+        self.streams = StreamPool(list, max_idle_time=self.max_stream_idle_time, max_streams=self.max_streams)
 
         self.ort_session = None  # ONNX runtime inference session
         self.model_train_state = True
@@ -524,11 +530,7 @@ class LightweightOpenPoseLearner(Learner):
             file_name = sample['file_name']
             img = sample['img']
             avg_heatmaps, avg_pafs, _, _ = self.__infer_eval(img)
-            total_keypoints_num = 0
-            all_keypoints_by_type = []
-            for kpt_idx in range(18):  # 19th for bg
-                total_keypoints_num += extract_keypoints(avg_heatmaps[:, :, kpt_idx], all_keypoints_by_type,
-                                                         total_keypoints_num)
+            all_keypoints_by_type = extract_all_keypoints(avg_heatmaps[:, :, :18])  # 19th for bg
             pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, avg_pafs)
             coco_keypoints, scores = convert_to_coco_format(pose_entries, all_keypoints)
 
@@ -572,7 +574,7 @@ class LightweightOpenPoseLearner(Learner):
                 print("Evaluation ended with no detections.")
             return {"average_precision": [0.0 for _ in range(5)], "average_recall": [0.0 for _ in range(5)]}
 
-    def infer(self, img, upsample_ratio=4, track=True, smooth=True):
+    def infer(self, img, upsample_ratio=4, track=True, smooth=True, postprocess_on_device=False):
         """
         This method is used to perform pose estimation on an image.
 
@@ -585,15 +587,129 @@ class LightweightOpenPoseLearner(Learner):
         :type track: bool, optional
         :param smooth: If True, smoothing is performed on pose keypoints between frames, defaults to 'True'
         :type smooth: bool, optional
+        :param postprocess_on_device: If True, the heatmaps and PAFs are upsampled and their peaks are found on the
+            inference device, so that only the peaks and the PAF samples are copied to the host, defaults to 'False'
+        :type postprocess_on_device: bool, optional
         :return: Returns a list of engine.target.Pose objects, where each holds a pose, or returns an empty list if no
             detections were made.
         :rtype: list of engine.target.Pose objects
         """
+        poses, confidences = self.infer_keypoints(img, upsample_ratio=upsample_ratio,
+                                                  postprocess_on_device=postprocess_on_device)
+        current_poses = self.__to_poses(poses, confidences, smooth)
+
+        with profiler.stage("lightweight_open_pose/tracking"):
+            if track:
+                track_poses(self.previous_poses, current_poses, smooth=smooth)
+                self.previous_poses = current_poses
+        return current_poses
+
+    def infer_batch(self, imgs, upsample_ratio=4, track=True, smooth=True, stream_ids=None,
+                    postprocess_on_device=False):
+        """
+        This method is used to perform pose estimation on a batch of images, e.g. the latest frames of several cameras,
+        with a single forward pass. Images of different sizes are padded to the width of the widest one. Each image
+        is tracked as a separate stream, with its own previous poses. Streams that have not received a frame for more
+        than max_stream_idle_time seconds are evicted.
+
+        :param imgs: images to run inference on
+        :type imgs: list of engine.data.Image
+        :param upsample_ratio: Defines the amount of upsampling to be performed on the heatmaps and PAFs when resizing,
+            defaults to 4
+        :type upsample_ratio: int, optional
+        :param track: If True, infer propagates poses ids from the previous frame of the same stream to track poses,
+            defaults to 'True'
+        :type track: bool, optional
+        :param smooth: If True, smoothing is performed on pose keypoints between frames, defaults to 'True'
+        :type smooth: bool, optional
+        :param stream_ids: the stream id of every image, defaults to the position of the image in imgs
+        :type stream_ids: list, optional
+        :param postprocess_on_device: If True, the heatmaps and PAFs are upsampled and their peaks are found on the
+            inference device, so that only the peaks and the PAF samples are copied to the host, defaults to 'False'
+        :type postprocess_on_device: bool, optional
+        :return: Returns a list of engine.target.Pose objects for every image.
+        :rtype: list of lists of engine.target.Pose objects
+        """
+        if stream_ids is None:
+            stream_ids = list(range(len(imgs)))
+        if len(stream_ids) != len(imgs):
+            raise ValueError("stream_ids should hold one stream id per image")
+        if len(imgs) == 0:
+            return []
+
+        with profiler.stage("lightweight_open_pose/preprocess"):
+            inputs = [self.__preprocess(img) for img in imgs]
+            batch_width = max(padded_img.shape[1] for padded_img, _, _ in inputs)
+            # Padding on the right keeps every image on the same stride grid as when it is processed alone
+            batch = np.stack([cv2.copyMakeBorder(padded_img, 0, 0, 0, batch_width - padded_img.shape[1],
+                                                 cv2.BORDER_CONSTANT, value=self.pad_value)
+                              for padded_img, _, _ in inputs])
+
+        stage2_heatmaps, stage2_pafs = self.__forward(batch)
+
+        self.streams.evict_idle()
+        results = []
+        for i, ((padded_img, scale, pad), stream_id) in enumerate(zip(inputs, stream_ids)):
+            width = stage2_heatmaps.shape[3] * padded_img.shape[1] // batch_width
+            poses, confidences = self.__decode(stage2_heatmaps[i:i + 1, :, :, :width],
+                                               stage2_pafs[i:i + 1, :, :, :width],
+                                               scale, pad, upsample_ratio, postprocess_on_device)
+            current_poses = self.__to_poses(poses, confidences, smooth)
+
+            with profiler.stage("lightweight_open_pose/tracking"):
+                if track:
+                    previous_poses = self.streams.get(stream_id)
+                    track_poses(previous_poses, current_poses, smooth=smooth)
+                    previous_poses[:] = current_poses
+            results.append(current_poses)
+        return results
+
+    def remove_stream(self, stream_id):
+        """
+        Drops the tracking state of a stream of infer_batch. Its next frame starts new pose ids.
+
+        :param stream_id: id of the stream
+        :type stream_id: hashable
+        """
+        self.streams.remove(stream_id)
+
+    def infer_keypoints(self, img, upsample_ratio=4, postprocess_on_device=False):
+        """
+        This method is used to perform pose estimation on an image and return the poses as a single array, without
+        creating engine.target.Pose objects or tracking the poses.
+
+        :param img: image to run inference on
+        :type img: engine.data.Image
+        :param upsample_ratio: Defines the amount of upsampling to be performed on the heatmaps and PAFs when resizing,
+            defaults to 4
+        :type upsample_ratio: int, optional
+        :param postprocess_on_device: If True, the heatmaps and PAFs are upsampled and their peaks are found on the
+            inference device, so that only the peaks and the PAF samples are copied to the host, defaults to 'False'
+        :type postprocess_on_device: bool, optional
+        :return: Returns the num_poses x 18 x 3 (x, y, score) keypoints in image coordinates, where missing keypoints
+            are -1, and the num_poses confidences of the poses.
+        :rtype: tuple of numpy.ndarray
+        """
+        with profiler.stage("lightweight_open_pose/preprocess"):
+            padded_img, scale, pad = self.__preprocess(img)
+
+        stage2_heatmaps, stage2_pafs = self.__forward(padded_img[None])
+        return self.__decode(stage2_heatmaps, stage2_pafs, scale, pad, upsample_ratio, postprocess_on_device)
+
+    def __preprocess(self, img):
+        """
+        Resizes an image to the base height, normalizes it and pads it to a multiple of the stride.
+
+        :param img: image to preprocess
+        :type img: engine.data.Image
+        :return: the padded image, the scale of the resize and the (top, left, bottom, right) padding
+        :rtype: tuple
+        """
         if not isinstance(img, Image):
-            img = Image(img)
+            img = Image(img, copy=False)
 
         # Bring image into the appropriate format for the implementation
-        img = img.convert(format='channels_last', channel_order='bgr')
+        img = img.convert(format='channels_last', channel_order='bgr', copy=False)
 
         height, width, _ = img.shape
         scale = self.base_height / height
@@ -602,67 +718,103 @@ class LightweightOpenPoseLearner(Learner):
         scaled_img = normalize(scaled_img, self.img_mean, self.img_scale)
         min_dims = [self.base_height, max(scaled_img.shape[1], self.base_height)]
         padded_img, pad = pad_width(scaled_img, self.stride, self.pad_value, min_dims)
+        return padded_img, scale, pad
 
-        tensor_img = torch.from_numpy(padded_img).permute(2, 0, 1).unsqueeze(0).float()
-        if "cuda" in self.device:
-            tensor_img = tensor_img.to(self.device)
-            if self.half:
-                tensor_img = tensor_img.half()
+    def __forward(self, batch):
+        """
+        Runs the network, or the ONNX session, on a batch of preprocessed images.
+
+        :param batch: NxHxWx3 preprocessed images
+        :type batch: numpy.ndarray
+        :return: the heatmaps and PAFs of the last stage
+        :rtype: tuple of torch.Tensor
+        """
+        with profiler.stage("lightweight_open_pose/forward"):
+            tensor_img = torch.from_numpy(batch).permute(0, 3, 1, 2).float()
+            if "cuda" in self.device:
+                tensor_img = tensor_img.to(self.device)
+                if self.half:
+                    tensor_img = tensor_img.half()
+
+            if self.ort_session is not None:
+                stages_output = self.ort_session.run(None, {'data': np.array(tensor_img.cpu())})
+                return torch.tensor(stages_output[-2]), torch.tensor(stages_output[-1])
 
-        if self.ort_session is not None:
-            stages_output = self.ort_session.run(None, {'data': np.array(tensor_img.cpu())})
-            stage2_heatmaps = torch.tensor(stages_output[-2])
-            stage2_pafs = torch.tensor(stages_output[-1])
-        else:
             if self.model is None:
                 raise UserWarning("No model is loaded, cannot run inference. Load a model first using load().")
             if self.model_train_state:
                 self.model.eval()
                 self.model_train_state = False
             stages_output = self.model(tensor_img)
-            stage2_heatmaps = stages_output[-2]
-            stage2_pafs = stages_output[-1]
+            return stages_output[-2], stages_output[-1]
 
-        heatmaps = np.transpose(stage2_heatmaps.squeeze().cpu().data.numpy(), (1, 2, 0))
-        if self.half:
-            heatmaps = np.float32(heatmaps)
-        heatmaps = cv2.resize(heatmaps, (0, 0), fx=upsample_ratio, fy=upsample_ratio, interpolation=cv2.INTER_CUBIC)
-
-        pafs = np.transpose(stage2_pafs.squeeze().cpu().data.numpy(), (1, 2, 0))
-        if self.half:
-            pafs = np.float32(pafs)
-        pafs = cv2.resize(pafs, (0, 0), fx=upsample_ratio, fy=upsample_ratio, interpolation=cv2.INTER_CUBIC)
-
-        total_keypoints_num = 0
-        all_keypoints_by_type = []
-        num_keypoints = 18
-        for kpt_idx in range(num_keypoints):  # 19th for bg
-            total_keypoints_num += extract_keypoints(heatmaps[:, :, kpt_idx], all_keypoints_by_type,
-                                                     total_keypoints_num)
-
-        pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, pafs)
-        for kpt_id in range(all_keypoints.shape[0]):
-            all_keypoints[kpt_id, 0] = (all_keypoints[kpt_id, 0] * self.stride / upsample_ratio - pad[1]) / scale
-            all_keypoints[kpt_id, 1] = (all_keypoints[kpt_id, 1] * self.stride / upsample_ratio - pad[0]) / scale
-        current_poses = []
-        for n in range(len(pose_entries)):
-            if len(pose_entries[n]) == 0:
-                continue
-            pose_keypoints = np.ones((num_keypoints, 2), dtype=np.int32) * -1
-            for kpt_id in range(num_keypoints):
-                if pose_entries[n][kpt_id] != -1.0:  # keypoint was found
-                    pose_keypoints[kpt_id, 0] = int(all_keypoints[int(pose_entries[n][kpt_id]), 0])
-                    pose_keypoints[kpt_id, 1] = int(all_keypoints[int(pose_entries[n][kpt_id]), 1])
-            if smooth:
-                pose = FilteredPose(pose_keypoints, pose_entries[n][18])
+    def __decode(self, stage2_heatmaps, stage2_pafs, scale, pad, upsample_ratio, postprocess_on_device):
+        """
+        Groups the keypoints of the heatmaps and PAFs of a single image into poses in image coordinates.
+
+        :param stage2_heatmaps: 1xKxHxW heatmaps of the image
+        :type stage2_heatmaps: torch.Tensor
+        :param stage2_pafs: 1xCxHxW PAFs of the image
+        :type stage2_pafs: torch.Tensor
+        :param scale: the scale of the resize of __preprocess
+        :type scale: float
+        :param pad: the padding of __preprocess
+        :type pad: list
+        :param upsample_ratio: the amount of upsampling of the heatmaps and PAFs
+        :type upsample_ratio: int
+        :param postprocess_on_device: whether the upsampling and the peak finding run on the inference device
+        :type postprocess_on_device: bool
+        :return: the num_poses x 18 x 3 keypoints, -1 for the missing ones, and the confidences of the poses
+        :rtype: tuple of numpy.ndarray
+        """
+        with profiler.stage("lightweight_open_pose/upsample"):
+            if postprocess_on_device:
+                # The maps stay on the device as KxHxW tensors, 19th heatmap channel is the background
+                heatmaps = upsample_maps(stage2_heatmaps.detach()[:, :18], upsample_ratio)
+                pafs = upsample_maps(stage2_pafs.detach(), upsample_ratio)
             else:
-                pose = Pose(pose_keypoints, pose_entries[n][18])
-            current_poses.append(pose)
+                heatmaps = np.transpose(stage2_heatmaps[0].cpu().data.numpy(), (1, 2, 0))
+                if self.half:
+                    heatmaps = np.float32(heatmaps)
+                heatmaps = cv2.resize(heatmaps, (0, 0), fx=upsample_ratio, fy=upsample_ratio,
+                                      interpolation=cv2.INTER_CUBIC)[:, :, :18]  # 19th for bg
 
-        if track:
-            track_poses(self.previous_poses, current_poses, smooth=smooth)
-            self.previous_poses = current_poses
-        return current_poses
+                pafs = np.transpose(stage2_pafs[0].cpu().data.numpy(), (1, 2, 0))
+                if self.half:
+                    pafs = np.float32(pafs)
+                pafs = cv2.resize(pafs, (0, 0), fx=upsample_ratio, fy=upsample_ratio, interpolation=cv2.INTER_CUBIC)
+
+        with profiler.stage("lightweight_open_pose/grouping"):
+            all_keypoints_by_type = extract_all_keypoints(heatmaps)
+            pose_entries, all_keypoints = group_keypoints(all_keypoints_by_type, pafs)
+            poses, confidences = poses_to_array(pose_entries, all_keypoints)
+
+            found = poses[:, :, 0] != -1
+            offset = np.array([pad[1], pad[0]])
+            poses[:, :, :2] = np.where(found[:, :, None],
+                                       (poses[:, :, :2] * self.stride / upsample_ratio - offset) / scale, -1)
+        return poses, confidences
+
+    @staticmethod
+    def __to_poses(poses, confidences, smooth):
+        """
+        Creates the engine.target.Pose objects of the poses of infer_keypoints.
+
+        :param poses: the num_poses x 18 x 3 keypoints
+        :type poses: numpy.ndarray
+        :param confidences: the confidences of the poses
+        :type confidences: numpy.ndarray
+        :param smooth: whether the poses are smoothed between frames, which needs FilteredPose objects
+        :type smooth: bool
+        :return: the poses
+        :rtype: list of engine.target.Pose objects
+        """
+        with profiler.stage("lightweight_open_pose/poses"):
+            # Keypoints are truncated to integer pixels, the missing ones stay -1
+            poses_keypoints = poses[:, :, :2].astype(np.int32)
+            pose_class = FilteredPose if smooth else Pose
+            return [pose_class(pose_keypoints, confidence)
+                    for pose_keypoints, confidence in zip(poses_keypoints, confidences)]
 
     def save(self, path, verbose=False):
         """
@@ -859,7 +1011,7 @@ class LightweightOpenPoseLearner(Learner):
 
         torch.onnx.export(self.model, inp, output_name, verbose=verbose, opset_version=11,
                           do_constant_folding=do_constant_folding, input_names=input_names, output_names=output_names,
-                          dynamic_axes={"data": {3: "width"}})
+                          dynamic_axes={name: {0: "batch", 3: "width"} for name in input_names + output_names})
 
     def optimize(self, do_constant_folding=False):
         """
@@ -884,8 +1036,11 @@ class LightweightOpenPoseLearner(Learner):
         self.__load_from_onnx(os.path.join(self.temp_path, "onnx_model_temp.onnx"))
 
     def reset(self):
-        """This method is not used in this implementation."""
-        return NotImplementedError
+        """
+        Resets the tracking state of infer and infer_batch, so that the next frames start new pose ids.
+        """
+        self.previous_poses = []
+        self.streams.reset()
 
     def count_parameters(self):
         """
@@ -1018,10 +1173,10 @@ class LightweightOpenPoseLearner(Learner):
         :type img: engine.data.Image
         """
         if not isinstance(img, Image):
-            img = Image(img)
+            img = Image(img, copy=False)
 
         # Bring image into the appropriate format for the implementation
-        img = img.convert(format='channels_last', channel_order='bgr')
+        img = img.convert(format='channels_last', channel_order='bgr', copy=False)
 
         img_mean = self.img_mean  # Defaults to (128, 128, 128)
         img_scale = self.img_scale  # Defaults to 1 / 256
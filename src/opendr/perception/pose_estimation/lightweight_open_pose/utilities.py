@@ -98,17 +98,44 @@ def get_similarity(a, b, threshold=0.5):
     :return: number of similar keypoints
     :rtype: int
     """
-    bbox_a = get_bbox(a)
-    bbox_b = get_bbox(b)
-    num_similar_kpt = 0
-    for kpt_id in range(Pose.num_kpts):
-        if a.data[kpt_id, 0] != -1 and b.data[kpt_id, 0] != -1:
-            distance = np.sum((a.data[kpt_id] - b.data[kpt_id]) ** 2)
-            area = max(bbox_a[2] * bbox_a[3], bbox_b[2] * bbox_b[3])
-            similarity = np.exp(-distance / (2 * (area + np.spacing(1)) * vars_[kpt_id]))
-            if similarity > threshold:
-                num_similar_kpt += 1
-    return num_similar_kpt
+    return int(get_similarity_matrix([a], [b], threshold)[0, 0])
+
+
+def get_similarity_matrix(poses_a, poses_b, threshold=0.5):
+    """
+    Calculates the Keypoint Similarity of get_similarity between all the pairs of poses at once.
+
+    :param poses_a: first list of poses
+    :param poses_b: second list of poses
+    :param threshold: the similarity threshold to consider the keypoints similar
+    :return: len(poses_a) x len(poses_b) number of similar keypoints of every pair
+    :rtype: numpy.ndarray
+    """
+    if len(poses_a) == 0 or len(poses_b) == 0:
+        return np.zeros((len(poses_a), len(poses_b)), dtype=np.int64)
+    keypoints_a, found_a, area_a = _keypoints_and_area(poses_a)
+    keypoints_b, found_b, area_b = _keypoints_and_area(poses_b)
+    distance = ((keypoints_a[:, None] - keypoints_b[None]) ** 2).sum(-1)
+    area = np.maximum(area_a[:, None], area_b[None])[..., None]
+    similarity = np.exp(-distance / (2 * (area + np.spacing(1)) * vars_))
+    return np.count_nonzero((similarity > threshold) & found_a[:, None] & found_b[None], axis=-1)
+
+
+def _keypoints_and_area(poses):
+    """
+    Stacks the keypoints of the poses and computes the area of their get_bbox bounding boxes.
+
+    :param poses: list of poses
+    :return: the N x num_kpts x 2 keypoints, the N x num_kpts mask of the found keypoints and the N areas
+    :rtype: tuple of numpy.ndarray
+    """
+    keypoints = np.stack([np.asarray(pose.data, dtype=np.int64) for pose in poses])
+    found = keypoints[:, :, 0] != -1
+    # cv2.boundingRect of integer points includes both extreme points, it is empty if no keypoint was found
+    low = np.where(found[..., None], keypoints, np.iinfo(np.int64).max).min(1)
+    high = np.where(found[..., None], keypoints, np.iinfo(np.int64).min).max(1)
+    area = np.where(found.any(1), (high - low + 1).prod(1), 0)
+    return keypoints, found, area
 
 
 def track_poses(previous_poses, current_poses, threshold=3, smooth=False):
@@ -123,31 +150,25 @@ def track_poses(previous_poses, current_poses, threshold=3, smooth=False):
     :param smooth: smooth pose keypoints between frames
     """
     current_poses = sorted(current_poses, key=lambda pose: pose.confidence, reverse=True)  # match confident poses first
-    mask = np.ones(len(previous_poses), dtype=np.int32)
-    for current_pose in current_poses:
+    similarities = get_similarity_matrix(current_poses, previous_poses)
+    mask = np.ones(len(previous_poses), dtype=bool)
+    for current_pose, pose_similarities in zip(current_poses, similarities):
         best_matched_id = None
         best_matched_pose_id = None
-        best_matched_iou = 0
-        for id_, previous_pose in enumerate(previous_poses):
-            if not mask[id_]:
-                continue
-            iou = get_similarity(current_pose, previous_pose)
-            if iou > best_matched_iou:
-                best_matched_iou = iou
-                best_matched_pose_id = previous_pose.id
-                best_matched_id = id_
-        if best_matched_iou >= threshold:
-            mask[best_matched_id] = 0
-        else:  # pose not similar to any previous
-            best_matched_pose_id = None
+        if mask.any():
+            # The first of the most similar unmatched previous poses
+            best_matched_id = int(np.argmax(np.where(mask, pose_similarities, -1)))
+            if pose_similarities[best_matched_id] >= max(threshold, 1):
+                mask[best_matched_id] = False
+                best_matched_pose_id = previous_poses[best_matched_id].id
         update_id(current_pose, best_matched_pose_id)
 
         if smooth:
-            for kpt_id in range(Pose.num_kpts):
-                if current_pose.data[kpt_id, 0] == -1:
-                    continue
+            data = np.asarray(current_pose.data)
+            found = np.broadcast_to((data[:, 0] != -1)[:, None], data.shape)
+            if best_matched_pose_id is not None:
                 # reuse filter if previous pose has valid filter
-                if best_matched_pose_id is not None and previous_poses[best_matched_id].data[kpt_id, 0] != -1:
-                    current_pose.filters[kpt_id] = previous_poses[best_matched_id].filters[kpt_id]
-                current_pose.data[kpt_id, 0] = current_pose.filters[kpt_id][0](current_pose.data[kpt_id, 0])
-                current_pose.data[kpt_id, 1] = current_pose.filters[kpt_id][1](current_pose.data[kpt_id, 1])
+                previous_data = np.asarray(previous_poses[best_matched_id].data)
+                current_pose.filter.copy_from(previous_poses[best_matched_id].filter,
+                                              found & (previous_data[:, :1] != -1))
+            data[found] = current_pose.filter(data, found)[found]
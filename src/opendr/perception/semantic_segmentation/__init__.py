@@ -1,6 +1,10 @@
-from opendr.perception.semantic_segmentation.bisenet.bisenet_learner import BisenetLearner
-from opendr.perception.semantic_segmentation.bisenet.CamVid import CamVidDataset
+from opendr.engine.helper.lazy import lazy_exports
 
-from opendr.perception.semantic_segmentation.yolov8_seg.yolov8_seg_learner import YOLOv8SegLearner
+# Learners and datasets are only imported when they are first accessed
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'BisenetLearner': '.bisenet.bisenet_learner',
+    'CamVidDataset': '.bisenet.CamVid',
+    'YOLOv8SegLearner': '.yolov8_seg.yolov8_seg_learner',
+})
 
 __all__ = ['BisenetLearner', 'CamVidDataset', 'YOLOv8SegLearner']
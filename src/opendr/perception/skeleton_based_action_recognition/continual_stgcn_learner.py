@@ -27,6 +27,7 @@ from pathlib import Path
 from opendr.engine.target import Category
 from opendr.engine.learners import Learner
 from opendr.engine.helper.io import bump_version
+from opendr.engine.streams import ContinualStreams
 from opendr.engine.datasets import Dataset
 from opendr.engine.constants import OPENDR_SERVER_URL
 from opendr.engine.datasets import ExternalDataset, DatasetIterator
@@ -35,7 +36,7 @@ from opendr.perception.skeleton_based_action_recognition.algorithm.datasets.kine
 from urllib.request import urlretrieve
 
 from logging import getLogger
-from typing import Any, Union, Dict, List
+from typing import Any, Union, Dict, List, Hashable
 
 from opendr.perception.skeleton_based_action_recognition.spatio_temporal_gcn_learner import (
     SpatioTemporalGCNLearner,
@@ -91,6 +92,8 @@ class CoSTGCNLearner(Learner):
         in_channels=3,
         graph_type="ntu",
         sequence_len: int = 300,
+        max_stream_idle_time: float = 60.0,
+        max_streams: int = None,
         *args,
         **kwargs,
     ):
@@ -117,6 +120,10 @@ class CoSTGCNLearner(Learner):
             seed (int, optional): Random seed. Defaults to 123.
             num_classes (int, optional): Number of classes to predict among. Defaults to 400.
             sequence_len (int, optional): Size of the final global average pooling. Defaults to 300.
+            max_stream_idle_time (float, optional): Time (in seconds) after which a stream of `infer_streams`
+                without frames is dropped. Defaults to 60.0.
+            max_streams (int, optional): Maximum number of streams of `infer_streams`. When a new stream exceeds it,
+                the least recently used stream is dropped. Defaults to None.
         """
         super(CoSTGCNLearner, self).__init__(
             lr=lr,
@@ -148,6 +155,9 @@ class CoSTGCNLearner(Learner):
         self.in_channels = in_channels
         self.graph_type = graph_type
         self.sequence_len = sequence_len
+        self.max_stream_idle_time = max_stream_idle_time
+        self.max_streams = max_streams
+        self.streams = ContinualStreams(max_idle_time=max_stream_idle_time, max_streams=max_streams, warm_up=True)
 
         if self.graph_type is None:
             raise ValueError(
@@ -319,19 +329,51 @@ class CoSTGCNLearner(Learner):
                 )
                 results = self.model.forward_steps(batch)
 
-        categories = []
-        for r in results:
-            class_ind = int(r.argmax(dim=0))
-            class_description = self.classes_dict[class_ind]
-            categories.append(
-                Category(
-                    prediction=class_ind,
-                    confidence=F.softmax(r, dim=-1),
-                    description=class_description,
-                )
-            )
+        return [self._category(r) for r in results]
+
+    def infer_streams(self, batches: Dict[Hashable, torch.Tensor]) -> Dict[Hashable, Category]:
+        """Run inference on the latest skeletons of several independent streams, e.g. cameras.
+        Every stream keeps its own continual state, and the skeletons of all streams are stepped through the model
+        together, so that a single learner can follow many streams. Streams that are at the same position of the
+        ring buffers of the model, e.g. that started together, share a single forward step.
+        As in `infer`, the model is warmed up with the first skeletons of a new stream.
+        This uses the PyTorch model, also after `optimize`.
+
+        Args:
+            batches (Dict[Hashable, torch.Tensor]): The skeletons of a single time-step of every stream,
+                keyed by the stream id. The skeletons should have shape (C, V, S).
+
+        Returns:
+            Dict[Hashable, target.Category]: The output category of every stream, or None if the model has no
+                output for the step.
+        """
+        if not isinstance(batches, dict):
+            raise ValueError("batches should be a dict of skeletons keyed by the stream id")
+
+        inputs = {
+            stream_id: batch.to(device=self.device, dtype=torch.float).unsqueeze(0)  # (C, V, S) -> (1, C, V, S)
+            for stream_id, batch in batches.items()
+        }
+        self.model.eval()
+        results = self.streams.step(self.model, inputs)
+        return {stream_id: None if r is None else self._category(r[0]) for stream_id, r in results.items()}
+
+    def remove_stream(self, stream_id):
+        """Drop the continual state of a stream of `infer_streams`. Its next skeletons start a new state.
 
-        return categories
+        Args:
+            stream_id (Hashable): Id of the stream.
+        """
+        self.streams.remove(stream_id)
+
+    def _category(self, r: torch.Tensor) -> Category:
+        class_ind = int(r.argmax(dim=0))
+        class_description = self.classes_dict[class_ind]
+        return Category(
+            prediction=class_ind,
+            confidence=F.softmax(r, dim=-1),
+            description=class_description,
+        )
 
     def _load_model_weights(self, weights_path: Union[str, Path]):
         """Load pretrained model weights
@@ -505,6 +547,8 @@ class CoSTGCNLearner(Learner):
             in_channels=inference_params["in_channels"],
             graph_type=inference_params["graph_type"],
             sequence_len=inference_params["sequence_len"],
+            max_stream_idle_time=self.max_stream_idle_time,
+            max_streams=self.max_streams,
         )
 
         weights_path = path.parent / meta_data["model_paths"]
@@ -513,7 +557,8 @@ class CoSTGCNLearner(Learner):
         return self
 
     def reset(self):
-        pass
+        """Drop the continual states of all streams of `infer_streams`."""
+        self.streams.reset()
 
     def fit(
         self,
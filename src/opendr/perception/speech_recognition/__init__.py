@@ -1,5 +1,10 @@
-from opendr.perception.speech_recognition.quadraticselfonn.quadraticselfonn_learner import QuadraticSelfOnnLearner
-from opendr.perception.speech_recognition.matchboxnet.matchboxnet_learner import MatchboxNetLearner
-from opendr.perception.speech_recognition.edgespeechnets.edgespeechnets_learner import EdgeSpeechNetsLearner
+from opendr.engine.helper.lazy import lazy_exports
+
+# Learners and datasets are only imported when they are first accessed
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'QuadraticSelfOnnLearner': '.quadraticselfonn.quadraticselfonn_learner',
+    'MatchboxNetLearner': '.matchboxnet.matchboxnet_learner',
+    'EdgeSpeechNetsLearner': '.edgespeechnets.edgespeechnets_learner',
+})
 
 __all__ = ['QuadraticSelfOnnLearner', 'MatchboxNetLearner', 'EdgeSpeechNetsLearner']
@@ -1,4 +1,9 @@
-from opendr.perception.speech_transcription.whisper.whisper_learner import WhisperLearner
-from opendr.perception.speech_transcription.vosk.vosk_learner import VoskLearner
+from opendr.engine.helper.lazy import lazy_exports
+
+# Learners and datasets are only imported when they are first accessed
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'WhisperLearner': '.whisper.whisper_learner',
+    'VoskLearner': '.vosk.vosk_learner',
+})
 
 __all__ = ['WhisperLearner', 'VoskLearner']
@@ -0,0 +1,21 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from opendr.utils.benchmark.registry import BenchmarkSpec, register_learner, registered_learners
+from opendr.utils.benchmark.synthetic import synthetic_input
+from opendr.utils.benchmark.runner import benchmark_learner, run_benchmarks, compare_results, \
+    benchmark_imports
+
+__all__ = ['BenchmarkSpec', 'register_learner', 'registered_learners', 'synthetic_input', 'benchmark_learner',
+           'run_benchmarks', 'compare_results', 'benchmark_imports']
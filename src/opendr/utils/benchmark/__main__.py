@@ -0,0 +1,68 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+
+from opendr.utils.benchmark.registry import registered_learners
+from opendr.utils.benchmark.runner import run_benchmarks, save_results, load_results, compare_results, \
+    benchmark_imports, DEFAULT_IMPORT_TARGETS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OpenDR learners on synthetic inputs")
+    parser.add_argument("--learners", help="Comma-separated benchmark names, defaults to all", type=str, default=None)
+    parser.add_argument("--list", help="List the registered benchmarks", action="store_true")
+    parser.add_argument("--batch-sizes", help="Comma-separated batch sizes", type=str, default="1")
+    parser.add_argument("--warmup", help="Number of warmup calls per batch size", type=int, default=5)
+    parser.add_argument("--runs", help="Number of measured calls per batch size", type=int, default=50)
+    parser.add_argument("--seed", help="Seed of the synthetic inputs", type=int, default=0)
+    parser.add_argument("--output", help="Path of the JSON results file", type=str, default=None)
+    parser.add_argument("--compare", help="Path of baseline JSON results to compare with", type=str, default=None)
+    parser.add_argument("--imports", help="Measure import times instead of inference, optionally of the given "
+                        "comma-separated targets (module or module:name)", nargs="?", const="", default=None)
+    parser.add_argument("--no-isolate", help="Run all benchmarks in this process", action="store_true")
+    parser.add_argument("--quiet", help="Do not print the results", action="store_true")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(registered_learners()))
+        return
+
+    if args.imports is not None:
+        targets = args.imports.split(",") if args.imports else DEFAULT_IMPORT_TARGETS
+        results = {"results": {}, "imports": benchmark_imports(targets)}
+        if not args.quiet:
+            for target, result in results["imports"].items():
+                if "error" in result:
+                    print(target + ": failed\n" + result["error"].strip().splitlines()[-1])
+                else:
+                    print("{}: {:.3f} s, peak RSS {:.0f} MB, {} modules".format(
+                        target, result["import_time_median"], result["peak_rss"] / 2 ** 20, result["modules"]))
+    else:
+        names = args.learners.split(",") if args.learners else None
+        batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+        results = run_benchmarks(names, batch_sizes=batch_sizes, warmup=args.warmup, runs=args.runs, seed=args.seed,
+                                 isolate=not args.no_isolate, verbose=not args.quiet)
+    if args.output is not None:
+        save_results(results, args.output)
+
+    if args.compare is not None:
+        print("==== Comparison with " + args.compare + " (current / baseline) ====")
+        for name, batch_size, metric, base, current, ratio in compare_results(load_results(args.compare), results):
+            batch = "" if batch_size is None else " batch " + str(batch_size)
+            print("{}{} {}: {:.4g} -> {:.4g} ({:.2f}x)".format(name, batch, metric, base, current, ratio))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pathlib import Path
+
+import numpy as np
+
+
+class BenchmarkSpec:
+    """
+    Describes how to construct a learner and feed it with synthetic inputs for benchmarking.
+    """
+
+    def __init__(self, name, module, learner, data_type, learner_kwargs=None, input_kwargs=None, setup=None,
+                 collate="list", description=""):
+        """
+        :param name: unique name of the benchmark
+        :type name: str
+        :param module: module from which the learner class is imported, its import time is measured
+        :type module: str
+        :param learner: name of the learner class
+        :type learner: str
+        :param data_type: type of synthetic input, see synthetic.SYNTHETIC_INPUTS
+        :type data_type: str
+        :param learner_kwargs: constructor arguments, or a callable returning them
+        :type learner_kwargs: dict or callable, optional
+        :param input_kwargs: shape arguments of the synthetic input generator
+        :type input_kwargs: dict, optional
+        :param setup: callable applied to the constructed learner, e.g., to initialize the model
+        :type setup: callable, optional
+        :param collate: how a batch of samples is passed to infer(): 'list' passes the list of samples, 'single'
+            calls infer() once per sample, 'concatenate' concatenates the samples along their first axis, and a
+            callable receives the list of samples and returns the argument of infer()
+        :type collate: str or callable
+        :param description: short description of the benchmark
+        :type description: str
+        """
+        if not callable(collate) and collate not in ("list", "single", "concatenate"):
+            raise ValueError("collate should be 'list', 'single', 'concatenate' or a callable")
+        self.name = name
+        self.module = module
+        self.learner = learner
+        self.data_type = data_type
+        self.learner_kwargs = learner_kwargs or {}
+        self.input_kwargs = input_kwargs or {}
+        self.setup = setup
+        self.collate = collate
+        self.description = description
+
+    def __repr__(self):
+        return "BenchmarkSpec(" + self.name + ": " + self.module + "." + self.learner + ")"
+
+
+_registry = {}
+
+
+def register_learner(spec):
+    """
+    Adds a benchmark to the registry.
+
+    :param spec: the benchmark specification
+    :type spec: BenchmarkSpec
+    """
+    if spec.name in _registry:
+        raise ValueError("A benchmark named " + spec.name + " is already registered.")
+    _registry[spec.name] = spec
+    return spec
+
+
+def get_spec(name):
+    if name not in _registry:
+        raise KeyError("Unknown benchmark " + name + ", available benchmarks: " + ", ".join(sorted(_registry)))
+    return _registry[name]
+
+
+def registered_learners():
+    """
+    Returns the names of all registered benchmarks.
+    """
+    return sorted(_registry.keys())
+
+
+def _init_model(learner):
+    if learner.model is None:
+        learner.init_model()
+
+
+def _eval_mode(learner):
+    learner.model.eval()
+
+
+def _init_model_eval(learner):
+    _init_model(learner)
+    _eval_mode(learner)
+
+
+def _skeleton_steps(samples):
+    # Continual skeleton models consume a single time step of shape (B, C, V, S)
+    import torch
+    return torch.from_numpy(np.concatenate([sample.data[:, :, 0] for sample in samples]))
+
+
+def _voxel_kwargs(model="pointpillars"):
+    config = Path(__file__).parents[2] / "perception" / "object_detection_3d" / "voxel_object_detection_3d" / \
+        "second_detector" / "configs" / model / "car" / "xyres_16.proto"
+    return {"model_config_path": str(config), "device": "cpu"}
+
+
+def _tanet_kwargs():
+    return _voxel_kwargs("tanet")
+
+
+register_learner(BenchmarkSpec(
+    "x3d_xs", "opendr.perception.activity_recognition", "X3DLearner", "video",
+    learner_kwargs={"backbone": "xs", "device": "cpu"}, input_kwargs={"frames": 4, "height": 160, "width": 160},
+    setup=_eval_mode, description="X3D-XS video classification"))
+register_learner(BenchmarkSpec(
+    "cox3d_xs", "opendr.perception.activity_recognition", "CoX3DLearner", "image",
+    learner_kwargs={"backbone": "xs", "device": "cpu"}, input_kwargs={"height": 160, "width": 160},
+    setup=_eval_mode, description="Continual X3D-XS, one frame per step"))
+register_learner(BenchmarkSpec(
+    "cotransenc", "opendr.perception.activity_recognition", "CoTransEncLearner", "timeseries",
+    learner_kwargs={"device": "cpu"}, input_kwargs={"length": 64, "dims": 1024},
+    setup=_eval_mode, collate="single", description="Continual transformer encoder on a full sequence"))
+register_learner(BenchmarkSpec(
+    "costgcn", "opendr.perception.skeleton_based_action_recognition", "CoSTGCNLearner", "skeleton_sequence",
+    learner_kwargs={"device": "cpu"}, input_kwargs={"frames": 1},
+    setup=_eval_mode, collate=_skeleton_steps, description="Continual ST-GCN, one skeleton per step"))
+register_learner(BenchmarkSpec(
+    "stgcn", "opendr.perception.skeleton_based_action_recognition", "SpatioTemporalGCNLearner",
+    "skeleton_sequence",
+    learner_kwargs={"device": "cpu", "dataset_name": "nturgbd_cv", "method_name": "stgcn", "in_channels": 3,
+                    "num_point": 25, "graph_type": "ntu", "num_class": 60},
+    setup=_init_model_eval, collate="concatenate", description="ST-GCN on 300-frame skeleton sequences"))
+register_learner(BenchmarkSpec(
+    "lightweight_open_pose", "opendr.perception.pose_estimation", "LightweightOpenPoseLearner", "image",
+    learner_kwargs={"device": "cpu"}, setup=_init_model, collate="single",
+    description="Lightweight OpenPose (MobileNet) on 640x480 frames"))
+register_learner(BenchmarkSpec(
+    "deep_sort", "opendr.perception.object_tracking_2d", "ObjectTracking2DDeepSortLearner", "image_with_detections",
+    learner_kwargs={"device": "cpu"}, description="DeepSORT tracking of 20 detections per 640x480 frame"))
+register_learner(BenchmarkSpec(
+    "voxel_pointpillars", "opendr.perception.object_detection_3d", "VoxelObjectDetection3DLearner", "point_cloud",
+    learner_kwargs=_voxel_kwargs, collate="single", description="PointPillars 3D object detection"))
+register_learner(BenchmarkSpec(
+    "voxel_tanet", "opendr.perception.object_detection_3d", "VoxelObjectDetection3DLearner", "point_cloud",
+    learner_kwargs=_tanet_kwargs, collate="single", description="TANet 3D object detection"))
@@ -0,0 +1,296 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+
+import numpy as np
+
+from opendr.engine.profiling import peak_host_memory
+from opendr.utils.benchmark.registry import get_spec, registered_learners
+from opendr.utils.benchmark.synthetic import synthetic_input
+
+
+def _environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    environment = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+    }
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        environment["torch"] = torch.__version__
+        environment["torch_threads"] = torch.get_num_threads()
+    return environment
+
+
+def _collate(spec, samples):
+    if spec.collate == "list":
+        return [samples]
+    if spec.collate == "single":
+        return samples
+    if spec.collate == "concatenate":
+        return [type(samples[0])(np.concatenate([sample.data for sample in samples]))]
+    return [spec.collate(samples)]
+
+
+def _summary(latencies, batch_size):
+    latencies = np.asarray(latencies)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "batch_size": batch_size,
+        "runs": len(latencies),
+        "latency_mean": float(latencies.mean()),
+        "latency_p50": float(p50),
+        "latency_p95": float(p95),
+        "latency_p99": float(p99),
+        "throughput": float(batch_size * len(latencies) / latencies.sum()),
+    }
+
+
+def benchmark_learner(name, batch_sizes=(1,), warmup=5, runs=50, seed=0):
+    """
+    Benchmarks a registered learner on synthetic inputs.
+
+    Import time is only meaningful when the learner module has not been imported before in the process, which is why
+    run_benchmarks() runs every benchmark in a separate process by default.
+
+    :param name: name of the registered benchmark
+    :type name: str
+    :param batch_sizes: batch sizes to measure
+    :type batch_sizes: iterable of int
+    :param warmup: number of calls per batch size that are excluded from the statistics
+    :type warmup: int
+    :param runs: number of measured calls per batch size
+    :type runs: int
+    :param seed: seed of the synthetic input generator
+    :type seed: int
+    :return: import and load time (in seconds), per batch size latency percentiles (in seconds) and throughput
+        (in samples per second), and peak RSS (in bytes)
+    :rtype: dict
+    """
+    spec = get_spec(name)
+    result = {"learner": spec.module + "." + spec.learner, "data_type": spec.data_type}
+
+    start = time.perf_counter()
+    module = importlib.import_module(spec.module)
+    result["import_time"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    learner_kwargs = spec.learner_kwargs() if callable(spec.learner_kwargs) else spec.learner_kwargs
+    learner = getattr(module, spec.learner)(**learner_kwargs)
+    if spec.setup is not None:
+        spec.setup(learner)
+    result["load_time"] = time.perf_counter() - start
+
+    context = None
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        context = torch.no_grad
+
+    result["batches"] = {}
+    for batch_size in batch_sizes:
+        samples = [synthetic_input(spec.data_type, seed=seed + i, **spec.input_kwargs) for i in range(batch_size)]
+        arguments = _collate(spec, samples)
+        latencies = []
+        for i in range(warmup + runs):
+            if context is not None:
+                with context():
+                    start = time.perf_counter()
+                    for argument in arguments:
+                        learner.infer(argument)
+                    latency = time.perf_counter() - start
+            else:
+                start = time.perf_counter()
+                for argument in arguments:
+                    learner.infer(argument)
+                latency = time.perf_counter() - start
+            if i >= warmup:
+                latencies.append(latency)
+        result["batches"][str(batch_size)] = _summary(latencies, batch_size)
+    result["peak_rss"] = peak_host_memory()
+    return result
+
+
+def run_benchmarks(names=None, batch_sizes=(1,), warmup=5, runs=50, seed=0, isolate=True, verbose=True):
+    """
+    Runs several benchmarks, each one in a fresh process if isolate is True, so that import time and peak RSS are
+    not affected by the other benchmarks. Failures are recorded in the results instead of being raised.
+
+    :param names: names of the benchmarks to run, defaults to all registered benchmarks
+    :type names: list of str, optional
+    :return: the environment description and the results of every benchmark
+    :rtype: dict
+    """
+    names = registered_learners() if names is None else names
+    results = {}
+    for name in names:
+        if verbose:
+            print("==== Benchmarking " + name + " ====")
+        if isolate:
+            results[name] = _run_isolated(name, batch_sizes, warmup, runs, seed)
+        else:
+            try:
+                results[name] = benchmark_learner(name, batch_sizes, warmup, runs, seed)
+            except Exception:
+                results[name] = {"error": traceback.format_exc()}
+        if verbose:
+            print(format_result(name, results[name]))
+    return {"environment": _environment(), "results": results}
+
+
+def _run_isolated(name, batch_sizes, warmup, runs, seed):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output = os.path.join(temp_dir, "result.json")
+        command = [sys.executable, "-m", "opendr.utils.benchmark", "--learners", name, "--no-isolate", "--quiet",
+                   "--batch-sizes", ",".join(str(b) for b in batch_sizes), "--warmup", str(warmup),
+                   "--runs", str(runs), "--seed", str(seed), "--output", output]
+        process = subprocess.run(command, capture_output=True, text=True)
+        if process.returncode != 0 or not os.path.exists(output):
+            return {"error": process.stderr[-4000:]}
+        with open(output) as f:
+            return json.load(f)["results"][name]
+
+
+# Import targets measured by benchmark_imports() by default, either a module or "module:name"
+DEFAULT_IMPORT_TARGETS = (
+    "opendr.perception.activity_recognition",
+    "opendr.perception.object_detection_2d",
+    "opendr.perception.object_detection_2d:NanodetLearner",
+    "opendr.perception.object_detection_3d",
+    "opendr.perception.object_tracking_2d",
+    "opendr.perception.pose_estimation",
+    "opendr.perception.pose_estimation:LightweightOpenPoseLearner",
+    "opendr.perception.skeleton_based_action_recognition",
+)
+
+_IMPORT_SCRIPT = """
+import json, sys, time
+target = sys.argv[1]
+module, _, name = target.partition(":")
+start = time.perf_counter()
+imported = __import__(module, fromlist=["_"])
+if name:
+    getattr(imported, name)
+duration = time.perf_counter() - start
+from opendr.engine.profiling import peak_host_memory
+print(json.dumps({"time": duration, "peak_rss": peak_host_memory(), "modules": len(sys.modules)}))
+"""
+
+
+def benchmark_imports(targets=DEFAULT_IMPORT_TARGETS, repeats=3):
+    """
+    Measures the time needed to import modules (or names from modules) in fresh processes, together with the peak
+    RSS and the number of loaded modules after the import.
+
+    :param targets: modules to import, given either as "module" or as "module:name"
+    :type targets: iterable of str
+    :param repeats: number of processes started per target, the minimum and median time are reported
+    :type repeats: int
+    :return: the results of every target
+    :rtype: dict
+    """
+    results = {}
+    for target in targets:
+        runs = []
+        for _ in range(repeats):
+            process = subprocess.run([sys.executable, "-c", _IMPORT_SCRIPT, target], capture_output=True, text=True)
+            if process.returncode != 0:
+                runs = None
+                results[target] = {"error": process.stderr[-4000:]}
+                break
+            runs.append(json.loads(process.stdout.strip().splitlines()[-1]))
+        if runs is not None:
+            times = [run["time"] for run in runs]
+            results[target] = {
+                "import_time_min": float(np.min(times)),
+                "import_time_median": float(np.median(times)),
+                "peak_rss": max(run["peak_rss"] or 0 for run in runs),
+                "modules": runs[-1]["modules"],
+            }
+    return results
+
+
+def format_result(name, result):
+    if "error" in result:
+        return name + ": failed\n" + result["error"].strip().splitlines()[-1]
+    lines = [name + ": import {:.2f} s, load {:.2f} s, peak RSS {:.0f} MB".format(
+        result["import_time"], result["load_time"], (result["peak_rss"] or 0) / 2 ** 20)]
+    for batch in result["batches"].values():
+        lines.append("  batch {:>3}: p50 {:8.2f} ms | p95 {:8.2f} ms | p99 {:8.2f} ms | {:8.1f} samples/s".format(
+            batch["batch_size"], 1000 * batch["latency_p50"], 1000 * batch["latency_p95"],
+            1000 * batch["latency_p99"], batch["throughput"]))
+    return "\n".join(lines)
+
+
+def save_results(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(baseline, current, metrics=("latency_p50", "latency_p95", "throughput")):
+    """
+    Compares two sets of results, e.g., produced on two commits.
+
+    :return: one row (benchmark, batch size, metric, baseline value, current value, current / baseline) for every
+        metric found in both results, import benchmarks are reported with their target as name
+    :rtype: list of tuple
+    """
+    rows = []
+    for name, result in sorted(current.get("results", {}).items()):
+        base = baseline.get("results", {}).get(name)
+        if base is None or "error" in base or "error" in result:
+            continue
+        for metric in ("import_time", "load_time", "peak_rss"):
+            if base.get(metric) and result.get(metric) is not None:
+                rows.append((name, None, metric, base[metric], result[metric], result[metric] / base[metric]))
+        for batch_size, batch in result["batches"].items():
+            base_batch = base["batches"].get(batch_size)
+            if base_batch is None:
+                continue
+            for metric in metrics:
+                if base_batch[metric]:
+                    rows.append((name, int(batch_size), metric, base_batch[metric], batch[metric],
+                                 batch[metric] / base_batch[metric]))
+    base_imports = baseline.get("imports", {})
+    for target, result in sorted(current.get("imports", {}).items()):
+        base = base_imports.get(target)
+        if base is None or "error" in base or "error" in result:
+            continue
+        for metric in ("import_time_median", "peak_rss", "modules"):
+            if base[metric]:
+                rows.append((target, None, metric, base[metric], result[metric], result[metric] / base[metric]))
+    return rows
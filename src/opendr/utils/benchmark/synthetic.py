@@ -0,0 +1,102 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from opendr.engine.data import Image, ImageWithDetections, PointCloud, Timeseries, SkeletonSequence, Video
+from opendr.engine.target import BoundingBox, BoundingBoxList
+
+
+def synthetic_image(height=480, width=640, seed=0):
+    """
+    Returns a random color Image, supplied in the OpenCV (HWC/BGR) layout as camera frames are.
+    """
+    rng = np.random.default_rng(seed)
+    return Image(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+
+def synthetic_image_with_detections(height=480, width=640, num_detections=20, seed=0):
+    """
+    Returns a random color ImageWithDetections, holding random person detections with a confidence in [0.5, 1].
+    """
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    sizes = rng.uniform(0.05, 0.3, (num_detections, 2)) * (width, height)
+    corners = rng.uniform(0, 1, (num_detections, 2)) * ((width, height) - sizes)
+    scores = rng.uniform(0.5, 1.0, num_detections)
+    boxes = BoundingBoxList([BoundingBox(0, left, top, box_width, box_height, score) for (left, top), (
+        box_width, box_height), score in zip(corners, sizes, scores)])
+    return ImageWithDetections(image, boxes)
+
+
+def synthetic_point_cloud(num_points=20000, channels=4, seed=0):
+    """
+    Returns a random PointCloud with points spread over a LiDAR-like field of view and reflectance in [0, 1].
+    """
+    rng = np.random.default_rng(seed)
+    low = np.array([0.0, -40.0, -3.0] + [0.0] * (channels - 3), dtype=np.float32)
+    high = np.array([70.0, 40.0, 1.0] + [1.0] * (channels - 3), dtype=np.float32)
+    return PointCloud(rng.uniform(low, high, (num_points, channels)).astype(np.float32))
+
+
+def synthetic_timeseries(length=64, dims=1024, seed=0):
+    """
+    Returns a random Timeseries of shape (length, dims).
+    """
+    rng = np.random.default_rng(seed)
+    return Timeseries(rng.standard_normal((length, dims), dtype=np.float32))
+
+
+def synthetic_skeleton_sequence(channels=3, frames=300, joints=25, persons=2, seed=0):
+    """
+    Returns a random SkeletonSequence of shape (1, channels, frames, joints, persons).
+    """
+    rng = np.random.default_rng(seed)
+    return SkeletonSequence(rng.standard_normal((1, channels, frames, joints, persons), dtype=np.float32))
+
+
+def synthetic_video(channels=3, frames=4, height=160, width=160, seed=0):
+    """
+    Returns a random Video of shape (channels, frames, height, width).
+    """
+    rng = np.random.default_rng(seed)
+    return Video(rng.standard_normal((channels, frames, height, width), dtype=np.float32))
+
+
+SYNTHETIC_INPUTS = {
+    "image": synthetic_image,
+    "image_with_detections": synthetic_image_with_detections,
+    "point_cloud": synthetic_point_cloud,
+    "timeseries": synthetic_timeseries,
+    "skeleton_sequence": synthetic_skeleton_sequence,
+    "video": synthetic_video,
+}
+
+
+def synthetic_input(data_type, seed=0, **kwargs):
+    """
+    Returns a random sample of the given data type.
+
+    :param data_type: one of 'image', 'image_with_detections', 'point_cloud', 'timeseries', 'skeleton_sequence'
+        and 'video'
+    :type data_type: str
+    :param seed: seed of the random generator
+    :type seed: int
+    :param kwargs: shape arguments of the corresponding generator
+    :return: the generated sample
+    :rtype: engine.data.Data
+    """
+    if data_type not in SYNTHETIC_INPUTS:
+        raise ValueError("data_type should be one of " + str(list(SYNTHETIC_INPUTS.keys())))
+    return SYNTHETIC_INPUTS[data_type](seed=seed, **kwargs)
@@ -0,0 +1,132 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import threading
+import time
+import unittest
+
+from opendr.engine.batching import BatchingLearner
+from opendr.engine.learners import Learner
+
+
+class DummyLearner(Learner):
+    def __init__(self):
+        super(DummyLearner, self).__init__(device="cpu")
+        self.batch_sizes = []
+
+    def infer(self, batch):
+        if batch < 0:
+            raise ValueError("negative sample")
+        return batch * 2
+
+    def infer_batch(self, samples):
+        self.batch_sizes.append(len(samples))
+        time.sleep(0.01)
+        return [self.infer(sample) for sample in samples]
+
+    def fit(self, dataset, val_dataset=None, logging_path='', silent=True, verbose=True):
+        pass
+
+    def eval(self, dataset):
+        return {"dataset": dataset}
+
+    def save(self, path):
+        pass
+
+    def load(self, path):
+        pass
+
+    def optimize(self, target_device):
+        pass
+
+    def reset(self):
+        pass
+
+
+class TestBatchingLearner(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST engine.batching \n**********************************")
+
+    def test_results_are_routed_to_callers(self):
+        learner = DummyLearner()
+        results = {}
+
+        with BatchingLearner(learner, max_batch_size=4, max_wait=0.05) as server:
+            def produce(index):
+                results[index] = server.infer(index)
+
+            threads = [threading.Thread(target=produce, args=(i,)) for i in range(16)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(results, {i: 2 * i for i in range(16)})
+        self.assertEqual(sum(learner.batch_sizes), 16)
+        self.assertLessEqual(max(learner.batch_sizes), 4)
+        self.assertLess(len(learner.batch_sizes), 16)
+        self.assertEqual(server.infers_count, 16)
+
+    def test_errors_and_fallback(self):
+        learner = DummyLearner()
+        with BatchingLearner(learner, max_batch_size=2, max_wait=0.0) as server:
+            with self.assertRaises(ValueError):
+                server.infer(-1)
+        self.assertEqual(server.eval("data"), {"dataset": "data"})
+
+        # Without a batched path every sample is passed to infer()
+        learner.infer_batch = None
+        with BatchingLearner(learner, max_batch_size=4) as server:
+            futures = [server.submit(i) for i in range(5)]
+            self.assertEqual([future.result() for future in futures], [0, 2, 4, 6, 8])
+
+    def test_restart_and_fatal_errors(self):
+        learner = DummyLearner()
+        server = BatchingLearner(learner, max_batch_size=2, max_wait=0.0)
+        for i in range(3):
+            self.assertEqual(server.infer(i), 2 * i)
+            server.stop()
+
+        # Errors that are not Exceptions stop the worker, but no request is left pending
+        release = threading.Event()
+
+        def batch_infer(samples):
+            release.wait()
+            raise SystemExit()
+
+        server = BatchingLearner(learner, max_batch_size=1, batch_infer=batch_infer)
+        futures = [server.submit(i) for i in range(4)]
+        release.set()
+        for future in futures:
+            self.assertIsInstance(future.exception(timeout=1), SystemExit)
+
+        # The next request starts a new worker
+        server.batch_infer = learner.infer_batch
+        self.assertEqual(server.infer(3), 6)
+        server.stop()
+
+    def test_asyncio(self):
+        server = BatchingLearner(DummyLearner(), max_batch_size=8, max_wait=0.01)
+
+        async def run():
+            return await asyncio.gather(*[server.infer_async(i) for i in range(8)])
+
+        self.assertEqual(asyncio.run(run()), [2 * i for i in range(8)])
+        server.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
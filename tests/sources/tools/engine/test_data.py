@@ -0,0 +1,83 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import cv2
+import numpy as np
+
+from opendr.engine.data import Image, ImageWithDetections
+from opendr.engine.target import BoundingBoxList
+
+
+class TestData(unittest.TestCase):
+
+    def test_image_layouts(self):
+        print("\n\n**********************************\nTEST engine.data \n**********************************")
+        frame = np.random.randint(0, 255, (24, 32, 3), dtype=np.uint8)
+        rgb_chw = np.transpose(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), (2, 0, 1))
+
+        image = Image(frame, copy=False)
+        self.assertEqual(image.format, 'channels_last')
+        self.assertEqual(image.channel_order, 'bgr')
+
+        # A BGR frame requested in its own layout is returned without any copies
+        self.assertIs(image.opencv(copy=False), frame)
+        self.assertIsNot(image.opencv(), frame)
+        self.assertTrue(np.array_equal(image.opencv(), frame))
+        self.assertTrue(np.array_equal(image.numpy(), rgb_chw))
+        self.assertIs(image.opencv(copy=False), frame)
+        self.assertTrue(np.array_equal(image.data, rgb_chw))
+
+        # Conversions are cached
+        rgb_hwc = image.convert('channels_last', 'rgb', copy=False)
+        self.assertIs(image.convert('channels_last', 'rgb', copy=False), rgb_hwc)
+        self.assertTrue(np.array_equal(image.convert('channels_first', 'bgr'), np.transpose(frame, (2, 0, 1))))
+
+        # Images in OpenDR format are kept as they are
+        image = Image(rgb_chw)
+        self.assertEqual(image.format, 'channels_first')
+        self.assertIs(image.numpy(copy=False), image.data)
+        self.assertTrue(np.array_equal(image.opencv(), frame))
+
+        # Setting the data discards the cached conversions
+        image.data = np.zeros((3, 4, 4))
+        self.assertEqual(image.opencv().shape, (4, 4, 3))
+        self.assertEqual(image.opencv().sum(), 0)
+
+        # Writes through the data array are visible in every layout
+        image = Image(frame, copy=False)
+        image.opencv(copy=False)
+        image.data[0] = 0
+        self.assertEqual(image.opencv()[:, :, 2].sum(), 0)
+        self.assertEqual(image.format, 'channels_last')
+        self.assertTrue(np.array_equal(frame, rgb_chw.transpose(1, 2, 0)[:, :, ::-1]))
+
+        with self.assertRaises(ValueError):
+            image.convert('channels_middle')
+
+    def test_image_copy(self):
+        frame = np.random.randint(0, 255, (24, 32, 3), dtype=np.uint8)
+        image = Image(frame)
+        self.assertFalse(np.may_share_memory(image.opencv(copy=False), frame))
+        frame[:] = 0
+        self.assertNotEqual(image.opencv().sum(), 0)
+
+        # Images with detections are always stored as uint8
+        image = ImageWithDetections(frame.astype(np.float32), BoundingBoxList([]), dtype=np.float32)
+        self.assertEqual(image.data.dtype, np.uint8)
+        self.assertEqual(image.opencv().dtype, np.uint8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from opendr.engine.data import Image, PointCloud, PointCloudWithCalibration
+from opendr.engine.datasets import DatasetIterator
+from opendr.engine.dataset_cache import CachedDatasetIterator, DatasetCacheWriter, cache_dataset
+from opendr.engine.target import BoundingBox, BoundingBoxList, ColumnarBoundingBoxList, Category, Pose
+
+
+class MixedDatasetIterator(DatasetIterator):
+    def __init__(self, size=7):
+        super().__init__()
+        self.size = size
+        self.accessed = 0
+
+    def __getitem__(self, idx):
+        self.accessed += 1
+        rng = np.random.RandomState(idx)
+        kind = idx % 4
+        if kind == 0:
+            boxes = [BoundingBox(name=i, left=i, top=2 * i, width=10, height=20, score=0.5) for i in range(idx)]
+            return Image(rng.randint(0, 255, (16, 24, 3), dtype=np.uint8)), BoundingBoxList(boxes, image_id=idx)
+        if kind == 1:
+            return rng.randint(0, 255, (8, 8, 3), dtype=np.uint8), Category(idx)
+        if kind == 2:
+            return PointCloud(rng.rand(idx * 5, 4)), Pose(rng.rand(18, 2), 0.5)
+        return PointCloudWithCalibration(rng.rand(3, 4), calib={"P2": idx}), None
+
+    def __len__(self):
+        return self.size
+
+
+class ImageDatasetIterator(DatasetIterator):
+    def __getitem__(self, idx):
+        rng = np.random.RandomState(idx)
+        if idx == 0:
+            return Image(rng.randint(0, 255, (3, 16, 24), dtype=np.uint8), guess_format=False), None
+        return Image(rng.randint(0, 255, (16, 24, 3), dtype=np.uint8)), None
+
+    def __len__(self):
+        return 2
+
+
+class TestDatasetCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST Dataset cache\n"
+              "**********************************")
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def assertSampleEqual(self, expected, actual):
+        (data, target), (cached_data, cached_target) = expected, actual
+        self.assertIs(type(cached_data), type(data))
+        if isinstance(data, Image):
+            self.assertEqual((cached_data.format, cached_data.channel_order), (data.format, data.channel_order))
+            self.assertTrue(np.array_equal(cached_data.opencv(), data.opencv()))
+        elif isinstance(data, PointCloudWithCalibration):
+            self.assertEqual(cached_data.calib, data.calib)
+        else:
+            self.assertTrue(np.array_equal(np.asarray(cached_data.data if hasattr(cached_data, "data") else
+                                                      cached_data), np.asarray(getattr(data, "data", data))))
+        if isinstance(target, BoundingBoxList):
+            self.assertIsInstance(cached_target, ColumnarBoundingBoxList)
+            self.assertEqual(cached_target.image_id, target.image_id)
+            self.assertTrue(np.allclose(cached_target.mot(), target.mot().reshape(-1, 6)))
+        elif isinstance(target, Category):
+            self.assertEqual(cached_target.data, target.data)
+        elif isinstance(target, Pose):
+            self.assertTrue(np.array_equal(cached_target.data, target.data))
+        else:
+            self.assertIsNone(cached_target)
+
+    def test_round_trip(self):
+        dataset = MixedDatasetIterator(9)
+        cached = cache_dataset(dataset, self.path, shard_size=4)
+        self.assertEqual(len(cached), 9)
+        self.assertEqual(len(cached.manifest["shards"]), 3)
+        for idx in range(len(dataset)):
+            self.assertSampleEqual(dataset[idx], cached[idx])
+        self.assertSampleEqual(dataset[8], cached[-1])
+        with self.assertRaises(IndexError):
+            cached[9]
+
+        # An existing cache is reused
+        accessed = dataset.accessed
+        cache_dataset(dataset, self.path, shard_size=4)
+        self.assertEqual(dataset.accessed, accessed)
+
+    def test_read_only_views(self):
+        cache_dataset(MixedDatasetIterator(2), self.path)
+        image, _ = CachedDatasetIterator(self.path, copy=False)[0]
+        self.assertFalse(image.opencv(copy=False).flags.writeable)
+        image, _ = CachedDatasetIterator(self.path)[0]
+        self.assertTrue(image.opencv().flags.writeable)
+
+    def test_shared_memory(self):
+        cache_dataset(ImageDatasetIterator(), self.path)
+        cached = CachedDatasetIterator(self.path, copy=False)
+        for idx in range(len(cached)):
+            image, _ = cached[idx]
+            # The image keeps the view of the shard in the layout it was cached in
+            data = image.convert(image.format, image.channel_order, copy=False)
+            self.assertTrue(np.shares_memory(data, cached._maps[0]))
+        cached = CachedDatasetIterator(self.path)
+        for idx in range(len(cached)):
+            image, _ = cached[idx]
+            data = image.convert(image.format, image.channel_order, copy=False)
+            self.assertFalse(np.shares_memory(data, cached._maps[0]))
+
+    def test_integrity_checks(self):
+        cache_dataset(MixedDatasetIterator(4), self.path, shard_size=2)
+        shard = os.path.join(self.path, "shard-00001.bin")
+        with open(shard, "r+b") as f:
+            f.seek(70)
+            byte = f.read(1)
+            f.seek(70)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        cached = CachedDatasetIterator(self.path)
+        cached[0]
+        with self.assertRaises(ValueError):
+            cached[2]
+        CachedDatasetIterator(self.path, verify=False)[2]
+
+        with open(shard, "ab") as f:
+            f.write(b"\0")
+        with self.assertRaises(ValueError):
+            CachedDatasetIterator(self.path, verify=False)[2]
+
+    def test_incomplete_cache(self):
+        with self.assertRaises(RuntimeError):
+            with DatasetCacheWriter(self.path) as writer:
+                writer.append(MixedDatasetIterator()[0])
+                raise RuntimeError()
+        with self.assertRaises(ValueError):
+            CachedDatasetIterator(self.path)
+        with self.assertRaises(ValueError):
+            DatasetCacheWriter(self.path).append(Image(np.zeros((3, 4, 4))))
+
+
+if __name__ == "__main__":
+    unittest.main()
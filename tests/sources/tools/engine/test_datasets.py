@@ -0,0 +1,113 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import numpy as np
+from opendr.engine.data import Image
+from opendr.engine.datasets import DatasetIterator, ParallelMappedDatasetIterator, _map_in_worker, _init_worker, \
+    _load_shared, _release_shared
+from opendr.engine.target import Category
+
+
+class SyntheticDatasetIterator(DatasetIterator):
+    def __init__(self, size=20):
+        super().__init__()
+        self.size = size
+        self.accessed = []
+
+    def __getitem__(self, idx):
+        self.accessed.append(idx)
+        return Image(np.full((3, 64, 64), idx, dtype=np.uint8)), Category(idx % 3)
+
+    def __len__(self):
+        return self.size
+
+
+def add_noise(sample):
+    image, category = sample
+    return image.data.astype(np.float32) + np.random.rand(*image.data.shape), category
+
+
+class TestParallelMappedDatasetIterator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST ParallelMappedDatasetIterator\n"
+              "**********************************")
+
+    def test_ordered_iteration(self):
+        for backend in ("thread", "process"):
+            with ParallelMappedDatasetIterator(SyntheticDatasetIterator(), num_workers=2, backend=backend,
+                                               shm_threshold=1024) as dataset:
+                samples = list(dataset)
+                self.assertEqual(len(samples), 20)
+                for idx, (image, category) in enumerate(samples):
+                    self.assertTrue(np.all(image.data == idx))
+                    self.assertEqual(category.data, idx % 3)
+                # Transferred arrays are owned by the consumer
+                samples[0][0].data[0, 0, 0] = 255
+
+    def test_unordered_iteration(self):
+        dataset = ParallelMappedDatasetIterator(SyntheticDatasetIterator(), num_workers=3, ordered=False)
+        indices = [int(image.data[0, 0, 0]) for image, _ in dataset.iterate(range(5, 15))]
+        self.assertEqual(sorted(indices), list(range(5, 15)))
+        dataset.close()
+
+    def test_sequential_access_is_prefetched(self):
+        original = SyntheticDatasetIterator()
+        dataset = ParallelMappedDatasetIterator(original, num_workers=2, prefetch=4)
+        for idx in range(len(dataset)):
+            self.assertTrue(np.all(dataset[idx][0].data == idx))
+        self.assertTrue(np.all(dataset[-1][0].data == 19))
+        with self.assertRaises(IndexError):
+            dataset[20]
+        dataset.close()
+        self.assertEqual(sorted(set(original.accessed)), list(range(20)))
+
+    def test_deterministic_seeding(self):
+        reference = [sample[0] for sample in ParallelMappedDatasetIterator(
+            SyntheticDatasetIterator(8), add_noise, num_workers=0, seed=7)]
+        with ParallelMappedDatasetIterator(SyntheticDatasetIterator(8), add_noise, num_workers=2,
+                                           backend="process", ordered=False, seed=7) as dataset:
+            results = {int(data[0, 0, 0]): data for data, _ in dataset}
+        for idx, data in enumerate(reference):
+            self.assertTrue(np.array_equal(results[idx], data))
+
+    def test_shared_memory_transfer(self):
+        _init_worker(SyntheticDatasetIterator(), lambda sample: (sample[0].data, np.zeros(0)), None, 0)
+        payload, descriptors = _map_in_worker(5)
+        self.assertEqual([name is None for name, _ in descriptors], [False, True])
+        data, empty = _load_shared(payload, descriptors)
+        self.assertTrue(np.all(data == 5))
+        self.assertEqual(empty.size, 0)
+        data[0, 0, 0] = 255
+
+        # Releasing tolerates empty buffers, blocks that were already released and missing results
+        payload, descriptors = _map_in_worker(6)
+        _release_shared(descriptors)
+        _release_shared(descriptors)
+        _release_shared(None)
+
+    def test_errors_are_propagated(self):
+        def fail(sample):
+            raise RuntimeError("failed")
+
+        with ParallelMappedDatasetIterator(SyntheticDatasetIterator(), fail, num_workers=2) as dataset:
+            with self.assertRaises(RuntimeError):
+                list(dataset)
+        with self.assertRaises(ValueError):
+            ParallelMappedDatasetIterator(SyntheticDatasetIterator(), backend="gpu")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import types
+import unittest
+from opendr.engine.helper.lazy import lazy_exports
+
+
+class TestLazyExports(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST Lazy exports\n"
+              "**********************************")
+
+    def setUp(self):
+        self.module = types.ModuleType("opendr_lazy_test")
+        sys.modules[self.module.__name__] = self.module
+        self.module.__getattr__, self.module.__dir__ = lazy_exports(self.module.__name__, {
+            "OrderedDict": "collections",
+            "sqrt": "math",
+        })
+
+    def tearDown(self):
+        del sys.modules[self.module.__name__]
+
+    def test_exports_are_resolved_on_access(self):
+        from collections import OrderedDict
+        self.assertNotIn("OrderedDict", vars(self.module))
+        self.assertIs(self.module.OrderedDict, OrderedDict)
+        # The resolved export is cached in the module, so __getattr__ is not called again
+        self.assertIs(vars(self.module)["OrderedDict"], OrderedDict)
+        self.assertEqual(self.module.sqrt(4), 2)
+
+    def test_dir_and_unknown_names(self):
+        self.assertIn("OrderedDict", dir(self.module))
+        self.assertIn("sqrt", dir(self.module))
+        with self.assertRaises(AttributeError):
+            self.module.unknown
+        self.assertFalse(hasattr(self.module, "unknown"))
+
+    def test_perception_package(self):
+        from opendr.perception import pose_estimation
+        self.assertIn("LightweightOpenPoseLearner", pose_estimation.__all__)
+        self.assertIn("LightweightOpenPoseLearner", dir(pose_estimation))
+        with self.assertRaises(AttributeError):
+            pose_estimation.UnknownLearner
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import sys
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from opendr.engine.profiling import Profiler, peak_host_memory
+
+
+class TestProfiler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST engine.profiling \n**********************************")
+
+    def test_disabled(self):
+        profiler = Profiler()
+        with profiler.stage("forward"):
+            pass
+
+        @profiler.profile("decorated")
+        def add(a, b):
+            return a + b
+
+        self.assertEqual(add(1, 2), 3)
+        self.assertEqual(profiler.to_dict(), {})
+
+    def test_stages(self):
+        profiler = Profiler(enabled=True)
+
+        @profiler.profile("postprocess")
+        def postprocess():
+            time.sleep(0.002)
+
+        # Without memory tracking, the peak memory counters of the process are left alone
+        with mock.patch.object(Profiler, "_reset_peak_memory", side_effect=AssertionError):
+            for _ in range(5):
+                with profiler.stage("infer"):
+                    with profiler.stage("forward"):
+                        time.sleep(0.001)
+                    postprocess()
+
+        summary = profiler.to_dict()
+        self.assertEqual(set(summary.keys()), {"infer", "infer/forward", "infer/postprocess"})
+        self.assertEqual(summary["infer/forward"]["count"], 5)
+        self.assertGreaterEqual(summary["infer/postprocess"]["min"], 0.002)
+        self.assertGreaterEqual(summary["infer"]["total"],
+                                summary["infer/forward"]["total"] + summary["infer/postprocess"]["total"])
+        self.assertLessEqual(summary["infer/forward"]["p50"], summary["infer/forward"]["max"])
+        self.assertEqual(sum(summary["infer"]["histogram"].values()), 5)
+        self.assertNotIn("peak_host_memory", summary["infer"])
+
+        lines = profiler.to_json_lines().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn(json.loads(lines[0])["stage"], summary)
+
+        profiler.reset()
+        self.assertEqual(profiler.to_dict(), {})
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "the peak RSS can only be reset on Linux")
+    def test_peak_memory(self):
+        profiler = Profiler(enabled=True, track_memory=True)
+        size = 256 * 2 ** 20
+        with profiler.stage("infer"):
+            with profiler.stage("allocate"):
+                np.ones(size, dtype=np.uint8)
+            with profiler.stage("forward"):
+                pass
+        with profiler.stage("idle"):
+            pass
+
+        summary = profiler.to_dict()
+        # The peak of a stage is measured while it runs, while the outer stage also sees the peak of nested stages
+        self.assertGreater(summary["infer/allocate"]["peak_host_memory"],
+                           summary["infer/forward"]["peak_host_memory"] + size // 2)
+        self.assertGreater(summary["infer"]["peak_host_memory"], summary["idle"]["peak_host_memory"] + size // 2)
+        # The peak of the whole process is not affected
+        self.assertGreaterEqual(peak_host_memory(), summary["infer"]["peak_host_memory"])
+
+
+if __name__ == "__main__":
+    unittest.main()
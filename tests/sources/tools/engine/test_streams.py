@@ -0,0 +1,169 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import torch
+from opendr.engine.streams import StreamPool, ContinualStreams, ClipStreams
+
+
+class Clock(object):
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+class RunningSum(torch.nn.Module):
+    """
+    Continual sum of the last three inputs, with a time first ring buffer and a batch times heads memory, as the
+    states of the continual convolutions and attentions.
+    """
+    receptive_field = 3
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def _forward_step(self, x, state):
+        self.calls += 1
+        if state is None:
+            state = (torch.zeros((2,) + tuple(x.shape)), torch.tensor(0), (torch.zeros(2 * x.shape[0], 1), torch.tensor(0)))
+        buffer, index, (memory, warm) = state
+        output = x + buffer.sum(0)
+        buffer = buffer.clone()
+        buffer[index] = x
+        memory = memory + x.sum(1).repeat_interleave(2)[:, None]
+        next_state = (buffer, (index + 1) % 2, (memory, torch.clamp(warm + 1, max=2)))
+        return (output if warm == 2 else None), next_state
+
+
+class TestStreamPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST Stream Pool\n"
+              "**********************************")
+
+    def test_get(self):
+        pool = StreamPool(object)
+        first = pool.get("a")
+        self.assertIs(pool.get("a"), first)
+        self.assertIsNot(pool.get("b"), first)
+        self.assertEqual(pool.streams, ["a", "b"])
+
+        pool.remove("a")
+        self.assertNotIn("a", pool)
+        self.assertIsNot(pool.get("a"), first)
+
+        pool.reset()
+        self.assertEqual(len(pool), 0)
+
+    def test_evict_idle(self):
+        clock = Clock()
+        pool = StreamPool(object, max_idle_time=10, clock=clock)
+        pool.get("a")
+        clock.time = 5
+        pool.get("b")
+        clock.time = 12
+        pool.get("c")
+        self.assertEqual(pool.evict_idle(), ["a"])
+        clock.time = 16
+        pool.get("c")
+        self.assertEqual(pool.evict_idle(), ["b"])
+        self.assertEqual(pool.streams, ["c"])
+
+    def test_max_streams(self):
+        pool = StreamPool(object, max_streams=2)
+        pool.get("a")
+        pool.get("b")
+        pool.get("a")
+        pool.get("c")
+        self.assertEqual(pool.streams, ["a", "c"])
+
+        with self.assertRaises(ValueError):
+            StreamPool(object, max_streams=0)
+
+
+class TestContinualStreams(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST Continual Streams\n"
+              "**********************************")
+
+    def test_step(self):
+        model = RunningSum()
+        streams = ContinualStreams()
+        frames = {stream_id: [torch.randn(1, 4) for _ in range(6)] for stream_id in "abc"}
+
+        outputs = {stream_id: [] for stream_id in "abc"}
+        for t in range(6):
+            # Stream c starts one step after the others
+            inputs = {stream_id: frames[stream_id][t - (stream_id == "c")] for stream_id in "abc"
+                      if stream_id != "c" or t > 0}
+            model.calls = 0
+            for stream_id, output in streams.step(model, inputs).items():
+                outputs[stream_id].append(output)
+            # Streams a and b share a step, c is at another position of its ring buffer. The first step also finds the
+            # batch dimensions of the state.
+            if t > 0:
+                self.assertEqual(model.calls, 2)
+
+        for stream_id in "abc":
+            reference = ContinualStreams()
+            for frame, output in zip(frames[stream_id], outputs[stream_id]):
+                expected = reference.step(model, {stream_id: frame})[stream_id]
+                if expected is None:
+                    self.assertIsNone(output)
+                else:
+                    self.assertTrue(torch.allclose(output, expected))
+        self.assertTrue(torch.allclose(streams.get("a").state[2][0], sum(frames["a"]).sum(1).expand(2, 1)))
+
+    def test_warm_up(self):
+        model = RunningSum()
+        streams = ContinualStreams(warm_up=True)
+        frame = torch.ones(1, 4)
+        self.assertTrue(torch.equal(streams.step(model, {"a": frame})["a"], 3 * frame))
+
+        streams.remove("a")
+        self.assertNotIn("a", streams)
+
+
+class TestClipStreams(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST Clip Streams\n"
+              "**********************************")
+
+    def test_push(self):
+        streams = ClipStreams(clip_len=4, stride=2)
+        frames = torch.randn(9, 3, 2, 2)
+
+        # Clips end on the fourth frame and then on every second frame
+        for t, frame in enumerate(frames):
+            clip = streams.push({"a": frame}).get("a")
+            if t < 3 or (t - 3) % 2 != 0:
+                self.assertIsNone(clip)
+            else:
+                self.assertEqual(clip.shape, (3, 4, 2, 2))
+                self.assertTrue(torch.equal(clip, frames[t - 3:t + 1].transpose(0, 1)))
+
+    def test_new_frame_size(self):
+        streams = ClipStreams(clip_len=2)
+        streams.push({"a": torch.zeros(3, 2, 2)})
+        self.assertEqual(streams.push({"a": torch.zeros(3, 4, 4)}), {})
+        self.assertEqual(streams.push({"a": torch.ones(3, 4, 4)})["a"].shape, (3, 2, 4, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@ import unittest
 import torch
 import numpy as np
 
-from opendr.engine.target import Category
+from opendr.engine.target import Category, BoundingBox, BoundingBoxList, ColumnarBoundingBoxList
 
 
 class TestTarget(unittest.TestCase):
@@ -18,6 +18,42 @@ class TestTarget(unittest.TestCase):
         # np.ndarray
         c_t = Category(prediction=1, confidence=np.array(data_list))
 
+    def test_columnar_bounding_box_list(self):
+        boxes = [BoundingBox(i % 3, i, 2 * i, 10, 20, score=0.05 * i) for i in range(20)]
+        reference = BoundingBoxList(list(boxes))
+
+        columnar = ColumnarBoundingBoxList()
+        for box in boxes:
+            columnar.add_box(box)
+        self.assertEqual(len(columnar), len(reference))
+        self.assertTrue(np.allclose(columnar.mot(), reference.mot()))
+        self.assertTrue(np.allclose(columnar.mot(with_confidence=False), reference.mot(with_confidence=False)))
+        self.assertAlmostEqual(columnar.confidence, reference.confidence, places=5)
+
+        # Lazy per-box view
+        self.assertEqual(columnar[5].left, 5)
+        self.assertEqual(columnar[-1].name, 19 % 3)
+        self.assertEqual(len(list(columnar.data)), 20)
+        columnar.data.append(BoundingBox("person", 1, 2, 3, 4, score=1.0))
+        self.assertEqual(len(columnar), 21)
+        self.assertEqual(columnar[20].name, "person")
+
+        # Slicing and masking
+        self.assertEqual(len(columnar[2:6]), 4)
+        high = columnar[columnar.scores > 0.92]
+        self.assertIsInstance(high, ColumnarBoundingBoxList)
+        self.assertEqual(len(high), 2)
+
+        # Bulk construction and COCO round trip
+        bulk = ColumnarBoundingBoxList(np.ones((3, 4)), scores=[0.2, 0.4, 0.6], classes=[0, 1, 2])
+        bulk.add_boxes([[0, 0, 2, 2]], scores=[0.8], classes=[3])
+        coco = bulk.coco()
+        self.assertEqual(len(coco), 4)
+        self.assertEqual(coco[-1]["area"], 4)
+        restored = ColumnarBoundingBoxList.from_coco(coco)
+        self.assertTrue(np.allclose(restored.mot(), bulk.mot()))
+        self.assertEqual(len(ColumnarBoundingBoxList.from_bounding_box_list(reference)), 20)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -71,7 +71,10 @@ class TestCoTransEncLearner(unittest.TestCase):
         # Make changes to check subsequent load
         self.learner.model = None
         self.learner.batch_size = 42
+        # The stream settings are not part of the model and are kept
+        self.learner._max_streams = 3
         self.learner.load(self.temp_dir)
+        assert self.learner.streams.max_streams == 3
         self.assertIsNotNone(self.learner.model, "model is None after loading pth model.")
         assert self.learner.batch_size == _BATCH_SIZE
 
@@ -115,6 +118,23 @@ class TestCoTransEncLearner(unittest.TestCase):
             results3 = self.learner.infer(Vector(tensor[:, i]))
         assert torch.allclose(results1.confidence, results3.confidence, atol=1e-4)
 
+    def test_infer_streams(self):
+        dl = torch.utils.data.DataLoader(self.val_ds, batch_size=2, num_workers=0)
+        tensors = next(iter(dl))[0]
+
+        self.learner.reset()
+        for i in range(64):  # = sequence_len
+            results = self.learner.infer_streams({"a": tensors[0][:, i].to(device), "b": Vector(tensors[1][:, i])})
+
+        # Every stream has the result of its own sequence
+        for stream_id, tensor in zip(["a", "b"], tensors):
+            expected = self.learner.infer(tensor.to(device))
+            assert torch.allclose(expected.confidence, results[stream_id].confidence, atol=1e-4)
+
+        self.learner.remove_stream("a")
+        result = self.learner.infer_streams({"a": tensors[0][:, 0].to(device)})["a"]
+        assert result.data == -1  # The new stream warms up
+
     def test_optimize(self):
         torch_ok = int(torch.__version__.split(".")[1]) >= 10
         co_ok = int(getattr(continual, "__version__", "0.0.0").split(".")[0]) >= 1
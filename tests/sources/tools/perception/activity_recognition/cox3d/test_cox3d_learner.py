@@ -68,7 +68,10 @@ class TestCoX3DLearner(unittest.TestCase):
         # Make changes to check subsequent load
         self.learner.model = None
         self.learner.batch_size = 42
+        # The stream settings are not part of the model and are kept
+        self.learner.max_streams = 3
         self.learner.load(self.temp_dir)
+        assert self.learner.streams.max_streams == 3
         self.assertIsNotNone(
             self.learner.model, "model is None after loading pth model."
         )
@@ -123,6 +126,30 @@ class TestCoX3DLearner(unittest.TestCase):
         assert results1[0].data == results3[0].data
         assert results1[1].data == results3[1].data
 
+    def test_infer_streams(self):
+        dl = torch.utils.data.DataLoader(self.test_ds, batch_size=2, num_workers=0)
+        batch = next(iter(dl))[0]
+        batch = batch[:, :, 0]  # Select a single frame
+
+        self.learner.load(self.temp_dir / "weights" / f"x3d_{_BACKBONE}.pyth")
+        self.learner.model.clean_state()
+        self.learner.model.forward_steps(
+            batch.unsqueeze(2).repeat(1, 1, self.learner.model.receptive_field - 1, 1, 1)
+        )
+        results1 = self.learner.infer(batch)
+
+        # Every stream follows its own frames
+        self.learner.reset()
+        for _ in range(self.learner.model.receptive_field):
+            results2 = self.learner.infer_streams({"a": batch[0], "b": Image(batch[1], dtype=np.float32)})
+        assert results1[0].data == results2["a"].data
+        assert results1[1].data == results2["b"].data
+        # The continual learner keeps no clip windows
+        assert self.learner._clip_streams is None
+
+        self.learner.remove_stream("a")
+        assert self.learner.infer_streams({"a": batch[0]})["a"] is None  # The new stream warms up
+
     def test_optimize(self):
         self.learner.ort_session = None
         self.learner.load(self.temp_dir / "weights" / f"x3d_{_BACKBONE}.pyth")
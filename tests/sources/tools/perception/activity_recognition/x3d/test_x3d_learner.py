@@ -18,7 +18,8 @@ import unittest
 
 from opendr.perception.activity_recognition import X3DLearner
 from opendr.perception.activity_recognition import KineticsDataset
-from opendr.engine.data import Video
+from opendr.perception.activity_recognition.datasets.utils.transforms import standard_video_transforms
+from opendr.engine.data import Image, Video
 from pathlib import Path
 from logging import getLogger
 
@@ -64,6 +65,13 @@ class TestX3DLearner(unittest.TestCase):
         # Make changes to check subsequent load
         self.learner.model = None
         self.learner.batch_size = 42
+        # The stream settings are not part of the model and are kept
+        self.learner.max_streams = 3
+        self.learner.clip_stride = 2
+        self.learner.load(self.temp_dir)
+        assert self.learner.clip_streams.max_streams == 3
+        assert self.learner.clip_streams.stride == 2
+        self.learner.clip_stride = 1
         self.learner.load(self.temp_dir)
         self.assertIsNotNone(
             self.learner.model, "model is None after loading pth model."
@@ -120,6 +128,28 @@ class TestX3DLearner(unittest.TestCase):
             for (r1, r3) in zip(results1, results3)
         ])
 
+    def test_infer_streams(self):
+        self.learner.load(self.temp_dir / "weights" / f"x3d_{_BACKBONE}.pyth")
+        self.learner.reset()
+        T = self.learner.model_hparams["frames_per_clip"]
+        transform = standard_video_transforms(spatial_pixels=self.learner.model_hparams["image_size"])[1]
+        frames = torch.randint(0, 256, (T + 1, 3, 120, 160), dtype=torch.uint8)
+
+        for t, frame in enumerate(frames):
+            results = self.learner.infer_streams({"a": frame, "b": Image(frame.numpy())})
+            if t < T - 1:
+                assert results["a"] is None and results["b"] is None
+                continue
+            # Every new frame completes a clip, which matches a clip of the dataset
+            clip = transform(frames[t - T + 1:t + 1].permute(0, 2, 3, 1))
+            expected = self.learner.infer(clip.unsqueeze(0))[0]
+            for r in results.values():
+                assert r.data == expected.data
+                assert torch.allclose(r.confidence, expected.confidence, atol=1e-5)
+
+        self.learner.remove_stream("a")
+        assert self.learner.infer_streams({"a": frames[0]})["a"] is None
+
     def test_optimize(self):
         self.learner._ort_session = None
         self.learner.load(self.temp_dir / "weights" / f"x3d_{_BACKBONE}.pyth")
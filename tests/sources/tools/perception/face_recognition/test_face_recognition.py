@@ -69,14 +69,30 @@ class TestFaceRecognitionLearner(unittest.TestCase):
         # Cleanup
         rmdir(os.path.join(self.temp_dir, 'aligned'))
 
+    def test_reference_database(self):
+        recognizer = FaceRecognitionLearner(backbone='mobilefacenet', mode='backbone_only', device=device,
+                                            temp_path=self.temp_dir)
+        features = np.random.RandomState(0).randn(3, recognizer.embedding_size).astype(np.float32)
+        # A dict assigned as the database is indexed at once, later changes go through the index
+        recognizer.database = {'person_a': features[:1]}
+        self.assertIs(recognizer.gallery, recognizer.database)
+        recognizer.add_reference('person_b', features[1:2])
+        self.assertEqual(recognizer.gallery.search(features[1])[0][0][0], 'person_b')
+        recognizer.remove_reference('person_a')
+        self.assertEqual([person for person, _ in recognizer.gallery.search(features[0], k=2)[0]], ['person_b'])
+
     def test_fit_reference(self):
         imgs = os.path.join(self.temp_dir, 'test_data/images')
         save_path = os.path.join(self.temp_dir, 'reference')
         self.recognizer.load(self.temp_dir)
         self.recognizer.fit_reference(imgs, save_path)
-        self.assertTrue(os.path.exists(os.path.join(save_path, 'reference.pkl')))
+        self.assertTrue(os.path.exists(os.path.join(save_path, 'gallery.json')))
+        self.assertTrue(os.path.exists(os.path.join(save_path, 'embeddings.bin')))
+        # Persons that are already in the gallery are not embedded again
+        size = len(self.recognizer.gallery)
+        self.recognizer.fit_reference(imgs, save_path, create_new=False)
+        self.assertEqual(len(self.recognizer.gallery), size)
         # Cleanup
-        rmfile(os.path.join(self.temp_dir, 'reference', 'reference.pkl'))
         rmdir(os.path.join(self.temp_dir, 'reference'))
 
     def test_infer(self):
@@ -88,7 +104,6 @@ class TestFaceRecognitionLearner(unittest.TestCase):
         result = self.recognizer.infer(img)
         self.assertIsNotNone(result)
         # Cleanup
-        rmfile(os.path.join(self.temp_dir, 'reference', 'reference.pkl'))
         rmdir(os.path.join(self.temp_dir, 'reference'))
 
     def test_eval(self):
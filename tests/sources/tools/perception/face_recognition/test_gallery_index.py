@@ -0,0 +1,155 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from opendr.perception.face_recognition.algorithm.util.gallery_index import GalleryIndex
+
+
+def normalize(x):
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+def brute_force(database, query):
+    # Closest identity as computed by the original nested loop over the reference database
+    distance, person = 10, None
+    for key in database:
+        for item in database[key]:
+            dist = np.sum(np.square(query - item))
+            if dist < distance:
+                distance, person = dist, key
+    return person, distance
+
+
+class TestGalleryIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST Face Recognition GalleryIndex\n"
+              "**********************************")
+        rng = np.random.RandomState(0)
+        cls.database = {"person_" + str(i): normalize(rng.randn(rng.randint(1, 4), 32)).astype(np.float32)
+                        for i in range(50)}
+        cls.queries = normalize(rng.randn(20, 32)).astype(np.float32)
+
+    def test_exact_search(self):
+        index = GalleryIndex.from_database(self.database)
+        self.assertEqual(len(index), 50)
+        self.assertEqual(index.size, sum(len(v) for v in self.database.values()))
+        results = index.search(self.queries, k=3)
+        for query, result in zip(self.queries, results):
+            person, distance = brute_force(self.database, query)
+            self.assertEqual(result[0][0], person)
+            self.assertAlmostEqual(result[0][1], distance, places=4)
+            self.assertEqual(len(result), 3)
+            self.assertTrue(result[0][1] <= result[1][1] <= result[2][1])
+        self.assertEqual(index.distances(self.queries).shape, (20, 50))
+
+    def test_add_remove(self):
+        index = GalleryIndex.from_database(self.database)
+        query = self.queries[0]
+        person, _ = index.search(query)[0][0]
+        index.remove(person)
+        self.assertNotIn(person, index)
+        self.assertNotEqual(index.search(query)[0][0][0], person)
+
+        index.add("new_person", query * 3)
+        self.assertEqual(index.search(query)[0][0][0], "new_person")
+        self.assertAlmostEqual(index.search(query)[0][0][1], 0, places=5)
+        remaining = {key: value for key, value in self.database.items() if key != person}
+        remaining["new_person"] = normalize(query[None])
+        for q in self.queries[1:]:
+            self.assertEqual(index.search(q)[0][0][0], brute_force(remaining, q)[0])
+
+        with self.assertRaises(KeyError):
+            index.remove(person)
+        with self.assertRaises(ValueError):
+            index.add("wrong_size", np.ones(16))
+
+    def test_mapping(self):
+        index = GalleryIndex.from_database(self.database)
+        self.assertEqual(list(index), list(self.database))
+        self.assertTrue(np.allclose(index["person_3"], self.database["person_3"], atol=1e-6))
+
+        # Assigning replaces the embeddings of an identity, as with the dict based reference database
+        index["person_3"] = self.queries[0]
+        self.assertEqual(index["person_3"].shape, (1, 32))
+        self.assertEqual(index.search(self.queries[0])[0][0][0], "person_3")
+        index["new_person"] = self.queries[1][None]
+        self.assertEqual(index.search(self.queries[1])[0][0][0], "new_person")
+        del index["new_person"]
+        self.assertNotIn("new_person", index)
+        self.assertEqual(len(index), len(self.database))
+        with self.assertRaises(KeyError):
+            index["new_person"]
+
+    def test_approximate_search(self):
+        rng = np.random.RandomState(1)
+        centers = normalize(rng.randn(40, 32))
+        database = {i: normalize(centers[i % 40] + 0.1 * rng.randn(2, 32)) for i in range(2000)}
+        index = GalleryIndex.from_database(database, approximate=True, num_probes=4, min_approximate_size=1000)
+        exact = GalleryIndex.from_database(database)
+        queries = normalize(centers[rng.randint(0, 40, 50)] + 0.1 * rng.randn(50, 32))
+        hits = sum(index.search(q)[0][0][0] == exact.search(q)[0][0][0] for q in queries)
+        self.assertGreaterEqual(hits, 45)
+
+    def test_save_load(self):
+        path = tempfile.mkdtemp()
+        try:
+            index = GalleryIndex.from_database(self.database)
+            index.save(path)
+            loaded = GalleryIndex.load(path)
+            self.assertEqual(loaded.labels, index.labels)
+            self.assertIsInstance(loaded._embeddings, np.memmap)
+            self.assertTrue(np.allclose(loaded.distances(self.queries), index.distances(self.queries)))
+
+            # Only the new embeddings are appended to the saved gallery
+            size = os.path.getsize(os.path.join(path, "embeddings.bin"))
+            loaded.add("new_person", self.queries[0])
+            loaded.add("person_3", self.queries[1])
+            loaded.save(path)
+            self.assertEqual(os.path.getsize(os.path.join(path, "embeddings.bin")), size + 2 * 32 * 4)
+            reloaded = GalleryIndex.load(path)
+            self.assertEqual(reloaded.search(self.queries[0])[0][0][0], "new_person")
+            self.assertEqual(reloaded.search(self.queries[1])[0][0][0], "person_3")
+            self.assertTrue(np.allclose(reloaded.distances(self.queries), loaded.distances(self.queries)))
+
+            # Removals rewrite the gallery, float16 halves its size
+            reloaded.remove("new_person")
+            reloaded.save(path, dtype="float16")
+            self.assertEqual(os.path.getsize(os.path.join(path, "embeddings.bin")), (size + 32 * 4) // 2)
+            half = GalleryIndex.load(path)
+            self.assertNotIn("new_person", half)
+            self.assertTrue(np.allclose(half.distances(self.queries), reloaded.distances(self.queries), atol=1e-2))
+
+            # A memory-mapped gallery can be rewritten in place with another dtype
+            loaded = GalleryIndex.load(path)
+            loaded.save(path, dtype="float32")
+            loaded = GalleryIndex.load(path)
+            self.assertIsInstance(loaded._embeddings, np.memmap)
+            loaded.save(path, dtype="float16")
+            self.assertTrue(np.allclose(loaded.distances(self.queries), reloaded.distances(self.queries), atol=1e-2))
+            self.assertTrue(np.allclose(GalleryIndex.load(path).distances(self.queries),
+                                        reloaded.distances(self.queries), atol=1e-2))
+        finally:
+            shutil.rmtree(path)
+
+    def test_empty(self):
+        self.assertEqual(GalleryIndex().search(self.queries[:2]), [[], []])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import torch
+import torchvision
+from opendr.perception.object_detection_2d import ClusterNMS
+from opendr.perception.object_detection_2d.nms.utils.nms_utils import pad_detections
+
+
+def random_boxes(n, seed, num_classes=3):
+    generator = torch.Generator().manual_seed(seed)
+    xy = torch.rand(n, 2, generator=generator) * 200
+    wh = torch.rand(n, 2, generator=generator) * 80 + 5
+    return torch.cat([xy, xy + wh], dim=1), torch.rand(n, num_classes, generator=generator)
+
+
+class TestClusterNMS(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST Cluster-NMS\n"
+              "**********************************")
+        cls.nms_types = ('default', 'diou', 'spm', 'spm_dist', 'spm_dist_weighted')
+
+    def test_run_nms(self):
+        # The default Cluster-NMS converges to the result of the traditional greedy NMS
+        boxes, scores = random_boxes(300, 0)
+        nms = ClusterNMS(nms_type='default', cross_class=True, device='cpu')
+        bounding_boxes, (kept_boxes, classes, kept_scores) = nms.run_nms(boxes, scores, threshold=0.2)
+        max_scores, max_classes = scores.max(dim=1)
+        expected = torchvision.ops.nms(boxes, max_scores, 0.45)[:100]
+        expected = expected[max_scores[expected] > 0.2]
+        self.assertEqual(len(bounding_boxes), len(expected))
+        self.assertTrue(torch.allclose(torch.from_numpy(kept_boxes), boxes[expected]))
+        self.assertTrue(torch.equal(torch.from_numpy(classes), max_classes[expected]))
+        self.assertTrue(torch.allclose(torch.from_numpy(kept_scores), max_scores[expected]))
+
+        for nms_type in self.nms_types:
+            nms = ClusterNMS(nms_type=nms_type, cross_class=True, device='cpu', post_k=100)
+            bounding_boxes, (_, _, kept_scores) = nms.run_nms(boxes, scores, threshold=0.2)
+            self.assertLessEqual(len(bounding_boxes), 100)
+            self.assertTrue((kept_scores > 0.2).all())
+            self.assertTrue((kept_scores[:-1] >= kept_scores[1:]).all())
+
+    def test_run_nms_per_class(self):
+        boxes, scores = random_boxes(300, 1)
+        for nms_type in self.nms_types:
+            nms = ClusterNMS(nms_type=nms_type, cross_class=False, device='cpu', post_k=100)
+            bounding_boxes, (_, classes, kept_scores) = nms.run_nms(boxes, scores, threshold=0.2)
+            self.assertLessEqual(len(bounding_boxes), 100)
+            self.assertTrue(set(classes.tolist()) <= {0, 1, 2})
+            self.assertTrue((kept_scores > 0.2).all())
+
+    def test_run_nms_batch(self):
+        images = [random_boxes(n, seed) for seed, n in enumerate((150, 60))]
+        boxes, scores, num_boxes = pad_detections([b for b, _ in images], [s for _, s in images])
+        for nms_type in self.nms_types:
+            for cross_class in (False, True):
+                nms = ClusterNMS(nms_type=nms_type, cross_class=cross_class, device='cpu', top_k=100, post_k=40)
+                batched = nms.run_nms_batch(boxes, scores, threshold=0.2, num_boxes=num_boxes)
+                self.assertEqual(batched[3].shape, (2, 40))
+                for b, (image_boxes, image_scores) in enumerate(images):
+                    single = nms.run_nms_batch(image_boxes[None], image_scores[None], threshold=0.2)
+                    for batch_result, expected in zip(batched, single):
+                        self.assertTrue(torch.allclose(batch_result[b].float(), expected[0].float(), atol=1e-5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import torch
+import torchvision
+from opendr.engine.target import ColumnarBoundingBoxList
+from opendr.perception.object_detection_2d import FastNMS
+from opendr.perception.object_detection_2d.nms.utils import NMSCustom
+from opendr.perception.object_detection_2d.nms.utils.nms_utils import pad_detections, batch_to_bounding_boxes
+
+
+def random_boxes(n, seed, num_classes=3):
+    generator = torch.Generator().manual_seed(seed)
+    xy = torch.rand(n, 2, generator=generator) * 200
+    wh = torch.rand(n, 2, generator=generator) * 80 + 5
+    return torch.cat([xy, xy + wh], dim=1), torch.rand(n, num_classes, generator=generator)
+
+
+def reference_fast_nms(boxes, scores, nms_thres, top_k, post_k, cross_class):
+    # Fast-NMS drops a box if any higher scoring box of its group overlaps it, whether that box is kept or not
+    groups = [scores.max(dim=1)] if cross_class else \
+        [(scores[:, c], torch.full((len(scores),), c, dtype=torch.long)) for c in range(scores.shape[1])]
+    kept = []
+    for group_scores, group_classes in groups:
+        order = group_scores.argsort(descending=True)[:top_k]
+        iou = torchvision.ops.box_iou(boxes[order], boxes[order]).triu(diagonal=1)
+        for i, overlap in zip(order.tolist(), iou.max(dim=0)[0].tolist()):
+            if overlap <= nms_thres and (cross_class or group_scores[i] > 0.01):
+                kept.append((float(group_scores[i]), int(group_classes[i]), i))
+    return sorted(kept, reverse=True)[:post_k]
+
+
+class PerImageFastNMS(NMSCustom):
+    # A custom NMS that only implements run_nms(), which run_nms_batch() falls back to
+    def __init__(self, **kwargs):
+        super().__init__(device='cpu')
+        self.nms = FastNMS(device='cpu', **kwargs)
+
+    def run_nms(self, boxes=None, scores=None, threshold=0.2, img=None):
+        return self.nms.run_nms(boxes=boxes, scores=scores, threshold=threshold, img=img)
+
+
+class TestFastNMS(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST Fast-NMS\n"
+              "**********************************")
+
+    def test_run_nms(self):
+        boxes, scores = random_boxes(300, 0)
+        for cross_class in (False, True):
+            nms = FastNMS(cross_class=cross_class, device='cpu')
+            bounding_boxes, (kept_boxes, classes, kept_scores) = nms.run_nms(boxes, scores, threshold=0.2)
+            expected = [d for d in reference_fast_nms(boxes, scores, nms_thres=0.45, top_k=400, post_k=100,
+                                                      cross_class=cross_class) if d[0] > 0.2]
+            self.assertEqual(len(bounding_boxes), len(expected))
+            self.assertTrue(torch.allclose(torch.from_numpy(kept_boxes), boxes[[i for _, _, i in expected]]))
+            self.assertEqual(classes.tolist(), [c for _, c, _ in expected])
+            self.assertTrue(torch.allclose(torch.from_numpy(kept_scores), torch.tensor([s for s, _, _ in expected])))
+
+    def test_run_nms_batch(self):
+        images = [random_boxes(n, seed) for seed, n in enumerate((120, 0, 80))]
+        boxes, scores, num_boxes = pad_detections([b for b, _ in images], [s for _, s in images])
+        for cross_class in (False, True):
+            nms = FastNMS(cross_class=cross_class, device='cpu', top_k=100, post_k=50)
+            kept_boxes, classes, kept_scores, indices = nms.run_nms_batch(boxes, scores, threshold=0.2,
+                                                                          num_boxes=num_boxes)
+            self.assertEqual(indices.shape, (3, 50))
+            self.assertTrue(torch.all(indices[1] == -1))
+            for b, (image_boxes, image_scores) in enumerate(images):
+                if len(image_boxes) == 0:
+                    continue
+                single = nms.run_nms_batch(image_boxes[None], image_scores[None], threshold=0.2)
+                for batched, expected in zip((kept_boxes, classes, kept_scores, indices), single):
+                    self.assertTrue(torch.equal(batched[b], expected[0]))
+                valid = indices[b] >= 0
+                self.assertTrue(torch.equal(kept_boxes[b][valid], image_boxes[indices[b][valid]]))
+
+            results = batch_to_bounding_boxes(kept_boxes, classes, kept_scores, indices)
+            self.assertEqual(len(results), 3)
+            self.assertIsInstance(results[0], ColumnarBoundingBoxList)
+            self.assertEqual(len(results[0]), int((indices[0] >= 0).sum()))
+            self.assertEqual(len(results[1]), 0)
+
+    def test_run_nms_batch_fallback(self):
+        images = [random_boxes(n, seed) for seed, n in enumerate((120, 0, 80))]
+        boxes, scores, num_boxes = pad_detections([b for b, _ in images], [s for _, s in images])
+        for cross_class in (False, True):
+            nms = FastNMS(cross_class=cross_class, device='cpu', top_k=100, post_k=50)
+            fallback = PerImageFastNMS(cross_class=cross_class, top_k=100, post_k=50)
+            expected = nms.run_nms_batch(boxes, scores, threshold=0.2, num_boxes=num_boxes)
+            results = fallback.run_nms_batch(boxes, scores, threshold=0.2, num_boxes=num_boxes)
+            # The fallback pads to the largest number of kept detections instead of post_k
+            num_kept = results[3].shape[1]
+            self.assertTrue(torch.all(expected[3][:, num_kept:] == -1))
+            for result, reference in zip(results, expected):
+                self.assertTrue(torch.allclose(result.float(), reference[:, :num_kept].float()))
+
+
+if __name__ == "__main__":
+    unittest.main()
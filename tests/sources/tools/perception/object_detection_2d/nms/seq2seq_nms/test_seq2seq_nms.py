@@ -19,6 +19,7 @@ import os
 import numpy as np
 from opendr.perception.object_detection_2d import Seq2SeqNMSLearner
 from opendr.perception.object_detection_2d.nms.utils.nms_dataset import Dataset_NMS
+from opendr.perception.object_detection_2d.nms.utils.nms_utils import pad_detections
 from opendr.engine.data import Image
 
 
@@ -117,6 +118,30 @@ class TestSeq2SeqNMS(unittest.TestCase):
         gc.collect()
         print('Finished inference test for Seq2Seq-NMS...')
 
+    def test_infer_batch(cls):
+        print('Starting batched inference test for Seq2Seq-NMS...')
+        cls.seq2SeqNMSLearner.load(cls.temp_dir + '/seq2seq_pets_jpd_pets_fmod/', verbose=True)
+        dataset_nms = Dataset_NMS(path=cls.temp_dir + '/datasets', dataset_name='TEST_MODULE', split='train', use_ssd=False)
+        image_fln = dataset_nms.src_data[0]['filename']
+        img = Image.open(os.path.join(cls.temp_dir, 'datasets', 'TEST_MODULE', image_fln))
+        boxes = dataset_nms.src_data[0]['dt_boxes'][1][:, 0:4]
+        scores = np.expand_dims(dataset_nms.src_data[0]['dt_boxes'][1][:, 4], axis=-1)
+
+        padded_boxes, padded_scores, num_boxes = pad_detections([boxes, boxes[:10]], [scores, scores[:10]])
+        kept_boxes, classes, kept_scores, indices = cls.seq2SeqNMSLearner.run_nms_batch(
+            boxes=padded_boxes, scores=padded_scores, threshold=0.5, num_boxes=num_boxes, imgs=[img, img])
+        _, [single_boxes, _, single_scores] = cls.seq2SeqNMSLearner.run_nms(boxes=boxes, scores=scores, img=img,
+                                                                            threshold=0.5)
+
+        cls.assertEqual(indices.shape[0], 2)
+        cls.assertEqual(int((indices[0] >= 0).sum()), len(single_scores))
+        cls.assertTrue(np.allclose(np.sort(kept_scores[0][indices[0] >= 0].numpy()),
+                                   np.sort(single_scores.reshape(-1)), atol=1e-5))
+        cls.assertTrue(bool((indices[1] < 10).all()))
+        del img, boxes, scores, dataset_nms
+        gc.collect()
+        print('Finished batched inference test for Seq2Seq-NMS...')
+
     def test_save_load(cls):
         print('Starting save/load test for Seq2Seq-NMS...')
         cls.seq2SeqNMSLearner.save(os.path.join(cls.temp_dir, "test_model", "last_weights"), current_epoch=0)
@@ -0,0 +1,88 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import numpy as np
+import torch
+import torchvision
+from opendr.perception.object_detection_2d import SoftNMS
+from opendr.perception.object_detection_2d.nms.soft_nms.soft_nms import _soft_nms_kernel, soft_nms_iou_matrix
+
+
+def random_boxes(n, seed):
+    generator = torch.Generator().manual_seed(seed)
+    xy = torch.rand(n, 2, generator=generator) * 200
+    wh = torch.rand(n, 2, generator=generator) * 80 + 5
+    return torch.cat([xy, xy + wh], dim=1), torch.rand(n, 4, generator=generator)
+
+
+class TestSoftNMS(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST Soft-NMS\n"
+              "**********************************")
+
+    def test_kernel_matches_iou_matrix(self):
+        boxes, scores = random_boxes(200, 0)
+        scores = scores.max(dim=1)[0]
+        for method, nms_thres in ((0, 0.3), (1, 0.5), (2, 0.45)):
+            keep, keep_scores = _soft_nms_kernel(boxes.numpy(), scores.numpy(), method, nms_thres, 0.1, 50)
+            matrix_keep, matrix_scores = soft_nms_iou_matrix(boxes[None], scores[None], method, nms_thres, 0.1, 50)
+            self.assertTrue(np.array_equal(keep, matrix_keep[0, :len(keep)].numpy()))
+            self.assertTrue(np.allclose(keep_scores, matrix_scores[0, :len(keep)].numpy(), atol=1e-5))
+            self.assertTrue(np.all(np.diff(keep_scores) <= 0))
+
+    def test_hard_nms(self):
+        boxes, scores = random_boxes(200, 1)
+        scores = scores.max(dim=1)[0]
+        keep, _ = _soft_nms_kernel(boxes.numpy(), scores.numpy(), 2, 0.45, 0.0, 200)
+        self.assertTrue(np.array_equal(keep, torchvision.ops.nms(boxes, scores, 0.45).numpy()))
+
+    def test_run_nms(self):
+        boxes, scores = random_boxes(100, 2)
+        nms = SoftNMS(nms_type='gaussian', device='cpu', post_k=20)
+        bounding_boxes, (kept_boxes, classes, kept_scores) = nms.run_nms(boxes, scores, threshold=0.3)
+        self.assertEqual(len(bounding_boxes), len(kept_boxes))
+        self.assertLessEqual(len(bounding_boxes), 20)
+        self.assertTrue(np.all(kept_scores > 0.3))
+        self.assertTrue(np.all(classes < 4))
+
+    def test_batch(self):
+        nms = SoftNMS(nms_type='linear', device='cpu', post_k=30)
+        first, first_scores = random_boxes(60, 3)
+        second, second_scores = random_boxes(40, 4)
+        boxes = torch.zeros(2, 60, 4)
+        scores = torch.zeros(2, 60, 4)
+        boxes[0], scores[0] = first, first_scores
+        # The padding of the second image has high scores, which must be ignored
+        boxes[1, :40], scores[1, :40], scores[1, 40:] = second, second_scores, 1
+        kept_boxes, classes, batch_scores, indices = nms.run_nms_batch(boxes, scores, threshold=0.2,
+                                                                       num_boxes=[60, 40])
+        self.assertEqual(indices.shape, (2, 30))
+        for b, (image_boxes, image_scores) in enumerate(((first, first_scores), (second, second_scores))):
+            single_boxes, single_classes, single_scores, single = nms.run_nms_batch(image_boxes[None],
+                                                                                    image_scores[None], 0.2)
+            self.assertTrue(torch.equal(indices[b], single[0]))
+            self.assertTrue(torch.equal(kept_boxes[b], single_boxes[0]))
+            self.assertTrue(torch.allclose(batch_scores[b], single_scores[0]))
+            self.assertTrue(torch.equal(classes[b], single_classes[0]))
+        self.assertTrue(torch.all(indices[1] < 40))
+
+    def test_unsupported_type(self):
+        with self.assertRaises(ValueError):
+            SoftNMS(nms_type='unknown')
+
+
+if __name__ == "__main__":
+    unittest.main()
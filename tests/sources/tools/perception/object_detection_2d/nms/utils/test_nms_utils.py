@@ -0,0 +1,90 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import torch
+from opendr.perception.object_detection_2d.nms.seq2seq_nms.algorithm.seq2seq_model import Seq2SeqNet
+from opendr.perception.object_detection_2d.nms.fseq2_nms.algorithm.fseq2_model import FSeq2Net
+from opendr.perception.object_detection_2d.nms.utils.nms_utils import compute_attention_mask, \
+    compute_geometrical_feats, pack_detections, bucket_by_length
+
+
+def random_detections(n, seed, resolution=(640, 480)):
+    generator = torch.Generator().manual_seed(seed)
+    xy = torch.rand(n, 2, generator=generator) * torch.tensor(resolution) * 0.8
+    wh = torch.rand(n, 2, generator=generator) * 60 + 8
+    scores, _ = torch.sort(torch.rand(n, generator=generator), descending=True)
+    return torch.cat([xy, xy + wh], dim=1), scores, torch.arange(n)
+
+
+class TestNMSUtils(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST NMS utilities\n"
+              "**********************************")
+        cls.resolutions = [(640, 480), (500, 300), (640, 480)]
+        cls.detections = [random_detections(n, seed, res) for seed, (n, res) in
+                          enumerate(zip((12, 0, 7), cls.resolutions))]
+        cls.boxes, cls.scores, cls.indices, cls.num_boxes = pack_detections(cls.detections)
+
+    def test_pack_detections(self):
+        self.assertEqual(self.boxes.shape, (3, 12, 4))
+        self.assertTrue(torch.equal(self.num_boxes, torch.tensor([12, 0, 7])))
+        self.assertTrue(torch.all(self.indices[1] == -1))
+        self.assertTrue(torch.equal(self.boxes[2, :7], self.detections[2][0]))
+
+    def test_batched_features(self):
+        mask = compute_attention_mask(self.boxes, num_boxes=self.num_boxes)
+        q_feats, k_feats = compute_geometrical_feats(self.boxes, self.scores, torch.tensor(self.resolutions))
+        self.assertTrue(torch.isfinite(k_feats).all())
+        for b, (boxes, scores, _) in enumerate(self.detections):
+            n = len(scores)
+            self.assertEqual(float(mask[b, n:].abs().sum() + mask[b, :, n:].abs().sum()), 0.0)
+            if n == 0:
+                continue
+            self.assertTrue(torch.equal(mask[b, :n, :n], compute_attention_mask(boxes)))
+            image_q_feats, image_k_feats = compute_geometrical_feats(boxes, scores, self.resolutions[b])
+            self.assertTrue(torch.allclose(q_feats[b, :n], image_q_feats))
+            self.assertTrue(torch.allclose(k_feats[b, :n, :n], image_k_feats))
+
+    def test_bucket_by_length(self):
+        chunks = bucket_by_length(torch.tensor([5, 0, 100, 7, 30, 6]), max_pairs=200)
+        self.assertEqual([chunk.tolist() for chunk in chunks], [[0, 5, 3], [4], [2]])
+
+    def test_batched_models(self):
+        torch.manual_seed(0)
+        mask = compute_attention_mask(self.boxes, num_boxes=self.num_boxes)
+        q_feats, k_feats = compute_geometrical_feats(self.boxes, self.scores, torch.tensor(self.resolutions))
+        seq2seq = Seq2SeqNet(use_app_feats=True, device='cpu', app_input_dim=32).eval()
+        app_feats = torch.rand(3, 12, 1, 32)
+        maps = [torch.rand(res[1] // 8, res[0] // 8, 512) for res in self.resolutions]
+        fseq2 = FSeq2Net(device='cpu').eval()
+        with torch.no_grad():
+            seq2seq_preds = seq2seq(q_geom_feats=q_feats, k_geom_feats=k_feats, msk=mask, app_feats=app_feats)
+            fseq2_preds = fseq2(q_geom_feats=q_feats, k_geom_feats=k_feats, msk=mask, maps=maps,
+                                img_res=self.resolutions, boxes=self.boxes)
+            for b in (0, 2):
+                n = int(self.num_boxes[b])
+                image_mask = mask[b, :n, :n]
+                image_q_feats, image_k_feats = q_feats[b, :n], k_feats[b, :n, :n]
+                preds = seq2seq(q_geom_feats=image_q_feats, k_geom_feats=image_k_feats, msk=image_mask,
+                                app_feats=app_feats[b, :n])
+                self.assertTrue(torch.allclose(seq2seq_preds[b, :n], preds, atol=1e-5))
+                preds = fseq2(q_geom_feats=image_q_feats, k_geom_feats=image_k_feats, msk=image_mask,
+                              maps=maps[b], img_res=self.resolutions[b], boxes=self.boxes[b, :n])
+                self.assertTrue(torch.allclose(fseq2_preds[b, :n], preds, atol=1e-5))
+
+
+if __name__ == "__main__":
+    unittest.main()
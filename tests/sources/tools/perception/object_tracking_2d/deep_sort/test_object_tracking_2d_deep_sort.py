@@ -16,6 +16,7 @@ import sys
 import unittest
 import shutil
 import torch
+import numpy as np
 from opendr.perception.object_tracking_2d import ObjectTracking2DDeepSortLearner
 from opendr.perception.object_tracking_2d import (
     Market1501Dataset,
@@ -25,6 +26,10 @@ from opendr.perception.object_tracking_2d import (
     MotDataset,
     RawMotWithDetectionsDatasetIterator,
 )
+from opendr.perception.object_tracking_2d.deep_sort.algorithm.deep_sort.sort.nn_matching import (
+    NearestNeighborDistanceMetric,
+)
+from opendr.perception.object_tracking_2d.deep_sort.algorithm.deep_sort.deep.feature_extractor import Extractor
 import os
 
 DEVICE = os.getenv('TEST_DEVICE') if os.getenv('TEST_DEVICE') else 'cpu'
@@ -210,6 +215,39 @@ class TestObjectTracking2DDeepSortLearner(unittest.TestCase):
         for name in self.model_names:
             test_model(name)
 
+    def test_infer_streams(self):
+        def test_model(name):
+            model_path = os.path.join(self.temp_dir, name)
+            dataset = RawMotWithDetectionsDatasetIterator(
+                self.mot_dataset_path,
+                self.train_split_paths
+            )
+
+            learner = ObjectTracking2DDeepSortLearner(
+                temp_path=self.temp_dir,
+                device=DEVICE,
+                max_streams=2,
+            )
+            learner.load(model_path, verbose=True)
+            expected = learner.infer([dataset[0][0], dataset[1][0]], [0, 1])
+
+            for i in range(2):
+                result = learner.infer_streams(
+                    {"left": dataset[i][0], "right": dataset[i][0]}, {"left": i, "right": i}
+                )
+                self.assertEqual(sorted(result.keys()), ["left", "right"])
+                for stream_result in result.values():
+                    self.assertTrue(np.allclose(stream_result.mot(), expected[i].mot()))
+
+            # A third stream evicts the least recently used one
+            learner.infer_streams({"center": dataset[0][0]})
+            self.assertEqual(learner.streams.streams, ["right", "center"])
+            learner.remove_stream("center")
+            self.assertEqual(learner.streams.streams, ["right"])
+
+        for name in self.model_names:
+            test_model(name)
+
     def test_save(self):
         def test_model(name):
             model_path = os.path.join(self.temp_dir, "test_save_" + name)
@@ -263,6 +301,52 @@ class TestObjectTracking2DDeepSortLearner(unittest.TestCase):
         for name in self.model_names:
             test_model(name)
 
+    def test_nn_distance_metric(self):
+        rng = np.random.default_rng(0)
+
+        for metric_name in ["cosine", "euclidean"]:
+            for budget in [None, 3]:
+                metric = NearestNeighborDistanceMetric(metric_name, 0.2, budget)
+                history = {}
+
+                for active_targets in [[1, 2], [1, 2, 3], [2, 3], [2, 3, 4]]:
+                    targets = np.repeat(active_targets, 2)
+                    features = rng.normal(size=(len(targets), 8))
+                    metric.partial_fit(features, targets, active_targets)
+                    for feature, target in zip(features, targets):
+                        history.setdefault(target, []).append(feature)
+                    history = {t: history[t][-budget if budget else 0:] for t in active_targets}
+
+                    self.assertEqual(sorted(metric.samples.keys()), sorted(active_targets))
+                    queries = rng.normal(size=(5, 8))
+                    cost_matrix = metric.distance(queries, active_targets)
+                    for i, target in enumerate(active_targets):
+                        samples = np.array(history[target])
+                        if metric_name == "cosine":
+                            samples = samples / np.linalg.norm(samples, axis=1, keepdims=True)
+                            normalized = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+                            expected = (1 - samples @ normalized.T).min(axis=0)
+                        else:
+                            expected = ((samples[:, None] - queries[None]) ** 2).sum(axis=2).min(axis=0)
+                        self.assertTrue(np.allclose(cost_matrix[i], expected))
+                        self.assertTrue(np.allclose(metric.samples[target], samples))
+
+    def test_batched_feature_extraction(self):
+        rng = np.random.default_rng(0)
+        extractor = Extractor(device=DEVICE)
+        extractor.net.eval()
+        image = rng.integers(0, 256, size=(240, 320, 3)).astype(np.uint8)
+        crops = np.array([[10, 20, 150, 80], [0, 0, 239, 319], [200, 300, 203, 301], [50, 60, 51, 200]])
+
+        im_crops = [image[r1:r2, c1:c2] for r1, c1, r2, c2 in crops]
+        im_batch = extractor._crop_and_resize(image, crops).cpu()
+        self.assertTrue(torch.allclose(im_batch, extractor._preprocess(im_crops), atol=1e-5))
+
+        features = extractor.extract(image, crops)
+        expected = extractor(im_crops)
+        self.assertEqual(features.shape, expected.shape)
+        self.assertTrue(np.allclose(features, expected, atol=1e-4))
+
 
 if __name__ == "__main__":
     unittest.main()
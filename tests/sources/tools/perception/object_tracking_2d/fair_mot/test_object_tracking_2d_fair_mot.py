@@ -16,6 +16,7 @@ import sys
 import unittest
 import shutil
 import torch
+import numpy as np
 from opendr.perception.object_tracking_2d import (
     MotDataset,
     MotDatasetIterator,
@@ -201,6 +202,39 @@ class TestObjectTracking2DFairMotLearner(unittest.TestCase):
         for name in self.model_names:
             test_model(name)
 
+    def test_infer_streams(self):
+        def test_model(name):
+            model_path = os.path.join(self.temp_dir, name)
+            eval_dataset = RawMotDatasetIterator(self.dataset_path, self.train_split_paths)
+
+            learner = ObjectTracking2DFairMotLearner(
+                temp_path=self.temp_dir,
+                device=DEVICE,
+                use_pretrained_backbone=False,
+                max_streams=2,
+            )
+            learner.load(model_path, verbose=True)
+            expected = learner.infer([eval_dataset[0][0], eval_dataset[1][0]], [0, 1])
+
+            for i in range(2):
+                result = learner.infer_streams(
+                    {"left": eval_dataset[i][0], "right": eval_dataset[i][0]}, {"left": i, "right": i}
+                )
+                self.assertEqual(sorted(result.keys()), ["left", "right"])
+                for stream_result in result.values():
+                    # Track ids are unique across streams, so only the boxes are compared
+                    self.assertTrue(np.allclose(stream_result.mot()[:, [0, 2, 3, 4, 5, 6]],
+                                                expected[i].mot()[:, [0, 2, 3, 4, 5, 6]], atol=1e-3))
+
+            # A third stream evicts the least recently used one
+            learner.infer_streams({"center": eval_dataset[0][0]})
+            self.assertEqual(learner.streams.streams, ["right", "center"])
+            learner.remove_stream("center")
+            self.assertEqual(learner.streams.streams, ["right"])
+
+        for name in self.model_names:
+            test_model(name)
+
     def test_save(self):
         def test_model(name):
             model_path = os.path.join(self.temp_dir, "test_save_" + name)
@@ -16,8 +16,13 @@ import sys
 import unittest
 import shutil
 import os
+import numpy as np
 from opendr.perception.object_tracking_3d import ObjectTracking3DAb3dmotLearner
 from opendr.perception.object_tracking_3d import KittiTrackingDatasetIterator
+from opendr.perception.object_tracking_3d.ab3dmot.algorithm.core import iou3D_matrix, convert_3dboxes_to_8corners
+from opendr.perception.object_tracking_3d.ab3dmot.algorithm.kalman_tracker_3d import KalmanTracker3D, \
+    KalmanTracklets3D
+from opendr.engine.target import BoundingBox3D
 
 
 def rmfile(path):
@@ -102,6 +107,69 @@ class TestObjectTracking3DAb3dmot(unittest.TestCase):
         self.assertTrue(len(result) == 5)
         self.assertTrue(len(result[0]) > 0)
 
+    def test_iou3D_matrix(self):
+
+        # x, y, z, rotation_y, l, w, h
+        boxes = np.array([
+            [0, 0, 0, 0, 4, 2, 1.5],
+            [0, 0, 0, np.pi / 2, 4, 2, 1.5],  # Overlaps with the first box in a 2x2 square
+            [2, 0, 0, 0, 4, 2, 1.5],  # Overlaps with half of the first box
+            [0, -0.75, 0, 0, 4, 2, 1.5],  # Overlaps with half of the height of the first box
+            [10, 0, 10, 0.3, 4, 2, 1.5],  # Far away
+        ])
+        corners = convert_3dboxes_to_8corners(boxes)
+        self.assertEqual(corners.shape, (5, 8, 3))
+        self.assertTrue(np.allclose(corners[0, :4, 1], 0) and np.allclose(corners[0, 4:, 1], -1.5))
+
+        iou, iou_2d = iou3D_matrix(corners, corners)
+        self.assertTrue(np.allclose(np.diag(iou), 1))
+        self.assertTrue(np.allclose(iou_2d[0, 1:], [1 / 3, 1 / 3, 1, 0]))
+        self.assertTrue(np.allclose(iou[0, 1:], [1 / 3, 1 / 3, 1 / 3, 0]))
+        self.assertTrue(np.allclose(iou, iou.T))
+        self.assertEqual(iou3D_matrix(corners, np.zeros((0, 8, 3)))[0].shape, (5, 0))
+
+    def test_kalman_tracklets(self):
+
+        rng = np.random.default_rng(0)
+
+        def random_boxes(count):
+            return [
+                BoundingBox3D(
+                    name="Car", truncated=0, occluded=0, alpha=0, bbox2d=[0, 0, 1, 1], dimensions=rng.uniform(1, 4, 3),
+                    location=rng.uniform(-10, 10, 3), rotation_y=rng.uniform(-np.pi, np.pi), score=rng.random(),
+                )
+                for _ in range(count)
+            ]
+
+        boxes = random_boxes(4)
+        trackers = [KalmanTracker3D(box, i + 1, 0) for i, box in enumerate(boxes)]
+        tracklets = KalmanTracklets3D()
+        tracklets.add(boxes, [1, 2, 3, 4], 0)
+
+        for frame in range(1, 6):
+            predictions = tracklets.predict()
+            for tracker, prediction in zip(trackers, predictions):
+                self.assertTrue(np.allclose(tracker.predict().reshape(-1), prediction, atol=1e-3))
+
+            updated = [0, 2] if frame % 2 else [1, 2, 3]
+            boxes = random_boxes(len(updated))
+            tracklets.update(np.array(updated), boxes, frame)
+            for i, box in zip(updated, boxes):
+                trackers[i].update(box, frame)
+
+            results = tracklets.tracking_bounding_boxes_3d(range(len(tracklets)), frame)
+            for tracker, result in zip(trackers, results):
+                expected = tracker.tracking_bounding_box_3d(frame)
+                self.assertEqual(result.id, expected.id)
+                self.assertEqual(result.confidence, expected.confidence)
+                self.assertTrue(np.allclose(result.location, expected.location, atol=1e-3))
+                self.assertAlmostEqual(result.rotation_y, expected.rotation_y, places=3)
+
+        self.assertTrue(np.array_equal(tracklets.staleness(5), [0, 1, 0, 1]))
+        tracklets.keep(tracklets.staleness(5) < 1)
+        self.assertTrue(np.array_equal(tracklets.ids, [1, 3]))
+        self.assertEqual(len(tracklets.attributes), 2)
+
 
 if __name__ == "__main__":
     unittest.main()
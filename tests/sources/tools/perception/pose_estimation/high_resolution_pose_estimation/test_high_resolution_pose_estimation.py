@@ -14,6 +14,7 @@
 
 import unittest
 import shutil
+import numpy as np
 from opendr.perception.pose_estimation import HighResolutionPoseEstimationLearner
 
 from opendr.engine.datasets import ExternalDataset
@@ -108,6 +109,59 @@ class TestLightweightOpenPoseLearner(unittest.TestCase):
         self.assertGreater(len(self.pose_estimator.infer(img)[0][0].data), 0,
                            msg="Returned pose must have non-zero number of keypoints.")
 
+    def test_infer_on_device(self):
+        self.pose_estimator.model = None
+        self.pose_estimator.load(os.path.join(self.temp_dir, "openpose_default"))
+        img = Image.open(os.path.join(self.temp_dir, "dataset", "image", "000000052591_1080.jpg"))
+        self.assertGreater(len(self.pose_estimator.infer(img, postprocess_on_device=True)[0][0].data), 0,
+                           msg="Returned pose must have non-zero number of keypoints.")
+
+    def test_infer_multiscale(self):
+        self.pose_estimator.model = None
+        self.pose_estimator.load(os.path.join(self.temp_dir, "openpose_default"))
+        img = Image.open(os.path.join(self.temp_dir, "dataset", "image", "000000052591_1080.jpg"))
+        self.assertGreater(len(self.pose_estimator.infer(img, multiscale=True, flip=True)[0][0].data), 0,
+                           msg="Returned pose must have non-zero number of keypoints.")
+
+    def test_second_pass_merged(self):
+        self.pose_estimator.model = None
+        self.pose_estimator.load(os.path.join(self.temp_dir, "openpose_default"))
+        img = Image.open(os.path.join(self.temp_dir, "dataset", "image", "000000052591_1080.jpg"))
+        img = img.opencv()[100:500, 200:800]
+
+        # A single scale of 1 without flip merges the maps of the single scale second pass
+        heatmaps, pafs, scale, pad = self.pose_estimator._HighResolutionPoseEstimationLearner__second_pass(
+            img, 360, img.shape[1], self.pose_estimator.stride, 4, postprocess_on_device=True)
+        merged_heatmaps, merged_pafs, merged_scale, merged_pad = \
+            self.pose_estimator._HighResolutionPoseEstimationLearner__second_pass_merged(
+                img, 360, img.shape[1], 4, [1], flip=False, postprocess_on_device=True)
+        self.assertEqual(merged_scale, scale)
+        self.assertEqual(merged_pad, pad)
+        self.assertTrue(np.allclose(merged_heatmaps.cpu().numpy(), heatmaps.cpu().numpy(), atol=1e-4))
+        self.assertTrue(np.allclose(merged_pafs.cpu().numpy(), pafs.cpu().numpy(), atol=1e-4))
+
+        # Without postprocess_on_device, the merged maps are copied to the host in the layout of the host pass
+        host_heatmaps, host_pafs, _, _ = self.pose_estimator._HighResolutionPoseEstimationLearner__second_pass_merged(
+            img, 360, img.shape[1], 4, [0.5, 1.0], flip=True)
+        self.assertIsInstance(host_heatmaps, np.ndarray)
+        self.assertEqual(host_heatmaps.shape, tuple(heatmaps.shape[1:]) + (heatmaps.shape[0],))
+        self.assertEqual(host_pafs.shape, tuple(pafs.shape[1:]) + (pafs.shape[0],))
+
+    def test_infer_batch(self):
+        self.pose_estimator.model = None
+        self.pose_estimator.load(os.path.join(self.temp_dir, "openpose_default"))
+        img = Image.open(os.path.join(self.temp_dir, "dataset", "image", "000000052591_1080.jpg"))
+        counter = self.pose_estimator.counter
+        results = self.pose_estimator.infer_batch([img, img])
+        self.assertEqual(len(results), 2)
+        for poses, _, _ in results:
+            self.assertGreater(len(poses[0].data), 0, msg="Returned pose must have non-zero number of keypoints.")
+        self.assertEqual(set(self.pose_estimator.streams.streams), {0, 1})
+        # The streams of infer_batch keep their own regions of interest, apart from the one of infer
+        self.assertEqual(self.pose_estimator.counter, counter)
+        self.pose_estimator.remove_stream(0)
+        self.assertEqual(self.pose_estimator.streams.streams, [1])
+
     def test_infer_adaptive(self):
         self.pose_estimator.model = None
         self.pose_estimator.load(os.path.join(self.temp_dir, "openpose_default"))
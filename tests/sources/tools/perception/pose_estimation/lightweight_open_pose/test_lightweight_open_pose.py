@@ -15,15 +15,37 @@
 import unittest
 import shutil
 import torch
+import numpy as np
 from opendr.perception.pose_estimation import LightweightOpenPoseLearner
+from opendr.perception.pose_estimation.lightweight_open_pose.algorithm.modules.keypoints import \
+    extract_keypoints, extract_all_keypoints, BODY_PARTS_KPT_IDS, FLIPPED_KPT_IDS, FLIPPED_PART_IDS
+from opendr.perception.pose_estimation.lightweight_open_pose.filtered_pose import FilteredPose
+from opendr.perception.pose_estimation.lightweight_open_pose.utilities import get_bbox, get_similarity, \
+    get_similarity_matrix, track_poses, vars_
 from opendr.engine.datasets import ExternalDataset
 from opendr.engine.data import Image
+from opendr.engine.target import Pose
 import warnings
 import os
 
 device = os.getenv('TEST_DEVICE') if os.getenv('TEST_DEVICE') else 'cpu'
 
 
+def reference_similarity(a, b, threshold=0.5):
+    # The per-keypoint Keypoint Similarity that get_similarity_matrix computes for all the pairs at once
+    bbox_a = get_bbox(a)
+    bbox_b = get_bbox(b)
+    num_similar_kpt = 0
+    for kpt_id in range(Pose.num_kpts):
+        if a.data[kpt_id, 0] != -1 and b.data[kpt_id, 0] != -1:
+            distance = np.sum((a.data[kpt_id] - b.data[kpt_id]) ** 2)
+            area = max(bbox_a[2] * bbox_a[3], bbox_b[2] * bbox_b[3])
+            similarity = np.exp(-distance / (2 * (area + np.spacing(1)) * vars_[kpt_id]))
+            if similarity > threshold:
+                num_similar_kpt += 1
+    return num_similar_kpt
+
+
 def rmfile(path):
     try:
         os.remove(path)
@@ -100,6 +122,126 @@ class TestLightweightOpenPoseLearner(unittest.TestCase):
         self.assertGreater(len(self.pose_estimator.infer(img)[0].data), 0,
                            msg="Returned pose must have non-zero number of keypoints.")
 
+    def test_infer_batch(self):
+        self.pose_estimator.model = None
+        self.pose_estimator.load(os.path.join(self.temp_dir, "openpose_default"))
+
+        img = Image.open(os.path.join(self.temp_dir, "dataset", "image", "000000000785.jpg"))
+        poses = self.pose_estimator.infer(img, track=False, smooth=False)
+        batch_poses = self.pose_estimator.infer_batch([img, img], stream_ids=["first", "second"])
+        self.assertEqual(len(batch_poses), 2)
+        for stream_poses in batch_poses:
+            self.assertEqual(len(stream_poses), len(poses))
+            for stream_pose, pose in zip(stream_poses, poses):
+                self.assertLessEqual(np.abs(stream_pose.data - pose.data).max(), 1)
+        self.assertEqual(set(self.pose_estimator.streams.streams), {"first", "second"})
+        self.pose_estimator.reset()
+        self.assertEqual(len(self.pose_estimator.streams), 0)
+
+        # The least recently used stream is dropped when a new one would exceed max_streams
+        self.pose_estimator.streams.max_streams = 1
+        self.pose_estimator.infer_batch([img, img], stream_ids=["first", "second"])
+        self.assertEqual(self.pose_estimator.streams.streams, ["second"])
+        self.pose_estimator.streams.max_streams = None
+        self.pose_estimator.reset()
+
+    def test_infer_keypoints(self):
+        self.pose_estimator.model = None
+        self.pose_estimator.load(os.path.join(self.temp_dir, "openpose_default"))
+
+        img = Image.open(os.path.join(self.temp_dir, "dataset", "image", "000000000785.jpg"))
+        keypoints, confidences = self.pose_estimator.infer_keypoints(img)
+        poses = self.pose_estimator.infer(img, track=False, smooth=False)
+        self.assertEqual(keypoints.shape, (len(poses), 18, 3))
+        for pose_keypoints, confidence, pose in zip(keypoints, confidences, poses):
+            self.assertTrue(np.array_equal(pose_keypoints[:, :2].astype(np.int32), pose.data))
+            self.assertAlmostEqual(confidence, pose.confidence)
+
+    def test_infer_keypoints_on_device(self):
+        self.pose_estimator.model = None
+        self.pose_estimator.load(os.path.join(self.temp_dir, "openpose_default"))
+
+        img = Image.open(os.path.join(self.temp_dir, "dataset", "image", "000000000785.jpg"))
+        keypoints, confidences = self.pose_estimator.infer_keypoints(img)
+        device_keypoints, device_confidences = self.pose_estimator.infer_keypoints(img, postprocess_on_device=True)
+        self.assertEqual(device_keypoints.shape, keypoints.shape)
+        self.assertTrue(np.allclose(device_keypoints, keypoints, atol=1e-3))
+        self.assertTrue(np.allclose(device_confidences, confidences, atol=1e-3))
+
+    def test_extract_all_keypoints(self):
+        rng = np.random.default_rng(0)
+        heatmaps = rng.random((64, 96, 18)).astype(np.float32) ** 4
+
+        all_keypoints_by_type = []
+        total_keypoints_num = 0
+        for kpt_idx in range(18):
+            total_keypoints_num += extract_keypoints(heatmaps[:, :, kpt_idx].copy(), all_keypoints_by_type,
+                                                     total_keypoints_num)
+        keypoints_by_type = extract_all_keypoints(heatmaps)
+        self.assertEqual(len(keypoints_by_type), 18)
+        for keypoints, expected in zip(keypoints_by_type, all_keypoints_by_type):
+            self.assertTrue(np.allclose(keypoints, np.array(expected, dtype=np.float32).reshape(-1, 4)))
+
+        device_keypoints_by_type = extract_all_keypoints(torch.from_numpy(heatmaps).permute(2, 0, 1))
+        self.assertEqual(len(device_keypoints_by_type), 18)
+        for keypoints, expected in zip(device_keypoints_by_type, keypoints_by_type):
+            self.assertTrue(np.array_equal(keypoints, expected))
+
+    def test_flipped_ids(self):
+        # A flipped image swaps the right and the left keypoints
+        for name, flipped_id in zip(Pose.kpt_names, FLIPPED_KPT_IDS):
+            flipped_name = name.replace("r_", "x_").replace("l_", "r_").replace("x_", "l_")
+            self.assertEqual(Pose.kpt_names[flipped_id], flipped_name)
+        # Flipping twice gives every keypoint and body part back
+        self.assertEqual([FLIPPED_KPT_IDS[i] for i in FLIPPED_KPT_IDS], list(range(Pose.num_kpts)))
+        self.assertEqual([FLIPPED_PART_IDS[i] for i in FLIPPED_PART_IDS], list(range(len(BODY_PARTS_KPT_IDS))))
+        # The flip of a body part joins the flips of its keypoints
+        for part_id, flipped_part_id in enumerate(FLIPPED_PART_IDS):
+            a, b = BODY_PARTS_KPT_IDS[part_id]
+            self.assertEqual(BODY_PARTS_KPT_IDS[flipped_part_id], [FLIPPED_KPT_IDS[a], FLIPPED_KPT_IDS[b]])
+
+    def test_get_similarity(self):
+        # Both bounding boxes span at most 10x20 pixels, so the area is 200
+        keypoints_a = np.full((Pose.num_kpts, 2), -1, dtype=np.int32)
+        keypoints_a[0] = (0, 0)
+        keypoints_a[1] = (9, 19)
+        keypoints_b = np.full((Pose.num_kpts, 2), -1, dtype=np.int32)
+        keypoints_b[0] = (1, 0)
+        keypoints_b[1] = (9, 19)
+        keypoints_b[2] = (5, 5)  # Missing from the first pose, so it is never similar
+        a, b = Pose(keypoints_a, 1.0), Pose(keypoints_b, 1.0)
+
+        # The neck matches exactly, the nose is 1 pixel away: exp(-1 / (2 * 200 * 0.052 ** 2)) = 0.397
+        self.assertEqual(get_similarity(a, b), 1)
+        self.assertEqual(get_similarity(a, b, threshold=0.39), 2)
+        self.assertEqual(get_similarity(a, b, threshold=0.4), 1)
+        self.assertEqual(get_similarity_matrix([a, b], [b]).tolist(), [[1], [3]])
+        self.assertEqual(get_similarity_matrix([a], []).shape, (1, 0))
+
+    def test_track_poses(self):
+        rng = np.random.default_rng(0)
+        keypoints = rng.integers(100, 500, (5, 18, 2)).astype(np.int32)
+        keypoints[rng.random((5, 18)) < 0.2] = -1
+        previous_poses = [FilteredPose(pose_keypoints.copy(), 1.0) for pose_keypoints in keypoints]
+        track_poses([], previous_poses, smooth=True)
+
+        # The poses of the next frame move slightly and come in a different order
+        order = rng.permutation(5)
+        current_poses = [FilteredPose(np.where(keypoints[i] != -1, keypoints[i] + 2, -1).astype(np.int32), 1.0)
+                         for i in order]
+        similarities = get_similarity_matrix(current_poses, previous_poses)
+        for i, current_pose in enumerate(current_poses):
+            for j, previous_pose in enumerate(previous_poses):
+                self.assertEqual(similarities[i, j], reference_similarity(current_pose, previous_pose))
+
+        track_poses(previous_poses, current_poses, smooth=True)
+        for i, current_pose in zip(order, current_poses):
+            self.assertEqual(current_pose.id, previous_poses[i].id)
+            # Smoothing keeps the keypoints between their previous and current positions
+            found = keypoints[i] != -1
+            self.assertTrue(np.all(current_pose.data[found] >= keypoints[i][found]))
+            self.assertTrue(np.all(current_pose.data[found] <= keypoints[i][found] + 2))
+
     def test_save_load(self):
         self.pose_estimator.model = None
         self.pose_estimator.ort_session = None
@@ -143,6 +143,27 @@ class TestCoSTGCNLearner(unittest.TestCase):
         # Results is a batch with each item summing to 1.0
         assert all([torch.isclose(torch.sum(r.confidence), torch.tensor(1.0)) for r in results1])
 
+    def test_infer_streams(self):
+        ds = self.learner._prepare_dataset(
+            ExternalDataset(path=self.Val_DATASET_PATH, dataset_type="NTURGBD"),
+            data_filename="val_joints.npy",
+            labels_filename="val_labels.pkl",
+            skeleton_data_type="joint",
+            phase="val",
+            verbose=False,
+        )
+        dl = torch.utils.data.DataLoader(ds, batch_size=2, num_workers=0)
+        frame = next(iter(dl))[0][:, :, -1]  # Select a single frame
+
+        self.learner.reset()
+        results = self.learner.infer_streams({"a": frame[0], "b": frame[1]})
+        assert all([torch.isclose(torch.sum(r.confidence), torch.tensor(1.0)) for r in results.values()])
+
+        # A stream does not depend on the other streams
+        self.learner.remove_stream("b")
+        result = self.learner.infer_streams({"b": frame[1]})["b"]
+        assert torch.allclose(result.confidence, results["b"].confidence, atol=1e-5)
+
     # DISABLED: test passes however hangs unittest, preventing it from completing
     # def test_optimize(self):
     #    self.learner.batch_size = 2
@@ -164,7 +185,10 @@ class TestCoSTGCNLearner(unittest.TestCase):
         # Make changes to check subsequent load
         self.learner.model = None
         self.learner.batch_size = 42
+        # The stream settings are not part of the model and are kept
+        self.learner.max_streams = 3
         self.learner.load(self.temp_dir)
+        assert self.learner.streams.max_streams == 3
         self.assertIsNotNone(self.learner.model, "model is None after loading pth model.")
         assert self.learner.batch_size == 2
 
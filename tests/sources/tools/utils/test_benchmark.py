@@ -0,0 +1,110 @@
+# Copyright 2020-2024 OpenDR European Project
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import numpy as np
+from opendr.engine.data import Image, ImageWithDetections, PointCloud, Timeseries, SkeletonSequence, Video
+from opendr.engine.learners import Learner
+from opendr.utils.benchmark import BenchmarkSpec, register_learner, registered_learners, synthetic_input, \
+    run_benchmarks, compare_results, benchmark_imports
+
+
+class SyntheticLearner(Learner):
+    def __init__(self, scale=1.0):
+        super(SyntheticLearner, self).__init__(device="cpu", scale=scale)
+        self.calls = []
+
+    def infer(self, batch):
+        self.calls.append(len(batch))
+        return [float(np.mean(sample.data)) * self.scale for sample in batch]
+
+    def fit(self, dataset, val_dataset=None, logging_path='', silent=True, verbose=True):
+        pass
+
+    def eval(self, dataset):
+        pass
+
+    def save(self, path):
+        pass
+
+    def load(self, path):
+        pass
+
+    def optimize(self, target_device):
+        pass
+
+    def reset(self):
+        pass
+
+
+class TestBenchmark(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print("\n\n**********************************\nTEST Benchmark\n"
+              "**********************************")
+        if "test_synthetic" not in registered_learners():
+            register_learner(BenchmarkSpec("test_synthetic", __name__, "SyntheticLearner", "image",
+                                           learner_kwargs={"scale": 2.0}, input_kwargs={"height": 8, "width": 8}))
+
+    def test_synthetic_inputs(self):
+        self.assertIsInstance(synthetic_input("image", height=4, width=6), Image)
+        self.assertEqual(synthetic_input("image", height=4, width=6).data.shape, (3, 4, 6))
+        image = synthetic_input("image_with_detections", height=40, width=60, num_detections=5)
+        self.assertIsInstance(image, ImageWithDetections)
+        self.assertEqual(len(image.boundingBoxList), 5)
+        self.assertTrue(all(box.left + box.width <= 60 and box.top + box.height <= 40 for box in image.boundingBoxList))
+        self.assertIsInstance(synthetic_input("point_cloud", num_points=10), PointCloud)
+        self.assertIsInstance(synthetic_input("timeseries", length=4, dims=3), Timeseries)
+        self.assertEqual(synthetic_input("skeleton_sequence", frames=2).data.shape, (1, 3, 2, 25, 2))
+        self.assertIsInstance(synthetic_input("video", frames=2, height=4, width=4), Video)
+        self.assertTrue(np.array_equal(synthetic_input("image", seed=3).data, synthetic_input("image", seed=3).data))
+        self.assertIsInstance(synthetic_input("skeleton_sequence"), SkeletonSequence)
+        with self.assertRaises(ValueError):
+            synthetic_input("audio")
+
+    def test_run_and_compare(self):
+        results = run_benchmarks(["test_synthetic"], batch_sizes=(1, 4), warmup=2, runs=10, isolate=False,
+                                 verbose=False)
+        result = results["results"]["test_synthetic"]
+        self.assertNotIn("error", result)
+        self.assertEqual(set(result["batches"].keys()), {"1", "4"})
+        batch = result["batches"]["4"]
+        self.assertEqual(batch["runs"], 10)
+        self.assertLessEqual(batch["latency_p50"], batch["latency_p99"])
+        self.assertGreater(batch["throughput"], 0)
+        self.assertGreater(result["peak_rss"], 0)
+        self.assertIn("environment", results)
+
+        rows = compare_results(results, results)
+        self.assertTrue(all(abs(row[-1] - 1.0) < 1e-9 for row in rows))
+
+        # Failures are recorded instead of raised
+        failed = run_benchmarks(["test_synthetic", "unknown"], runs=1, warmup=0, isolate=False, verbose=False)
+        self.assertIn("error", failed["results"]["unknown"])
+
+    def test_benchmark_imports(self):
+        results = benchmark_imports(["opendr.engine.helper.lazy:lazy_exports", "opendr.unknown"], repeats=1)
+        result = results["opendr.engine.helper.lazy:lazy_exports"]
+        self.assertNotIn("error", result)
+        self.assertGreater(result["import_time_median"], 0)
+        self.assertGreater(result["modules"], 0)
+        self.assertIn("error", results["opendr.unknown"])
+
+        rows = compare_results({"imports": results}, {"imports": results})
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(all(abs(row[-1] - 1.0) < 1e-9 for row in rows))
+
+
+if __name__ == "__main__":
+    unittest.main()